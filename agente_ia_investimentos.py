@@ -1,11 +1,9 @@
-import requests
 import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Backend não-interativo para evitar problemas
 import matplotlib.pyplot as plt
 import seaborn as sns
-from bs4 import BeautifulSoup
 import yfinance as yf
 from datetime import datetime, timedelta
 import warnings
@@ -13,9 +11,31 @@ import json
 import time
 import logging
 import os
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass
 
+from alertas import (ARQUIVO_REGRAS_PADRAO, Alerta, fatos_dados_mercado, fatos_painel, fatos_sentimento,
+                     juntar_fatos, obter_motor_alertas)
+from alocacao_hrp import MODOS_ALOCACAO, alocar, arredondar_percentuais
+from calendario_b3 import DIAS_UTEIS_ANO
+from cambio import CamadaCambio
+from coletor_feeds import ColetorFeeds
+from covariancia import CovarianciaBaixoPosto, estimar_covariancia
+from dividendos_fiis import ColetorDividendos, frequencia_pagamentos, metricas_fiis, obter_cache_dividendos
+from entidades_b3 import simbolo_yahoo
+from extratores_html import codificacao_declarada, ler_em_pedacos, obter_adaptador
+from gravacao_http import obter_gravador
+from indicadores_tecnicos import EstadoIndicadores, MotorIndicadores, resumo_tecnico
+from indice_noticias import obter_indice
+from instrumentacao import medir, obter_rastreador, rastrear_execucao
+from painel_precos import COLUNAS_USADAS, PainelPrecos, resumir_fechamentos
+from perfis_risco import (GradePerfis, GradeRecomendacoes, aceita_ativo, interpretar_pontuacao,
+                          melhor_investimento, validar_perfil)
+from registros_noticias import Artigo
+from resiliencia import SessaoResiliente
+from sentimento_ativos import obter_agregador
+from triagem_ativos import ARQUIVO_UNIVERSO_PADRAO, GRUPOS_POR_TIPO, TabelaMetricas, carregar_universo
+
 # Configuração inicial
 warnings.filterwarnings('ignore')
 plt.style.use('default')  # Usa estilo padrão seguro
@@ -26,7 +46,26 @@ class ConfiguracaoAgente:
     PERFIL_RISCO_PADRAO: str = 'moderado'
     MAX_ARTIGOS_POR_FONTE: int = 10
     TIMEOUT_REQUISICAO: int = 15
+    TENTATIVAS_REPETIR: int = 3
+    NOTICIAS_APENAS_NOVAS: bool = False  # Feeds: ignora itens já vistos (o relatório traz só as novidades)
+    INDEXAR_NOTICIAS: bool = True  # Grava as notícias no índice de busca (estado/noticias.db)
+    PRECISAO_PAINEL: str = 'float32'  # 'float32' ou 'float64' para os painéis de preços
+    METODO_COVARIANCIA: str = 'fatores'  # 'fatores' (PCA + risco específico) ou 'ledoit_wolf'
+    NUM_FATORES_COVARIANCIA: int = 10  # Fatores do modelo estatístico (limitado pelo histórico)
+    MODO_RECOMENDACAO: str = 'melhor_retorno'  # 'melhor_retorno', 'hrp' ou 'volatilidade_inversa'
+    ARQUIVO_UNIVERSO: str = ARQUIVO_UNIVERSO_PADRAO  # Listagem ticker;tipo;setor;nome para a triagem
+    FILTRO_TRIAGEM: str = ''  # Ex.: "volatilidade < 30 and retorno_ano > 10 and volume_medio > 1e6" ('' = sem triagem)
+    ORDENAR_TRIAGEM_POR: str = 'retorno_ano'
+    MAX_ATIVOS_TRIAGEM: int = 20  # Ativos aprovados na triagem que entram na análise
+    ALERTAS_ATIVOS: bool = True  # Avalia as regras de alerta a cada coleta
+    ARQUIVO_REGRAS_ALERTA: str = ARQUIVO_REGRAS_PADRAO  # Uma regra por linha (ex.: "IBOV drawdown > 5%")
+    DESTINOS_ALERTA: Tuple[str, ...] = ('arquivo', 'log')  # 'arquivo' (estado/alertas.jsonl), 'log', 'console', 'webhook'
+    URL_WEBHOOK_ALERTAS: str = ''  # Necessária para o destino 'webhook'
+    DIVIDENDOS_FIIS: bool = True  # FIIs do universo com histórico de dividendos (cache em estado/dividendos_fiis.npz)
     TAXA_SELIC_ATUAL: float = 13.75  # Taxa Selic atual para cálculos
+    PASSO_GRADE_PERFIS: float = 1.0  # Pontuações de risco (0-100): recomendação pré-calculada a cada N pontos
+    VISAO_CAMBIAL: str = 'sem_hedge'  # Ativos estrangeiros em reais: 'sem_hedge', 'com_hedge' ou 'moeda_local'
+    TAXA_JUROS_USD: float = 5.0  # Juros em dólar (% a.a.) para o custo/prêmio do hedge cambial
     
     PERFIS_CARTEIRA: Dict = None
     
@@ -56,6 +95,22 @@ class ConfiguracaoAgente:
                 }
             }
 
+# Classes cuja parte da carteira os modos por risco redistribuem
+CLASSES_DE_RISCO = ['renda_variavel', 'fiis', 'internacional']
+# FIIs sempre coletados (o restante vem do universo de ativos)
+FIIS_POPULARES = ('KNRI11.SA', 'HGLG11.SA', 'MXRF11.SA', 'VISC11.SA')
+# Campos de retorno e volatilidade de ativos estrangeiros em cada visão cambial
+CAMPOS_VISAO_CAMBIAL = {
+    'sem_hedge': ('retorno_brl', 'volatilidade_brl'),
+    'com_hedge': ('retorno_brl_hedge', 'volatilidade_brl_hedge'),
+    'moeda_local': ('retorno_ano', 'volatilidade'),
+}
+ESTRATEGIAS_RECOMENDACAO = {
+    'melhor_retorno': 'Diversificação por classes de ativos',
+    'hrp': 'Paridade de risco hierárquica entre e dentro das classes',
+    'volatilidade_inversa': 'Pesos inversamente proporcionais à volatilidade'
+}
+
 class UtilitariosFinanceiros:
     """Classe com funções utilitárias para cálculos financeiros"""
     
@@ -130,11 +185,190 @@ class ColetorDadosMercado:
     def __init__(self, config: ConfiguracaoAgente):
         self.config = config
         self.logger = UtilitariosFinanceiros.configurar_logging()
-        self.sessao = requests.Session()
+        self.sessao = SessaoResiliente(tentativas=self.config.TENTATIVAS_REPETIR)
         self.sessao.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.coletor_feeds = ColetorFeeds(self.sessao, consumidor='agente',
+                                          timeout=self.config.TIMEOUT_REQUISICAO, logger=self.logger)
+        # Painéis da última coleta (reaproveitados por análises posteriores)
+        self.painel_precos: Optional[PainelPrecos] = None
+        self.painel_fiis: Optional[PainelPrecos] = None
+        self.painel_universo: Optional[PainelPrecos] = None
+        self.tabela_fiis: Optional[TabelaMetricas] = None
+        self.camada_cambio: Optional[CamadaCambio] = None
+        # Estado incremental dos indicadores técnicos por painel ('principal', 'fiis')
+        self.motor_indicadores = MotorIndicadores()
+        self.estados_indicadores: Dict[str, EstadoIndicadores] = {}
+    
+    def _obter_historico(self, simbolo: str, periodo: str) -> pd.DataFrame:
+        """Baixa o histórico de um símbolo, registrando latência e volume de dados"""
+        rastreador = obter_rastreador()
+        gravador = obter_gravador()
+        with rastreador.span('coleta.yahoo.simbolo', simbolo=simbolo, periodo=periodo) as span:
+            if gravador.reproduzindo:
+                hist = gravador.reproduzir_historico(simbolo, periodo)
+            else:
+                inicio = time.perf_counter()
+                hist = yf.Ticker(simbolo).history(period=periodo)
+                # Descarta OHLC, dividendos e desdobramentos logo após o download
+                hist = hist[[c for c in COLUNAS_USADAS if c in hist.columns]]
+                if gravador.gravando:
+                    gravador.gravar_historico(simbolo, periodo, hist, time.perf_counter() - inicio)
+            num_bytes = int(hist.memory_usage(deep=True).sum())
+            span.definir(linhas=len(hist), bytes=num_bytes)
+        rastreador.registrar_download('yahoo_finance', num_bytes)
+        rastreador.registrar_itens('yahoo_finance', 1 if not hist.empty else 0)
+        return hist
+    
+    def _montar_painel(self, simbolos, periodo: str) -> PainelPrecos:
+        """Baixa os históricos e monta o painel de preços (símbolos com erro ficam de fora)"""
+        historicos = {}
+        for simbolo in simbolos:
+            try:
+                hist = self._obter_historico(simbolo, periodo)
+                if not hist.empty:
+                    historicos[simbolo] = hist
+            except Exception as e:
+                self.logger.warning(f"Erro ao coletar {simbolo}: {str(e)}")
+                continue
+        return PainelPrecos.de_historicos(historicos, tipo=self.config.PRECISAO_PAINEL)
+    
+    def estimar_covariancia(self, painel: PainelPrecos = None) -> Optional[CovarianciaBaixoPosto]:
+        """
+        Covariância dos retornos do painel
+
+        Padrão: painéis da última coleta (principal, FIIs e universo) juntos;
+        cada símbolo entra com o histórico que tem, e os de histórico curto
+        demais ficam de fora da estimativa (covariancia.retornos_do_painel).
+        """
+        if painel is None:
+            paineis = [p for p in (self.painel_precos, self.painel_fiis, self.painel_universo)
+                       if p is not None and len(p)]
+            if paineis:
+                painel = paineis[0]
+                for outro in paineis[1:]:
+                    painel = painel.juntar(outro)
+            # Ativos estrangeiros em reais, na visão cambial configurada
+            if painel is not None:
+                visao = self.config.VISAO_CAMBIAL if self.config.VISAO_CAMBIAL in CAMPOS_VISAO_CAMBIAL else 'sem_hedge'
+                painel = CamadaCambio(painel, self.config.TAXA_SELIC_ATUAL, self._juros_moedas()
+                                      ).painel_em_reais(visao)
+        if painel is None or len(painel) == 0:
+            return None
+        try:
+            return estimar_covariancia(painel, self.config.METODO_COVARIANCIA,
+                                       self.config.NUM_FATORES_COVARIANCIA)
+        except Exception as e:
+            self.logger.warning(f"Erro ao estimar covariância: {str(e)}")
+            return None
+    
+    def _juros_moedas(self) -> Dict[str, float]:
+        return {'USD': self.config.TAXA_JUROS_USD}
+    
+    def converter_para_reais(self, painel: PainelPrecos = None) -> Dict[str, Dict]:
+        """
+        Retornos e volatilidades em reais (sem e com hedge) dos símbolos em
+        moeda estrangeira do painel (padrão: painel principal, que traz o
+        USDBRL=X)
+        """
+        painel = painel if painel is not None else self.painel_precos
+        if painel is None or len(painel) == 0 or len(painel.datas) < 2:
+            return {}
+        try:
+            self.camada_cambio = CamadaCambio(painel, self.config.TAXA_SELIC_ATUAL, self._juros_moedas())
+            return self.camada_cambio.retornos().resumos()
+        except Exception as e:
+            self.logger.warning(f"Erro ao converter retornos para reais: {str(e)}")
+            return {}
+    
+    def calcular_indicadores(self, painel: PainelPrecos, nome_painel: str = None) -> Dict[str, Dict]:
+        """
+        Resumo técnico do último pregão de cada símbolo do painel
+
+        Com `nome_painel`, o estado fica guardado para atualizar_indicadores.
+        """
+        if painel is None or len(painel) == 0 or len(painel.datas) == 0:
+            return {}
+        try:
+            estado = self.motor_indicadores.iniciar(painel.fechamento)
+            if nome_painel:
+                self.estados_indicadores[nome_painel] = estado
+            return resumo_tecnico(estado.ultimos, estado.ultimo_fechamento, painel.simbolos)
+        except Exception as e:
+            self.logger.warning(f"Erro ao calcular indicadores técnicos: {str(e)}")
+            return {}
+    
+    def atualizar_indicadores(self, nome_painel: str, fechamentos: Dict[str, float]) -> Dict[str, Dict]:
+        """
+        Aplica um novo pregão (fechamento por símbolo; os ausentes repetem o
+        anterior) ao estado guardado e devolve o resumo técnico atualizado
+        """
+        estado = self.estados_indicadores.get(nome_painel)
+        painel = {'principal': self.painel_precos, 'fiis': self.painel_fiis}.get(nome_painel)
+        if estado is None or painel is None:
+            return {}
+        valores = np.array([fechamentos.get(simbolo, np.nan) for simbolo in painel.simbolos], dtype=np.float64)
+        ultimos = estado.atualizar(valores)
+        return resumo_tecnico(ultimos, estado.ultimo_fechamento, painel.simbolos)
+    
+    @medir('coleta.universo')
+    def obter_dados_universo(self, caminho_universo: str = None, periodo: str = '1y') -> TabelaMetricas:
+        """Baixa os preços de todo o universo e calcula a tabela de métricas da triagem"""
+        universo = carregar_universo(caminho_universo or self.config.ARQUIVO_UNIVERSO)
+        self.logger.info(f"Coletando preços de {len(universo)} ativos do universo...")
+        self.painel_universo = self._montar_painel([simbolo_yahoo(ativo.ticker) for ativo in universo], periodo)
+        return TabelaMetricas.de_painel(self.painel_universo, universo)
+    
+    @medir('coleta.fiis')
+    def obter_dados_fiis(self, simbolos: List[str] = None) -> Dict:
+        """
+        FIIs com preço, retorno total e métricas de dividendos
+
+        Padrão: FIIs populares e todos os FIIs do universo. Preços e
+        dividendos vêm do cache incremental, atualizado em lotes.
+        """
+        if simbolos is None:
+            simbolos = list(FIIS_POPULARES)
+            try:
+                simbolos += [simbolo_yahoo(ativo.ticker) for ativo in carregar_universo(self.config.ARQUIVO_UNIVERSO)
+                             if ativo.tipo == 'fii']
+            except Exception as e:
+                self.logger.warning(f"Erro ao carregar os FIIs do universo: {str(e)}")
+        simbolos = list(dict.fromkeys(simbolos))
+        try:
+            cache = obter_cache_dividendos()
+            consultados = ColetorDividendos(cache, timeout=self.config.TIMEOUT_REQUISICAO).atualizar(simbolos)
+            self.logger.info(f"Dividendos de FIIs: {consultados} de {len(simbolos)} fundos atualizados")
+            painel = cache.painel(simbolos)
+            tabela = metricas_fiis(painel, cache.matriz_dividendos(painel))
+        except Exception as e:
+            self.logger.warning(f"Erro ao coletar dividendos de FIIs: {str(e)}")
+            return {}
+        
+        self.painel_fiis = painel
+        self.tabela_fiis = tabela
+        tecnicos = self.calcular_indicadores(painel, 'fiis')
+        dados_fiis = {}
+        for i, ticker in enumerate(tabela.tickers):
+            if np.isnan(tabela['preco'][i]):
+                continue
+            simbolo = tabela['simbolo'][i]
+            dados_fiis[ticker] = {
+                'preco': round(float(tabela['preco'][i]), 2),
+                'retorno_periodo': round(float(tabela['retorno_preco_12m'][i]), 2),
+                'retorno_total': round(float(tabela['retorno_total_12m'][i]), 2),
+                'dy_12m': round(float(tabela['dy_12m'][i]), 2),
+                'yield_on_cost': round(float(tabela['yield_on_cost'][i]), 2),
+                'meses_com_pagamento': int(tabela['meses_com_pagamento'][i]),
+                'estabilidade_pagamentos': round(float(np.nan_to_num(tabela['estabilidade_pagamentos'][i])), 2),
+                'simbolo': simbolo
+            }
+            if simbolo in tecnicos:
+                dados_fiis[ticker]['tecnico'] = tecnicos[simbolo]
+        return dados_fiis
     
+    @medir('coleta.yahoo', contar_itens=True)
     def obter_dados_yahoo_finance(self) -> Dict:
         """Coleta dados do Yahoo Finance de forma segura"""
         self.logger.info("Coletando dados do Yahoo Finance...")
@@ -147,102 +381,118 @@ class ColetorDadosMercado:
             'OURO': 'GC=F'
         }
         
-        # FIIs populares
-        fiis = ['KNRI11.SA', 'HGLG11.SA', 'MXRF11.SA', 'VISC11.SA']
-        
         dados_mercado = {}
         
-        # Coleta dados principais
+        # Coleta dados principais em um painel compacto (fechamento/volume)
+        self.painel_precos = self._montar_painel(simbolos.values(), '1y')
+        tecnicos = self.calcular_indicadores(self.painel_precos, 'principal')
         for nome, simbolo in simbolos.items():
-            try:
-                ticker = yf.Ticker(simbolo)
-                hist = ticker.history(period='1y')
-                
-                if not hist.empty:
-                    preco_atual = float(hist['Close'].iloc[-1])
-                    preco_inicial = float(hist['Close'].iloc[0])
-                    retorno_ano = ((preco_atual / preco_inicial) - 1) * 100
-                    
-                    # Calcula volatilidade anualizada
-                    retornos_diarios = hist['Close'].pct_change().dropna()
-                    volatilidade = float(retornos_diarios.std() * np.sqrt(252) * 100)
-                    
-                    dados_mercado[nome] = {
-                        'preco': round(preco_atual, 2),
-                        'retorno_ano': round(retorno_ano, 2),
-                        'volatilidade': round(volatilidade, 2),
-                        'simbolo': simbolo
-                    }
-                    
-                    self.logger.info(f"✅ {nome}: {retorno_ano:.2f}% no ano")
-                    
-            except Exception as e:
-                self.logger.warning(f"Erro ao coletar {nome}: {str(e)}")
+            if simbolo not in self.painel_precos:
+                continue
+            resumo = resumir_fechamentos(self.painel_precos.fechamentos_validos(simbolo))
+            if resumo is None:
                 continue
+            
+            # Calcula volatilidade anualizada
+            volatilidade = resumo['volatilidade_diaria'] * np.sqrt(DIAS_UTEIS_ANO) * 100
+            
+            dados_mercado[nome] = {
+                'preco': round(resumo['preco_atual'], 2),
+                'retorno_ano': round(resumo['retorno_periodo'], 2),
+                'volatilidade': round(volatilidade, 2),
+                'simbolo': simbolo
+            }
+            if simbolo in tecnicos:
+                dados_mercado[nome]['tecnico'] = tecnicos[simbolo]
+            
+            self.logger.info(f"✅ {nome}: {resumo['retorno_periodo']:.2f}% no ano")
         
-        # Coleta dados dos FIIs
-        dados_fiis = {}
+        # Retornos em reais dos ativos cotados em moeda estrangeira (mesmo câmbio para todos)
+        em_reais = self.converter_para_reais()
+        for dados in dados_mercado.values():
+            dados.update(em_reais.get(dados['simbolo'], {}))
+        
+        # Coleta dados dos FIIs (com dividendos; sem eles, só a variação de 6 meses)
+        dados_fiis = self.obter_dados_fiis() if self.config.DIVIDENDOS_FIIS else {}
+        if dados_fiis:
+            dados_mercado['FIIs'] = dados_fiis
+            return dados_mercado
+        
+        fiis = list(FIIS_POPULARES)
+        self.painel_fiis = self._montar_painel(fiis, '6mo')  # Período menor para FIIs
+        tecnicos_fiis = self.calcular_indicadores(self.painel_fiis, 'fiis')
         for fii in fiis:
-            try:
-                ticker = yf.Ticker(fii)
-                hist = ticker.history(period='6mo')  # Período menor para FIIs
-                
-                if not hist.empty and len(hist) > 1:
-                    preco_atual = float(hist['Close'].iloc[-1])
-                    preco_inicial = float(hist['Close'].iloc[0])
-                    retorno_periodo = ((preco_atual / preco_inicial) - 1) * 100
-                    
-                    dados_fiis[fii.replace('.SA', '')] = {
-                        'preco': round(preco_atual, 2),
-                        'retorno_periodo': round(retorno_periodo, 2),
-                        'simbolo': fii
-                    }
-                    
-            except Exception as e:
-                self.logger.warning(f"Erro ao coletar FII {fii}: {str(e)}")
+            if fii not in self.painel_fiis:
+                continue
+            resumo = resumir_fechamentos(self.painel_fiis.fechamentos_validos(fii))
+            if resumo is None:
                 continue
+            
+            dados_fiis[fii.replace('.SA', '')] = {
+                'preco': round(resumo['preco_atual'], 2),
+                'retorno_periodo': round(resumo['retorno_periodo'], 2),
+                'simbolo': fii
+            }
+            if fii in tecnicos_fiis:
+                dados_fiis[fii.replace('.SA', '')]['tecnico'] = tecnicos_fiis[fii]
         
         if dados_fiis:
             dados_mercado['FIIs'] = dados_fiis
             
         return dados_mercado
     
-    def coletar_noticias_basicas(self) -> List[Dict]:
+    @medir('coleta.noticias_basicas', contar_itens=True)
+    def coletar_noticias_basicas(self) -> List[Artigo]:
         """Coleta notícias básicas de fontes confiáveis"""
         self.logger.info("Coletando notícias financeiras...")
         
         noticias = []
         
-        # URLs de feeds RSS ou páginas de notícias
+        # Páginas de notícias (usadas quando o feed da fonte não responde)
         fontes = {
             'InfoMoney': 'https://www.infomoney.com.br/mercados/',
             'Valor': 'https://valor.globo.com/financas/'
         }
         
+        rastreador = obter_rastreador()
         for fonte, url in fontes.items():
+            quantidade_anterior = len(noticias)
             try:
-                response = self.sessao.get(url, timeout=self.config.TIMEOUT_REQUISICAO)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Busca títulos de notícias
-                    titulos = soup.find_all(['h1', 'h2', 'h3'], limit=5)
-                    
-                    for titulo in titulos:
-                        texto = titulo.get_text().strip()
-                        if len(texto) > 20:  # Filtra títulos muito curtos
-                            noticias.append({
-                                'titulo': texto,
-                                'fonte': fonte,
-                                'data_coleta': datetime.now(),
-                                'relevancia': self._calcular_relevancia(texto)
-                            })
+                # Feed RSS/sitemap primeiro; página HTML apenas se não houver feed disponível
+                itens_feed = self.coletor_feeds.coletar(fonte, 5, self.config.NOTICIAS_APENAS_NOVAS)
+                if itens_feed is not None:
+                    for artigo in itens_feed:
+                        artigo.relevancia = self._calcular_relevancia(artigo.titulo)
+                    noticias.extend(itens_feed)
+                    continue
+                
+                with self.sessao.get(url, timeout=self.config.TIMEOUT_REQUISICAO, stream=True) as response:
+                    if response.status_code == 200:
+                        # Busca títulos de notícias (a leitura para nos 5 primeiros)
+                        titulos = obter_adaptador('manchetes').extrair(
+                            ler_em_pedacos(response), 5, codificacao=codificacao_declarada(response)
+                        )
+                    else:
+                        titulos = []
+                
+                for texto, _ in titulos:
+                    if len(texto) > 20:  # Filtra títulos muito curtos
+                        noticias.append(Artigo(texto, fonte, relevancia=self._calcular_relevancia(texto)))
                             
             except Exception as e:
                 self.logger.warning(f"Erro ao coletar de {fonte}: {str(e)}")
                 continue
+            finally:
+                rastreador.registrar_itens(fonte, len(noticias) - quantidade_anterior)
+        
+        noticias = noticias[:self.config.MAX_ARTIGOS_POR_FONTE]
+        if self.config.INDEXAR_NOTICIAS and noticias:
+            try:
+                obter_indice().adicionar(noticias)
+            except Exception as e:
+                self.logger.warning(f"Erro ao indexar notícias: {str(e)}")
         
-        return noticias[:self.config.MAX_ARTIGOS_POR_FONTE]
+        return noticias
     
     def _calcular_relevancia(self, texto: str) -> float:
         """Calcula relevância do texto para investimentos"""
@@ -265,7 +515,85 @@ class AnalisadorInvestimentos:
         self.coletor = ColetorDadosMercado(self.config)
         self.dados_mercado = {}
         self.noticias = []
+        self.tabela_universo: Optional[TabelaMetricas] = None
+        self.alertas: List[Alerta] = []
+        # Perfis contínuos; grades de recomendação da última análise, por modo
+        self.grade_perfis = GradePerfis(self.config.PERFIS_CARTEIRA, self.config.PASSO_GRADE_PERFIS)
+        self.grades_recomendacao: Dict[str, GradeRecomendacoes] = {}
+        self._analise_grades: Optional[Dict] = None
     
+    def verificar_alertas(self, dados_mercado: Dict = None) -> List[Alerta]:
+        """
+        Avalia as regras de alerta com a última coleta (preços, indicadores)
+        e o sentimento por ativo; só fatos que mudaram desde a última
+        verificação são reavaliados
+        """
+        if not self.config.ALERTAS_ATIVOS:
+            return []
+        dados_mercado = dados_mercado if dados_mercado is not None else self.dados_mercado
+        try:
+            motor = obter_motor_alertas(self.config.ARQUIVO_REGRAS_ALERTA, self.config.DESTINOS_ALERTA,
+                                        self.config.URL_WEBHOOK_ALERTAS)
+            nomes = {dados['simbolo']: nome for nome, dados in dados_mercado.items()
+                     if isinstance(dados, dict) and dados.get('simbolo')}
+            fatos = juntar_fatos(
+                fatos_sentimento(obter_agregador()),
+                fatos_dados_mercado(dados_mercado),
+                fatos_painel(self.coletor.painel_precos, nomes),
+                fatos_painel(self.coletor.painel_fiis)
+            )
+            alertas = motor.atualizar(fatos)
+            motor.salvar()
+            return alertas
+        except Exception as e:
+            self.logger.warning(f"Erro ao verificar alertas: {str(e)}")
+            return []
+    
+    def triar_universo(self, expressao: str = None, dados_mercado: Dict = None,
+                       tabela: TabelaMetricas = None) -> TabelaMetricas:
+        """
+        Aplica o filtro de triagem ao universo de ativos
+
+        A tabela de métricas é calculada uma vez (ou recebida pronta); com
+        dados_mercado, os aprovados entram nos grupos 'Acoes', 'FIIs' e
+        'BDRs' lidos por analisar_oportunidades.
+        """
+        if tabela is None:
+            if self.tabela_universo is None:
+                self.tabela_universo = self.coletor.obter_dados_universo()
+            tabela = self.tabela_universo
+        
+        aprovados = tabela.filtrar(expressao if expressao is not None else self.config.FILTRO_TRIAGEM,
+                                   ordenar_por=self.config.ORDENAR_TRIAGEM_POR,
+                                   limite=self.config.MAX_ATIVOS_TRIAGEM)
+        self.logger.info(f"Triagem: {len(aprovados)} de {len(tabela)} ativos aprovados")
+        if dados_mercado is not None:
+            for grupo, ativos in aprovados.para_dados_mercado().items():
+                # Junta por ativo: FIIs já coletados mantêm as métricas de dividendos
+                for ativo, dados in ativos.items():
+                    dados_mercado.setdefault(grupo, {}).setdefault(ativo, {}).update(dados)
+        return aprovados
+    
+    @staticmethod
+    def _descrever_ativo_triado(dados: Dict) -> Dict:
+        """Entrada da análise para um ativo vindo da triagem"""
+        volatilidade = dados.get('volatilidade', float('nan'))
+        volume = dados.get('volume_medio', 0) or 0
+        if not volatilidade < 35:
+            risco = 'Muito Alto'
+        else:
+            risco = 'Alto' if volatilidade >= 20 else 'Médio-Alto'
+        return {
+            'retorno': dados.get('retorno_ano', 0),
+            'risco': risco,
+            'volatilidade': volatilidade,
+            'liquidez': 'Alta' if volume >= 1e7 else ('Boa' if volume >= 1e6 else 'Baixa'),
+            'setor': dados.get('setor', ''),
+            'simbolo': dados.get('simbolo'),
+            'tendencia': dados.get('tendencia')
+        }
+    
+    @medir('analise.oportunidades')
     def analisar_oportunidades(self, dados_mercado: Dict) -> Dict:
         """Analisa oportunidades de investimento"""
         self.logger.info("Analisando oportunidades de investimento...")
@@ -311,26 +639,33 @@ class AnalisadorInvestimentos:
         }
     
     def _analisar_renda_variavel(self, dados_mercado: Dict) -> Dict:
-        """Analisa renda variável"""
+        """Analisa renda variável (índice e ações/ETFs aprovados na triagem)"""
+        analise_rv = {
+            acao: self._descrever_ativo_triado(dados)
+            for acao, dados in dados_mercado.get('Acoes', {}).items()
+        }
         if 'IBOV' not in dados_mercado:
-            return {}
+            return analise_rv
         
         ibov_data = dados_mercado['IBOV']
-        
-        return {
-            'IBOVESPA': {
-                'retorno': ibov_data['retorno_ano'],
-                'risco': 'Alto',
-                'volatilidade': ibov_data['volatilidade'],
-                'liquidez': 'Alta'
-            },
-            'Acoes_Growth': {
+        analise_rv['IBOVESPA'] = {
+            'retorno': ibov_data['retorno_ano'],
+            'risco': 'Alto',
+            'volatilidade': ibov_data['volatilidade'],
+            'liquidez': 'Alta',
+            'simbolo': ibov_data.get('simbolo'),
+            'tendencia': ibov_data.get('tecnico', {}).get('tendencia')
+        }
+        # Estimativa para ações de crescimento quando não há triagem
+        if 'Acoes' not in dados_mercado:
+            analise_rv['Acoes_Growth'] = {
                 'retorno': ibov_data['retorno_ano'] * 1.2,
                 'risco': 'Muito Alto',
                 'volatilidade': ibov_data['volatilidade'] * 1.3,
                 'liquidez': 'Alta'
             }
-        }
+        
+        return analise_rv
     
     def _analisar_fiis(self, dados_mercado: Dict) -> Dict:
         """Analisa Fundos Imobiliários"""
@@ -340,81 +675,147 @@ class AnalisadorInvestimentos:
         fiis_data = dados_mercado['FIIs']
         analise_fiis = {}
         
-        for fii, dados in fiis_data.items():
+        # Retorno total (cota + distribuições) quando há histórico de dividendos
+        ordenados = sorted(fiis_data.items(), key=lambda item: item[1].get('retorno_total', item[1]['retorno_periodo']),
+                           reverse=True)
+        for fii, dados in ordenados:
             analise_fiis[fii] = {
-                'retorno': dados['retorno_periodo'],
+                'retorno': dados.get('retorno_total', dados['retorno_periodo']),
                 'risco': 'Médio-Alto',
-                'dividendos': 'Mensais',
-                'liquidez': 'Boa'
+                'dividendos': (frequencia_pagamentos(dados['meses_com_pagamento'])
+                               if 'meses_com_pagamento' in dados else 'Mensais'),
+                'dividend_yield': dados.get('dy_12m'),
+                'liquidez': 'Boa',
+                'simbolo': dados.get('simbolo'),
+                'tendencia': dados.get('tecnico', {}).get('tendencia')
             }
         
         return analise_fiis
     
+    def _em_reais(self, dados: Dict) -> Dict:
+        """
+        Retorno e volatilidade do ativo estrangeiro na visão cambial
+        configurada (sem conversão disponível, ficam os da moeda local)
+        """
+        visao = self.config.VISAO_CAMBIAL if self.config.VISAO_CAMBIAL in CAMPOS_VISAO_CAMBIAL else 'sem_hedge'
+        campo_retorno, campo_volatilidade = CAMPOS_VISAO_CAMBIAL[visao]
+        if campo_retorno not in dados:
+            visao, campo_retorno, campo_volatilidade = 'moeda_local', 'retorno_ano', 'volatilidade'
+        retorno = dados[campo_retorno]
+        local = retorno if visao == 'moeda_local' else dados.get('retorno_moeda_local', dados['retorno_ano'])
+        return {
+            'retorno': retorno,
+            'volatilidade': dados.get(campo_volatilidade, dados.get('volatilidade')),
+            'retorno_moeda_local': local,
+            # Parcela cambial na visão: variação do câmbio ou, com hedge, o diferencial de juros
+            'retorno_cambio': round(((1 + retorno / 100) / (1 + local / 100) - 1) * 100, 2),
+            'visao_cambial': visao
+        }
+    
     def _analisar_internacional(self, dados_mercado: Dict) -> Dict:
-        """Analisa investimentos internacionais"""
+        """Analisa investimentos internacionais (retornos em reais, comparáveis à renda fixa)"""
         analise_intl = {}
         
         if 'SP500' in dados_mercado:
             sp500_data = dados_mercado['SP500']
             analise_intl['SP500'] = {
-                'retorno': sp500_data['retorno_ano'],
+                **self._em_reais(sp500_data),
                 'risco': 'Alto',
-                'moeda': 'USD',
-                'liquidez': 'Alta'
+                'moeda': sp500_data.get('moeda', 'USD'),
+                'liquidez': 'Alta',
+                'simbolo': sp500_data.get('simbolo'),
+                'tendencia': sp500_data.get('tecnico', {}).get('tendencia')
             }
         
         if 'BITCOIN' in dados_mercado:
             btc_data = dados_mercado['BITCOIN']
             analise_intl['BITCOIN'] = {
-                'retorno': btc_data['retorno_ano'],
+                **self._em_reais(btc_data),
                 'risco': 'Muito Alto',
-                'volatilidade': btc_data['volatilidade'],
-                'liquidez': 'Boa'
+                'moeda': btc_data.get('moeda', 'USD'),
+                'liquidez': 'Boa',
+                'simbolo': btc_data.get('simbolo'),
+                'tendencia': btc_data.get('tecnico', {}).get('tendencia')
             }
         
+        # BDRs aprovados na triagem
+        for bdr, dados in dados_mercado.get('BDRs', {}).items():
+            analise_intl[bdr] = {**self._descrever_ativo_triado(dados), 'moeda': 'BRL (BDR)'}
+        
         return analise_intl
     
-    def gerar_recomendacao_carteira(self, analise: Dict, perfil_risco: str = 'moderado') -> Dict:
-        """Gera recomendação personalizada de carteira"""
+    @medir('analise.recomendacao')
+    def gerar_recomendacao_carteira(self, analise: Dict, perfil_risco: Union[str, float, Dict] = 'moderado',
+                                    modo: str = None) -> Dict:
+        """
+        Gera recomendação personalizada de carteira
+
+        perfil_risco pode ser um perfil de PERFIS_CARTEIRA, uma pontuação de
+        risco de 0 a 100 (consultada na grade pré-calculada para esta
+        análise, ver perfis_risco.py) ou um perfil personalizado
+        {'renda_fixa': 60, 'renda_variavel': 25, ..., 'nome': ...}.
+
+        modo 'melhor_retorno' (padrão da configuração) escolhe um investimento
+        por classe; 'hrp' e 'volatilidade_inversa' distribuem a parte de risco
+        entre todos os ativos com histórico de preços (ver _alocar_por_risco).
+        """
+        modo = modo or self.config.MODO_RECOMENDACAO
         self.logger.info(f"Gerando recomendação para perfil {perfil_risco}...")
         
+        if isinstance(perfil_risco, dict):
+            perfil = validar_perfil(perfil_risco)
+            return self._recomendar_perfil(analise, perfil_risco.get('nome', 'personalizado'), perfil,
+                                           self.grade_perfis.base_do_perfil(perfil), modo)
+        
+        pontuacao = interpretar_pontuacao(perfil_risco)
+        if pontuacao is not None:
+            recomendacao = self._grade_recomendacoes(analise, modo).consultar(pontuacao)
+            recomendacao['perfil'] = f"pontuação {pontuacao:g} ({recomendacao['perfil']})"
+            recomendacao['pontuacao_risco'] = pontuacao
+            return recomendacao
+        
         if perfil_risco not in self.config.PERFIS_CARTEIRA:
+            self.logger.warning(f"Perfil {perfil_risco} desconhecido; usando {self.config.PERFIL_RISCO_PADRAO}")
             perfil_risco = self.config.PERFIL_RISCO_PADRAO
-            
-        perfil = self.config.PERFIS_CARTEIRA[perfil_risco]
-        
-        # Seleciona melhores investimentos de cada categoria
+        return self._recomendar_perfil(analise, perfil_risco, self.config.PERFIS_CARTEIRA[perfil_risco],
+                                       perfil_risco, modo)
+    
+    def _grade_recomendacoes(self, analise: Dict, modo: str) -> GradeRecomendacoes:
+        """Grade de recomendações da análise (calculada na primeira pontuação consultada)"""
+        if self._analise_grades is not analise:
+            self.grades_recomendacao = {}
+            self._analise_grades = analise
+        if modo not in self.grades_recomendacao:
+            modo_grade, covariancia = modo, None
+            if modo in MODOS_ALOCACAO:
+                # Estimada uma vez para a grade inteira; sem ela, nenhum ponto tenta de novo
+                covariancia = self.coletor.estimar_covariancia()
+                if covariancia is None:
+                    self.logger.warning(f"Sem histórico suficiente para o modo {modo}; usando melhor retorno por classe")
+                    modo_grade = 'melhor_retorno'
+            self.grades_recomendacao[modo] = GradeRecomendacoes(
+                self.grade_perfis,
+                lambda base, perfil: self._recomendar_perfil(analise, base, perfil, base, modo_grade, covariancia)
+            )
+        return self.grades_recomendacao[modo]
+    
+    def _recomendar_perfil(self, analise: Dict, rotulo: str, perfil: Dict, perfil_base: str, modo: str,
+                           covariancia: CovarianciaBaixoPosto = None) -> Dict:
+        """
+        Recomendação para os percentuais de `perfil`; perfil_base (perfil
+        nomeado mais próximo) decide regras como a exclusão do Bitcoin
+
+        A exclusão não é gradual: com os perfis padrão vale para pontuações
+        até 25 e deixa de valer a partir de 26 (ver perfis_risco).
+        """
+        # Seleciona o melhor investimento de cada categoria (sem Bitcoin para conservadores)
         recomendacoes = {}
-        
-        # Renda Fixa - seleciona melhor opção
-        if analise['renda_fixa']:
-            melhor_rf = max(analise['renda_fixa'].items(), 
-                           key=lambda x: x[1].get('retorno', 0))
-            recomendacoes['renda_fixa'] = melhor_rf
-        
-        # Renda Variável
-        if analise['renda_variavel']:
-            melhor_rv = max(analise['renda_variavel'].items(),
-                           key=lambda x: x[1].get('retorno', 0))
-            recomendacoes['renda_variavel'] = melhor_rv
-        
-        # FIIs
-        if analise['fiis']:
-            melhor_fii = max(analise['fiis'].items(),
-                            key=lambda x: x[1].get('retorno', 0))
-            recomendacoes['fiis'] = melhor_fii
-        
-        # Internacional
-        if analise['internacional'] and perfil['internacional'] > 0:
-            # Exclui Bitcoin para perfis conservadores
-            opcoes_intl = analise['internacional'].copy()
-            if perfil_risco == 'conservador' and 'BITCOIN' in opcoes_intl:
-                opcoes_intl.pop('BITCOIN')
-            
-            if opcoes_intl:
-                melhor_intl = max(opcoes_intl.items(),
-                                 key=lambda x: x[1].get('retorno', 0))
-                recomendacoes['internacional'] = melhor_intl
+        for categoria in ('renda_fixa', 'renda_variavel', 'fiis', 'internacional'):
+            if categoria == 'internacional' and perfil['internacional'] <= 0:
+                continue
+            melhor = melhor_investimento(analise[categoria], perfil_base)
+            if melhor:
+                recomendacoes[categoria] = melhor
         
         # Monta carteira detalhada
         detalhes_carteira = []
@@ -430,14 +831,101 @@ class AnalisadorInvestimentos:
                         'risco': investimento[1].get('risco', 'N/A')
                     })
         
-        return {
-            'perfil': perfil_risco,
+        # Perfil personalizado sem retorno informado: média dos investimentos escolhidos
+        retorno_esperado = perfil.get('retorno_esperado')
+        if retorno_esperado is None:
+            retorno_esperado = round(sum(item['alocacao'] * item['retorno_esperado']
+                                         for item in detalhes_carteira) / 100, 2)
+        
+        recomendacao = {
+            'perfil': rotulo,
+            'modo': 'melhor_retorno',
             'alocacao': perfil,
             'recomendacoes': recomendacoes,
             'detalhes_carteira': detalhes_carteira,
-            'retorno_esperado': perfil['retorno_esperado']
+            'retorno_esperado': retorno_esperado
+        }
+        
+        if modo in MODOS_ALOCACAO:
+            diversificada = self._alocar_por_risco(analise, perfil, perfil_base, modo, covariancia)
+            if diversificada:
+                recomendacao.update(diversificada)
+            else:
+                self.logger.warning(f"Sem histórico suficiente para o modo {modo}; usando melhor retorno por classe")
+        
+        return recomendacao
+    
+    def _alocar_por_risco(self, analise: Dict, perfil: Dict, perfil_risco: str, modo: str,
+                          covariancia: CovarianciaBaixoPosto = None) -> Optional[Dict]:
+        """
+        Distribui a parte de risco do perfil (renda variável, FIIs e
+        internacional) entre todos os ativos dessas classes com histórico
+
+        O agrupamento por correlação decide quanto vai para cada classe e para
+        cada ativo dentro dela; a renda fixa mantém o percentual do perfil.
+        """
+        if covariancia is None:
+            covariancia = self.coletor.estimar_covariancia()
+        if covariancia is None:
+            return None
+        
+        candidatos = {}  # simbolo -> (categoria, nome, dados)
+        for categoria in CLASSES_DE_RISCO:
+            if perfil.get(categoria, 0) <= 0:
+                continue
+            for nome, dados in analise.get(categoria, {}).items():
+                # Exclui Bitcoin para perfis conservadores
+                if not aceita_ativo(nome, perfil_risco):
+                    continue
+                if dados.get('simbolo') in covariancia:
+                    candidatos[dados['simbolo']] = (categoria, nome, dados)
+        if len(candidatos) < 2:
+            return None
+        
+        pesos = alocar(covariancia, list(candidatos), modo)
+        orcamento = sum(perfil.get(categoria, 0) for categoria in CLASSES_DE_RISCO)
+        percentuais = arredondar_percentuais(pesos, orcamento)
+        
+        alocacao = dict(perfil)
+        for categoria in CLASSES_DE_RISCO:
+            alocacao[categoria] = 0
+        detalhes_carteira = []
+        if perfil.get('renda_fixa', 0) > 0 and analise['renda_fixa']:
+            nome, dados = max(analise['renda_fixa'].items(), key=lambda x: x[1].get('retorno', 0))
+            detalhes_carteira.append({
+                'categoria': 'Renda Fixa',
+                'alocacao': perfil['renda_fixa'],
+                'investimento': nome,
+                'retorno_esperado': dados.get('retorno', 0),
+                'risco': dados.get('risco', 'N/A')
+            })
+        for simbolo, percentual in sorted(percentuais.items(),
+                                          key=lambda x: (CLASSES_DE_RISCO.index(candidatos[x[0]][0]), -x[1])):
+            categoria, nome, dados = candidatos[simbolo]
+            alocacao[categoria] += percentual
+            detalhes_carteira.append({
+                'categoria': categoria.replace('_', ' ').title(),
+                'alocacao': percentual,
+                'investimento': nome,
+                'retorno_esperado': dados.get('retorno', 0),
+                'risco': dados.get('risco', 'N/A')
+            })
+        
+        # Renda fixa entra como ativo sem volatilidade
+        volatilidade = covariancia.risco_carteira({s: p / 100 for s, p in percentuais.items()})
+        # Retorno da carteira com os novos pesos (o do perfil supunha um ativo por classe)
+        retorno_esperado = round(sum(item['alocacao'] * item['retorno_esperado']
+                                     for item in detalhes_carteira) / 100, 2)
+        alocacao['retorno_esperado'] = retorno_esperado
+        return {
+            'modo': modo,
+            'alocacao': alocacao,
+            'detalhes_carteira': detalhes_carteira,
+            'retorno_esperado': retorno_esperado,
+            'volatilidade_estimada': round(volatilidade * 100, 2)
         }
     
+    @medir('saida.visualizacoes')
     def criar_visualizacoes(self, analise: Dict, recomendacao: Dict):
         """Cria visualizações dos dados"""
         self.logger.info("Criando visualizações...")
@@ -527,8 +1015,10 @@ PRINCIPAIS RECOMENDAÇÕES:
             self.logger.error(f"Erro ao criar visualizações: {str(e)}")
             return None
     
+    @medir('saida.relatorio')
     def gerar_relatorio_completo(self, analise: Dict, recomendacao: Dict, 
-                                dados_mercado: Dict, noticias: List[Dict] = None) -> str:
+                                dados_mercado: Dict, noticias: List[Artigo] = None,
+                                alertas: List[Alerta] = None) -> str:
         """Gera relatório completo"""
         self.logger.info("Gerando relatório completo...")
         
@@ -542,7 +1032,7 @@ PRINCIPAIS RECOMENDAÇÕES:
 
 Perfil do Investidor: {recomendacao['perfil'].title()}
 Retorno Esperado: {recomendacao['retorno_esperado']:.1f}% ao ano
-Estratégia: Diversificação por classes de ativos
+Estratégia: {ESTRATEGIAS_RECOMENDACAO.get(recomendacao.get('modo'), 'Diversificação por classes de ativos')}
 
 📊 ALOCAÇÃO RECOMENDADA:
 """
@@ -568,7 +1058,10 @@ Estratégia: Diversificação por classes de ativos
             relatorio += "\n🏢 FUNDOS IMOBILIÁRIOS:\n"
             for nome, dados in analise['fiis'].items():
                 retorno = dados.get('retorno', dados.get('retorno_periodo', 0))
-                relatorio += f"  • {nome}: {retorno:.1f}% - {dados['risco']}\n"
+                relatorio += f"  • {nome}: {retorno:.1f}% - {dados['risco']}"
+                if dados.get('dividend_yield') is not None:
+                    relatorio += f" | DY 12m {dados['dividend_yield']:.1f}% | Dividendos {dados['dividendos'].lower()}"
+                relatorio += "\n"
         
         # Renda Variável
         if analise['renda_variavel']:
@@ -580,20 +1073,49 @@ Estratégia: Diversificação por classes de ativos
         if analise['internacional']:
             relatorio += "\n🌍 INVESTIMENTOS INTERNACIONAIS:\n"
             for nome, dados in analise['internacional'].items():
-                relatorio += f"  • {nome}: {dados['retorno']:.1f}% - {dados['risco']}\n"
+                relatorio += f"  • {nome}: {dados['retorno']:.1f}% - {dados['risco']}"
+                if dados.get('visao_cambial', 'moeda_local') != 'moeda_local':
+                    relatorio += (f" (em R$; {dados['retorno_moeda_local']:.1f}% em {dados['moeda']}"
+                                  f" e {dados['retorno_cambio']:+.1f}% de "
+                                  f"{'hedge cambial' if dados['visao_cambial'] == 'com_hedge' else 'câmbio'})")
+                relatorio += "\n"
         
         # Dados de mercado coletados
         if dados_mercado:
             relatorio += f"\n📊 DADOS DE MERCADO (últimos 12 meses):\n"
             for ativo, dados in dados_mercado.items():
-                if ativo != 'FIIs' and isinstance(dados, dict):
+                if ativo not in GRUPOS_POR_TIPO.values() and isinstance(dados, dict):
                     relatorio += f"  • {ativo}: {dados.get('retorno_ano', 0):.1f}%\n"
         
+        # Indicadores técnicos do último pregão
+        tecnicos = {ativo: dados['tecnico'] for ativo, dados in dados_mercado.items()
+                    if isinstance(dados, dict) and dados.get('tecnico')}
+        tecnicos.update({fii: dados['tecnico'] for fii, dados in dados_mercado.get('FIIs', {}).items()
+                         if dados.get('tecnico')})
+        if tecnicos:
+            relatorio += "\n📐 ANÁLISE TÉCNICA (último pregão):\n"
+            for ativo, tecnico in tecnicos.items():
+                rsi = f"{tecnico['rsi']:.0f}" if tecnico['rsi'] is not None else "N/A"
+                relatorio += f"  • {ativo}: tendência {tecnico['tendencia']} | RSI {rsi} ({tecnico['zona_rsi']})"
+                if tecnico['suporte'] is not None and tecnico['resistencia'] is not None:
+                    relatorio += (f" | suporte {UtilitariosFinanceiros.formatar_valor_brasileiro(tecnico['suporte'])}"
+                                  f" / resistência {UtilitariosFinanceiros.formatar_valor_brasileiro(tecnico['resistencia'])}")
+                if tecnico['rompimento']:
+                    rompimento = {'resistencia': 'resistência'}.get(tecnico['rompimento'], tecnico['rompimento'])
+                    relatorio += f" | rompimento de {rompimento}"
+                relatorio += "\n"
+        
+        # Alertas disparados nesta execução
+        if alertas:
+            relatorio += f"\n🚨 ALERTAS DISPARADOS ({len(alertas)}):\n"
+            for alerta in alertas[:20]:
+                relatorio += f"  • {alerta.mensagem}\n"
+        
         # Notícias relevantes
         if noticias:
             relatorio += f"\n📰 NOTÍCIAS RELEVANTES ({len(noticias)} coletadas):\n"
             for noticia in noticias[:5]:
-                relatorio += f"  • {noticia['titulo'][:80]}... ({noticia['fonte']})\n"
+                relatorio += f"  • {noticia.titulo[:80]}... ({noticia.fonte})\n"
         
         relatorio += f"""
 
@@ -647,6 +1169,7 @@ O investidor deve estar ciente dos riscos envolvidos em cada modalidade.
         self.logger.info(f"Relatório salvo em: {nome_arquivo}")
         return nome_arquivo
     
+    @rastrear_execucao('analise_completa')
     def executar_analise_completa(self, perfil_risco: str = 'moderado') -> Dict:
         """Executa análise completa de investimentos"""
         self.logger.info("🚀 Iniciando análise completa de investimentos...")
@@ -663,6 +1186,15 @@ O investidor deve estar ciente dos riscos envolvidos em cada modalidade.
                 self.logger.warning("Nenhum dado de mercado coletado")
                 print("⚠️ Aviso: Dados limitados. Usando valores de referência.")
             
+            # Triagem do universo (opcional)
+            if self.config.FILTRO_TRIAGEM:
+                print("🔎 Triando o universo de ativos...")
+                try:
+                    aprovados = self.triar_universo(dados_mercado=self.dados_mercado)
+                    print(f"✅ {len(aprovados)} ativos aprovados na triagem")
+                except Exception as e:
+                    self.logger.warning(f"Erro na triagem do universo: {str(e)}")
+            
             # 2. Coleta notícias (opcional - não bloqueia se falhar)
             print("📰 Coletando notícias financeiras...")
             try:
@@ -673,6 +1205,11 @@ O investidor deve estar ciente dos riscos envolvidos em cada modalidade.
                 self.noticias = []
                 print("⚠️ Notícias não disponíveis (continuando sem elas)")
             
+            # Alertas sobre preços, indicadores e sentimento
+            self.alertas = self.verificar_alertas(self.dados_mercado)
+            if self.alertas:
+                print(f"🚨 {len(self.alertas)} alertas disparados")
+            
             # 3. Analisa oportunidades
             print("🔍 Analisando oportunidades de investimento...")
             analise = self.analisar_oportunidades(self.dados_mercado)
@@ -688,7 +1225,7 @@ O investidor deve estar ciente dos riscos envolvidos em cada modalidade.
             # 6. Gera relatório
             print("📄 Gerando relatório detalhado...")
             arquivo_relatorio = self.gerar_relatorio_completo(
-                analise, recomendacao, self.dados_mercado, self.noticias
+                analise, recomendacao, self.dados_mercado, self.noticias, self.alertas
             )
             
             # 7. Exibe resumo
@@ -711,6 +1248,7 @@ O investidor deve estar ciente dos riscos envolvidos em cada modalidade.
                 'recomendacao': recomendacao,
                 'dados_mercado': self.dados_mercado,
                 'noticias': self.noticias,
+                'alertas': self.alertas,
                 'arquivo_relatorio': arquivo_relatorio,
                 'arquivo_grafico': arquivo_grafico
             }
@@ -739,9 +1277,10 @@ def main():
         print("2. Moderado (Equilíbrio entre risco e retorno)")
         print("3. Arrojado (Foco em alta rentabilidade)")
         print("4. Comparar todos os perfis")
+        print("5. Informar pontuação de risco (0 a 100)")
         
         while True:
-            escolha = input("\nDigite sua escolha (1-4) ou Enter para Moderado: ").strip()
+            escolha = input("\nDigite sua escolha (1-5) ou Enter para Moderado: ").strip()
             
             if escolha == '1':
                 perfil = 'conservador'
@@ -778,12 +1317,23 @@ def main():
                 
                 print("\n✅ Análise comparativa concluída!")
                 return
+            elif escolha == '5':
+                try:
+                    perfil = interpretar_pontuacao(input("Pontuação de risco (0 = mais conservador, "
+                                                         "100 = mais arrojado): "))
+                except ValueError as e:
+                    perfil = None
+                    print(f"❌ {str(e)}")
+                if perfil is not None:
+                    break
+                print("❌ Pontuação inválida. Tente novamente.")
+                continue
             else:
                 print("❌ Opção inválida. Tente novamente.")
                 continue
         
         # Confirma a escolha
-        print(f"\n✅ Perfil selecionado: {perfil.upper()}")
+        print(f"\n✅ Perfil selecionado: {str(perfil).upper()}")
         print("🔄 Iniciando análise...")
         
         # Executa análise completa
@@ -854,12 +1404,15 @@ def executar_teste_rapido():
 
 if __name__ == "__main__":
     import sys
+    from perfilamento import perfilamento_da_linha_de_comando
     
-    # Verifica se é um teste rápido
-    if len(sys.argv) > 1 and sys.argv[1] == 'teste':
-        if executar_teste_rapido():
-            sys.exit(0)
+    # Opções --perfil=... / --perfil-taxa=... são removidas de sys.argv
+    with perfilamento_da_linha_de_comando('agente_ia_investimentos'):
+        # Verifica se é um teste rápido
+        if len(sys.argv) > 1 and sys.argv[1] == 'teste':
+            if executar_teste_rapido():
+                sys.exit(0)
+            else:
+                sys.exit(1)
         else:
-            sys.exit(1)
-    else:
-        main()
\ No newline at end of file
+            main()
\ No newline at end of file
@@ -0,0 +1,509 @@
+"""
+Alertas por regras sobre preços, indicadores e sentimento.
+
+Uma regra é uma linha de texto "<alvo> <métrica> <operador> <valor>", com
+descrição opcional depois de "|":
+
+    IBOV drawdown > 5% | Ibovespa mais de 5% abaixo do pico
+    PETR4 choque_sentimento < -0.3
+    * rsi >= 80
+    SP500 tendencia == baixa
+
+O alvo é um ticker/nome de ativo (ou "*" para todos); operadores: >, >=, <,
+<= (numéricos) e == (texto ou número). O "%" é só decorativo: as métricas já
+estão em pontos percentuais.
+
+Avaliação incremental: as regras ficam num índice (alvo, métrica) →
+operador → limites ordenados. A cada atualização só os fatos cujo valor
+mudou são consultados, e para cada um o conjunto de regras satisfeitas é um
+prefixo (>, >=) ou sufixo (<, <=) da lista ordenada: duas buscas binárias
+(valor anterior e novo) dão exatamente as regras que passaram a valer, sem
+percorrer as demais. Alertas disparam na transição (falso → verdadeiro);
+a regra volta a disparar só depois que a condição deixar de valer. O último
+valor de cada fato fica em estado/alertas_estado.json, então a transição vale
+entre execuções do agente.
+
+Fatos vêm de fatos_dados_mercado (dados coletados e resumo técnico),
+fatos_painel (preço, variação do dia e drawdown sobre o painel) e
+fatos_sentimento (médias decaídas de sentimento_ativos). Alertas disparados
+vão para os destinos configurados: arquivo JSON Lines, log, console ou
+webhook.
+"""
+
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from configuracao import caminho_estado
+from indicadores_tecnicos import preencher_adiante
+
+ARQUIVO_REGRAS_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'regras_alertas.txt')
+ARQUIVO_ESTADO_PADRAO = caminho_estado('alertas_estado.json')
+ARQUIVO_ALERTAS_PADRAO = caminho_estado('alertas.jsonl')
+OPERADORES = ('>=', '<=', '==', '>', '<')   # Ordem de reconhecimento no texto
+ALVO_TODOS = '*'
+
+Valor = Union[float, str]
+
+
+class ErroRegra(ValueError):
+    """Regra de alerta inválida"""
+
+
+class RegraAlerta(NamedTuple):
+    alvo: str
+    metrica: str
+    operador: str
+    limite: Valor
+    descricao: str = ''
+
+    @property
+    def identificador(self) -> str:
+        limite = f"{self.limite:g}" if isinstance(self.limite, float) else self.limite
+        return f"{self.alvo} {self.metrica} {self.operador} {limite}"
+
+
+class Alerta(NamedTuple):
+    regra: RegraAlerta
+    simbolo: str
+    valor: Valor
+    instante: datetime
+
+    @property
+    def mensagem(self) -> str:
+        valor = f"{self.valor:.2f}" if isinstance(self.valor, float) else self.valor
+        limite = f"{self.regra.limite:g}" if isinstance(self.regra.limite, float) else self.regra.limite
+        texto = f"{self.simbolo}: {self.regra.metrica} = {valor} ({self.regra.operador} {limite})"
+        return f"{texto} - {self.regra.descricao}" if self.regra.descricao else texto
+
+    def para_registro(self) -> Dict:
+        return {
+            'regra': self.regra.identificador,
+            'simbolo': self.simbolo,
+            'metrica': self.regra.metrica,
+            'valor': self.valor,
+            'operador': self.regra.operador,
+            'limite': self.regra.limite,
+            'descricao': self.regra.descricao,
+            'instante': self.instante.isoformat()
+        }
+
+
+def interpretar_regra(texto: str) -> RegraAlerta:
+    """Converte uma linha de texto em RegraAlerta (ErroRegra se inválida)"""
+    condicao, _, descricao = texto.partition('|')
+    for operador in OPERADORES:
+        esquerda, encontrado, direita = condicao.partition(operador)
+        if encontrado:
+            break
+    else:
+        raise ErroRegra(f"Regra sem operador ({', '.join(OPERADORES)}): {texto!r}")
+    partes = esquerda.split()
+    if len(partes) != 2:
+        raise ErroRegra(f"Regra deve ter alvo e métrica antes do operador: {texto!r}")
+    alvo, metrica = partes
+    limite_texto = direita.strip().rstrip('%').strip().strip('\'"')
+    if not limite_texto:
+        raise ErroRegra(f"Regra sem valor de comparação: {texto!r}")
+    try:
+        limite: Valor = float(limite_texto)
+    except ValueError:
+        if operador != '==':
+            raise ErroRegra(f"Operador {operador} exige valor numérico: {texto!r}")
+        limite = limite_texto
+    return RegraAlerta(alvo.upper() if alvo != ALVO_TODOS else alvo, metrica.lower(), operador, limite,
+                       descricao.strip())
+
+
+def carregar_regras(caminho: str = ARQUIVO_REGRAS_PADRAO) -> List[RegraAlerta]:
+    """Uma regra por linha; linhas vazias e iniciadas por # são ignoradas"""
+    regras = []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for numero, linha in enumerate(f, 1):
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            try:
+                regras.append(interpretar_regra(linha))
+            except ErroRegra as e:
+                raise ErroRegra(f"{caminho}:{numero}: {e}") from None
+    return regras
+
+
+class _LimitesOrdenados:
+    """Regras de um operador numérico sobre um mesmo fato, ordenadas pelo limite"""
+
+    def __init__(self, operador: str):
+        self.operador = operador
+        self.limites: List[float] = []
+        self.regras: List[RegraAlerta] = []
+
+    def inserir(self, regra: RegraAlerta):
+        posicao = bisect_right(self.limites, regra.limite)
+        self.limites.insert(posicao, regra.limite)
+        self.regras.insert(posicao, regra)
+
+    def remover(self, regra: RegraAlerta) -> bool:
+        if regra not in self.regras:
+            return False
+        posicao = self.regras.index(regra)
+        del self.limites[posicao]
+        del self.regras[posicao]
+        return True
+
+    def _fronteira(self, valor: Optional[float]) -> int:
+        """Satisfeitas: regras[:fronteira] para > e >=, regras[fronteira:] para < e <="""
+        if valor is None:
+            return 0 if self.operador in ('>', '>=') else len(self.limites)
+        if self.operador == '>':
+            return bisect_left(self.limites, valor)
+        if self.operador == '>=':
+            return bisect_right(self.limites, valor)
+        if self.operador == '<':
+            return bisect_right(self.limites, valor)
+        return bisect_left(self.limites, valor)
+
+    def novas_satisfeitas(self, anterior: Optional[float], atual: float) -> List[RegraAlerta]:
+        antes, depois = self._fronteira(anterior), self._fronteira(atual)
+        if self.operador in ('>', '>='):
+            return self.regras[antes:depois]
+        return self.regras[depois:antes]
+
+
+class _GrupoRegras:
+    """Todas as regras de um par (alvo, métrica)"""
+
+    def __init__(self):
+        self.numericas: Dict[str, _LimitesOrdenados] = {}
+        self.igualdades: Dict[Valor, List[RegraAlerta]] = {}
+
+    def inserir(self, regra: RegraAlerta):
+        if regra.operador == '==':
+            self.igualdades.setdefault(regra.limite, []).append(regra)
+        else:
+            self.numericas.setdefault(regra.operador, _LimitesOrdenados(regra.operador)).inserir(regra)
+
+    def remover(self, regra: RegraAlerta) -> bool:
+        if regra.operador == '==':
+            regras = self.igualdades.get(regra.limite, [])
+            if regra in regras:
+                regras.remove(regra)
+                return True
+            return False
+        grupo = self.numericas.get(regra.operador)
+        return grupo is not None and grupo.remover(regra)
+
+    def novas_satisfeitas(self, anterior: Optional[Valor], atual: Valor) -> List[RegraAlerta]:
+        regras: List[RegraAlerta] = list(self.igualdades.get(atual, ()))
+        if self.numericas and isinstance(atual, float):
+            anterior_numerico = anterior if isinstance(anterior, float) else None
+            for grupo in self.numericas.values():
+                regras.extend(grupo.novas_satisfeitas(anterior_numerico, atual))
+        return regras
+
+
+class DestinoAlerta:
+    """Interface dos destinos: recebe os alertas disparados em uma atualização"""
+
+    def enviar(self, alertas: Sequence[Alerta]):
+        raise NotImplementedError
+
+
+class DestinoArquivo(DestinoAlerta):
+    """Acrescenta um registro JSON por alerta (JSON Lines)"""
+
+    def __init__(self, caminho: str = ARQUIVO_ALERTAS_PADRAO):
+        self.caminho = caminho
+
+    def enviar(self, alertas: Sequence[Alerta]):
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            for alerta in alertas:
+                f.write(json.dumps(alerta.para_registro(), ensure_ascii=False) + '\n')
+
+
+class DestinoLog(DestinoAlerta):
+    """Um aviso no log por alerta"""
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger or logging.getLogger('AgenteIA')
+
+    def enviar(self, alertas: Sequence[Alerta]):
+        for alerta in alertas:
+            self.logger.warning(f"🚨 Alerta: {alerta.mensagem}")
+
+
+class DestinoConsole(DestinoAlerta):
+    def enviar(self, alertas: Sequence[Alerta]):
+        for alerta in alertas:
+            print(f"🚨 {alerta.mensagem}")
+
+
+class DestinoWebhook(DestinoAlerta):
+    """POST de {'alertas': [...]} em JSON para a URL (uma requisição por atualização)"""
+
+    def __init__(self, url: str, sessao=None, timeout: float = 10.0):
+        if sessao is None:
+            from resiliencia import SessaoResiliente
+            sessao = SessaoResiliente(tentativas=2)
+        self.url = url
+        self.sessao = sessao
+        self.timeout = timeout
+
+    def enviar(self, alertas: Sequence[Alerta]):
+        resposta = self.sessao.post(self.url, json={'alertas': [a.para_registro() for a in alertas]},
+                                    timeout=self.timeout)
+        resposta.raise_for_status()
+
+
+def criar_destinos(nomes: Iterable[str], url_webhook: str = '',
+                   caminho_arquivo: str = ARQUIVO_ALERTAS_PADRAO) -> List[DestinoAlerta]:
+    """Destinos pelo nome: 'arquivo', 'log', 'console', 'webhook' (só com URL)"""
+    destinos: List[DestinoAlerta] = []
+    for nome in nomes:
+        if nome == 'arquivo':
+            destinos.append(DestinoArquivo(caminho_arquivo))
+        elif nome == 'log':
+            destinos.append(DestinoLog())
+        elif nome == 'console':
+            destinos.append(DestinoConsole())
+        elif nome == 'webhook':
+            if url_webhook:
+                destinos.append(DestinoWebhook(url_webhook))
+        else:
+            raise ValueError(f"Destino de alerta desconhecido: {nome}")
+    return destinos
+
+
+class MotorAlertas:
+    """Índice de regras, último valor de cada fato e despacho para os destinos"""
+
+    def __init__(self, regras: Iterable[Union[str, RegraAlerta]] = (), destinos: Sequence[DestinoAlerta] = (),
+                 caminho_estado: str = ARQUIVO_ESTADO_PADRAO):
+        self.destinos = list(destinos)
+        self.caminho_estado = caminho_estado
+        self._trava = threading.Lock()
+        self._indice: Dict[Tuple[str, str], _GrupoRegras] = {}
+        self._regras: Dict[str, RegraAlerta] = {}
+        # Métricas com alguma regra: fatos das demais nem são guardados
+        self._metricas: Dict[str, int] = {}
+        self._valores: Dict[Tuple[str, str], Valor] = {}
+        for regra in regras:
+            self.registrar(regra)
+        if caminho_estado:
+            self._carregar()
+
+    def __len__(self) -> int:
+        return len(self._regras)
+
+    @property
+    def regras(self) -> List[RegraAlerta]:
+        return list(self._regras.values())
+
+    def registrar(self, regra: Union[str, RegraAlerta]) -> RegraAlerta:
+        """Adiciona a regra (texto ou RegraAlerta); regras repetidas são ignoradas"""
+        if isinstance(regra, str):
+            regra = interpretar_regra(regra)
+        with self._trava:
+            if regra.identificador in self._regras:
+                return self._regras[regra.identificador]
+            self._regras[regra.identificador] = regra
+            self._indice.setdefault((regra.alvo, regra.metrica), _GrupoRegras()).inserir(regra)
+            self._metricas[regra.metrica] = self._metricas.get(regra.metrica, 0) + 1
+        return regra
+
+    def remover(self, regra: Union[str, RegraAlerta]) -> bool:
+        if isinstance(regra, str):
+            regra = interpretar_regra(regra)
+        with self._trava:
+            regra = self._regras.pop(regra.identificador, None)
+            if regra is None:
+                return False
+            self._indice[(regra.alvo, regra.metrica)].remover(regra)
+            self._metricas[regra.metrica] -= 1
+            if not self._metricas[regra.metrica]:
+                del self._metricas[regra.metrica]
+        return True
+
+    def atualizar(self, fatos: Dict[str, Dict[str, Valor]], instante: datetime = None) -> List[Alerta]:
+        """
+        Aplica os valores novos ({símbolo: {métrica: valor}}), envia e
+        devolve os alertas que passaram a valer
+
+        Valores iguais aos anteriores, ausentes (None/NaN) ou de métricas sem
+        regras não custam nada além da consulta ao dicionário.
+        """
+        instante = instante or datetime.now()
+        disparados: List[Alerta] = []
+        with self._trava:
+            for simbolo, metricas in fatos.items():
+                for metrica, valor in metricas.items():
+                    if metrica not in self._metricas:
+                        continue
+                    valor = _normalizar_valor(valor)
+                    chave = (simbolo, metrica)
+                    anterior = self._valores.get(chave)
+                    if valor is None or valor == anterior:
+                        continue
+                    self._valores[chave] = valor
+                    for alvo in (simbolo, ALVO_TODOS):
+                        grupo = self._indice.get((alvo, metrica))
+                        if grupo is not None:
+                            disparados.extend(Alerta(regra, simbolo, valor, instante)
+                                              for regra in grupo.novas_satisfeitas(anterior, valor))
+        if disparados:
+            self._despachar(disparados)
+        return disparados
+
+    def _despachar(self, alertas: List[Alerta]):
+        for destino in self.destinos:
+            try:
+                destino.enviar(alertas)
+            except Exception as e:
+                print(f"⚠️ Erro ao enviar alertas para {type(destino).__name__}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _carregar(self):
+        try:
+            with open(self.caminho_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return
+        for simbolo, metrica, valor in estado.get('valores', []):
+            self._valores[(simbolo, metrica)] = valor
+
+    def salvar(self):
+        with self._trava:
+            estado = {'valores': [[simbolo, metrica, valor] for (simbolo, metrica), valor in self._valores.items()]}
+        pasta = os.path.dirname(self.caminho_estado)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        temporario = f"{self.caminho_estado}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho_estado)
+
+
+def _normalizar_valor(valor) -> Optional[Valor]:
+    """Números viram float (NaN vira None); textos ficam como estão"""
+    if valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, (bool, np.bool_)):
+        return float(valor)
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(valor) else valor
+
+
+# ----------------------------------------------------------------------
+# Fatos
+# ----------------------------------------------------------------------
+
+def fatos_dados_mercado(dados_mercado: Dict) -> Dict[str, Dict[str, Valor]]:
+    """
+    Métricas escalares de cada ativo de obter_dados_yahoo_finance (inclusive
+    os grupos 'FIIs', 'Acoes' e 'BDRs') e do seu resumo técnico
+    """
+    fatos: Dict[str, Dict[str, Valor]] = {}
+
+    def adicionar(nome: str, dados: Dict):
+        metricas = {chave: valor for chave, valor in dados.items()
+                    if isinstance(valor, (int, float, str)) and chave not in ('simbolo', 'nome')}
+        metricas.update(dados.get('tecnico') or {})
+        fatos.setdefault(nome.upper(), {}).update(metricas)
+
+    for nome, dados in dados_mercado.items():
+        if not isinstance(dados, dict):
+            continue
+        if 'preco' in dados or 'tecnico' in dados:
+            adicionar(nome, dados)
+        else:
+            for ativo, dados_ativo in dados.items():
+                if isinstance(dados_ativo, dict):
+                    adicionar(ativo, dados_ativo)
+    return fatos
+
+
+def fatos_painel(painel, nomes: Dict[str, str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Preço, variação do último pregão (%) e drawdown (% abaixo da máxima do
+    período, positivo) de todos os símbolos do painel de uma vez
+
+    `nomes` traduz símbolos do Yahoo para os nomes usados nas regras
+    (ex.: '^BVSP' → 'IBOV'); sem tradução, o ticker sem '.SA'.
+    """
+    if painel is None or len(painel) == 0 or len(painel.datas) == 0:
+        return {}
+    nomes = nomes or {}
+    precos = preencher_adiante(painel.fechamento)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        atual = precos[-1]
+        anterior = precos[-2] if len(precos) > 1 else np.full(precos.shape[1], np.nan)
+        variacao = (atual / anterior - 1) * 100
+        drawdown = (1 - atual / np.fmax.reduce(precos, axis=0)) * 100
+    return {
+        nomes.get(simbolo, simbolo.replace('.SA', '')): {
+            'preco': float(atual[i]), 'variacao_dia': float(variacao[i]), 'drawdown': float(drawdown[i])
+        }
+        for i, simbolo in enumerate(painel.simbolos) if not np.isnan(atual[i])
+    }
+
+
+def fatos_sentimento(agregador, meia_vida: float = 7.0, agora: datetime = None) -> Dict[str, Dict[str, float]]:
+    """
+    Sentimento decaído por ticker/setor: 'sentimento' (meia-vida pedida),
+    'sentimento_curto' (menor meia-vida), 'choque_sentimento' (curto menos a
+    maior meia-vida: negativo quando o noticiário piora de repente) e
+    'artigos'
+    """
+    curta, longa = min(agregador.meias_vidas), max(agregador.meias_vidas)
+    base = agregador.sentimento(meia_vida=meia_vida, agora=agora)
+    curtos = agregador.sentimento(meia_vida=curta, agora=agora)
+    longos = agregador.sentimento(meia_vida=longa, agora=agora)
+    fatos = {}
+    for chave, valores in base.items():
+        sentimento_curto = curtos.get(chave, {}).get('sentimento', valores['sentimento'])
+        sentimento_longo = longos.get(chave, {}).get('sentimento', valores['sentimento'])
+        fatos[chave.upper() if not chave.startswith('setor:') else chave] = {
+            'sentimento': valores['sentimento'],
+            'sentimento_curto': sentimento_curto,
+            'choque_sentimento': sentimento_curto - sentimento_longo,
+            'artigos': float(valores['artigos'])
+        }
+    return fatos
+
+
+def juntar_fatos(*conjuntos: Dict[str, Dict[str, Valor]]) -> Dict[str, Dict[str, Valor]]:
+    fatos: Dict[str, Dict[str, Valor]] = {}
+    for conjunto in conjuntos:
+        for simbolo, metricas in conjunto.items():
+            fatos.setdefault(simbolo, {}).update(metricas)
+    return fatos
+
+
+_motor_padrao: Optional[MotorAlertas] = None
+_trava_motor = threading.Lock()
+
+
+def obter_motor_alertas(caminho_regras: str = ARQUIVO_REGRAS_PADRAO, destinos: Iterable[str] = ('arquivo', 'log'),
+                        url_webhook: str = '') -> MotorAlertas:
+    """Motor global (um por processo) com as regras do arquivo e o estado salvo"""
+    global _motor_padrao
+    with _trava_motor:
+        if _motor_padrao is None:
+            regras = carregar_regras(caminho_regras) if os.path.exists(caminho_regras) else []
+            _motor_padrao = MotorAlertas(regras, criar_destinos(destinos, url_webhook))
+        return _motor_padrao
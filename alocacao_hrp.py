@@ -0,0 +1,131 @@
+"""
+Alocação por paridade de risco hierárquica (HRP, López de Prado, 2016).
+
+    1. distância de correlação d = √((1 - ρ) / 2) entre todos os pares
+    2. agrupamento hierárquico (ligação simples por padrão) sobre d
+    3. quase-diagonalização: ativos na ordem das folhas do dendrograma
+    4. bisseção recursiva: cada metade recebe peso inversamente proporcional
+       à variância da sua carteira de variância inversa
+
+A correlação vem do modelo de covariância de posto baixo (covariancia.py):
+as distâncias são calculadas em blocos de linhas, direto no vetor
+condensado que o scipy espera, sem montar a matriz N × N de correlação; as
+variâncias dos grupos na bisseção custam O(n·K). A ligação simples do scipy
+usa árvore geradora mínima (O(N²)), então alguns milhares de ativos levam
+poucos segundos, dominados pelas distâncias.
+
+Também há a alocação por volatilidade inversa (w ∝ 1/σ), sem agrupamento.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+from scipy.cluster.hierarchy import leaves_list, linkage
+
+from covariancia import CovarianciaBaixoPosto
+
+MODOS_ALOCACAO = ('hrp', 'volatilidade_inversa')
+_LINHAS_POR_BLOCO = 256
+
+
+def distancias_correlacao(covariancia: CovarianciaBaixoPosto) -> np.ndarray:
+    """
+    Vetor condensado (formato scipy.spatial.distance.squareform) das
+    distâncias de correlação entre todos os pares de ativos
+    """
+    n = len(covariancia)
+    # Fora da diagonal ρ_ij = b_i·b_j / (σ_i σ_j)
+    normalizadas = covariancia.cargas / np.sqrt(covariancia.variancias())[:, None]
+    condensado = np.empty(n * (n - 1) // 2)
+    posicao = 0
+    for inicio in range(0, n - 1, _LINHAS_POR_BLOCO):
+        fim = min(inicio + _LINHAS_POR_BLOCO, n - 1)
+        correlacoes = normalizadas[inicio:fim] @ normalizadas[inicio + 1:].T
+        for deslocamento, linha in enumerate(range(inicio, fim)):
+            tamanho = n - linha - 1
+            condensado[posicao:posicao + tamanho] = correlacoes[deslocamento, deslocamento:]
+            posicao += tamanho
+    np.clip(condensado, -1.0, 1.0, out=condensado)
+    return np.sqrt(0.5 * (1.0 - condensado))
+
+
+def ordem_quase_diagonal(covariancia: CovarianciaBaixoPosto, metodo_ligacao: str = 'single') -> np.ndarray:
+    """Índices dos ativos na ordem das folhas do dendrograma"""
+    if len(covariancia) < 3:
+        return np.arange(len(covariancia))
+    ligacao = linkage(distancias_correlacao(covariancia), method=metodo_ligacao)
+    return leaves_list(ligacao)
+
+
+def _variancia_grupo(covariancia: CovarianciaBaixoPosto, indices: np.ndarray, variancias: np.ndarray) -> float:
+    """Variância da carteira de variância inversa do grupo (O(n·K))"""
+    pesos = 1.0 / variancias[indices]
+    pesos /= pesos.sum()
+    expostos = covariancia.cargas[indices].T @ pesos
+    return float(expostos @ expostos + (covariancia.especificas[indices] * pesos * pesos).sum())
+
+
+def pesos_hrp(covariancia: CovarianciaBaixoPosto, metodo_ligacao: str = 'single') -> np.ndarray:
+    """Pesos HRP alinhados a covariancia.simbolos (somam 1, todos positivos)"""
+    n = len(covariancia)
+    pesos = np.ones(n)
+    if n < 2:
+        return pesos
+    variancias = covariancia.variancias()
+    grupos: List[np.ndarray] = [ordem_quase_diagonal(covariancia, metodo_ligacao)]
+    while grupos:
+        grupo = grupos.pop()
+        if len(grupo) < 2:
+            continue
+        metade = len(grupo) // 2
+        esquerda, direita = grupo[:metade], grupo[metade:]
+        variancia_esquerda = _variancia_grupo(covariancia, esquerda, variancias)
+        variancia_direita = _variancia_grupo(covariancia, direita, variancias)
+        alfa = 1.0 - variancia_esquerda / (variancia_esquerda + variancia_direita)
+        pesos[esquerda] *= alfa
+        pesos[direita] *= 1.0 - alfa
+        grupos.extend((esquerda, direita))
+    return pesos
+
+
+def pesos_volatilidade_inversa(covariancia: CovarianciaBaixoPosto) -> np.ndarray:
+    """Pesos proporcionais a 1/σ, alinhados a covariancia.simbolos"""
+    inversas = 1.0 / np.sqrt(covariancia.variancias())
+    return inversas / inversas.sum()
+
+
+def alocar(covariancia: CovarianciaBaixoPosto, simbolos: Sequence[str] = None, modo: str = 'hrp',
+           metodo_ligacao: str = 'single') -> Dict[str, float]:
+    """
+    Pesos por símbolo (somam 1) no modo pedido
+
+    Símbolos sem covariância estimada são ignorados.
+    """
+    if modo not in MODOS_ALOCACAO:
+        raise ValueError(f"Modo de alocação desconhecido: {modo}")
+    if simbolos is not None:
+        covariancia = covariancia.selecionar([s for s in dict.fromkeys(simbolos) if s in covariancia])
+    if len(covariancia) == 0:
+        return {}
+    if modo == 'hrp':
+        pesos = pesos_hrp(covariancia, metodo_ligacao)
+    else:
+        pesos = pesos_volatilidade_inversa(covariancia)
+    return dict(zip(covariancia.simbolos, pesos.tolist()))
+
+
+def arredondar_percentuais(pesos: Dict[str, float], total: int) -> Dict[str, int]:
+    """
+    Converte pesos em percentuais inteiros que somam `total` (maiores restos);
+    itens que ficariam com 0% são omitidos
+    """
+    if not pesos or total <= 0:
+        return {}
+    chaves = list(pesos)
+    brutos = np.array([pesos[c] for c in chaves], dtype=float)
+    brutos = brutos / brutos.sum() * total
+    inteiros = np.floor(brutos).astype(int)
+    faltam = total - int(inteiros.sum())
+    if faltam > 0:
+        inteiros[np.argsort(-(brutos - inteiros), kind='stable')[:faltam]] += 1
+    return {chave: int(valor) for chave, valor in zip(chaves, inteiros) if valor > 0}
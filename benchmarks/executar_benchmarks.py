@@ -0,0 +1,556 @@
+"""
+Benchmarks offline dos caminhos críticos do agente.
+
+Todas as páginas vêm de benchmarks/fixtures (HTML gravado, replicado para
+atingir o tamanho pedido) e os preços são séries sintéticas determinísticas,
+portanto nenhum benchmark acessa a internet.
+
+Significado de "tamanho" em cada benchmark:
+    coletar_noticias_infomoney  artigos na página (e max_artigos), via scraping do HTML
+    coletar_feed_infomoney      itens no feed RSS (e max_artigos)
+    coletar_dados_investing     linhas da tabela de componentes na página
+    analisar_sentimento         manchetes analisadas, uma a uma
+    pontuar_sentimento_lote     manchetes classificadas em uma única chamada
+    metricas_yahoo              pregões por série (x25)
+    risco_carteira              ativos no painel (x5), 250 pregões; estima o modelo de fatores e mede 100 carteiras
+    alocacao_hrp                ativos (x5) alocados por HRP (distâncias, ligação e bisseção)
+    triagem_universo            ativos (x10) na tabela de métricas filtrada pela expressão compilada
+    indicadores_tecnicos        ativos no painel (x5), 250 pregões; todos os indicadores sobre a matriz
+    indicadores_incrementais    ativos no painel (x5); atualização dos indicadores com um pregão novo
+    alertas_incrementais        regras de alerta (x10) indexadas; atualização com 10 fatos alterados
+    metricas_fiis               FIIs no cache (x5), 2 anos de preços e dividendos mensais; DY, estabilidade e retorno total
+    retornos_em_reais           ativos em dólar no painel (x5), 250 pregões; retornos e volatilidades sem e com hedge
+    painel_em_reais             ativos em dólar no painel (x5), 250 pregões; painel convertido a reais com hedge
+    recomendacao_lote           clientes (x100) num bloco: perfil, restrições, melhor ativo por classe e ajustes
+    recomendacao_pontuacao      pontuações de risco resolvidas na grade pré-calculada (recomendação completa)
+    gerar_recomendacao_carteira FIIs no universo analisado
+    criar_visualizacoes         FIIs no universo analisado
+    gerar_relatorio_completo    FIIs e notícias no relatório
+
+Uso:
+    python benchmarks/executar_benchmarks.py
+    python benchmarks/executar_benchmarks.py --tamanhos 10 100 --repeticoes 3
+    python benchmarks/executar_benchmarks.py --apenas analisar_sentimento
+    python benchmarks/executar_benchmarks.py --comparar benchmarks/resultados/bench_X.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_PROJETO = os.path.dirname(DIRETORIO_BENCHMARKS)
+DIRETORIO_FIXTURES = os.path.join(DIRETORIO_BENCHMARKS, 'fixtures')
+DIRETORIO_RESULTADOS = os.path.join(DIRETORIO_BENCHMARKS, 'resultados')
+
+sys.path.insert(0, DIRETORIO_PROJETO)
+
+from agente_ia_investimentos import AnalisadorInvestimentos, ConfiguracaoAgente  # noqa: E402
+from alertas import MotorAlertas  # noqa: E402
+from dividendos_fiis import CacheDividendos, metricas_fiis  # noqa: E402
+from alocacao_hrp import alocar  # noqa: E402
+from cambio import CamadaCambio  # noqa: E402
+from coletor_web_avancado import ColetorWebAvancado  # noqa: E402
+from indicadores_tecnicos import MotorIndicadores  # noqa: E402
+from instrumentacao import obter_rastreador  # noqa: E402
+from painel_precos import PainelPrecos  # noqa: E402
+from recomendacao_lote import RetratoMercado, recomendar_clientes  # noqa: E402
+from triagem_ativos import TabelaMetricas, compilar_filtro  # noqa: E402
+from registros_noticias import Artigo, FonteNoticia  # noqa: E402
+
+TAMANHOS_PADRAO = [10, 100, 1000]
+MARCADOR_INICIO = '<!-- inicio-lista -->'
+MARCADOR_FIM = '<!-- fim-lista -->'
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def carregar_fixture(nome: str) -> str:
+    """Lê uma fixture de texto"""
+    with open(os.path.join(DIRETORIO_FIXTURES, nome), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def escalar_pagina(html: str, quantidade: int, marcador_item: str) -> str:
+    """Replica o bloco entre os marcadores até ter ao menos `quantidade` itens"""
+    inicio = html.index(MARCADOR_INICIO) + len(MARCADOR_INICIO)
+    fim = html.index(MARCADOR_FIM)
+    bloco = html[inicio:fim]
+    itens_no_bloco = max(1, bloco.count(marcador_item))
+    repeticoes = max(1, math.ceil(quantidade / itens_no_bloco))
+    return html[:inicio] + bloco * repeticoes + html[fim:]
+
+
+class SessaoFixtures:
+    """Substitui a sessão HTTP servindo páginas de fixtures por trecho de URL"""
+
+    def __init__(self, paginas: Dict[str, str]):
+        self.paginas = {trecho: html.encode('utf-8') for trecho, html in paginas.items()}
+        self.headers = {}
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        resposta = requests.Response()
+        resposta.url = url
+        for trecho, conteudo in self.paginas.items():
+            if trecho in url:
+                resposta.status_code = 200
+                resposta._content = conteudo
+                resposta._content_consumed = True
+                return resposta
+        resposta.status_code = 404
+        resposta._content = b''
+        resposta._content_consumed = True
+        return resposta
+
+
+def gerar_precos_sinteticos(dias: int, semente: int = 42, preco_inicial: float = 100.0) -> pd.DataFrame:
+    """Série OHLCV no formato do yfinance (passeio aleatório geométrico)"""
+    gerador = np.random.default_rng(semente)
+    retornos = gerador.normal(0.0004, 0.015, dias)
+    fechamento = preco_inicial * np.exp(np.cumsum(retornos))
+    indice = pd.bdate_range(end='2025-08-01', periods=dias)
+    return pd.DataFrame({
+        'Open': fechamento * (1 + gerador.normal(0, 0.002, dias)),
+        'High': fechamento * 1.01,
+        'Low': fechamento * 0.99,
+        'Close': fechamento,
+        'Volume': gerador.integers(1_000_000, 10_000_000, dias).astype(float),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=indice)
+
+
+def gerar_dados_mercado(quantidade_fiis: int) -> Dict:
+    """Dicionário no formato de obter_dados_yahoo_finance com N FIIs"""
+    gerador = np.random.default_rng(7)
+    dados = {
+        'IBOV': {'preco': 132971.0, 'retorno_ano': 6.15, 'volatilidade': 18.2, 'simbolo': '^BVSP'},
+        'DOLAR': {'preco': 5.51, 'retorno_ano': -3.74, 'volatilidade': 12.0, 'simbolo': 'USDBRL=X'},
+        'SP500': {'preco': 6329.94, 'retorno_ano': 22.05, 'volatilidade': 15.1, 'simbolo': '^GSPC'},
+        'BITCOIN': {'preco': 114000.0, 'retorno_ano': 80.3, 'volatilidade': 45.0, 'simbolo': 'BTC-USD'},
+    }
+    dados['FIIs'] = {
+        f'FII{i:04d}': {
+            'preco': round(float(gerador.uniform(8, 160)), 2),
+            'retorno_periodo': round(float(gerador.normal(4, 6)), 2),
+            'simbolo': f'FII{i:04d}11.SA'
+        }
+        for i in range(quantidade_fiis)
+    }
+    return dados
+
+
+def gerar_noticias(quantidade: int) -> List[Artigo]:
+    """Notícias no formato de coletar_noticias_basicas"""
+    manchetes = carregar_fixture('manchetes.txt').split('\n')
+    manchetes = [m for m in manchetes if m]
+    return [
+        Artigo(manchetes[i % len(manchetes)], FonteNoticia.INFOMONEY,
+               data_hora=datetime(2025, 8, 5), relevancia=0.5)
+        for i in range(quantidade)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def _novo_analisador() -> AnalisadorInvestimentos:
+    analisador = AnalisadorInvestimentos(ConfiguracaoAgente())
+    logging.getLogger().setLevel(logging.WARNING)
+    return analisador
+
+
+def preparar_infomoney(tamanho: int) -> Callable:
+    coletor = ColetorWebAvancado()
+    pagina = escalar_pagina(carregar_fixture('infomoney_mercados.html'), tamanho, '<article')
+    coletor.sessao = SessaoFixtures({'infomoney.com.br': pagina})
+    coletor.coletor_feeds.feeds = {}  # Força o plano B (HTML)
+    return lambda: coletor.coletar_noticias_infomoney(max_artigos=tamanho)
+
+
+def preparar_feed_infomoney(tamanho: int) -> Callable:
+    coletor = ColetorWebAvancado()
+    feed = escalar_pagina(carregar_fixture('infomoney_feed.xml'), tamanho, '<item')
+    coletor.coletor_feeds.sessao = SessaoFixtures({'infomoney.com.br/mercados/feed': feed})
+    coletor.apenas_noticias_novas = False
+    return lambda: coletor.coletar_noticias_infomoney(max_artigos=tamanho)
+
+
+def preparar_investing(tamanho: int) -> Callable:
+    coletor = ColetorWebAvancado()
+    coletor.sessao = SessaoFixtures({
+        'indices/bovespa': escalar_pagina(carregar_fixture('investing_bovespa.html'), tamanho, '<tr'),
+        'rates-bonds': carregar_fixture('investing_taxa.html')
+    })
+    return coletor.coletar_dados_investing
+
+
+def preparar_sentimento(tamanho: int) -> Callable:
+    coletor = ColetorWebAvancado()
+    manchetes = [n.titulo for n in gerar_noticias(tamanho)]
+    return lambda: [coletor.analisar_sentimento(m) for m in manchetes]
+
+
+def preparar_sentimento_lote(tamanho: int) -> Callable:
+    coletor = ColetorWebAvancado()
+    artigos = gerar_noticias(tamanho)
+    return lambda: coletor.pontuar_artigos(artigos)
+
+
+def preparar_metricas_yahoo(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    analisador.config.DIVIDENDOS_FIIS = False  # Dividendos usam yf.download em lote; o benchmark fica offline
+    coletor = analisador.coletor
+    series = {}
+
+    def historico(simbolo: str, periodo: str) -> pd.DataFrame:
+        if simbolo not in series:
+            series[simbolo] = gerar_precos_sinteticos(tamanho * 25, semente=len(series))
+        return series[simbolo]
+
+    coletor._obter_historico = historico
+    return coletor.obter_dados_yahoo_finance
+
+
+def gerar_painel_fatorial(num_ativos: int, dias: int = 250, semente: int = 11) -> PainelPrecos:
+    """Painel de preços com 5 fatores comuns e ruído idiossincrático"""
+    gerador = np.random.default_rng(semente)
+    fatores = gerador.normal(0, 0.01, (dias, 5))
+    retornos = fatores @ gerador.normal(1, 0.5, (5, num_ativos)) + gerador.normal(0, 0.015, (dias, num_ativos))
+    precos = 100 * np.cumprod(1 + retornos, axis=0)
+    return PainelPrecos(pd.bdate_range(end='2025-08-01', periods=dias).values,
+                        [f'ATV{i:05d}' for i in range(num_ativos)], precos, np.ones_like(precos))
+
+
+def preparar_risco_carteira(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    painel = gerar_painel_fatorial(tamanho * 5)
+    carteiras = np.random.default_rng(11).dirichlet(np.ones(tamanho * 5), 100).T
+
+    def executar():
+        covariancia = analisador.coletor.estimar_covariancia(painel)
+        return covariancia.risco_carteira(carteiras)
+
+    return executar
+
+
+def preparar_alocacao_hrp(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    covariancia = analisador.coletor.estimar_covariancia(gerar_painel_fatorial(tamanho * 5))
+    return lambda: alocar(covariancia, modo='hrp')
+
+
+def preparar_triagem(tamanho: int) -> Callable:
+    gerador = np.random.default_rng(5)
+    num_ativos = tamanho * 10
+    tabela = TabelaMetricas({
+        'ticker': np.array([f'ATV{i:05d}' for i in range(num_ativos)], dtype=object),
+        'tipo': gerador.choice(np.array(['acao', 'fii', 'bdr', 'etf'], dtype=object), num_ativos),
+        'retorno_ano': gerador.normal(8, 20, num_ativos),
+        'volatilidade': gerador.uniform(5, 80, num_ativos),
+        'volume_medio': 10 ** gerador.uniform(3, 9, num_ativos)
+    })
+    filtro = compilar_filtro("volatilidade < 30 and retorno_ano > 10 and volume_medio > 1e6 and tipo in ('acao', 'etf')")
+    return lambda: tabela.filtrar(filtro, ordenar_por='retorno_ano', limite=20)
+
+
+def preparar_indicadores(tamanho: int) -> Callable:
+    painel = gerar_painel_fatorial(tamanho * 5)
+    motor = MotorIndicadores()
+    return lambda: motor.calcular(painel.fechamento)
+
+
+def preparar_indicadores_incrementais(tamanho: int) -> Callable:
+    painel = gerar_painel_fatorial(tamanho * 5)
+    estado = MotorIndicadores().iniciar(painel.fechamento[:-1])
+    novo_pregao = painel.fechamento[-1].astype(np.float64)
+    return lambda: estado.atualizar(novo_pregao)
+
+
+def preparar_alertas(tamanho: int) -> Callable:
+    # 10 limites por ativo; cada atualização muda o preço de 10 ativos
+    regras = [f"ATV{i:05d} preco > {limite}" for i in range(tamanho) for limite in range(90, 140, 5)]
+    motor = MotorAlertas(regras, caminho_estado='')
+    gerador = np.random.default_rng(3)
+    lotes = [{f"ATV{i:05d}": {'preco': float(p)} for i, p in zip(gerador.integers(0, tamanho, 10),
+                                                                 gerador.uniform(80, 150, 10))}
+             for _ in range(64)]
+    proximo = iter(range(10 ** 9))
+    return lambda: motor.atualizar(lotes[next(proximo) % len(lotes)])
+
+
+def preparar_metricas_fiis(tamanho: int) -> Callable:
+    painel = gerar_painel_fatorial(tamanho * 5, dias=500)
+    datas = pd.DatetimeIndex(painel.datas)
+    historicos = {}
+    for j, simbolo in enumerate(painel.simbolos):
+        dividendos = np.zeros(len(datas))
+        dividendos[j % 21::21] = 0.8
+        historicos[simbolo] = pd.DataFrame({'Close': painel.fechamento[:, j], 'Volume': painel.volume[:, j],
+                                            'Dividends': dividendos}, index=datas)
+    cache = CacheDividendos(caminho='')
+    cache.incorporar(historicos, hoje=datas[-1].date())
+
+    def executar():
+        painel_cache = cache.painel()
+        return metricas_fiis(painel_cache, cache.matriz_dividendos(painel_cache))
+    return executar
+
+
+def preparar_retornos_em_reais(tamanho: int) -> Callable:
+    # Primeira coluna faz o papel do USDBRL=X; as demais são cotadas em dólar
+    painel = gerar_painel_fatorial(tamanho * 5 + 1)
+    painel = PainelPrecos(painel.datas, ['USDBRL=X'] + painel.simbolos[1:], painel.fechamento, painel.volume)
+    moedas = {simbolo: 'USD' for simbolo in painel.simbolos[1:]}
+    camada = CamadaCambio(painel, juros_brl=13.75, juros_moedas={'USD': 5.0})
+    return lambda: camada.retornos(moedas=moedas).resumos()
+
+
+def preparar_painel_em_reais(tamanho: int) -> Callable:
+    # Mesmo painel de retornos_em_reais, com uma lacuna para passar pelo preenchimento
+    painel = gerar_painel_fatorial(tamanho * 5 + 1)
+    fechamento = painel.fechamento.copy()
+    fechamento[10, 1:] = np.nan
+    painel = PainelPrecos(painel.datas, ['USDBRL=X'] + painel.simbolos[1:], fechamento, painel.volume)
+    moedas = {simbolo: 'USD' for simbolo in painel.simbolos[1:]}
+    camada = CamadaCambio(painel, juros_brl=13.75, juros_moedas={'USD': 5.0})
+    return lambda: camada.painel_em_reais('com_hedge', moedas=moedas)
+
+
+def preparar_recomendacao_lote(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    retrato = RetratoMercado.de_analise(analisador.analisar_oportunidades(gerar_dados_mercado(20)), analisador.config)
+    gerador = np.random.default_rng(13)
+    num_clientes = tamanho * 100
+    ativos = np.array(['PETR4', 'KNRI11', 'FII0003', 'CDB_BANCO', 'TESOURO_IPCA', 'SP500', 'XPTO3'])
+    clientes = pd.DataFrame({
+        'cliente': [f'C{i:07d}' for i in range(num_clientes)],
+        'pontuacao_risco': gerador.uniform(0, 100, num_clientes).round(1).astype(str),
+        'horizonte_anos': gerador.choice(['', '1', '2', '4', '10'], num_clientes),
+        'restricoes': gerador.choice(['', 'sem_cripto', 'max_internacional=5|sem_fiis'], num_clientes),
+        'posicoes': ['|'.join(f'{a}:{v:.0f}' for a, v in zip(gerador.choice(ativos, 3, replace=False),
+                                                              gerador.uniform(100, 1e5, 3)))
+                     for _ in range(num_clientes)]
+    })
+    return lambda: recomendar_clientes(clientes, retrato)
+
+
+def preparar_recomendacao_pontuacao(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    analise = analisador.analisar_oportunidades(gerar_dados_mercado(20))
+    pontuacoes = np.random.default_rng(17).uniform(0, 100, tamanho).tolist()
+    analisador.gerar_recomendacao_carteira(analise, 50.0)  # Monta a grade fora da medição
+
+    def executar():
+        return [analisador.gerar_recomendacao_carteira(analise, pontuacao) for pontuacao in pontuacoes]
+    return executar
+
+
+def preparar_recomendacao(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    analise = analisador.analisar_oportunidades(gerar_dados_mercado(tamanho))
+    return lambda: analisador.gerar_recomendacao_carteira(analise, 'moderado')
+
+
+def preparar_visualizacoes(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    analise = analisador.analisar_oportunidades(gerar_dados_mercado(tamanho))
+    recomendacao = analisador.gerar_recomendacao_carteira(analise, 'moderado')
+    return lambda: analisador.criar_visualizacoes(analise, recomendacao)
+
+
+def preparar_relatorio(tamanho: int) -> Callable:
+    analisador = _novo_analisador()
+    dados = gerar_dados_mercado(tamanho)
+    analise = analisador.analisar_oportunidades(dados)
+    recomendacao = analisador.gerar_recomendacao_carteira(analise, 'moderado')
+    noticias = gerar_noticias(tamanho)
+    return lambda: analisador.gerar_relatorio_completo(analise, recomendacao, dados, noticias)
+
+
+BENCHMARKS: Dict[str, Callable[[int], Callable]] = {
+    'coletar_noticias_infomoney': preparar_infomoney,
+    'coletar_feed_infomoney': preparar_feed_infomoney,
+    'coletar_dados_investing': preparar_investing,
+    'analisar_sentimento': preparar_sentimento,
+    'pontuar_sentimento_lote': preparar_sentimento_lote,
+    'metricas_yahoo': preparar_metricas_yahoo,
+    'risco_carteira': preparar_risco_carteira,
+    'alocacao_hrp': preparar_alocacao_hrp,
+    'triagem_universo': preparar_triagem,
+    'indicadores_tecnicos': preparar_indicadores,
+    'indicadores_incrementais': preparar_indicadores_incrementais,
+    'alertas_incrementais': preparar_alertas,
+    'metricas_fiis': preparar_metricas_fiis,
+    'retornos_em_reais': preparar_retornos_em_reais,
+    'painel_em_reais': preparar_painel_em_reais,
+    'recomendacao_lote': preparar_recomendacao_lote,
+    'recomendacao_pontuacao': preparar_recomendacao_pontuacao,
+    'gerar_recomendacao_carteira': preparar_recomendacao,
+    'criar_visualizacoes': preparar_visualizacoes,
+    'gerar_relatorio_completo': preparar_relatorio,
+}
+
+
+# ---------------------------------------------------------------------------
+# Execução e comparação
+# ---------------------------------------------------------------------------
+
+def cronometrar(funcao: Callable, repeticoes: int, aquecimento: int = 1) -> List[float]:
+    """Executa a função e retorna a duração de cada repetição (s)"""
+    rastreador = obter_rastreador()
+    duracoes = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(aquecimento + repeticoes):
+            rastreador.reiniciar()
+            inicio = time.perf_counter()
+            funcao()
+            duracao = time.perf_counter() - inicio
+            if i >= aquecimento:
+                duracoes.append(duracao)
+    return duracoes
+
+
+def resumir(nome: str, tamanho: int, duracoes: List[float]) -> Dict:
+    """Estatísticas de latência e vazão de um benchmark"""
+    amostras = np.array(duracoes)
+    mediana = float(np.median(amostras))
+    return {
+        'benchmark': nome,
+        'tamanho': tamanho,
+        'repeticoes': len(duracoes),
+        'min_s': float(amostras.min()),
+        'mediana_s': mediana,
+        'media_s': float(amostras.mean()),
+        'p95_s': float(np.percentile(amostras, 95)),
+        'itens_por_s': tamanho / mediana if mediana > 0 else None
+    }
+
+
+def coletar_metadados() -> Dict:
+    """Ambiente de execução, para tornar os resultados comparáveis"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO_PROJETO,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'data_hora': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+
+def executar(tamanhos: List[int], repeticoes: int, apenas: List[str] = None) -> Dict:
+    """Roda os benchmarks selecionados em um diretório temporário"""
+    selecionados = {n: p for n, p in BENCHMARKS.items() if not apenas or n in apenas}
+    resultados = []
+    diretorio_original = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='bench_agente_') as diretorio_temporario:
+        # Relatórios, gráficos e logs gerados pelos benchmarks ficam isolados
+        os.chdir(diretorio_temporario)
+        try:
+            for nome, preparar in selecionados.items():
+                for tamanho in tamanhos:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        funcao = preparar(tamanho)
+                    resumo = resumir(nome, tamanho, cronometrar(funcao, repeticoes))
+                    resultados.append(resumo)
+                    print(f"  {nome:30s} n={tamanho:<6d} mediana={resumo['mediana_s'] * 1000:10.2f} ms"
+                          f"  p95={resumo['p95_s'] * 1000:10.2f} ms")
+        finally:
+            os.chdir(diretorio_original)
+
+    return {'metadados': coletar_metadados(), 'resultados': resultados}
+
+
+def salvar(resultado: Dict, diretorio: str = DIRETORIO_RESULTADOS) -> str:
+    """Grava resultados em JSON com marca de tempo"""
+    os.makedirs(diretorio, exist_ok=True)
+    marca_tempo = datetime.now().strftime('%Y%m%d_%H%M%S')
+    caminho = os.path.join(diretorio, f'bench_{marca_tempo}.json')
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def comparar(base: Dict, atual: Dict, limite: float = 0.10) -> List[Tuple[str, int, float]]:
+    """
+    Compara medianas com um resultado anterior
+
+    Retorna (benchmark, tamanho, razão atual/base) das regressões acima do limite.
+    """
+    indice_base = {(r['benchmark'], r['tamanho']): r for r in base['resultados']}
+    regressoes = []
+
+    print(f"\n{'benchmark':30s} {'n':>6s} {'base (ms)':>12s} {'atual (ms)':>12s} {'razão':>8s}")
+    for r in atual['resultados']:
+        chave = (r['benchmark'], r['tamanho'])
+        if chave not in indice_base:
+            continue
+        mediana_base = indice_base[chave]['mediana_s']
+        razao = r['mediana_s'] / mediana_base if mediana_base > 0 else float('inf')
+        marca = ' ⚠️' if razao > 1 + limite else ''
+        print(f"{r['benchmark']:30s} {r['tamanho']:6d} {mediana_base * 1000:12.2f} "
+              f"{r['mediana_s'] * 1000:12.2f} {razao:8.2f}{marca}")
+        if razao > 1 + limite:
+            regressoes.append((r['benchmark'], r['tamanho'], razao))
+
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks offline do Agente IA de Investimentos')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--apenas', nargs='+', choices=sorted(BENCHMARKS), help='Benchmarks a executar')
+    parser.add_argument('--comparar', help='Arquivo de resultados anterior para comparação')
+    parser.add_argument('--limite-regressao', type=float, default=0.10,
+                        help='Aumento relativo da mediana considerado regressão (padrão 0.10)')
+    parser.add_argument('--falhar-regressao', action='store_true',
+                        help='Sai com código 1 se houver regressão')
+    args = parser.parse_args()
+
+    print("⏱️ EXECUTANDO BENCHMARKS OFFLINE")
+    print("=" * 60)
+    resultado = executar(args.tamanhos, args.repeticoes, args.apenas)
+    caminho = salvar(resultado)
+    print(f"\n📁 Resultados salvos em: {caminho}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        regressoes = comparar(base, resultado, args.limite_regressao)
+        if regressoes:
+            print(f"\n⚠️ {len(regressoes)} regressão(ões) acima de {args.limite_regressao:.0%}")
+            if args.falhar_regressao:
+                sys.exit(1)
+        else:
+            print("\n✅ Nenhuma regressão detectada")
+
+
+if __name__ == '__main__':
+    main()
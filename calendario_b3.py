@@ -0,0 +1,224 @@
+"""
+Calendário de dias úteis B3/ANBIMA com aritmética de datas vetorizada.
+
+O calendário é pré-calculado uma única vez: tabela de feriados, máscara de
+dias úteis e índice acumulado de dias úteis. Com isso, contagem de dias úteis,
+soma de dias úteis e busca de fim de período viram operações O(1) por data,
+aplicadas de uma vez sobre arrays inteiros (sem laços dia a dia).
+"""
+
+from datetime import date
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+# Convenção de mercado para anualização (taxas DI, volatilidade, etc.)
+DIAS_UTEIS_ANO = 252
+
+ANO_INICIAL = 1990
+ANO_FINAL = 2099
+
+# Feriados nacionais de data fixa (mês, dia)
+FERIADOS_FIXOS = [
+    (1, 1),    # Confraternização Universal
+    (4, 21),   # Tiradentes
+    (5, 1),    # Dia do Trabalho
+    (9, 7),    # Independência
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),   # Finados
+    (11, 15),  # Proclamação da República
+    (12, 25),  # Natal
+]
+
+# Dias sem pregão na B3 além dos feriados nacionais
+DIAS_SEM_PREGAO_B3 = [
+    (12, 24),  # Véspera de Natal
+    (12, 31),  # Último dia do ano
+]
+
+# Dia Nacional de Zumbi e da Consciência Negra (feriado nacional desde 2024)
+ANO_INICIO_CONSCIENCIA_NEGRA = 2024
+
+
+def calcular_pascoa(ano: int) -> date:
+    """Calcula o domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def gerar_feriados(ano_inicial: int = ANO_INICIAL, ano_final: int = ANO_FINAL,
+                   tipo: str = 'anbima') -> np.ndarray:
+    """
+    Gera a tabela de feriados do período como array datetime64[D] ordenado
+
+    tipo='anbima' usa os feriados nacionais (calendário de renda fixa);
+    tipo='b3' acrescenta os dias sem pregão da bolsa.
+    """
+    if tipo not in ('anbima', 'b3'):
+        raise ValueError(f"Tipo de calendário inválido: {tipo}")
+
+    feriados: List[np.datetime64] = []
+    for ano in range(ano_inicial, ano_final + 1):
+        datas_fixas = list(FERIADOS_FIXOS)
+        if ano >= ANO_INICIO_CONSCIENCIA_NEGRA:
+            datas_fixas.append((11, 20))
+        if tipo == 'b3':
+            datas_fixas.extend(DIAS_SEM_PREGAO_B3)
+
+        for mes, dia in datas_fixas:
+            feriados.append(np.datetime64(date(ano, mes, dia), 'D'))
+
+        # Feriados móveis baseados na Páscoa
+        pascoa = np.datetime64(calcular_pascoa(ano), 'D')
+        for deslocamento in (-48, -47, -2, 60):  # Carnaval (2a e 3a), Sexta Santa, Corpus Christi
+            feriados.append(pascoa + np.timedelta64(deslocamento, 'D'))
+
+    return np.unique(np.array(feriados, dtype='datetime64[D]'))
+
+
+class CalendarioDiasUteis:
+    """
+    Calendário de dias úteis com índice acumulado pré-calculado
+
+    Todas as consultas aceitam uma data isolada ou um array de datas
+    (datetime64, date, str ISO, DatetimeIndex) e retornam no mesmo formato.
+    """
+
+    def __init__(self, tipo: str = 'anbima', ano_inicial: int = ANO_INICIAL,
+                 ano_final: int = ANO_FINAL):
+        self.tipo = tipo
+        self.inicio = np.datetime64(f'{ano_inicial}-01-01', 'D')
+        self.fim = np.datetime64(f'{ano_final}-12-31', 'D')
+        self.feriados = gerar_feriados(ano_inicial, ano_final, tipo)
+
+        dias = np.arange(self.inicio, self.fim + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+        self._total_dias = len(dias)
+
+        # 1970-01-01 foi quinta-feira: (dias + 3) % 7 dá segunda=0 ... domingo=6
+        dia_semana = (dias.astype(np.int64) + 3) % 7
+        self._util = (dia_semana < 5) & ~np.isin(dias, self.feriados)
+
+        # _acumulado[i] = dias úteis estritamente antes do dia i (tamanho N+1)
+        self._acumulado = np.zeros(self._total_dias + 1, dtype=np.int32)
+        np.cumsum(self._util, out=self._acumulado[1:])
+
+        # _posicoes_uteis[k] = deslocamento (em dias) do k-ésimo dia útil
+        self._posicoes_uteis = np.flatnonzero(self._util).astype(np.int32)
+
+    def _para_deslocamentos(self, datas, permitir_fim: bool = False) -> np.ndarray:
+        """
+        Converte datas para deslocamentos inteiros a partir do início do calendário
+
+        Com permitir_fim=True aceita também o dia seguinte ao fim do
+        calendário, válido como limite exclusivo nas consultas a _acumulado.
+        """
+        datas_d = np.asarray(datas, dtype='datetime64[D]')
+        deslocamentos = (datas_d - self.inicio).astype(np.int64)
+
+        limite = self._total_dias + 1 if permitir_fim else self._total_dias
+        if deslocamentos.size and (deslocamentos.min() < 0 or deslocamentos.max() >= limite):
+            raise ValueError(
+                f"Data fora do calendário ({self.inicio} a {self.fim})"
+            )
+        return deslocamentos
+
+    def _para_datas(self, deslocamentos: np.ndarray):
+        """Converte deslocamentos de volta para datetime64[D]"""
+        datas = self.inicio + deslocamentos.astype('timedelta64[D]')
+        return datas[()] if datas.ndim == 0 else datas
+
+    def eh_dia_util(self, datas):
+        """Indica se cada data é dia útil"""
+        resultado = self._util[self._para_deslocamentos(datas)]
+        return bool(resultado) if np.ndim(resultado) == 0 else resultado
+
+    def du(self, inicio, fim):
+        """
+        Conta dias úteis entre duas datas (convenção ANBIMA)
+
+        Inclui a data inicial e exclui a final. Resultado negativo
+        quando fim < inicio.
+        """
+        acumulado_inicio = self._acumulado[self._para_deslocamentos(inicio, permitir_fim=True)]
+        acumulado_fim = self._acumulado[self._para_deslocamentos(fim, permitir_fim=True)]
+        resultado = acumulado_fim.astype(np.int64) - acumulado_inicio
+        return int(resultado) if np.ndim(resultado) == 0 else resultado
+
+    def adicionar_dias_uteis(self, datas, quantidade):
+        """
+        Soma (ou subtrai) dias úteis a cada data
+
+        Com quantidade=0, datas não úteis são levadas ao próximo dia útil.
+        """
+        deslocamentos = self._para_deslocamentos(datas)
+        quantidade = np.asarray(quantidade, dtype=np.int64)
+
+        antes = self._acumulado[deslocamentos].astype(np.int64)
+        # Partindo de dia não útil, o primeiro dia útil seguinte já conta como +1
+        ajuste = (~self._util[deslocamentos]) & (quantidade > 0)
+        indice = antes + quantidade - ajuste
+
+        if indice.size and (indice.min() < 0 or indice.max() >= len(self._posicoes_uteis)):
+            raise ValueError("Resultado fora do calendário")
+
+        return self._para_datas(self._posicoes_uteis[indice])
+
+    def ajustar_dia_util(self, datas, convencao: str = 'seguinte'):
+        """Ajusta datas não úteis para o dia útil seguinte ou anterior"""
+        if convencao == 'seguinte':
+            return self.adicionar_dias_uteis(datas, 0)
+
+        if convencao == 'anterior':
+            deslocamentos = self._para_deslocamentos(datas)
+            indice = self._acumulado[deslocamentos + 1].astype(np.int64) - 1
+            if indice.size and indice.min() < 0:
+                raise ValueError("Resultado fora do calendário")
+            return self._para_datas(self._posicoes_uteis[indice])
+
+        raise ValueError(f"Convenção inválida: {convencao}")
+
+    def fim_de_periodo(self, datas, periodo: str = 'M'):
+        """
+        Retorna o último dia útil do período (M=mês, T=trimestre, A=ano) de cada data
+        """
+        meses = np.asarray(datas, dtype='datetime64[D]').astype('datetime64[M]')
+        numero_mes = meses.astype(np.int64) % 12
+
+        if periodo == 'M':
+            proximo_inicio = meses + 1
+        elif periodo == 'T':
+            proximo_inicio = meses + (3 - numero_mes % 3)
+        elif periodo == 'A':
+            proximo_inicio = meses + (12 - numero_mes)
+        else:
+            raise ValueError(f"Período inválido: {periodo}")
+
+        deslocamentos = self._para_deslocamentos(proximo_inicio.astype('datetime64[D]'), permitir_fim=True)
+        indice = self._acumulado[deslocamentos].astype(np.int64) - 1
+        return self._para_datas(self._posicoes_uteis[indice])
+
+    def dias_uteis(self, inicio, fim) -> np.ndarray:
+        """Lista os dias úteis no intervalo [inicio, fim)"""
+        primeiro = self._acumulado[self._para_deslocamentos(inicio, permitir_fim=True)]
+        ultimo = self._acumulado[self._para_deslocamentos(fim, permitir_fim=True)]
+        return self._para_datas(self._posicoes_uteis[primeiro:ultimo])
+
+    def fator_anualizacao(self, inicio, fim) -> float:
+        """Fração de ano útil entre as datas (du / 252)"""
+        return self.du(inicio, fim) / DIAS_UTEIS_ANO
+
+
+@lru_cache(maxsize=None)
+def obter_calendario(tipo: str = 'anbima') -> CalendarioDiasUteis:
+    """Retorna instância compartilhada do calendário (construída uma única vez)"""
+    return CalendarioDiasUteis(tipo)
@@ -0,0 +1,162 @@
+"""
+Camada cambial: retornos de ativos estrangeiros em reais.
+
+Os ativos e as cotações de câmbio (USDBRL=X etc.) ficam no mesmo painel. No
+calendário comum (união das datas do painel), preço e câmbio repetem o
+último valor nos dias sem negociação, e para todos os ativos de uma vez:
+
+    sem_hedge   (1 + r_local)(1 + r_câmbio) - 1
+    com_hedge   (1 + r_local)(1 + prêmio a termo) - 1, com o prêmio dado pelo
+                diferencial de juros ((1 + i_BRL) / (1 + i_moeda))^(dias/365)
+    moeda_local r_local, sem conversão
+
+Cada série de câmbio é preenchida uma única vez e compartilhada pelos ativos
+da mesma moeda (índice de coluna por ativo, sem copiar a série por ativo).
+Retorno do período e volatilidade anualizada (pelo número de observações
+por ano do calendário comum) saem das matrizes de retornos.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from indicadores_tecnicos import preencher_adiante
+from painel_precos import PainelPrecos
+
+VISOES_CAMBIAIS = ('sem_hedge', 'com_hedge', 'moeda_local')
+PARES_CAMBIO = {'USD': 'USDBRL=X', 'EUR': 'EURBRL=X', 'GBP': 'GBPBRL=X'}
+# Moeda de cotação dos símbolos estrangeiros coletados pelo agente
+MOEDAS_SIMBOLOS = {'^GSPC': 'USD', 'BTC-USD': 'USD', 'GC=F': 'USD', '^IXIC': 'USD', '^DJI': 'USD',
+                   'ETH-USD': 'USD', '^STOXX50E': 'EUR', '^FTSE': 'GBP'}
+
+
+class RetornosBRL:
+    """Matrizes de retornos (datas × ativos) nas três visões e resumo por ativo"""
+
+    def __init__(self, simbolos: List[str], moedas: List[str], datas: np.ndarray, local: np.ndarray,
+                 cambio: np.ndarray, premio: np.ndarray):
+        self.simbolos = simbolos
+        self.moedas = moedas
+        self.datas = datas              # Datas de fim de cada retorno
+        self.local = local
+        self.cambio = cambio
+        with np.errstate(invalid='ignore'):
+            self.sem_hedge = (1 + local) * (1 + cambio) - 1
+            self.com_hedge = (1 + local) * (1 + premio) - 1
+
+    def matriz(self, visao: str = 'sem_hedge') -> np.ndarray:
+        if visao not in VISOES_CAMBIAIS:
+            raise ValueError(f"Visão cambial desconhecida: {visao}")
+        return self.local if visao == 'moeda_local' else getattr(self, visao)
+
+    @property
+    def observacoes_por_ano(self) -> float:
+        if len(self.datas) < 2:
+            return 252.0
+        anos = (self.datas[-1] - self.datas[0]) / np.timedelta64(1, 'D') / 365.25
+        return (len(self.datas) - 1) / anos if anos > 0 else 252.0
+
+    def retorno_periodo(self, visao: str = 'sem_hedge') -> np.ndarray:
+        """Retorno acumulado no período (%), por ativo"""
+        retornos = self.matriz(visao)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            acumulado = np.exp(np.nansum(np.log1p(retornos), axis=0)) - 1
+        return np.where(np.isnan(retornos).all(axis=0), np.nan, acumulado * 100)
+
+    def volatilidade(self, visao: str = 'sem_hedge') -> np.ndarray:
+        """Volatilidade anualizada (%), por ativo"""
+        retornos = self.matriz(visao)
+        validos = (~np.isnan(retornos)).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.nansum(retornos, axis=0) / validos
+            variancia = np.nansum((retornos - media) ** 2, axis=0) / (validos - 1)
+        return np.where(validos > 1, np.sqrt(variancia * self.observacoes_por_ano) * 100, np.nan)
+
+    def resumos(self) -> Dict[str, Dict[str, float]]:
+        """Retornos e volatilidades de cada ativo nas três visões (%, arredondados)"""
+        colunas = {
+            'retorno_moeda_local': self.retorno_periodo('moeda_local'),
+            'retorno_brl': self.retorno_periodo('sem_hedge'),
+            'retorno_brl_hedge': self.retorno_periodo('com_hedge'),
+            'volatilidade_moeda_local': self.volatilidade('moeda_local'),
+            'volatilidade_brl': self.volatilidade('sem_hedge'),
+            'volatilidade_brl_hedge': self.volatilidade('com_hedge'),
+        }
+        with np.errstate(invalid='ignore'):
+            colunas['retorno_cambio'] = ((1 + colunas['retorno_brl'] / 100)
+                                         / (1 + colunas['retorno_moeda_local'] / 100) - 1) * 100
+        nomes = list(colunas)
+        linhas = np.round(np.column_stack(list(colunas.values())), 2).tolist()
+        return {
+            simbolo: {'moeda': moeda, **{nome: valor for nome, valor in zip(nomes, linha) if valor == valor}}
+            for simbolo, moeda, linha in zip(self.simbolos, self.moedas, linhas)
+        }
+
+
+class CamadaCambio:
+    """Cotações de câmbio do painel, preenchidas uma vez e reaproveitadas por todos os ativos"""
+
+    def __init__(self, painel: PainelPrecos, juros_brl: float, juros_moedas: Dict[str, float] = None,
+                 pares: Dict[str, str] = None):
+        self.painel = painel
+        self.juros_brl = juros_brl
+        self.juros_moedas = juros_moedas or {}
+        self.pares = {moeda: simbolo for moeda, simbolo in (pares or PARES_CAMBIO).items() if simbolo in painel}
+        self.moedas = list(self.pares)
+        # Uma coluna por moeda, no calendário do painel
+        colunas = [painel.codigos[simbolo] for simbolo in self.pares.values()]
+        self.cotacoes = preencher_adiante(painel.fechamento[:, colunas])
+
+    def moeda(self, simbolo: str, moedas: Dict[str, str] = None) -> Optional[str]:
+        """Moeda do símbolo (None se for em reais ou desconhecida)"""
+        return (moedas or {}).get(simbolo, MOEDAS_SIMBOLOS.get(simbolo))
+
+    def retornos(self, simbolos: Sequence[str] = None, moedas: Dict[str, str] = None) -> RetornosBRL:
+        """
+        Retornos em reais dos símbolos estrangeiros (padrão: todos do painel
+        com moeda conhecida e câmbio disponível)
+        """
+        if simbolos is None:
+            simbolos = self.painel.simbolos
+        selecionados = [s for s in simbolos if s in self.painel and self.moeda(s, moedas) in self.pares]
+        moedas_ativos = [self.moeda(s, moedas) for s in selecionados]
+        colunas_cambio = np.array([self.moedas.index(m) for m in moedas_ativos], dtype=np.int64)
+
+        precos = preencher_adiante(self.painel.fechamento[:, [self.painel.codigos[s] for s in selecionados]])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            local = precos[1:] / precos[:-1] - 1
+            retornos_cambio = self.cotacoes[1:] / self.cotacoes[:-1] - 1
+        # Antes do início de cada série não há retorno (e não há conversão)
+        local[np.isnan(precos[:-1])] = np.nan
+        cambio = np.nan_to_num(retornos_cambio)[:, colunas_cambio]
+
+        dias = np.diff(self.painel.datas).astype('timedelta64[D]').astype(np.float64)[:, None]
+        juros = np.array([self.juros_moedas.get(m, 0.0) for m in moedas_ativos])
+        premio = ((1 + self.juros_brl / 100) / (1 + juros / 100)) ** (dias / 365.0) - 1
+        return RetornosBRL(selecionados, moedas_ativos, self.painel.datas[1:], local, cambio, premio)
+
+    def painel_em_reais(self, visao: str = 'sem_hedge', moedas: Dict[str, str] = None) -> PainelPrecos:
+        """
+        Painel com os ativos estrangeiros em reais (índice de preço que
+        reproduz os retornos da visão, começando no preço local); os demais
+        símbolos ficam como estão
+        """
+        if visao == 'moeda_local':
+            return self.painel
+        retornos = self.retornos(moedas=moedas)
+        if not retornos.simbolos:
+            return self.painel
+        fechamento = self.painel.fechamento.astype(np.float64, order='F', copy=True)
+        colunas = [self.painel.codigos[s] for s in retornos.simbolos]
+        originais = fechamento[:, colunas]
+        precos = preencher_adiante(originais)
+        primeiros = np.argmax(~np.isnan(precos), axis=0)
+        fatores = np.vstack([np.ones(len(colunas)), 1 + np.nan_to_num(retornos.matriz(visao))])
+        indice = np.cumprod(fatores, axis=0)
+        base = precos[primeiros, np.arange(len(colunas))] / indice[primeiros, np.arange(len(colunas))]
+        convertidos = indice * base
+        # Mantém as lacunas originais (datas sem negociação do ativo)
+        convertidos[np.isnan(originais)] = np.nan
+        fechamento[:, colunas] = convertidos
+        return PainelPrecos(self.painel.datas, self.painel.simbolos,
+                            fechamento.astype(self.painel.fechamento.dtype), self.painel.volume)
@@ -0,0 +1,339 @@
+"""
+Coleta do texto completo dos artigos a partir dos links das notícias.
+
+    FiltroBloom          conjunto probabilístico (NumPy) das URLs já baixadas
+                         ou com erro definitivo (4xx, exceto 408/429);
+                         persiste em estado/urls_visitadas.npz
+    FronteiraURLs        fila persistente de URLs pendentes (estado/fronteira_urls.json);
+                         o que não for baixado numa execução fica para a próxima
+    extrair_texto_principal
+                         remove navegação, scripts e blocos de links e devolve
+                         o texto do bloco com mais parágrafos (estilo readability)
+    ColetorArtigos       baixa a fronteira com aiohttp e concorrência limitada,
+                         passando pelo limitador de taxa e disjuntores; o corpo
+                         de uma URL já baixada vem de `corpos_salvos` (o
+                         índice de notícias), sem novo download
+
+A vazão é limitada pelo limitador por host (limitador_taxa); com a taxa
+padrão de 2 req/s por host, cada site rende até ~120 artigos por minuto.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import aiohttp
+import numpy as np
+from lxml import etree, html as lxml_html
+
+from configuracao import caminho_estado
+from instrumentacao import obter_rastreador
+from registros_noticias import Artigo
+from resiliencia import GerenciadorResiliencia, PoliticaRetentativa
+
+ARQUIVO_BLOOM_PADRAO = caminho_estado('urls_visitadas.npz')
+ARQUIVO_FRONTEIRA_PADRAO = caminho_estado('fronteira_urls.json')
+MAX_TENTATIVAS_URL = 3
+STATUS_TRANSITORIOS = {408, 429}  # 4xx que voltam para a fronteira, como os 5xx
+
+_TAGS_PRESERVADAS = ('html', 'body', 'main', 'article')
+_TAGS_DESCARTADAS = ('script', 'style', 'noscript', 'iframe', 'form', 'nav', 'header', 'footer',
+                     'aside', 'button', 'svg', 'figure')
+_CLASSES_NEGATIVAS = re.compile(
+    r'comment|coment|footer|rodape|sidebar|menu|share|compartilh|related|relacionad|'
+    r'newsletter|promo|banner|publicidade|advert|\bad\b|social|tags|breadcrumb', re.IGNORECASE
+)
+_CLASSES_POSITIVAS = re.compile(r'article|artigo|content|conteudo|entry|post|materia|texto|body|story',
+                                re.IGNORECASE)
+_PARAMETROS_RASTREIO = re.compile(r'^(utm_|fbclid$|gclid$|mc_)')
+
+
+def normalizar_url(url: str) -> str:
+    """Remove fragmento e parâmetros de rastreamento; padroniza esquema e host"""
+    partes = urlparse(url.strip())
+    consulta = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                if not _PARAMETROS_RASTREIO.match(k)]
+    return urlunparse((partes.scheme.lower(), partes.netloc.lower(), partes.path or '/',
+                       partes.params, urlencode(consulta), ''))
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre um array de bits NumPy (hash duplo com BLAKE2b)"""
+
+    def __init__(self, capacidade: int = 200_000, taxa_falsos_positivos: float = 0.001):
+        self.num_bits = max(8, int(-capacidade * np.log(taxa_falsos_positivos) / np.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / capacidade * np.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.quantidade = 0
+
+    def _posicoes(self, item: str) -> np.ndarray:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        i = np.arange(self.num_hashes, dtype=np.uint64)
+        return (np.uint64(h1 % self.num_bits) + i * np.uint64(h2 % self.num_bits)) % np.uint64(self.num_bits)
+
+    def adicionar(self, item: str):
+        posicoes = self._posicoes(item)
+        np.bitwise_or.at(self.bits, posicoes >> np.uint64(3),
+                         (np.uint8(1) << (posicoes & np.uint64(7)).astype(np.uint8)))
+        self.quantidade += 1
+
+    def __contains__(self, item: str) -> bool:
+        posicoes = self._posicoes(item)
+        bytes_ = self.bits[posicoes >> np.uint64(3)]
+        mascaras = np.uint8(1) << (posicoes & np.uint64(7)).astype(np.uint8)
+        return bool(np.all(bytes_ & mascaras))
+
+    def salvar(self, caminho: str):
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(f"{caminho}.tmp", 'wb') as f:
+            np.savez_compressed(f, bits=self.bits, num_bits=self.num_bits,
+                                num_hashes=self.num_hashes, quantidade=self.quantidade)
+        os.replace(f"{caminho}.tmp", caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str, capacidade: int = 200_000,
+                 taxa_falsos_positivos: float = 0.001) -> 'FiltroBloom':
+        """Carrega do disco ou cria um filtro vazio"""
+        filtro = cls(capacidade, taxa_falsos_positivos)
+        try:
+            with np.load(caminho) as dados:
+                filtro.bits = dados['bits'].copy()
+                filtro.num_bits = int(dados['num_bits'])
+                filtro.num_hashes = int(dados['num_hashes'])
+                filtro.quantidade = int(dados['quantidade'])
+        except (OSError, KeyError, ValueError):
+            pass
+        return filtro
+
+
+class FronteiraURLs:
+    """Fila FIFO persistente de URLs a baixar (sem repetições)"""
+
+    def __init__(self, caminho: str = ARQUIVO_FRONTEIRA_PADRAO):
+        self.caminho = caminho
+        self._pendentes: 'OrderedDict[str, Dict]' = OrderedDict()
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    self._pendentes[item['url']] = item
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def __len__(self) -> int:
+        return len(self._pendentes)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._pendentes
+
+    def adicionar(self, url: str, fonte: str = None):
+        if url not in self._pendentes:
+            self._pendentes[url] = {'url': url, 'fonte': fonte, 'tentativas': 0}
+
+    def retirar(self, quantidade: int) -> List[Dict]:
+        """Remove e retorna até `quantidade` URLs, na ordem de chegada"""
+        itens = []
+        while self._pendentes and len(itens) < quantidade:
+            itens.append(self._pendentes.popitem(last=False)[1])
+        return itens
+
+    def devolver(self, item: Dict):
+        """Reenfileira uma URL que falhou, até MAX_TENTATIVAS_URL vezes"""
+        item['tentativas'] = item.get('tentativas', 0) + 1
+        if item['tentativas'] < MAX_TENTATIVAS_URL:
+            self._pendentes[item['url']] = item
+
+    def salvar(self):
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(f"{self.caminho}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(list(self._pendentes.values()), f, ensure_ascii=False)
+        os.replace(f"{self.caminho}.tmp", self.caminho)
+
+
+def _densidade_links(elemento) -> float:
+    texto = elemento.text_content()
+    if not texto:
+        return 0.0
+    texto_links = sum(len(a.text_content()) for a in elemento.iter('a'))
+    return texto_links / len(texto)
+
+
+def _peso_classe(elemento) -> int:
+    rotulo = f"{elemento.get('class', '')} {elemento.get('id', '')}"
+    peso = 0
+    if _CLASSES_NEGATIVAS.search(rotulo):
+        peso -= 25
+    if _CLASSES_POSITIVAS.search(rotulo):
+        peso += 25
+    return peso
+
+
+def extrair_texto_principal(documento: str, tamanho_minimo_paragrafo: int = 25) -> str:
+    """
+    Texto do corpo do artigo, sem menus, rodapé, anúncios e listas de links
+
+    Cada parágrafo pontua seu pai (e metade para o avô) conforme o tamanho e a
+    quantidade de vírgulas; vence o bloco de maior pontuação, ajustada pelas
+    classes/ids e pela densidade de links.
+    """
+    try:
+        raiz = lxml_html.document_fromstring(documento)
+    except (etree.ParserError, ValueError):
+        return ''
+
+    etree.strip_elements(raiz, *_TAGS_DESCARTADAS, with_tail=False)
+    # Remove blocos com cara de boilerplate (comentários, compartilhamento, relacionados...)
+    for elemento in list(raiz.iter()):
+        if not isinstance(elemento.tag, str) or elemento.tag in _TAGS_PRESERVADAS:
+            continue
+        rotulo = f"{elemento.get('class', '')} {elemento.get('id', '')}"
+        if _CLASSES_NEGATIVAS.search(rotulo) and not _CLASSES_POSITIVAS.search(rotulo) \
+                and elemento.getparent() is not None:
+            elemento.drop_tree()
+
+    pontuacoes: Dict = {}
+    for paragrafo in raiz.iter('p'):
+        texto = paragrafo.text_content().strip()
+        if len(texto) < tamanho_minimo_paragrafo:
+            continue
+        pontos = 1 + texto.count(',') + min(len(texto) // 100, 3)
+        pai = paragrafo.getparent()
+        for candidato, fator in ((pai, 1.0), (pai.getparent() if pai is not None else None, 0.5)):
+            if candidato is None:
+                continue
+            if candidato not in pontuacoes:
+                pontuacoes[candidato] = _peso_classe(candidato)
+            pontuacoes[candidato] += pontos * fator
+
+    if not pontuacoes:
+        return ''
+    melhor = max(pontuacoes, key=lambda e: pontuacoes[e] * (1 - _densidade_links(e)))
+
+    paragrafos = []
+    for paragrafo in melhor.iter('p'):
+        texto = ' '.join(paragrafo.text_content().split())
+        if len(texto) >= tamanho_minimo_paragrafo and _densidade_links(paragrafo) < 0.5:
+            paragrafos.append(texto)
+    return '\n'.join(paragrafos)
+
+
+class ColetorArtigos:
+    """Baixa o corpo dos artigos da fronteira com concorrência limitada"""
+
+    def __init__(self, gerenciador: GerenciadorResiliencia = None, concorrencia: int = 8,
+                 caminho_bloom: str = ARQUIVO_BLOOM_PADRAO, caminho_fronteira: str = ARQUIVO_FRONTEIRA_PADRAO,
+                 cabecalhos: Dict[str, str] = None, timeout: float = 15,
+                 corpos_salvos: Callable[[List[str]], Dict[str, str]] = None):
+        """`corpos_salvos(links)` devolve {link: corpo} dos artigos já baixados em outra execução"""
+        self.gerenciador = gerenciador or GerenciadorResiliencia(PoliticaRetentativa())
+        self.concorrencia = concorrencia
+        self.caminho_bloom = caminho_bloom
+        self.visitadas = FiltroBloom.carregar(caminho_bloom)
+        self.fronteira = FronteiraURLs(caminho_fronteira)
+        self.cabecalhos = cabecalhos or {}
+        self.timeout = timeout
+        self.corpos_salvos = corpos_salvos
+
+    def enfileirar(self, artigos: Iterable[Artigo]) -> int:
+        """Põe na fronteira os links ainda não baixados; retorna quantos entraram"""
+        novos = 0
+        for artigo in artigos:
+            if not artigo.link:
+                continue
+            url = normalizar_url(artigo.link)
+            if url in self.visitadas or url in self.fronteira:
+                continue
+            self.fronteira.adicionar(url, str(artigo.fonte))
+            novos += 1
+        return novos
+
+    async def _baixar(self, sessao, item: Dict, semaforo: asyncio.Semaphore,
+                      corpos: Dict[str, str]):
+        async with semaforo:
+            try:
+                status, documento = await self.gerenciador.buscar_texto_async(
+                    sessao, item['url'], timeout=aiohttp.ClientTimeout(total=self.timeout)
+                )
+            except Exception:
+                self.fronteira.devolver(item)
+                return
+        if status != 200:
+            if status >= 500 or status in STATUS_TRANSITORIOS:
+                self.fronteira.devolver(item)
+            else:
+                # 404, 410, 403...: não adianta baixar de novo a cada vez que o link aparecer
+                self.visitadas.adicionar(item['url'])
+            return
+
+        # Parsing fora do loop de eventos para não travar os downloads em andamento
+        texto = await asyncio.get_running_loop().run_in_executor(None, extrair_texto_principal, documento)
+        self.visitadas.adicionar(item['url'])
+        if texto:
+            corpos[item['url']] = texto
+
+    async def coletar_async(self, max_paginas: int = 100) -> Dict[str, str]:
+        """Baixa até `max_paginas` URLs da fronteira; retorna {url normalizada: texto}"""
+        itens = self.fronteira.retirar(max_paginas)
+        corpos: Dict[str, str] = {}
+        if itens:
+            with obter_rastreador().span('coleta.corpos_artigos', urls=len(itens)) as span:
+                semaforo = asyncio.Semaphore(self.concorrencia)
+                async with aiohttp.ClientSession(headers=self.cabecalhos) as sessao:
+                    await asyncio.gather(*(self._baixar(sessao, item, semaforo, corpos) for item in itens))
+                span.definir(itens=len(corpos))
+            obter_rastreador().registrar_itens('corpos_artigos', len(corpos))
+        self.salvar()
+        return corpos
+
+    def coletar(self, artigos: Iterable[Artigo] = (), max_paginas: int = 100) -> Dict[str, str]:
+        """
+        Enfileira os links dos artigos e baixa a fronteira (versão síncrona)
+
+        Links já visitados em outra execução recebem o corpo salvo, quando há.
+        """
+        artigos = list(artigos)
+        self.enfileirar(artigos)
+        corpos = asyncio.run(self.coletar_async(max_paginas))
+        corpos.update(self.corpos_ja_baixados(artigos, corpos))
+        return corpos
+
+    def corpos_ja_baixados(self, artigos: Iterable[Artigo], corpos: Dict[str, str] = None) -> Dict[str, str]:
+        """{url normalizada: texto} dos links já visitados, a partir de `corpos_salvos`"""
+        if self.corpos_salvos is None:
+            return {}
+        corpos = corpos or {}
+        links = {}
+        for artigo in artigos:
+            if not artigo.link:
+                continue
+            url = normalizar_url(artigo.link)
+            if url not in corpos and url in self.visitadas:
+                links[artigo.link] = url
+        if not links:
+            return {}
+        try:
+            salvos = self.corpos_salvos(list(links))
+        except Exception:
+            return {}
+        return {links[link]: corpo for link, corpo in salvos.items() if corpo and link in links}
+
+    def salvar(self):
+        try:
+            self.visitadas.salvar(self.caminho_bloom)
+            self.fronteira.salvar()
+        except OSError:
+            pass
+
+    @staticmethod
+    def corpo_do_artigo(artigo: Artigo, corpos: Dict[str, str]) -> Optional[str]:
+        return corpos.get(normalizar_url(artigo.link)) if artigo.link else None
@@ -0,0 +1,364 @@
+"""
+Ingestão de notícias por feeds RSS/Atom e sitemaps de notícias.
+
+Os feeds são lidos em pedaços direto do corpo da resposta (stream=True) por um
+parser XML incremental; cada item é descartado da árvore logo depois de
+convertido em Artigo e a leitura para assim que `max_itens` é atingido.
+
+Com `apenas_novos`, o coletor guarda por fonte a data do item mais recente
+já visto (e ETag/Last-Modified de cada URL) em estado/estado_feeds.json: itens
+mais antigos são ignorados e, se o servidor responder 304, nada é baixado.
+A data de corte e o ETag só avançam quando o feed foi lido até o fim; se a
+leitura parou em `max_itens`, o corte fica onde estava e as chaves (link ou
+título) dos itens entregues são guardadas, para que a próxima execução
+continue dos itens que ficaram de fora em vez de perdê-los.
+Quando nenhum feed da fonte responde, coletar() retorna None e o chamador
+recorre ao scraping do HTML.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+from configuracao import FontesDados, caminho_estado
+from gravacao_http import obter_gravador
+from instrumentacao import obter_rastreador
+from registros_noticias import Artigo, normalizar_fonte
+
+ARQUIVO_ESTADO_PADRAO = caminho_estado('estado_feeds.json')
+TAMANHO_PEDACO = 16 * 1024
+LIMITE_ITENS_ANTIGOS = 10  # Itens antigos seguidos após os quais a leitura do feed para
+LIMITE_ENTREGUES = 1000    # Chaves de itens entregues guardadas enquanto o corte não avança
+
+# Elementos que representam um item em RSS (item), Atom (entry) e sitemap (url)
+_TAGS_ITEM = {'item', 'entry', 'url'}
+
+
+def _nome_local(tag: str) -> str:
+    """Remove o namespace ('{uri}title' -> 'title')"""
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def interpretar_data(texto: Optional[str]) -> Optional[datetime]:
+    """Converte datas RFC 822 (RSS) ou ISO 8601 (Atom, sitemap) para horário local sem fuso"""
+    if not texto:
+        return None
+    texto = texto.strip()
+    try:
+        data = parsedate_to_datetime(texto)
+    except (TypeError, ValueError, IndexError):
+        data = None
+    if data is None:
+        try:
+            data = datetime.fromisoformat(texto.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if data.tzinfo is not None:
+        data = data.astimezone().replace(tzinfo=None)
+    return data
+
+
+def titulo_do_link(link: str) -> str:
+    """Título aproximado a partir do slug da URL (sitemaps sem news:title)"""
+    slug = [parte for parte in urlparse(link).path.split('/') if parte]
+    if not slug:
+        return ''
+    texto = re.sub(r'\.\w+$', '', unquote(slug[-1]))
+    return re.sub(r'[-_]+', ' ', texto).strip()
+
+
+def _converter_item(elemento) -> Optional[Tuple[str, Optional[str], Optional[datetime]]]:
+    """Extrai (título, link, data) de um item RSS, Atom ou sitemap"""
+    campos: Dict[str, object] = {}
+    for filho in elemento.iter():
+        nome = _nome_local(filho.tag)
+        if nome in campos:
+            continue
+        if nome == 'link' and filho.get('href'):
+            campos[nome] = filho.get('href')
+        elif filho.text and filho.text.strip():
+            campos[nome] = filho.text.strip()
+
+    link = campos.get('link') or campos.get('loc')
+    titulo = campos.get('title') or (titulo_do_link(link) if link else '')
+    if not titulo:
+        return None
+    data = interpretar_data(
+        campos.get('pubDate') or campos.get('published') or campos.get('publication_date')
+        or campos.get('updated') or campos.get('lastmod') or campos.get('date')
+    )
+    return titulo, link, data
+
+
+def extrair_itens_feed(pedacos: Iterable[Union[bytes, str]]) -> Iterator[Tuple[str, Optional[str], Optional[datetime]]]:
+    """
+    Gera (título, link, data) dos itens à medida que os pedaços chegam
+
+    O consumidor pode interromper a iteração a qualquer momento; o restante
+    do corpo não é lido.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for pedaco in pedacos:
+        parser.feed(pedaco)
+        for _, elemento in parser.read_events():
+            if _nome_local(elemento.tag) in _TAGS_ITEM:
+                item = _converter_item(elemento)
+                elemento.clear()
+                if item:
+                    yield item
+    parser.close()
+
+
+class ColetorFeeds:
+    """Coleta itens de feeds RSS/Atom/sitemap das fontes configuradas"""
+
+    def __init__(self, sessao, feeds: Dict[str, List[str]] = None, consumidor: str = 'padrao',
+                 arquivo_estado: str = ARQUIVO_ESTADO_PADRAO, timeout: int = 10, logger=None):
+        self.sessao = sessao
+        self.logger = logger or logging.getLogger('AgenteIA')
+        feeds = feeds if feeds is not None else FontesDados().FEEDS_NOTICIAS
+        self.feeds = {normalizar_fonte(fonte): urls for fonte, urls in feeds.items()}
+        self.consumidor = consumidor
+        self.arquivo_estado = arquivo_estado
+        self.timeout = timeout
+        self._trava = threading.Lock()
+        self._estado = self._carregar_estado()
+
+    # ------------------------------------------------------------------
+    # Estado incremental
+    # ------------------------------------------------------------------
+
+    def _carregar_estado(self) -> Dict:
+        try:
+            with open(self.arquivo_estado, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _salvar_estado(self):
+        pasta = os.path.dirname(self.arquivo_estado)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        temporario = f"{self.arquivo_estado}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._estado, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.arquivo_estado)
+
+    def _chave(self, fonte) -> str:
+        return f"{self.consumidor}:{fonte}"
+
+    def ultima_data(self, fonte) -> Optional[datetime]:
+        """Data do item mais recente já coletado da fonte"""
+        valor = self._estado.get(self._chave(normalizar_fonte(fonte)), {}).get('ultima_data')
+        return datetime.fromisoformat(valor) if valor else None
+
+    def _entregues(self, fonte) -> Dict[str, Optional[str]]:
+        """Itens já entregues depois do corte, numa leitura interrompida em max_itens"""
+        return self._estado.get(self._chave(fonte), {}).get('entregues', {})
+
+    def _cabecalhos_condicionais(self, fonte, url: str) -> Dict[str, str]:
+        validadores = self._estado.get(self._chave(fonte), {}).get('validadores', {}).get(url, {})
+        cabecalhos = {}
+        if validadores.get('etag'):
+            cabecalhos['If-None-Match'] = validadores['etag']
+        if validadores.get('last_modified'):
+            cabecalhos['If-Modified-Since'] = validadores['last_modified']
+        return cabecalhos
+
+    def _atualizar_estado(self, fonte, entregues: Dict[str, Optional[datetime]], validadores: Dict[str, Dict],
+                          completo: bool):
+        """
+        Registra os itens entregues; o corte só avança se todos os feeds
+        da fonte foram lidos até o fim (`completo`)
+        """
+        with self._trava:
+            item = self._estado.setdefault(self._chave(fonte), {})
+            pendentes = dict(item.get('entregues', {}))
+            pendentes.update({chave: data.isoformat() if data else None for chave, data in entregues.items()})
+            if completo:
+                datas = [datetime.fromisoformat(data) for data in pendentes.values() if data]
+                if item.get('ultima_data'):
+                    datas.append(datetime.fromisoformat(item['ultima_data']))
+                if datas:
+                    item['ultima_data'] = max(datas).isoformat()
+                item.pop('entregues', None)
+            else:
+                item['entregues'] = dict(list(pendentes.items())[-LIMITE_ENTREGUES:])
+            item.setdefault('validadores', {}).update(validadores)
+            try:
+                self._salvar_estado()
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Coleta
+    # ------------------------------------------------------------------
+
+    def tem_feed(self, fonte) -> bool:
+        return bool(self.feeds.get(normalizar_fonte(fonte)))
+
+    def _filtrar(self, itens: Iterator, fonte, corte: Optional[datetime], max_itens: int,
+                 vistos: set) -> Tuple[List[Artigo], Dict[str, Optional[datetime]], bool]:
+        """
+        Converte itens em Artigo, ignorando repetidos e anteriores ao corte
+
+        Retorna os artigos, {chave: data de publicação} de cada um e se o
+        feed foi lido até o fim (False quando parou em `max_itens`); `vistos`
+        só é consultado, e o chamador incorpora as chaves depois que o feed
+        foi lido sem erro.
+        """
+        artigos = []
+        chaves: Dict[str, Optional[datetime]] = {}
+        antigos_seguidos = 0
+        for titulo, link, data in itens:
+            if corte and data and data <= corte:
+                antigos_seguidos += 1
+                if antigos_seguidos >= LIMITE_ITENS_ANTIGOS:
+                    break
+                continue
+            antigos_seguidos = 0
+            chave = link or titulo
+            if chave in vistos or chave in chaves:
+                continue
+            chaves[chave] = data
+            artigos.append(Artigo(titulo, fonte, link=link, data_hora=data))
+            if len(artigos) >= max_itens:
+                return artigos, chaves, False
+        return artigos, chaves, True
+
+    def coletar(self, fonte, max_itens: int = 10, apenas_novos: bool = True) -> Optional[List[Artigo]]:
+        """
+        Lê os feeds da fonte, do primeiro ao último, até juntar `max_itens`
+
+        Retorna None se a fonte não tem feed ou nenhum feed pôde ser lido.
+        """
+        fonte = normalizar_fonte(fonte)
+        urls = self.feeds.get(fonte)
+        if not urls:
+            return None
+
+        # Em reprodução o estado é ignorado para manter as execuções determinísticas
+        apenas_novos = apenas_novos and not obter_gravador().reproduzindo
+        corte = self.ultima_data(fonte) if apenas_novos else None
+        rastreador = obter_rastreador()
+        artigos: List[Artigo] = []
+        validadores: Dict[str, Dict] = {}
+        vistos: set = set(self._entregues(fonte)) if apenas_novos else set()
+        entregues: Dict[str, Optional[datetime]] = {}
+        algum_lido = False
+        completo = True
+
+        for url in urls:
+            if len(artigos) >= max_itens:
+                completo = False
+                break
+            host = urlparse(url).netloc
+            cabecalhos = self._cabecalhos_condicionais(fonte, url) if apenas_novos else {}
+            try:
+                with rastreador.span('coleta.feed', fonte=str(fonte), url=url) as span:
+                    resposta = self.sessao.get(url, timeout=self.timeout, stream=True, headers=cabecalhos)
+                    try:
+                        if resposta.status_code == 304:
+                            algum_lido = True
+                            span.definir(status=304, itens=0)
+                            continue
+                        if resposta.status_code != 200:
+                            span.definir(status=resposta.status_code)
+                            completo = False
+                            continue
+
+                        num_bytes = [0]
+
+                        def pedacos():
+                            for pedaco in resposta.iter_content(TAMANHO_PEDACO):
+                                num_bytes[0] += len(pedaco)
+                                yield pedaco
+
+                        novos, chaves, lido_ate_o_fim = self._filtrar(extrair_itens_feed(pedacos()), fonte, corte,
+                                                                      max_itens - len(artigos), vistos)
+                    finally:
+                        resposta.close()
+
+                    artigos.extend(novos)
+                    vistos.update(chaves)
+                    entregues.update(chaves)
+                    algum_lido = True
+                    completo = completo and lido_ate_o_fim
+                    # Com a leitura interrompida, o 304 da próxima execução esconderia o restante
+                    if lido_ate_o_fim and (resposta.headers.get('ETag') or resposta.headers.get('Last-Modified')):
+                        validadores[url] = {
+                            'etag': resposta.headers.get('ETag'),
+                            'last_modified': resposta.headers.get('Last-Modified')
+                        }
+                    span.definir(status=200, itens=len(novos), bytes=num_bytes[0])
+                rastreador.registrar_download(host, num_bytes[0])
+            except Exception as e:
+                self.logger.warning(f"Feed {url} ({fonte}) ignorado: {e}")
+                # Itens não lidos deste feed não podem ficar abaixo do novo corte
+                completo = False
+                continue
+
+        if not algum_lido:
+            return None
+        if apenas_novos:
+            self._atualizar_estado(fonte, entregues, validadores, completo)
+        return artigos
+
+    async def coletar_async(self, sessao_aiohttp, gerenciador, fonte, max_itens: int = 10,
+                            apenas_novos: bool = True, **kwargs) -> Optional[List[Artigo]]:
+        """
+        Versão assíncrona (aiohttp) de coletar(); o feed é baixado inteiro e lido em seguida
+
+        `kwargs` são repassados a gerenciador.buscar_texto_async (ex.: timeout).
+        """
+        fonte = normalizar_fonte(fonte)
+        urls = self.feeds.get(fonte)
+        if not urls:
+            return None
+
+        apenas_novos = apenas_novos and not obter_gravador().reproduzindo
+        corte = self.ultima_data(fonte) if apenas_novos else None
+        artigos: List[Artigo] = []
+        vistos: set = set(self._entregues(fonte)) if apenas_novos else set()
+        entregues: Dict[str, Optional[datetime]] = {}
+        algum_lido = False
+        completo = True
+
+        for url in urls:
+            if len(artigos) >= max_itens:
+                completo = False
+                break
+            try:
+                status, texto = await gerenciador.buscar_texto_async(sessao_aiohttp, url, **kwargs)
+            except Exception as e:
+                self.logger.warning(f"Feed {url} ({fonte}) ignorado: {e}")
+                completo = False
+                continue
+            if status != 200:
+                completo = False
+                continue
+            try:
+                novos, chaves, lido_ate_o_fim = self._filtrar(extrair_itens_feed([texto]), fonte, corte,
+                                                              max_itens - len(artigos), vistos)
+            except ET.ParseError as e:
+                self.logger.warning(f"Feed {url} ({fonte}) com XML inválido: {e}")
+                completo = False
+                continue
+            artigos.extend(novos)
+            vistos.update(chaves)
+            entregues.update(chaves)
+            algum_lido = True
+            completo = completo and lido_ate_o_fim
+
+        if not algum_lido:
+            return None
+        if apenas_novos:
+            self._atualizar_estado(fonte, entregues, {}, completo)
+        return artigos
@@ -1,23 +1,33 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from textblob import TextBlob
+import numpy as np
 import re
 from datetime import datetime, timedelta
 import json
 from typing import List, Dict
 import asyncio
 import aiohttp
-from urllib.parse import urljoin, urlparse
 import time
+from collections import Counter
+
+from coletor_artigos import ColetorArtigos
+from coletor_feeds import ColetorFeeds
+from configuracao import ConfiguracaoAgente
+from entidades_b3 import obter_extrator
+from extratores_html import codificacao_declarada, fatiar_texto, ler_em_pedacos, obter_adaptador
+from indice_noticias import obter_indice
+from instrumentacao import medir, obter_rastreador, rastrear_execucao
+from modelo_sentimento import obter_backend_sentimento
+from registros_noticias import Artigo, FonteNoticia, LoteArtigos, RotuloSentimento, serializar_registro
+from resiliencia import SessaoResiliente
+from sentimento_ativos import obter_agregador
 
 class ColetorWebAvancado:
     """
     Módulo avançado para web scraping e análise de notícias financeiras
     """
     
-    def __init__(self):
-        self.sessao = requests.Session()
+    def __init__(self, tentativas_repetir: int = ConfiguracaoAgente.TENTATIVAS_REPETIR):
+        # Sessão com retentativa/backoff e disjuntor por host
+        self.sessao = SessaoResiliente(tentativas=tentativas_repetir)
         self.sessao.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -27,6 +37,18 @@ class ColetorWebAvancado:
             'Upgrade-Insecure-Requests': '1'
         })
         
+        # Feeds RSS/sitemap têm prioridade; o HTML é só o plano B
+        self.coletor_feeds = ColetorFeeds(self.sessao, consumidor='coletor_web')
+        self.apenas_noticias_novas = ConfiguracaoAgente.NOTICIAS_APENAS_NOVAS
+        
+        # Texto completo dos artigos (mesmo limitador e disjuntores da sessão)
+        self.coletor_artigos = ColetorArtigos(
+            gerenciador=self.sessao.gerenciador,
+            concorrencia=ConfiguracaoAgente.CONCORRENCIA_CORPOS,
+            cabecalhos={chave: self.sessao.headers[chave] for chave in ('User-Agent', 'Accept', 'Accept-Language')},
+            corpos_salvos=self.corpos_indexados
+        )
+        
         # Sites financeiros brasileiros para monitoramento
         self.fontes_financeiras = {
             'infomoney': 'https://www.infomoney.com.br',
@@ -42,45 +64,28 @@ class ColetorWebAvancado:
             'queda', 'baixa', 'desvalorização', 'pessimista', 'crise',
             'oportunidade', 'recomendação', 'compra', 'venda', 'neutro'
         ]
+        
+        # Classificador linear em lote (palavras-chave como plano B)
+        self.backend_sentimento = obter_backend_sentimento(ConfiguracaoAgente.BACKEND_SENTIMENTO)
     
-    def coletar_noticias_infomoney(self, max_artigos: int = 10) -> List[Dict]:
+    @medir('coleta.infomoney', contar_itens=True)
+    def coletar_noticias_infomoney(self, max_artigos: int = 10) -> List[Artigo]:
         """
         Coleta notícias do InfoMoney
         """
         print("📰 Coletando notícias do InfoMoney...")
         
         try:
-            url = "https://www.infomoney.com.br/mercados/"
-            resposta = self.sessao.get(url, timeout=10)
-            soup = BeautifulSoup(resposta.content, 'html.parser')
-            
-            artigos = []
-            elementos_artigo = soup.find_all(['article', 'div'], class_=re.compile(r'.*article.*|.*news.*|.*post.*'))
+            artigos = self.coletor_feeds.coletar(FonteNoticia.INFOMONEY, max_artigos, self.apenas_noticias_novas)
+            if artigos is None:
+                artigos = self._raspar_noticias_infomoney(max_artigos)
             
-            for i, elemento in enumerate(elementos_artigo[:max_artigos]):
-                try:
-                    elemento_titulo = elemento.find(['h1', 'h2', 'h3'], class_=re.compile(r'.*title.*|.*headline.*'))
-                    elemento_link = elemento.find('a', href=True)
-                    
-                    if elemento_titulo and elemento_link:
-                        titulo = elemento_titulo.get_text().strip()
-                        link = urljoin(url, elemento_link['href'])
-                        
-                        # Análise de sentimento básica
-                        sentimento = self.analisar_sentimento(titulo)
-                        
-                        artigos.append({
-                            'titulo': titulo,
-                            'link': link,
-                            'fonte': 'InfoMoney',
-                            'data_hora': datetime.now(),
-                            'sentimento': sentimento,
-                            'pontuacao_relevancia': self.calcular_relevancia(titulo)
-                        })
-                        
-                except Exception as e:
-                    continue
+            for artigo in artigos:
+                artigo.relevancia = self.calcular_relevancia(artigo.titulo)
+            # Análise de sentimento em lote
+            self.pontuar_artigos(artigos)
             
+            obter_rastreador().registrar_itens('InfoMoney', len(artigos))
             print(f"✅ Coletadas {len(artigos)} notícias do InfoMoney")
             return artigos
             
@@ -88,6 +93,138 @@ class ColetorWebAvancado:
             print(f"❌ Erro ao coletar InfoMoney: {str(e)}")
             return []
     
+    def _raspar_noticias_infomoney(self, max_artigos: int) -> List[Artigo]:
+        """
+        Plano B: extrai as notícias do HTML da página de mercados
+        """
+        url = "https://www.infomoney.com.br/mercados/"
+        with self.sessao.get(url, timeout=10, stream=True) as resposta:
+            # Lê a página só até encontrar max_artigos cards
+            itens = obter_adaptador('infomoney_lista').extrair(
+                ler_em_pedacos(resposta), max_artigos, url_base=url,
+                codificacao=codificacao_declarada(resposta)
+            )
+        
+        return [Artigo(titulo, FonteNoticia.INFOMONEY, link=link) for titulo, link in itens if titulo and link]
+    
+    def texto_para_pontuacao(self, artigo: Artigo) -> str:
+        """
+        Título seguido do início do corpo (quando o link já foi seguido)
+        """
+        if not artigo.corpo:
+            return artigo.titulo
+        return f"{artigo.titulo}\n{artigo.corpo[:ConfiguracaoAgente.TAMANHO_TRECHO_CORPO]}"
+    
+    @medir('coleta.corpos')
+    def enriquecer_com_corpos(self, artigos: List[Artigo],
+                              max_paginas: int = ConfiguracaoAgente.MAX_CORPOS_POR_EXECUCAO) -> int:
+        """
+        Segue os links dos artigos, guarda o texto completo e refaz
+        relevância e sentimento com ele; retorna quantos foram enriquecidos
+        """
+        if not artigos:
+            return 0
+        print("📄 Baixando o texto completo dos artigos...")
+        
+        try:
+            corpos = self.coletor_artigos.coletar(artigos, max_paginas)
+        except Exception as e:
+            print(f"❌ Erro ao baixar artigos: {str(e)}")
+            return 0
+        
+        enriquecidos = []
+        for artigo in artigos:
+            corpo = ColetorArtigos.corpo_do_artigo(artigo, corpos)
+            if not corpo:
+                continue
+            artigo.corpo = corpo
+            artigo.relevancia = self.calcular_relevancia(self.texto_para_pontuacao(artigo))
+            enriquecidos.append(artigo)
+        self.pontuar_artigos([artigo for artigo in enriquecidos if artigo.tem_sentimento], com_corpo=True)
+        
+        print(f"✅ Texto completo de {len(enriquecidos)} artigos ({len(self.coletor_artigos.fronteira)} na fila)")
+        return len(enriquecidos)
+    
+    def corpos_indexados(self, links: List[str]) -> Dict[str, str]:
+        """
+        Corpos salvos no índice de busca (links já baixados em outra execução)
+        """
+        if not ConfiguracaoAgente.INDEXAR_NOTICIAS:
+            return {}
+        return obter_indice().corpos(links)
+    
+    def indexar_artigos(self, artigos: List[Artigo]) -> int:
+        """
+        Grava os artigos no índice de busca; retorna quantos eram inéditos
+        """
+        if not ConfiguracaoAgente.INDEXAR_NOTICIAS or not artigos:
+            return 0
+        try:
+            return obter_indice().adicionar(artigos)
+        except Exception as e:
+            print(f"⚠️ Erro ao indexar notícias: {str(e)}")
+            return 0
+    
+    def agregar_sentimento_ativos(self, artigos: List[Artigo]) -> int:
+        """
+        Soma os artigos pontuados ao sentimento por ativo e por setor
+        """
+        if not ConfiguracaoAgente.AGREGAR_SENTIMENTO_ATIVOS or not artigos:
+            return 0
+        try:
+            agregador = obter_agregador()
+            usados = agregador.registrar_artigos(artigos)
+            agregador.salvar()
+            return usados
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar o sentimento por ativo: {str(e)}")
+            return 0
+    
+    def sentimento_por_ativo(self, limite: int = 5) -> Dict:
+        """
+        Ativos e setores com mais evidência recente, com o sentimento decaído
+        """
+        if not ConfiguracaoAgente.AGREGAR_SENTIMENTO_ATIVOS:
+            return {}
+        try:
+            agregador = obter_agregador()
+            meia_vida = ConfiguracaoAgente.MEIA_VIDA_SENTIMENTO_DIAS
+            por_peso = lambda itens: sorted(itens.items(), key=lambda item: item[1]['peso'], reverse=True)[:limite]
+            ativos = {c: v for c, v in agregador.sentimento(meia_vida=meia_vida).items()
+                      if not c.startswith('setor:')}
+            return {
+                'ativos': por_peso(ativos),
+                'setores': por_peso(agregador.sentimento_setores(meia_vida=meia_vida))
+            }
+        except Exception as e:
+            print(f"⚠️ Erro ao consultar o sentimento por ativo: {str(e)}")
+            return {}
+    
+    def historico_sentimento(self, dias: int = ConfiguracaoAgente.JANELA_HISTORICO_DIAS, **filtros) -> Dict:
+        """
+        Sentimento das notícias indexadas nos últimos `dias` (filtros de IndiceNoticias.buscar)
+        """
+        if not ConfiguracaoAgente.INDEXAR_NOTICIAS:
+            return {}
+        try:
+            return obter_indice().resumo_sentimento(inicio=datetime.now() - timedelta(days=dias), **filtros)
+        except Exception as e:
+            print(f"⚠️ Erro ao consultar o índice de notícias: {str(e)}")
+            return {}
+    
+    def temas_em_alta(self, dias: int = ConfiguracaoAgente.JANELA_HISTORICO_DIAS) -> Dict[str, int]:
+        """
+        Palavras-chave mais citadas nas notícias indexadas nos últimos `dias`
+        """
+        if not ConfiguracaoAgente.INDEXAR_NOTICIAS:
+            return {}
+        try:
+            return obter_indice().mencoes(inicio=datetime.now() - timedelta(days=dias))
+        except Exception as e:
+            print(f"⚠️ Erro ao consultar o índice de notícias: {str(e)}")
+            return {}
+    
+    @medir('coleta.investing', contar_itens=True)
     def coletar_dados_investing(self) -> Dict:
         """
         Coleta dados do Investing.com Brasil
@@ -96,40 +233,35 @@ class ColetorWebAvancado:
         
         try:
             url = "https://br.investing.com/indices/bovespa"
-            resposta = self.sessao.get(url, timeout=10)
-            soup = BeautifulSoup(resposta.content, 'html.parser')
+            adaptador = obter_adaptador('investing_cotacao')
+            with self.sessao.get(url, timeout=10, stream=True) as resposta:
+                campos = adaptador.extrair(ler_em_pedacos(resposta), codificacao=codificacao_declarada(resposta))
             
             dados = {}
             
             # Coleta preço atual do Ibovespa
-            elemento_preco = soup.find(['span', 'div'], {'data-test': 'instrument-price-last'})
-            if not elemento_preco:
-                elemento_preco = soup.find(['span', 'div'], class_=re.compile(r'.*price.*|.*last.*'))
-            
-            if elemento_preco:
-                texto_preco = elemento_preco.get_text().strip()
-                dados['preco_ibovespa'] = self.limpar_preco(texto_preco)
+            if 'preco' in campos:
+                dados['preco_ibovespa'] = self.limpar_preco(campos['preco'])
             
             # Coleta variação percentual
-            elemento_variacao = soup.find(['span', 'div'], class_=re.compile(r'.*change.*|.*percent.*'))
-            if elemento_variacao:
-                texto_variacao = elemento_variacao.get_text().strip()
-                dados['variacao_ibovespa'] = self.limpar_porcentagem(texto_variacao)
+            if 'variacao' in campos:
+                dados['variacao_ibovespa'] = self.limpar_porcentagem(campos['variacao'])
             
             # Coleta dados de outros índices
             indices = ['selic', 'cdi', 'dolar', 'euro']
             for indice in indices:
                 try:
                     url_indice = f"https://br.investing.com/rates-bonds/{indice}"
-                    resp = self.sessao.get(url_indice, timeout=5)
-                    soup_indice = BeautifulSoup(resp.content, 'html.parser')
+                    with self.sessao.get(url_indice, timeout=5, stream=True) as resp:
+                        campos_indice = adaptador.extrair(ler_em_pedacos(resp), campos=['preco'],
+                                                          codificacao=codificacao_declarada(resp))
                     
-                    elemento_preco = soup_indice.find(['span', 'div'], {'data-test': 'instrument-price-last'})
-                    if elemento_preco:
-                        dados[f'taxa_{indice}'] = self.limpar_preco(elemento_preco.get_text().strip())
+                    if 'preco' in campos_indice:
+                        dados[f'taxa_{indice}'] = self.limpar_preco(campos_indice['preco'])
                 except:
                     continue
             
+            obter_rastreador().registrar_itens('Investing', len(dados))
             print(f"✅ Dados coletados do Investing: {list(dados.keys())}")
             return dados
             
@@ -137,7 +269,8 @@ class ColetorWebAvancado:
             print(f"❌ Erro ao coletar Investing: {str(e)}")
             return {}
     
-    def coletar_recomendacoes_suno(self) -> List[Dict]:
+    @medir('coleta.suno', contar_itens=True)
+    def coletar_recomendacoes_suno(self) -> List[Artigo]:
         """
         Coleta recomendações da Suno Research
         """
@@ -145,33 +278,29 @@ class ColetorWebAvancado:
         
         try:
             url = "https://www.suno.com.br/artigos/"
-            resposta = self.sessao.get(url, timeout=10)
-            soup = BeautifulSoup(resposta.content, 'html.parser')
+            with self.sessao.get(url, timeout=10, stream=True) as resposta:
+                itens = obter_adaptador('suno_lista').extrair(
+                    ler_em_pedacos(resposta), 5, url_base=url, codificacao=codificacao_declarada(resposta)
+                )
             
             recomendacoes = []
-            elementos_artigo = soup.find_all(['div', 'article'], class_=re.compile(r'.*card.*|.*article.*|.*post.*'))
-            
-            for elemento in elementos_artigo[:5]:
+            for titulo, link in itens:
                 try:
-                    elemento_titulo = elemento.find(['h1', 'h2', 'h3', 'a'])
-                    if elemento_titulo:
-                        titulo = elemento_titulo.get_text().strip()
-                        
+                    if titulo:
                         # Identifica se é recomendação de compra/venda
                         tipo_recomendacao = self.identificar_tipo_recomendacao(titulo)
                         
                         if tipo_recomendacao != 'neutro':
-                            recomendacoes.append({
-                                'titulo': titulo,
-                                'tipo': tipo_recomendacao,
-                                'fonte': 'Suno Research',
-                                'confianca': self.calcular_confianca(titulo),
-                                'data_hora': datetime.now()
-                            })
+                            recomendacoes.append(Artigo(
+                                titulo, FonteNoticia.SUNO, link=link,
+                                tipo_recomendacao=tipo_recomendacao,
+                                confianca=self.calcular_confianca(titulo)
+                            ))
                             
                 except Exception as e:
                     continue
             
+            obter_rastreador().registrar_itens('Suno Research', len(recomendacoes))
             print(f"✅ Coletadas {len(recomendacoes)} recomendações da Suno")
             return recomendacoes
             
@@ -181,41 +310,29 @@ class ColetorWebAvancado:
     
     def analisar_sentimento(self, texto: str) -> Dict:
         """
-        Análise de sentimento usando TextBlob e palavras-chave
+        Análise de sentimento de um texto (backend configurado)
         """
         try:
-            # Análise com TextBlob
-            blob = TextBlob(texto)
-            polaridade = blob.sentiment.polarity
-            
-            # Análise com palavras-chave
-            texto_minusculo = texto.lower()
-            palavras_positivas = ['alta', 'subida', 'valorização', 'crescimento', 'otimista', 'oportunidade', 'compra', 'lucro']
-            palavras_negativas = ['queda', 'baixa', 'desvalorização', 'pessimista', 'crise', 'venda', 'prejuízo', 'risco']
-            
-            contagem_positiva = sum(1 for palavra in palavras_positivas if palavra in texto_minusculo)
-            contagem_negativa = sum(1 for palavra in palavras_negativas if palavra in texto_minusculo)
-            
-            # Combina análises
-            if polaridade > 0.1 or contagem_positiva > contagem_negativa:
-                sentimento = 'positivo'
-                pontuacao = max(polaridade, (contagem_positiva - contagem_negativa) / 10)
-            elif polaridade < -0.1 or contagem_negativa > contagem_positiva:
-                sentimento = 'negativo' 
-                pontuacao = min(polaridade, (contagem_negativa - contagem_positiva) / -10)
-            else:
-                sentimento = 'neutro'
-                pontuacao = polaridade
-            
-            return {
-                'sentimento': sentimento,
-                'pontuacao': pontuacao,
-                'confianca': abs(pontuacao)
-            }
-            
+            return self.backend_sentimento.analisar(texto)
         except Exception as e:
             return {'sentimento': 'neutro', 'pontuacao': 0, 'confianca': 0}
     
+    def pontuar_artigos(self, artigos: List[Artigo], com_corpo: bool = False):
+        """
+        Classifica o sentimento dos artigos em uma única chamada ao backend
+        """
+        if not artigos:
+            return
+        textos = [self.texto_para_pontuacao(a) if com_corpo else a.titulo for a in artigos]
+        try:
+            resultado = self.backend_sentimento.pontuar_lote(textos)
+        except Exception as e:
+            print(f"⚠️ Erro na análise de sentimento: {str(e)}")
+            return
+        for artigo, rotulo, pontuacao, confianca in zip(artigos, resultado['rotulo'], resultado['pontuacao'],
+                                                        resultado['confianca']):
+            artigo.definir_sentimento({'sentimento': rotulo, 'pontuacao': pontuacao, 'confianca': confianca})
+    
     def calcular_relevancia(self, texto: str) -> float:
         """
         Calcula relevância do texto para investimentos
@@ -304,6 +421,7 @@ class ColetorWebAvancado:
         except:
             return 0.0
     
+    @medir('coleta.multiplas_fontes')
     async def coletar_multiplas_fontes_async(self, fontes: List[str]) -> Dict:
         """
         Coleta dados de múltiplas fontes de forma assíncrona
@@ -312,24 +430,28 @@ class ColetorWebAvancado:
         
         async def buscar_fonte(sessao, url, nome_fonte):
             try:
-                async with sessao.get(url, timeout=10) as resposta:
-                    conteudo = await resposta.text()
-                    soup = BeautifulSoup(conteudo, 'html.parser')
-                    
-                    # Extrai títulos e links principais
-                    artigos = []
-                    for elemento in soup.find_all(['h1', 'h2', 'h3'])[:5]:
-                        titulo = elemento.get_text().strip()
-                        if len(titulo) > 20:  # Filtra títulos muito curtos
-                            artigos.append({
-                                'titulo': titulo,
-                                'fonte': nome_fonte,
-                                'sentimento': self.analisar_sentimento(titulo),
-                                'relevancia': self.calcular_relevancia(titulo)
-                            })
-                    
-                    return {nome_fonte: artigos}
+                timeout = aiohttp.ClientTimeout(total=10)
+                artigos = await self.coletor_feeds.coletar_async(
+                    sessao, self.sessao.gerenciador, nome_fonte, 5, self.apenas_noticias_novas, timeout=timeout
+                )
+                
+                if artigos is None:
+                    _, conteudo = await self.sessao.gerenciador.buscar_texto_async(sessao, url, timeout=timeout)
                     
+                    # Extrai os títulos principais (para após os 5 primeiros)
+                    manchetes = obter_adaptador('manchetes').extrair(fatiar_texto(conteudo), 5)
+                    artigos = [
+                        Artigo(titulo, nome_fonte) for titulo, _ in manchetes
+                        if len(titulo) > 20  # Filtra títulos muito curtos
+                    ]
+                
+                for artigo in artigos:
+                    artigo.relevancia = self.calcular_relevancia(artigo.titulo)
+                self.pontuar_artigos(artigos)
+                
+                obter_rastreador().registrar_itens(nome_fonte, len(artigos))
+                return {nome_fonte: artigos}
+                
             except Exception as e:
                 print(f"❌ Erro ao coletar {nome_fonte}: {str(e)}")
                 return {nome_fonte: []}
@@ -347,9 +469,14 @@ class ColetorWebAvancado:
         for resultado in resultados:
             dados_consolidados.update(resultado)
         
+        coletados = [artigo for artigos in dados_consolidados.values() for artigo in artigos]
+        self.indexar_artigos(coletados)
+        self.agregar_sentimento_ativos(coletados)
+        
         return dados_consolidados
     
-    def gerar_relatorio_sentimento_mercado(self, dados_noticias: List[Dict]) -> Dict:
+    @medir('analise.sentimento_mercado')
+    def gerar_relatorio_sentimento_mercado(self, dados_noticias: List[Artigo]) -> Dict:
         """
         Gera relatório de sentimento do mercado
         """
@@ -358,20 +485,12 @@ class ColetorWebAvancado:
         if not dados_noticias:
             return {'sentimento_geral': 'neutro', 'confianca': 0}
         
-        sentimentos = []
-        pesos_relevancia = []
-        
-        for artigo in dados_noticias:
-            dados_sentimento = artigo.get('sentimento', {})
-            if dados_sentimento:
-                sentimentos.append(dados_sentimento.get('pontuacao', 0))
-                pesos_relevancia.append(artigo.get('relevancia', 0.5))
-        
-        if not sentimentos:
-            return {'sentimento_geral': 'neutro', 'confianca': 0}
+        lote = dados_noticias if isinstance(dados_noticias, LoteArtigos) else LoteArtigos.de_artigos(dados_noticias)
         
         # Calcula sentimento ponderado pela relevância
-        sentimento_ponderado = sum(s * w for s, w in zip(sentimentos, pesos_relevancia)) / sum(pesos_relevancia)
+        sentimento_ponderado = lote.sentimento_ponderado()
+        if sentimento_ponderado is None:
+            return {'sentimento_geral': 'neutro', 'confianca': 0}
         
         # Determina sentimento geral
         if sentimento_ponderado > 0.1:
@@ -382,21 +501,24 @@ class ColetorWebAvancado:
             sentimento_geral = 'neutro'
         
         # Análise por categoria
-        artigos_positivos = [a for a in dados_noticias if a.get('sentimento', {}).get('sentimento') == 'positivo']
-        artigos_negativos = [a for a in dados_noticias if a.get('sentimento', {}).get('sentimento') == 'negativo']
+        indices_positivos = np.flatnonzero(lote.mascara_rotulo(RotuloSentimento.POSITIVO))
+        indices_negativos = np.flatnonzero(lote.mascara_rotulo(RotuloSentimento.NEGATIVO))
         
         return {
             'sentimento_geral': sentimento_geral,
             'pontuacao_sentimento': sentimento_ponderado,
             'confianca': abs(sentimento_ponderado),
-            'total_artigos': len(dados_noticias),
-            'artigos_positivos': len(artigos_positivos),
-            'artigos_negativos': len(artigos_negativos),
-            'artigos_neutros': len(dados_noticias) - len(artigos_positivos) - len(artigos_negativos),
-            'top_positivos': artigos_positivos[:3],
-            'top_negativos': artigos_negativos[:3]
+            'total_artigos': len(lote),
+            'artigos_positivos': len(indices_positivos),
+            'artigos_negativos': len(indices_negativos),
+            'artigos_neutros': len(lote) - len(indices_positivos) - len(indices_negativos),
+            'top_positivos': [lote[i] for i in indices_positivos[:3]],
+            'top_negativos': [lote[i] for i in indices_negativos[:3]],
+            'historico': self.historico_sentimento(),
+            'por_ativo': self.sentimento_por_ativo()
         }
     
+    @rastrear_execucao('analise_abrangente')
     def executar_analise_abrangente(self) -> Dict:
         """
         Executa análise abrangente coletando dados de múltiplas fontes
@@ -424,12 +546,20 @@ class ColetorWebAvancado:
         recomendacoes_suno = self.coletar_recomendacoes_suno()
         resultados['recomendacoes'].extend(recomendacoes_suno)
         
-        # 4. Gera relatório de sentimento
+        # 4. Segue os links para pontuar pelo texto completo, não só pelo título
+        if ConfiguracaoAgente.SEGUIR_LINKS_ARTIGOS:
+            self.enriquecer_com_corpos(resultados['dados_noticias'] + resultados['recomendacoes'])
+        
+        # 5. Indexa para consultas futuras (o histórico do relatório já inclui esta coleta)
+        self.indexar_artigos(resultados['dados_noticias'] + resultados['recomendacoes'])
+        self.agregar_sentimento_ativos(resultados['dados_noticias'])
+        
+        # 6. Gera relatório de sentimento
         todos_artigos = resultados['dados_noticias'] + resultados['recomendacoes']
         relatorio_sentimento = self.gerar_relatorio_sentimento_mercado(todos_artigos)
         resultados['relatorio_sentimento'] = relatorio_sentimento
         
-        # 5. Salva resultados
+        # 7. Salva resultados
         self.salvar_resultados(resultados)
         
         print("\n" + "=" * 60)
@@ -440,6 +570,7 @@ class ColetorWebAvancado:
         
         return resultados
     
+    @medir('saida.salvar_resultados')
     def salvar_resultados(self, resultados: Dict):
         """
         Salva resultados em arquivos JSON e CSV
@@ -449,23 +580,17 @@ class ColetorWebAvancado:
         # Salva em JSON
         nome_arquivo_json = f'analise_mercado_{marca_tempo}.json'
         with open(nome_arquivo_json, 'w', encoding='utf-8') as f:
-            # Converte datetime para string para serialização JSON
+            # Converte datetime e registros Artigo para serialização JSON
             copia_resultados = resultados.copy()
             copia_resultados['data_hora'] = copia_resultados['data_hora'].isoformat()
+            copia_resultados['dados_noticias'] = LoteArtigos.de_artigos(resultados['dados_noticias']).para_registros()
+            copia_resultados['recomendacoes'] = LoteArtigos.de_artigos(resultados['recomendacoes']).para_registros()
             
-            for artigo in copia_resultados['dados_noticias']:
-                if 'data_hora' in artigo:
-                    artigo['data_hora'] = artigo['data_hora'].isoformat()
-            
-            for rec in copia_resultados['recomendacoes']:
-                if 'data_hora' in rec:
-                    rec['data_hora'] = rec['data_hora'].isoformat()
-            
-            json.dump(copia_resultados, f, ensure_ascii=False, indent=2)
+            json.dump(copia_resultados, f, ensure_ascii=False, indent=2, default=serializar_registro)
         
         # Salva notícias em CSV
         if resultados['dados_noticias']:
-            df_noticias = pd.DataFrame(resultados['dados_noticias'])
+            df_noticias = LoteArtigos.de_artigos(resultados['dados_noticias']).para_dataframe()
             nome_arquivo_csv = f'dados_noticias_{marca_tempo}.csv'
             df_noticias.to_csv(nome_arquivo_csv, index=False, encoding='utf-8')
             print(f"📁 Dados salvos: {nome_arquivo_json}, {nome_arquivo_csv}")
@@ -483,6 +608,7 @@ class AgenteInvestimentosAprimorado:
         self.agente_base = AgenteIAInvestimentos()
         self.coletor_web = ColetorWebAvancado()
     
+    @rastrear_execucao('analise_aprimorada')
     def executar_analise_aprimorada(self, perfil_risco: str = 'moderado'):
         """
         Executa análise completa com dados web atualizados
@@ -509,7 +635,7 @@ class AgenteInvestimentosAprimorado:
         
         return resultados_aprimorados
     
-    def extrair_insights_investimento(self, dados_noticias: List[Dict]) -> Dict:
+    def extrair_insights_investimento(self, dados_noticias: List[Artigo]) -> Dict:
         """
         Extrai insights de investimento das notícias
         """
@@ -519,38 +645,38 @@ class AgenteInvestimentosAprimorado:
             'alertas_risco': []
         }
         
-        # Analisa títulos para identificar ativos em tendência
-        mencoes_ativos = {}
+        # Analisa os textos para identificar ativos em tendência
+        extrator = obter_extrator()
+        mencoes_ativos = Counter()
         palavras_risco = ['risco', 'crise', 'queda', 'volatilidade', 'incerteza']
         
         for artigo in dados_noticias:
-            titulo = artigo.get('titulo', '').lower()
+            titulo = artigo.titulo.lower()
             
-            # Conta menções de ativos específicos
-            ativos = ['petrobras', 'vale', 'itau', 'bradesco', 'bitcoin', 'dolar']
-            for ativo in ativos:
-                if ativo in titulo:
-                    mencoes_ativos[ativo] = mencoes_ativos.get(ativo, 0) + 1
+            # Ativos da B3 citados por ticker ou nome (cada artigo conta uma vez por ativo)
+            mencoes_ativos.update(extrator.tickers(f"{artigo.titulo}\n{artigo.corpo or ''}"))
             
             # Identifica alertas de risco
             if any(palavra in titulo for palavra in palavras_risco):
-                insights['alertas_risco'].append(artigo['titulo'])
+                insights['alertas_risco'].append(artigo.titulo)
         
         # Ativos mais mencionados
-        insights['ativos_tendencia'] = sorted(mencoes_ativos.items(), 
-                                           key=lambda x: x[1], reverse=True)[:5]
+        insights['ativos_tendencia'] = mencoes_ativos.most_common(5)
+        
+        # Temas mais citados no histórico indexado (não só nesta coleta)
+        insights['temas_mercado'] = list(self.coletor_web.temas_em_alta().items())[:5]
         
         return insights
     
-    def resumir_recomendacoes(self, recomendacoes: List[Dict]) -> Dict:
+    def resumir_recomendacoes(self, recomendacoes: List[Artigo]) -> Dict:
         """
         Sumariza recomendações coletadas
         """
         if not recomendacoes:
             return {'sinais_compra': 0, 'sinais_venda': 0, 'sinais_neutros': 0}
         
-        contagem_compra = sum(1 for rec in recomendacoes if rec.get('tipo') == 'compra')
-        contagem_venda = sum(1 for rec in recomendacoes if rec.get('tipo') == 'venda')
+        contagem_compra = sum(1 for rec in recomendacoes if rec.tipo_recomendacao == 'compra')
+        contagem_venda = sum(1 for rec in recomendacoes if rec.tipo_recomendacao == 'venda')
         contagem_neutro = len(recomendacoes) - contagem_compra - contagem_venda
         
         return {
@@ -559,9 +685,10 @@ class AgenteInvestimentosAprimorado:
             'sinais_venda': contagem_venda,
             'sinais_neutros': contagem_neutro,
             'proporcao_compra': contagem_compra / len(recomendacoes) if recomendacoes else 0,
-            'media_confianca': sum(rec.get('confianca', 0) for rec in recomendacoes) / len(recomendacoes)
+            'media_confianca': sum(rec.confianca or 0 for rec in recomendacoes) / len(recomendacoes)
         }
     
+    @medir('saida.relatorio_aprimorado')
     def gerar_relatorio_aprimorado(self, resultados: Dict):
         """
         Gera relatório aprimorado com dados web
@@ -597,11 +724,37 @@ Confiança: {resultados['sentimento_mercado'].get('confianca', 0):.2f}
         for ativo, mencoes in resultados['insights_noticias'].get('ativos_tendencia', [])[:5]:
             relatorio += f"• {ativo.upper()}: {mencoes} menções\n"
         
+        historico = resultados['sentimento_mercado'].get('historico') or {}
+        if historico.get('total'):
+            pontuacao_media = historico.get('pontuacao_media')
+            relatorio += f"""
+📚 HISTÓRICO ({ConfiguracaoAgente.JANELA_HISTORICO_DIAS} DIAS, ÍNDICE DE NOTÍCIAS):
+• Artigos com sentimento: {historico['total']}
+• Positivos/negativos/neutros: {historico['positivo']}/{historico['negativo']}/{historico['neutro']}
+• Pontuação média: {f'{pontuacao_media:.3f}' if pontuacao_media is not None else 'N/A'}
+"""
+        
+        por_ativo = resultados['sentimento_mercado'].get('por_ativo') or {}
+        if por_ativo.get('ativos') or por_ativo.get('setores'):
+            relatorio += f"\n🏷️ SENTIMENTO POR ATIVO (MEIA-VIDA DE {ConfiguracaoAgente.MEIA_VIDA_SENTIMENTO_DIAS:g} DIAS):\n"
+            for ativo, valores in por_ativo.get('ativos', []):
+                relatorio += f"• {ativo}: {valores['sentimento']:+.3f} ({valores['artigos']} artigos)\n"
+            for setor, valores in por_ativo.get('setores', []):
+                relatorio += f"• Setor {setor}: {valores['sentimento']:+.3f} ({valores['artigos']} artigos)\n"
+        
+        temas = resultados['insights_noticias'].get('temas_mercado', [])
+        if temas:
+            relatorio += "\n🗂️ TEMAS EM ALTA:\n"
+            for tema, quantidade in temas:
+                relatorio += f"• {tema.upper()}: {quantidade} artigos\n"
+        
         relatorio += f"""
 
 ⚠️ ALERTAS DE RISCO IDENTIFICADOS:
 """
         
+        for alerta in resultados.get('alertas', [])[:10]:
+            relatorio += f"• 🚨 {alerta.mensagem}\n"
         for alerta in resultados['insights_noticias'].get('alertas_risco', [])[:3]:
             relatorio += f"• {alerta}\n"
         
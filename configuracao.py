@@ -2,6 +2,16 @@ import os
 from dataclasses import dataclass
 from typing import Dict, List
 
+# Estado de execução (índice, caches, filtros de Bloom, alertas disparados) fica fora de dados/,
+# que só guarda arquivos versionados; lido na importação, altere com AGENTE_DIRETORIO_ESTADO
+DIRETORIO_ESTADO = os.environ.get('AGENTE_DIRETORIO_ESTADO', 'estado')
+
+
+def caminho_estado(nome_arquivo: str) -> str:
+    """Caminho de um arquivo de estado de execução dentro de DIRETORIO_ESTADO"""
+    return os.path.join(DIRETORIO_ESTADO, nome_arquivo)
+
+
 @dataclass
 class ConfiguracaoAgente:
     """Configurações do agente de IA"""
@@ -11,6 +21,17 @@ class ConfiguracaoAgente:
     MAX_ARTIGOS_POR_FONTE: int = 10
     TIMEOUT_REQUISICAO: int = 10
     TENTATIVAS_REPETIR: int = 3
+    NOTICIAS_APENAS_NOVAS: bool = False  # Feeds: ignora itens já vistos (o relatório traz só as novidades)
+    SEGUIR_LINKS_ARTIGOS: bool = True   # Baixa o texto completo das notícias para a pontuação
+    MAX_CORPOS_POR_EXECUCAO: int = 50   # O restante fica na fronteira para a próxima execução
+    CONCORRENCIA_CORPOS: int = 8
+    TAMANHO_TRECHO_CORPO: int = 1500    # Caracteres do corpo usados no sentimento/relevância
+    INDEXAR_NOTICIAS: bool = True       # Grava as notícias no índice de busca (estado/noticias.db)
+    JANELA_HISTORICO_DIAS: int = 7      # Janela do histórico consultado no índice pelos relatórios
+    AGREGAR_SENTIMENTO_ATIVOS: bool = True  # Sentimento por ativo/setor em estado/sentimento_ativos.json
+    MEIA_VIDA_SENTIMENTO_DIAS: float = 7.0  # Uma das meias-vidas de sentimento_ativos (1, 7 ou 30)
+    # 'linear' (modelo versionado em dados/modelo_sentimento.joblib) ou 'palavras_chave' (TextBlob)
+    BACKEND_SENTIMENTO: str = 'linear'
     
     # Configurações de análise
     PONTUACAO_MIN_RELEVANCIA: float = 0.3
@@ -55,6 +76,7 @@ class FontesDados:
     """URLs e configurações das fontes de dados"""
     
     SITES_FINANCEIROS: Dict[str, str] = None
+    FEEDS_NOTICIAS: Dict[str, List[str]] = None
     APIS_DADOS_MERCADO: Dict[str, str] = None
     PALAVRAS_CHAVE_NOTICIAS: List[str] = None
     
@@ -72,6 +94,24 @@ class FontesDados:
                 'toro_investimentos': 'https://blog.toroinvestimentos.com.br/'
             }
         
+        if self.FEEDS_NOTICIAS is None:
+            # RSS/Atom ou sitemaps de notícias, em ordem de preferência
+            self.FEEDS_NOTICIAS = {
+                'infomoney': [
+                    'https://www.infomoney.com.br/mercados/feed/',
+                    'https://www.infomoney.com.br/feed/'
+                ],
+                'valor_economico': [
+                    'https://pox.globo.com/rss/valor/financas',
+                    'https://valor.globo.com/sitemap/valor/news.xml'
+                ],
+                'investing_brasil': ['https://br.investing.com/rss/news.rss'],
+                'suno_research': ['https://www.suno.com.br/noticias/feed/'],
+                'xp_research': ['https://conteudos.xpi.com.br/feed/'],
+                'rico_research': ['https://www.rico.com.br/blog/feed/'],
+                'toro_investimentos': ['https://blog.toroinvestimentos.com.br/feed/']
+            }
+        
         if self.APIS_DADOS_MERCADO is None:
             self.APIS_DADOS_MERCADO = {
                 'yahoo_finance': 'https://finance.yahoo.com/',
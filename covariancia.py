@@ -0,0 +1,242 @@
+"""
+Covariância de retornos para muitos ativos sem matriz N × N.
+
+Os dois estimadores devolvem a mesma forma "diagonal + posto baixo":
+
+    Σ = B Bᵀ + diag(d)        B: N × K,  d: N
+
+    ledoit_wolf     encolhimento da covariância amostral para μ·I
+                    (Ledoit & Wolf, 2004): B = √((1-δ)/T) Xᵀ e d = δ·μ,
+                    com K = T pregões; a intensidade δ sai da matriz de
+                    Gram do lado menor, sem formar a covariância
+    modelo_fatores  PCA estatística com K fatores (SVD aleatorizada dos
+                    retornos) e risco específico diagonal: B = V_K·s_K/√T
+                    e d = var(x) - Σ B²
+
+Guardar B e d custa O(N·K); Σv custa O(N·K) e Σ⁻¹v também (identidade de
+Woodbury, com um sistema K × K). Para 5.000 ativos e 10 fatores o risco de
+uma carteira é uma multiplicação de 5.000 × 10, ou seja, microssegundos.
+A matriz densa só é montada sob demanda para subconjuntos (correlacao).
+
+Os retornos saem do PainelPrecos: preços ausentes (feriados locais, fins de
+semana do bitcoin) repetem o último fechamento, então o retorno do dia vale
+zero e o movimento aparece no pregão seguinte.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sklearn.utils.extmath import randomized_svd
+
+from calendario_b3 import DIAS_UTEIS_ANO
+from indicadores_tecnicos import preencher_adiante
+from painel_precos import PainelPrecos
+
+# Fração da variância total abaixo da qual o risco específico é limitado
+PISO_RISCO_ESPECIFICO = 1e-4
+
+Pesos = Union[Dict[str, float], np.ndarray]
+
+
+def retornos_do_painel(painel: PainelPrecos, minimo_observacoes: int = 20) -> Tuple[np.ndarray, List[str]]:
+    """
+    Retornos diários centrados (T × N, float64) e os símbolos mantidos
+
+    Símbolos com menos de `minimo_observacoes` retornos válidos ficam de
+    fora; antes do primeiro preço de um símbolo o retorno é zero.
+    """
+    # Repete o último fechamento nas datas sem negociação
+    precos = preencher_adiante(painel.fechamento)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retornos = precos[1:] / precos[:-1] - 1
+    mascara = np.isfinite(retornos)
+    observacoes = mascara.sum(axis=0)
+    manter = observacoes >= minimo_observacoes
+
+    retornos = np.where(mascara, retornos, 0.0)[:, manter]
+    medias = retornos.sum(axis=0) / observacoes[manter]
+    retornos -= medias
+    retornos[~mascara[:, manter]] = 0.0
+    return retornos, [s for s, m in zip(painel.simbolos, manter) if m]
+
+
+class CovarianciaBaixoPosto:
+    """Covariância diária Σ = B Bᵀ + diag(d) indexada por símbolo"""
+
+    def __init__(self, simbolos: Sequence[str], cargas: np.ndarray, especificas: np.ndarray,
+                 metodo: str, **detalhes):
+        if cargas.shape[0] != len(simbolos) or especificas.shape != (len(simbolos),):
+            raise ValueError("Dimensões de cargas/riscos específicos inconsistentes com os símbolos")
+        self.simbolos = list(simbolos)
+        self.codigos: Dict[str, int] = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+        self.cargas = np.ascontiguousarray(cargas, dtype=np.float64)
+        self.especificas = np.asarray(especificas, dtype=np.float64)
+        self.metodo = metodo
+        self.detalhes = detalhes
+        self._nucleo_woodbury: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.simbolos)
+
+    def __contains__(self, simbolo: str) -> bool:
+        return simbolo in self.codigos
+
+    @property
+    def num_fatores(self) -> int:
+        return self.cargas.shape[1]
+
+    def memoria_bytes(self) -> int:
+        return self.cargas.nbytes + self.especificas.nbytes
+
+    def vetor_pesos(self, pesos: Pesos) -> np.ndarray:
+        """Converte {símbolo: peso} no vetor alinhado a `simbolos` (ausentes valem zero)"""
+        if isinstance(pesos, dict):
+            vetor = np.zeros(len(self.simbolos))
+            for simbolo, peso in pesos.items():
+                if simbolo not in self.codigos:
+                    raise KeyError(f"Símbolo sem covariância estimada: {simbolo}")
+                vetor[self.codigos[simbolo]] = peso
+            return vetor
+        vetor = np.asarray(pesos, dtype=np.float64)
+        if vetor.shape[0] != len(self.simbolos):
+            raise ValueError(f"Esperados {len(self.simbolos)} pesos, recebidos {vetor.shape[0]}")
+        return vetor
+
+    # ------------------------------------------------------------------
+    # Álgebra
+    # ------------------------------------------------------------------
+
+    def produto(self, v: np.ndarray) -> np.ndarray:
+        """Σv para um vetor (N) ou várias colunas (N × P), em O(N·K) por coluna"""
+        v = np.asarray(v, dtype=np.float64)
+        especificas = self.especificas if v.ndim == 1 else self.especificas[:, None]
+        return self.cargas @ (self.cargas.T @ v) + especificas * v
+
+    def resolver(self, v: np.ndarray) -> np.ndarray:
+        """Σ⁻¹v pela identidade de Woodbury (sistema K × K fatorado uma vez)"""
+        v = np.asarray(v, dtype=np.float64)
+        inversas = 1.0 / self.especificas
+        if v.ndim > 1:
+            inversas = inversas[:, None]
+        if self._nucleo_woodbury is None:
+            # I + Bᵀ D⁻¹ B, guardado já fatorado por Cholesky
+            nucleo = np.eye(self.num_fatores) + self.cargas.T @ (self.cargas / self.especificas[:, None])
+            self._nucleo_woodbury = np.linalg.cholesky(nucleo)
+        z = inversas * v
+        fator = self._nucleo_woodbury
+        y = np.linalg.solve(fator.T, np.linalg.solve(fator, self.cargas.T @ z))
+        return z - inversas * (self.cargas @ y)
+
+    def variancias(self) -> np.ndarray:
+        """Diagonal de Σ (variâncias diárias)"""
+        return np.einsum('ik,ik->i', self.cargas, self.cargas) + self.especificas
+
+    def volatilidades(self, anualizar: bool = True) -> np.ndarray:
+        escala = np.sqrt(DIAS_UTEIS_ANO) if anualizar else 1.0
+        return np.sqrt(self.variancias()) * escala
+
+    def risco_carteira(self, pesos: Pesos, anualizar: bool = True) -> Union[float, np.ndarray]:
+        """
+        Volatilidade √(wᵀΣw) da carteira (ou de cada coluna de uma matriz N × P)
+
+        Usa ‖Bᵀw‖² + Σ d·w², sem passar por Σ.
+        """
+        w = self.vetor_pesos(pesos) if isinstance(pesos, dict) else np.asarray(pesos, dtype=np.float64)
+        expostos = self.cargas.T @ w
+        especificas = self.especificas if w.ndim == 1 else self.especificas[:, None]
+        variancia = (expostos * expostos).sum(axis=0) + (especificas * w * w).sum(axis=0)
+        risco = np.sqrt(variancia) * (np.sqrt(DIAS_UTEIS_ANO) if anualizar else 1.0)
+        return float(risco) if w.ndim == 1 else risco
+
+    def contribuicoes_risco(self, pesos: Pesos) -> np.ndarray:
+        """Contribuição de cada ativo para a volatilidade (somam o risco da carteira)"""
+        w = self.vetor_pesos(pesos)
+        sigma_w = self.produto(w)
+        return w * sigma_w / np.sqrt(w @ sigma_w) * np.sqrt(DIAS_UTEIS_ANO)
+
+    def pesos_variancia_minima(self) -> np.ndarray:
+        """Carteira de variância mínima (Σ⁻¹1 normalizado; pode ter pesos negativos)"""
+        bruto = self.resolver(np.ones(len(self.simbolos)))
+        return bruto / bruto.sum()
+
+    def covariancia(self, simbolos: Sequence[str] = None) -> np.ndarray:
+        """Matriz densa para um subconjunto de símbolos (padrão: todos)"""
+        indices = self._indices(simbolos)
+        cargas = self.cargas[indices]
+        densa = cargas @ cargas.T
+        densa[np.diag_indices_from(densa)] += self.especificas[indices]
+        return densa
+
+    def correlacao(self, simbolos: Sequence[str] = None) -> np.ndarray:
+        densa = self.covariancia(simbolos)
+        desvios = np.sqrt(np.diag(densa))
+        return densa / np.outer(desvios, desvios)
+
+    def selecionar(self, simbolos: Sequence[str]) -> 'CovarianciaBaixoPosto':
+        """Submodelo com os símbolos informados (na ordem dada)"""
+        indices = self._indices(simbolos)
+        return CovarianciaBaixoPosto([self.simbolos[i] for i in indices], self.cargas[indices],
+                                     self.especificas[indices], self.metodo, **self.detalhes)
+
+    def _indices(self, simbolos: Optional[Sequence[str]]) -> np.ndarray:
+        if simbolos is None:
+            return np.arange(len(self.simbolos))
+        return np.array([self.codigos[s] for s in simbolos], dtype=np.int64)
+
+
+def ledoit_wolf(retornos: np.ndarray, simbolos: Sequence[str]) -> CovarianciaBaixoPosto:
+    """
+    Encolhimento de Ledoit-Wolf para a identidade escalada
+
+    Σ = (1-δ)·S + δ·μ·I com S = XᵀX/T e μ = tr(S)/N. As normas de Frobenius
+    que definem δ vêm da Gram do lado menor (T × T ou N × N).
+    """
+    retornos = np.asarray(retornos, dtype=np.float64)
+    t, n = retornos.shape
+    normas_linhas = np.einsum('ij,ij->i', retornos, retornos)           # ‖x_t‖²
+    gram = retornos @ retornos.T if t <= n else retornos.T @ retornos
+    norma_s = np.einsum('ij,ij->', gram, gram) / t ** 2                  # ‖S‖²_F
+    mu = normas_linhas.sum() / (t * n)
+    delta = norma_s - mu ** 2 * n                                        # ‖S - μI‖²_F
+    beta = min(delta, ((normas_linhas ** 2).sum() - t * norma_s) / t ** 2)
+    encolhimento = float(beta / delta) if delta > 0 else 1.0
+
+    cargas = retornos.T * np.sqrt((1 - encolhimento) / t)
+    especificas = np.full(n, max(encolhimento * mu, PISO_RISCO_ESPECIFICO * mu))
+    return CovarianciaBaixoPosto(simbolos, cargas, especificas, 'ledoit_wolf', encolhimento=encolhimento)
+
+
+def modelo_fatores(retornos: np.ndarray, simbolos: Sequence[str], num_fatores: int = 10,
+                   semente: int = 0) -> CovarianciaBaixoPosto:
+    """
+    Modelo estatístico de K fatores (componentes principais dos retornos)
+
+    As variâncias da diagonal são preservadas: o risco específico é o que os
+    fatores não explicam, com piso para não gerar ativos sem risco.
+    """
+    retornos = np.asarray(retornos, dtype=np.float64)
+    t, n = retornos.shape
+    num_fatores = max(1, min(num_fatores, min(t, n) - 1))
+    _, valores, componentes_t = randomized_svd(retornos, num_fatores, random_state=semente)
+    cargas = componentes_t.T * (valores / np.sqrt(t))
+
+    variancias = np.einsum('ij,ij->j', retornos, retornos) / t
+    explicadas = np.einsum('ik,ik->i', cargas, cargas)
+    piso = PISO_RISCO_ESPECIFICO * max(variancias.mean(), np.finfo(float).tiny)
+    especificas = np.maximum(variancias - explicadas, np.maximum(PISO_RISCO_ESPECIFICO * variancias, piso))
+    fracao = float(explicadas.sum() / variancias.sum()) if variancias.sum() > 0 else 0.0
+    return CovarianciaBaixoPosto(simbolos, cargas, especificas, 'fatores', variancia_explicada=fracao)
+
+
+def estimar_covariancia(painel: PainelPrecos, metodo: str = 'fatores', num_fatores: int = 10,
+                        minimo_observacoes: int = 20) -> CovarianciaBaixoPosto:
+    """Covariância dos símbolos do painel ('fatores' ou 'ledoit_wolf')"""
+    retornos, simbolos = retornos_do_painel(painel, minimo_observacoes)
+    if not simbolos:
+        raise ValueError("Nenhum símbolo com histórico suficiente para estimar a covariância")
+    if metodo == 'ledoit_wolf':
+        return ledoit_wolf(retornos, simbolos)
+    if metodo == 'fatores':
+        return modelo_fatores(retornos, simbolos, num_fatores)
+    raise ValueError(f"Método de covariância desconhecido: {metodo}")
@@ -499,8 +499,11 @@ if __name__ == "__main__":
         sys.exit(1)
     
     try:
-        # Executa menu de demonstração
-        menu_demonstracao()
+        from perfilamento import perfilamento_da_linha_de_comando
+        
+        # Executa menu de demonstração (opcionalmente perfilado)
+        with perfilamento_da_linha_de_comando('demo_completo'):
+            menu_demonstracao()
         
     except KeyboardInterrupt:
         print("\n\n👋 Programa interrompido pelo usuário. Até logo!")
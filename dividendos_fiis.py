@@ -0,0 +1,379 @@
+"""
+Dividendos de FIIs: coleta em lotes, cache incremental e métricas.
+
+Coleta: yf.download com actions=True e auto_adjust=False (fechamento sem
+ajuste, que é a base do dividend yield) para lotes de até 50 fundos por
+requisição. Cada fundo guarda a data da última consulta; na execução
+seguinte só o período desde então é baixado (5 dias, 1 mês, 3 meses...),
+e fundos já consultados hoje nem entram nos lotes.
+
+Cache (estado/dividendos_fiis.npz): formato longo colunar, com fechamento e
+volume diários (código do fundo, dia, valor) e eventos de dividendo (código,
+data ex, valor por cota). A fusão de dados novos é vetorizada (chave
+código·dia, o dado mais recente vence) e só os últimos ANOS_RETIDOS anos são
+mantidos.
+
+Métricas (metricas_fiis), calculadas para todos os fundos de uma vez sobre
+as matrizes datas × fundos de preços e dividendos:
+    dy_12m                  dividendos dos últimos 12 meses / preço atual (%)
+    yield_on_cost           mesmos dividendos / preço médio de compra (%); sem
+                            preço médio informado, o preço de 12 meses atrás
+    retorno_total_12m       preço + distribuições reinvestidas na data ex (%)
+    retorno_preco_12m       só a variação da cota (%)
+    meses_com_pagamento     meses (janelas de 1/12 de ano) com distribuição
+    estabilidade_pagamentos 1 - coeficiente de variação dos totais mensais
+                            (1 = mesmo valor todo mês; 0 = muito irregular)
+A tabela resultante é uma TabelaMetricas, então aceita os filtros da triagem
+("dy_12m > 9 and estabilidade_pagamentos > 0.8").
+"""
+
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from configuracao import caminho_estado
+from gravacao_http import obter_gravador
+from indicadores_tecnicos import preencher_adiante
+from instrumentacao import obter_rastreador
+from painel_precos import PainelPrecos, normalizar_indice
+from triagem_ativos import TabelaMetricas
+
+ARQUIVO_CACHE_PADRAO = caminho_estado('dividendos_fiis.npz')
+TAMANHO_LOTE = 50
+PERIODO_INICIAL = '2y'
+ANOS_RETIDOS = 3
+# Períodos aceitos pelo Yahoo e quantos dias cada um cobre
+PERIODOS_ATUALIZACAO = (('5d', 5), ('1mo', 30), ('3mo', 90), ('6mo', 180), ('1y', 365), ('2y', 730))
+_DIAS_MES = 365.25 / 12
+_CHAVE_DIAS = 100_000  # Chave de fusão: código × _CHAVE_DIAS + dia
+
+
+def _dias(datas) -> np.ndarray:
+    """Datas (datetime64, DatetimeIndex) em dias desde 1970-01-01"""
+    return np.asarray(datas, dtype='datetime64[D]').astype(np.int64)
+
+
+def periodo_atualizacao(dias_desde_consulta: Optional[int]) -> str:
+    """Menor período do Yahoo que cobre o intervalo desde a última consulta"""
+    if dias_desde_consulta is None:
+        return PERIODO_INICIAL
+    for periodo, dias in PERIODOS_ATUALIZACAO:
+        if dias_desde_consulta + 3 <= dias:
+            return periodo
+    return PERIODO_INICIAL
+
+
+class CacheDividendos:
+    """Preços e dividendos por fundo, em arrays colunares persistidos em .npz"""
+
+    def __init__(self, caminho: str = ARQUIVO_CACHE_PADRAO):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self.simbolos: List[str] = []
+        self._codigos: Dict[str, int] = {}
+        self.consultas = np.empty(0, dtype=np.int64)   # Dia da última consulta por código (-1: nunca)
+        self.precos = {'codigo': np.empty(0, dtype=np.int32), 'dia': np.empty(0, dtype=np.int64),
+                       'fechamento': np.empty(0), 'volume': np.empty(0)}
+        self.dividendos = {'codigo': np.empty(0, dtype=np.int32), 'dia': np.empty(0, dtype=np.int64),
+                           'valor': np.empty(0)}
+        if caminho:
+            self._carregar()
+
+    def _codigo(self, simbolo: str) -> int:
+        if simbolo not in self._codigos:
+            self._codigos[simbolo] = len(self.simbolos)
+            self.simbolos.append(simbolo)
+            self.consultas = np.append(self.consultas, -1)
+        return self._codigos[simbolo]
+
+    def dias_desde_consulta(self, simbolo: str, hoje: date = None) -> Optional[int]:
+        codigo = self._codigos.get(simbolo)
+        if codigo is None or self.consultas[codigo] < 0:
+            return None
+        return int(_dias(np.datetime64(hoje or date.today(), 'D')) - self.consultas[codigo])
+
+    def incorporar(self, historicos: Dict[str, pd.DataFrame], hoje: date = None):
+        """
+        Funde históricos no formato do yfinance (Close, Volume, Dividends) e
+        marca como consultados hoje só os símbolos que retornaram dados: um
+        lote vazio ou com erro volta a pedir o histórico completo
+        """
+        dia_hoje = int(_dias(np.datetime64(hoje or date.today(), 'D')))
+        with self._trava:
+            precos = {chave: [valores] for chave, valores in self.precos.items()}
+            dividendos = {chave: [valores] for chave, valores in self.dividendos.items()}
+            for simbolo, hist in historicos.items():
+                if hist is None or hist.empty:
+                    continue
+                codigo = self._codigo(simbolo)
+                self.consultas[codigo] = dia_hoje
+                dias = _dias(normalizar_indice(hist.index).values)
+                fechamento = hist['Close'].to_numpy(dtype=np.float64)
+                validos = ~np.isnan(fechamento)
+                precos['codigo'].append(np.full(validos.sum(), codigo, dtype=np.int32))
+                precos['dia'].append(dias[validos])
+                precos['fechamento'].append(fechamento[validos])
+                volume = hist['Volume'].to_numpy(dtype=np.float64) if 'Volume' in hist else np.full(len(hist), np.nan)
+                precos['volume'].append(volume[validos])
+                if 'Dividends' in hist:
+                    valores = hist['Dividends'].to_numpy(dtype=np.float64)
+                    pagos = np.nan_to_num(valores) > 0
+                    dividendos['codigo'].append(np.full(pagos.sum(), codigo, dtype=np.int32))
+                    dividendos['dia'].append(dias[pagos])
+                    dividendos['valor'].append(valores[pagos])
+
+            limite = dia_hoje - int(ANOS_RETIDOS * 365.25)
+            self.precos = self._fundir({chave: np.concatenate(partes) for chave, partes in precos.items()}, limite)
+            self.dividendos = self._fundir({chave: np.concatenate(partes) for chave, partes in dividendos.items()},
+                                           limite)
+
+    @staticmethod
+    def _fundir(colunas: Dict[str, np.ndarray], limite: int) -> Dict[str, np.ndarray]:
+        """Remove duplicatas (código, dia) mantendo a última ocorrência e ordena por código e dia"""
+        chaves = colunas['codigo'].astype(np.int64) * _CHAVE_DIAS + colunas['dia']
+        # np.unique devolve a primeira ocorrência: no array invertido, é a mais recente
+        _, posicoes = np.unique(chaves[::-1], return_index=True)
+        posicoes = len(chaves) - 1 - posicoes
+        posicoes = posicoes[colunas['dia'][posicoes] >= limite]
+        return {chave: valores[posicoes] for chave, valores in colunas.items()}
+
+    def painel(self, simbolos: Sequence[str] = None, dias: int = 400) -> PainelPrecos:
+        """Painel de fechamento/volume dos últimos `dias` dias (padrão: todos os símbolos)"""
+        simbolos = [s for s in (simbolos if simbolos is not None else self.simbolos) if s in self._codigos]
+        with self._trava:
+            precos = dict(self.precos)
+        colunas = np.full(len(self.simbolos), -1, dtype=np.int64)
+        colunas[[self._codigos[s] for s in simbolos]] = np.arange(len(simbolos))
+        coluna = colunas[precos['codigo']] if len(precos['codigo']) else np.empty(0, dtype=np.int64)
+        selecionados = coluna >= 0
+        if selecionados.any():
+            selecionados &= precos['dia'] >= precos['dia'][selecionados].max() - dias
+        dias_unicos, linhas = np.unique(precos['dia'][selecionados], return_inverse=True)
+        fechamento = np.full((len(dias_unicos), len(simbolos)), np.nan, order='F')
+        volume = np.full_like(fechamento, np.nan)
+        fechamento[linhas, coluna[selecionados]] = precos['fechamento'][selecionados]
+        volume[linhas, coluna[selecionados]] = precos['volume'][selecionados]
+        datas = dias_unicos.astype('datetime64[D]').astype('datetime64[ns]')
+        return PainelPrecos(datas, simbolos, fechamento, volume)
+
+    def matriz_dividendos(self, painel: PainelPrecos) -> np.ndarray:
+        """
+        Dividendos por cota alinhados ao painel (datas × símbolos, zero sem
+        evento); data ex fora de pregão cai no pregão seguinte
+        """
+        matriz = np.zeros(painel.fechamento.shape)
+        if not len(painel.datas):
+            return matriz
+        with self._trava:
+            dividendos = dict(self.dividendos)
+        colunas = np.full(len(self.simbolos), -1, dtype=np.int64)
+        presentes = [s for s in painel.simbolos if s in self._codigos]
+        colunas[[self._codigos[s] for s in presentes]] = [painel.codigos[s] for s in presentes]
+        coluna = colunas[dividendos['codigo']] if len(dividendos['codigo']) else np.empty(0, dtype=np.int64)
+        dias_painel = _dias(painel.datas)
+        linhas = np.searchsorted(dias_painel, dividendos['dia'])
+        usados = (coluna >= 0) & (dividendos['dia'] >= dias_painel[0]) & (linhas < len(dias_painel))
+        np.add.at(matriz, (linhas[usados], coluna[usados]), dividendos['valor'][usados])
+        return matriz
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _carregar(self):
+        try:
+            with np.load(self.caminho, allow_pickle=False) as arquivo:
+                self.simbolos = [str(s) for s in arquivo['simbolos']]
+                self.consultas = arquivo['consultas'].astype(np.int64)
+                self.precos = {chave: arquivo[f'precos_{chave}'] for chave in self.precos}
+                self.dividendos = {chave: arquivo[f'dividendos_{chave}'] for chave in self.dividendos}
+        except (OSError, KeyError, ValueError):
+            return
+        self._codigos = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+
+    def salvar(self):
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._trava:
+            arrays = {'simbolos': np.array(self.simbolos, dtype=str), 'consultas': self.consultas,
+                      **{f'precos_{chave}': valores for chave, valores in self.precos.items()},
+                      **{f'dividendos_{chave}': valores for chave, valores in self.dividendos.items()}}
+        temporario = f"{self.caminho}.tmp.npz"
+        np.savez(temporario, **arrays)
+        os.replace(temporario, self.caminho)
+
+
+class ColetorDividendos:
+    """Atualiza o cache baixando, em lotes, só o que falta de cada fundo"""
+
+    def __init__(self, cache: CacheDividendos, tamanho_lote: int = TAMANHO_LOTE, timeout: int = 15):
+        self.cache = cache
+        self.tamanho_lote = tamanho_lote
+        self.timeout = timeout
+
+    def atualizar(self, simbolos: Sequence[str], hoje: date = None) -> int:
+        """
+        Baixa o período necessário de cada símbolo (agrupados por período e
+        em lotes) e salva o cache; retorna quantos símbolos foram consultados
+        """
+        pendentes: Dict[str, List[str]] = {}
+        for simbolo in dict.fromkeys(simbolos):
+            dias = self.cache.dias_desde_consulta(simbolo, hoje)
+            if dias is not None and dias <= 0:
+                continue
+            pendentes.setdefault(periodo_atualizacao(dias), []).append(simbolo)
+
+        consultados = 0
+        for periodo, grupo in pendentes.items():
+            for inicio in range(0, len(grupo), self.tamanho_lote):
+                lote = grupo[inicio:inicio + self.tamanho_lote]
+                self.cache.incorporar(self._baixar_lote(lote, periodo), hoje)
+                consultados += len(lote)
+        if consultados:
+            self.cache.salvar()
+        return consultados
+
+    def _baixar_lote(self, simbolos: List[str], periodo: str) -> Dict[str, pd.DataFrame]:
+        """Close, Volume e Dividends de cada símbolo do lote (uma requisição)"""
+        rastreador = obter_rastreador()
+        gravador = obter_gravador()
+        chave_periodo = f"{periodo} dividendos"
+        with rastreador.span('coleta.yahoo.lote_fiis', simbolos=len(simbolos), periodo=periodo) as span:
+            if gravador.reproduzindo:
+                historicos = {s: gravador.reproduzir_historico(s, chave_periodo) for s in simbolos}
+            else:
+                inicio = time.perf_counter()
+                bruto = yf.download(simbolos, period=periodo, actions=True, auto_adjust=False,
+                                    group_by='ticker', threads=True, progress=False, timeout=self.timeout)
+                historicos = self._separar_lote(bruto, simbolos)
+                if gravador.gravando:
+                    latencia = (time.perf_counter() - inicio) / max(len(simbolos), 1)
+                    for simbolo, hist in historicos.items():
+                        gravador.gravar_historico(simbolo, chave_periodo, hist, latencia)
+            num_bytes = sum(int(h.memory_usage(deep=True).sum()) for h in historicos.values())
+            span.definir(linhas=sum(len(h) for h in historicos.values()), bytes=num_bytes)
+        rastreador.registrar_download('yahoo_finance', num_bytes)
+        rastreador.registrar_itens('yahoo_finance', sum(1 for h in historicos.values() if not h.empty))
+        return historicos
+
+    @staticmethod
+    def _separar_lote(bruto: Optional[pd.DataFrame], simbolos: List[str]) -> Dict[str, pd.DataFrame]:
+        """Quebra o DataFrame do yf.download (colunas símbolo × campo) por símbolo"""
+        colunas = ['Close', 'Volume', 'Dividends']
+        historicos = {}
+        for simbolo in simbolos:
+            if bruto is None or bruto.empty:
+                hist = pd.DataFrame(columns=colunas)
+            elif isinstance(bruto.columns, pd.MultiIndex):
+                if simbolo not in bruto.columns.get_level_values(0):
+                    hist = pd.DataFrame(columns=colunas)
+                else:
+                    hist = bruto[simbolo]
+            else:
+                hist = bruto
+            hist = hist[[c for c in colunas if c in hist.columns]].dropna(subset=['Close'])
+            historicos[simbolo] = hist
+        return historicos
+
+
+def metricas_fiis(painel: PainelPrecos, dividendos: np.ndarray, precos_medios: Dict[str, float] = None,
+                  meses: int = 12) -> TabelaMetricas:
+    """
+    Métricas de dividendos e retorno total de todos os fundos do painel
+
+    `dividendos` vem de CacheDividendos.matriz_dividendos(painel);
+    `precos_medios` ({símbolo ou ticker: preço médio}) define o custo do
+    yield on cost.
+    """
+    n = len(painel)
+    simbolos = painel.simbolos
+    metricas = {nome: np.full(n, np.nan) for nome in
+                ('preco', 'dividendos_12m', 'dy_12m', 'yield_on_cost', 'retorno_total_12m', 'retorno_preco_12m',
+                 'estabilidade_pagamentos', 'ultimo_dividendo')}
+    metricas['meses_com_pagamento'] = np.zeros(n, dtype=np.int64)
+    tabela = {
+        'ticker': np.array([s.replace('.SA', '') for s in simbolos], dtype=object),
+        'simbolo': np.array(simbolos, dtype=object),
+        'tipo': np.full(n, 'fii', dtype=object),
+    }
+    if n == 0 or len(painel.datas) == 0:
+        return TabelaMetricas({**tabela, **metricas})
+
+    validos = ~np.isnan(painel.fechamento)
+    precos = preencher_adiante(painel.fechamento)
+
+    dias = _dias(painel.datas)
+    dias_atras = dias[-1] - dias
+    janela = dias_atras < meses * _DIAS_MES
+    inicio = int(np.argmax(janela))
+    dividendos = np.where(np.isnan(dividendos), 0.0, dividendos)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        atual = precos[-1]
+        # Preço de referência: último fechamento antes da janela (ou o primeiro dela)
+        base = precos[max(inicio - 1, 0)]
+        base = np.where(np.isnan(base), precos[validos.argmax(axis=0), np.arange(n)], base)
+        soma_12m = dividendos[janela].sum(axis=0)
+
+        # Retorno total com reinvestimento: Π (P_t + D_t) / P_{t-1} dentro da janela
+        trecho = precos[max(inicio - 1, 0):]
+        fatores = (trecho[1:] + dividendos[max(inicio - 1, 0) + 1:]) / trecho[:-1]
+        fatores = np.where(np.isnan(fatores), 1.0, fatores)
+        retorno_total = (np.exp(np.log(fatores).sum(axis=0)) - 1) * 100
+
+        # Totais por "mês" (janelas de 1/12 de ano contadas a partir da última data)
+        mes = np.minimum((dias_atras / _DIAS_MES).astype(np.int64), meses)
+        # As datas são crescentes, então cada mês é um bloco contíguo de linhas
+        inicios = np.flatnonzero(np.diff(mes, prepend=-1) != 0)
+        mensal = np.zeros((meses + 1, n))
+        mensal[mes[inicios]] = np.add.reduceat(dividendos, inicios, axis=0)
+        mensal = mensal[:meses]
+        media_mensal = mensal.mean(axis=0)
+        estabilidade = np.clip(1 - mensal.std(axis=0) / media_mensal, 0.0, 1.0)
+
+        linhas_pagamento = np.where(dividendos > 0, np.arange(len(dividendos))[:, None], -1).max(axis=0)
+        custo = np.array([(precos_medios or {}).get(s, (precos_medios or {}).get(s.replace('.SA', ''), np.nan))
+                          for s in simbolos], dtype=np.float64)
+        custo = np.where(np.isnan(custo), base, custo)
+
+        metricas['preco'] = atual
+        metricas['dividendos_12m'] = soma_12m
+        metricas['dy_12m'] = soma_12m / atual * 100
+        metricas['yield_on_cost'] = soma_12m / custo * 100
+        metricas['retorno_total_12m'] = np.where(np.isnan(atual), np.nan, retorno_total)
+        metricas['retorno_preco_12m'] = (atual / base - 1) * 100
+        metricas['estabilidade_pagamentos'] = np.where(media_mensal > 0, estabilidade, np.nan)
+        metricas['ultimo_dividendo'] = np.where(linhas_pagamento >= 0,
+                                                dividendos[np.maximum(linhas_pagamento, 0), np.arange(n)], np.nan)
+        metricas['meses_com_pagamento'] = (mensal > 0).sum(axis=0)
+
+    return TabelaMetricas({**tabela, **metricas})
+
+
+def frequencia_pagamentos(meses_com_pagamento: int, meses: int = 12) -> str:
+    """Rótulo da regularidade das distribuições"""
+    if meses_com_pagamento >= meses - 1:
+        return 'Mensais'
+    if meses_com_pagamento >= 3:
+        return 'Irregulares'
+    return 'Esporádicos' if meses_com_pagamento > 0 else 'Sem distribuições'
+
+
+_cache_padrao: Optional[CacheDividendos] = None
+_trava_cache = threading.Lock()
+
+
+def obter_cache_dividendos() -> CacheDividendos:
+    """Cache global (um por processo), carregado do disco na primeira chamada"""
+    global _cache_padrao
+    with _trava_cache:
+        if _cache_padrao is None:
+            _cache_padrao = CacheDividendos()
+        return _cache_padrao
@@ -0,0 +1,245 @@
+"""
+Reconhecimento de ativos da B3 (tickers e nomes de empresas) em textos.
+
+O dicionário vem de dados/ativos_b3.csv (ticker;nomes;setor;indices). Todos
+os tickers e nomes são compilados em um único autômato Aho-Corasick, que
+percorre o texto uma vez, independentemente do tamanho do dicionário. O texto
+é comparado sem acentos e sem distinção de maiúsculas ("Itaú", "ITAU" e
+"itau" são o mesmo termo); nomes marcados com "!" no arquivo exigem a grafia
+exata de maiúsculas, para não confundir "Vale" com "vale a pena".
+
+Uma menção só vale em fronteira de palavra e, quando menções se sobrepõem,
+fica a mais longa ("BB Seguridade" não conta como "BB"). Cada menção é
+resolvida para o ticker canônico, que pode ser cruzado com os preços do
+Yahoo Finance (simbolo_yahoo) e com o histórico de sentimento por ticker.
+"""
+
+import csv
+import os
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Arquivo versionado junto com o código (não depende do diretório de trabalho)
+ARQUIVO_ATIVOS_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'ativos_b3.csv')
+
+
+def _tabela_dobra(minusculas: bool) -> Dict[int, str]:
+    """
+    Tabela para str.translate que remove acentos (e opcionalmente a caixa)
+    trocando sempre um caractere por um, para as posições continuarem valendo
+    """
+    tabela = {}
+    for codigo in range(0x80, 0x250):
+        caractere = chr(codigo)
+        base = unicodedata.normalize('NFKD', caractere)[0]
+        if minusculas:
+            base = base.lower() if len(base.lower()) == 1 else base
+        if base != caractere:
+            tabela[codigo] = base
+    if minusculas:
+        for codigo in range(ord('A'), ord('Z') + 1):
+            tabela[codigo] = chr(codigo).lower()
+    return tabela
+
+
+_SEM_ACENTOS = _tabela_dobra(minusculas=False)
+_SEM_ACENTOS_MINUSCULAS = _tabela_dobra(minusculas=True)
+
+
+def normalizar_texto(texto: str, manter_caixa: bool = False) -> str:
+    """Remove acentos (e, por padrão, maiúsculas) preservando o comprimento"""
+    return texto.translate(_SEM_ACENTOS if manter_caixa else _SEM_ACENTOS_MINUSCULAS)
+
+
+def simbolo_yahoo(ticker: str) -> str:
+    """Símbolo do Yahoo Finance para o ticker da B3 (PETR4 -> PETR4.SA)"""
+    return f"{ticker}.SA"
+
+
+class AtivoB3(NamedTuple):
+    ticker: str
+    nome: str
+    setor: str
+    indices: Tuple[str, ...]
+
+
+class Mencao(NamedTuple):
+    ticker: str
+    inicio: int
+    fim: int
+    termo: str
+
+
+class AutomatoAhoCorasick:
+    """
+    Autômato de Aho-Corasick sobre caracteres
+
+    Cada padrão carrega um valor arbitrário; buscar() gera (fim, comprimento,
+    valor) para toda ocorrência, inclusive sobrepostas.
+    """
+
+    def __init__(self):
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falhas: List[int] = [0]
+        self._saidas: List[List[Tuple[int, object]]] = [[]]
+        self._compilado = False
+
+    def adicionar(self, padrao: str, valor):
+        if not padrao:
+            return
+        estado = 0
+        for caractere in padrao:
+            proximo = self._transicoes[estado].get(caractere)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes[estado][caractere] = proximo
+                self._transicoes.append({})
+                self._falhas.append(0)
+                self._saidas.append([])
+            estado = proximo
+        self._saidas[estado].append((len(padrao), valor))
+        self._compilado = False
+
+    def compilar(self):
+        """Calcula os links de falha em largura e herda as saídas dos sufixos"""
+        fila = list(self._transicoes[0].values())
+        for estado in fila:
+            self._falhas[estado] = 0
+        for estado in fila:
+            for caractere, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falhas[estado]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falhas[falha]
+                destino = self._transicoes[falha].get(caractere, 0)
+                self._falhas[proximo] = destino if destino != proximo else 0
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falhas[proximo]]
+        self._compilado = True
+
+    def __len__(self) -> int:
+        return len(self._transicoes)
+
+    def buscar(self, texto: str):
+        if not self._compilado:
+            self.compilar()
+        transicoes, falhas, saidas = self._transicoes, self._falhas, self._saidas
+        estado = 0
+        for posicao, caractere in enumerate(texto):
+            while estado and caractere not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            if saidas[estado]:
+                for comprimento, valor in saidas[estado]:
+                    yield posicao + 1, comprimento, valor
+
+
+def carregar_ativos(caminho: str = ARQUIVO_ATIVOS_PADRAO) -> Tuple[List[AtivoB3], Dict[str, List[str]]]:
+    """
+    Lê o dicionário de ativos
+
+    Retorna a lista de ativos e, por ticker, os nomes alternativos (com o
+    prefixo "!" dos que diferenciam maiúsculas).
+    """
+    ativos, nomes = [], {}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        linhas = (linha for linha in f if linha.strip() and not linha.lstrip().startswith('#'))
+        for campos in csv.reader(linhas, delimiter=';'):
+            campos += [''] * (4 - len(campos))
+            ticker = campos[0].strip().upper()
+            if not ticker:
+                continue
+            apelidos = [n.strip() for n in campos[1].split('|') if n.strip()]
+            ativos.append(AtivoB3(
+                ticker=ticker,
+                nome=apelidos[0].lstrip('!') if apelidos else ticker,
+                setor=campos[2].strip(),
+                indices=tuple(i.strip() for i in campos[3].split('|') if i.strip())
+            ))
+            nomes[ticker] = apelidos
+    return ativos, nomes
+
+
+class ExtratorEntidades:
+    """Marca textos com os tickers da B3 mencionados"""
+
+    def __init__(self, caminho: str = ARQUIVO_ATIVOS_PADRAO):
+        ativos, nomes = carregar_ativos(caminho)
+        self.ativos: Dict[str, AtivoB3] = {ativo.ticker: ativo for ativo in ativos}
+        self._automato = AutomatoAhoCorasick()
+        for ticker, apelidos in nomes.items():
+            self._automato.adicionar(normalizar_texto(ticker), (ticker, None))
+            for apelido in apelidos:
+                exato = apelido.startswith('!')
+                apelido = apelido.lstrip('!')
+                # Para nomes que diferenciam maiúsculas guarda a grafia a conferir
+                grafia = normalizar_texto(apelido, manter_caixa=True) if exato else None
+                self._automato.adicionar(normalizar_texto(apelido), (ticker, grafia))
+        self._automato.compilar()
+
+    def mencoes(self, texto: str) -> List[Mencao]:
+        """Menções em ordem de posição, sem sobreposição (vence a mais longa)"""
+        if not texto:
+            return []
+        dobrado = normalizar_texto(texto)
+        com_caixa = None
+        candidatas = []
+        for fim, comprimento, (ticker, grafia) in self._automato.buscar(dobrado):
+            inicio = fim - comprimento
+            if (inicio > 0 and dobrado[inicio - 1].isalnum()) or (fim < len(dobrado) and dobrado[fim].isalnum()):
+                continue
+            if grafia is not None:
+                if com_caixa is None:
+                    com_caixa = normalizar_texto(texto, manter_caixa=True)
+                if com_caixa[inicio:fim] != grafia:
+                    continue
+            candidatas.append((inicio, -comprimento, ticker))
+
+        resultado = []
+        limite = 0
+        for inicio, menos_comprimento, ticker in sorted(candidatas):
+            if inicio >= limite:
+                limite = inicio - menos_comprimento
+                resultado.append(Mencao(ticker, inicio, limite, texto[inicio:limite]))
+        return resultado
+
+    def tickers(self, texto: str) -> Set[str]:
+        """Tickers distintos mencionados no texto"""
+        return {mencao.ticker for mencao in self.mencoes(texto)}
+
+    def contar(self, textos: Iterable[str]) -> Counter:
+        """Em quantos textos cada ticker aparece"""
+        contagem = Counter()
+        for texto in textos:
+            contagem.update(self.tickers(texto))
+        return contagem
+
+    def resolver(self, termo: str) -> List[str]:
+        """Ticker(s) de um termo digitado pelo usuário: 'PETR4', 'Itaú', 'vale3'..."""
+        ticker = termo.strip().upper()
+        if ticker in self.ativos:
+            return [ticker]
+        encontrados = sorted(self.tickers(termo))
+        return encontrados or [ticker]
+
+    def tickers_do_indice(self, indice: str) -> List[str]:
+        """Tickers que compõem um índice (ex.: 'IBOV', 'IFIX')"""
+        return [t for t, ativo in self.ativos.items() if indice in ativo.indices]
+
+    def setor(self, ticker: str) -> Optional[str]:
+        ativo = self.ativos.get(ticker)
+        return ativo.setor if ativo else None
+
+
+_extrator_padrao: Optional[ExtratorEntidades] = None
+_trava_extrator = threading.Lock()
+
+
+def obter_extrator() -> ExtratorEntidades:
+    """Extrator global (um por processo), compilado na primeira chamada"""
+    global _extrator_padrao
+    with _trava_extrator:
+        if _extrator_padrao is None:
+            _extrator_padrao = ExtratorEntidades()
+        return _extrator_padrao
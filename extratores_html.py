@@ -0,0 +1,215 @@
+"""
+Extração de HTML em fluxo com seletores XPath pré-compilados por site.
+
+O corpo da resposta é entregue em pedaços a um lxml.etree.HTMLPullParser e
+os eventos de fim de elemento são testados contra os seletores do adaptador
+do site. A leitura (e o download, com stream=True) para assim que a
+quantidade pedida de itens ou todos os campos foram encontrados, então o
+custo é proporcional ao que se precisa, não ao tamanho da página.
+
+Adaptadores registrados:
+    infomoney_lista     cards de notícias da página de mercados do InfoMoney
+    suno_lista          cards de artigos da Suno
+    investing_cotacao   preço e variação de páginas de instrumento do Investing
+    manchetes           h1/h2/h3 de qualquer página (plano B genérico)
+
+Novos sites entram com registrar_adaptador().
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+from lxml import etree
+
+from instrumentacao import obter_rastreador
+
+TAMANHO_PEDACO = 16 * 1024
+NAMESPACES = {'re': 'http://exslt.org/regular-expressions'}
+_ATRIBUTO_EXTRAIDO = 'data-agente-extraido'
+
+
+def _compilar(expressao: str) -> etree.XPath:
+    return etree.XPath(expressao, namespaces=NAMESPACES)
+
+
+def _texto(elemento) -> str:
+    return ''.join(elemento.itertext()).strip()
+
+
+def codificacao_declarada(resposta) -> Optional[str]:
+    """Charset do cabeçalho Content-Type, se declarado (senão o parser usa o <meta>)"""
+    tipo = resposta.headers.get('Content-Type', '') if resposta.headers else ''
+    encontrado = re.search(r'charset=([\w.-]+)', tipo, re.IGNORECASE)
+    return encontrado.group(1) if encontrado else None
+
+
+def ler_em_pedacos(resposta, tamanho: int = TAMANHO_PEDACO) -> Iterator[bytes]:
+    """Itera o corpo da resposta contabilizando os bytes efetivamente lidos"""
+    lidos = 0
+    try:
+        for pedaco in resposta.iter_content(tamanho):
+            lidos += len(pedaco)
+            yield pedaco
+    finally:
+        obter_rastreador().registrar_download(urlparse(resposta.url or '').netloc, lidos)
+
+
+def fatiar_texto(texto: str, tamanho: int = TAMANHO_PEDACO) -> Iterator[str]:
+    """Divide um documento já baixado em pedaços para o parser em fluxo"""
+    for inicio in range(0, len(texto), tamanho):
+        yield texto[inicio:inicio + tamanho]
+
+
+def _eventos(pedacos: Iterable[Union[bytes, str]], codificacao: Optional[str]):
+    """Gera os elementos à medida que são fechados"""
+    parser = etree.HTMLPullParser(events=('end',), encoding=codificacao)
+    try:
+        for pedaco in pedacos:
+            parser.feed(pedaco)
+            for _, elemento in parser.read_events():
+                yield elemento
+        parser.close()
+        for _, elemento in parser.read_events():
+            yield elemento
+    finally:
+        if hasattr(pedacos, 'close'):
+            pedacos.close()
+
+
+class AdaptadorLista:
+    """
+    Extrai itens (título, link) de páginas de listagem
+
+    `item` é um predicado XPath avaliado em cada elemento fechado; `titulo`
+    e `link` são avaliados relativos ao item. Quando itens se aninham (card e
+    conteúdo do card), o título só é aproveitado uma vez. Com seletor de link,
+    itens sem link são ignorados.
+    """
+
+    def __init__(self, nome: str, hosts: Sequence[str], item: str, titulo: str, link: str = None):
+        self.nome = nome
+        self.hosts = tuple(hosts)
+        self._item = _compilar(item)
+        self._titulo = _compilar(titulo)
+        self._link = _compilar(link) if link else None
+
+    def extrair(self, pedacos: Iterable[Union[bytes, str]], max_itens: int, url_base: str = None,
+                codificacao: str = None) -> List[Tuple[str, Optional[str]]]:
+        itens = []
+        if max_itens <= 0:
+            return itens
+        eventos = _eventos(pedacos, codificacao)
+        try:
+            for elemento in eventos:
+                if not self._item(elemento):
+                    continue
+                titulos = self._titulo(elemento)
+                if not titulos or titulos[0].get(_ATRIBUTO_EXTRAIDO):
+                    continue
+
+                link = None
+                if self._link is not None:
+                    links = self._link(elemento)
+                    if not links:
+                        # Sem link o item não ocupa vaga de max_itens; o título fica livre
+                        # para um item externo (card que envolve este) que tenha o link
+                        continue
+                    link = urljoin(url_base, str(links[0])) if url_base else str(links[0])
+                titulos[0].set(_ATRIBUTO_EXTRAIDO, '1')
+                itens.append((_texto(titulos[0]), link))
+                if len(itens) >= max_itens:
+                    break
+        finally:
+            eventos.close()
+        return itens
+
+
+class AdaptadorCampos:
+    """
+    Extrai campos isolados (ex.: preço) de uma página
+
+    Cada campo tem uma lista de predicados XPath em ordem de preferência. A
+    leitura termina quando todos os campos pedidos foram encontrados pelo
+    predicado preferido; alternativas valem apenas se o preferido não aparecer.
+    """
+
+    def __init__(self, nome: str, hosts: Sequence[str], campos: Dict[str, Sequence[str]]):
+        self.nome = nome
+        self.hosts = tuple(hosts)
+        self._campos = {campo: [_compilar(p) for p in predicados] for campo, predicados in campos.items()}
+
+    def extrair(self, pedacos: Iterable[Union[bytes, str]], campos: Sequence[str] = None,
+                codificacao: str = None) -> Dict[str, str]:
+        pedidos = list(campos or self._campos)
+        encontrados: Dict[str, Tuple[int, str]] = {}
+        eventos = _eventos(pedacos, codificacao)
+        try:
+            for elemento in eventos:
+                for campo in pedidos:
+                    prioridade_atual = encontrados.get(campo, (len(self._campos[campo]), ''))[0]
+                    for prioridade, predicado in enumerate(self._campos[campo][:prioridade_atual]):
+                        if predicado(elemento):
+                            encontrados[campo] = (prioridade, _texto(elemento))
+                            break
+                if all(encontrados.get(campo, (1,))[0] == 0 for campo in pedidos):
+                    break
+        finally:
+            eventos.close()
+        return {campo: texto for campo, (_, texto) in encontrados.items()}
+
+
+_REGISTRO: Dict[str, Union[AdaptadorLista, AdaptadorCampos]] = {}
+
+
+def registrar_adaptador(adaptador: Union[AdaptadorLista, AdaptadorCampos]):
+    """Registra (ou substitui) o adaptador pelo nome"""
+    _REGISTRO[adaptador.nome] = adaptador
+
+
+def obter_adaptador(nome: str) -> Union[AdaptadorLista, AdaptadorCampos]:
+    return _REGISTRO[nome]
+
+
+def adaptadores_para_url(url: str) -> List[Union[AdaptadorLista, AdaptadorCampos]]:
+    """Adaptadores cujo host corresponde ao da URL"""
+    host = urlparse(url).netloc
+    return [a for a in _REGISTRO.values() if any(host.endswith(h) for h in a.hosts)]
+
+
+registrar_adaptador(AdaptadorLista(
+    'infomoney_lista', ['infomoney.com.br'],
+    item="(self::article or self::div) and re:test(@class, 'article|news|post')",
+    titulo="descendant::*[self::h1 or self::h2 or self::h3][re:test(@class, 'title|headline')][1]",
+    link="descendant::a[@href][1]/@href"
+))
+
+registrar_adaptador(AdaptadorLista(
+    'suno_lista', ['suno.com.br'],
+    item="(self::div or self::article) and re:test(@class, 'card|article|post')",
+    # Título do card (h1-h3); o primeiro <a> com texto só quando o card não tem título,
+    # mesmo que o link venha antes do título no documento
+    titulo="(descendant::*[self::h1 or self::h2 or self::h3])[1]"
+           " | (self::*[not(descendant::h1 or descendant::h2 or descendant::h3)]/descendant::a[normalize-space()])[1]",
+    link="descendant::a[@href][1]/@href"
+))
+
+registrar_adaptador(AdaptadorCampos(
+    'investing_cotacao', ['investing.com'],
+    # Só os atributos data-test do instrumento: classes com 'price' ou 'change' também
+    # aparecem em tabelas e widgets de outros ativos na mesma página
+    campos={
+        'preco': [
+            "(self::span or self::div) and @data-test='instrument-price-last'"
+        ],
+        'variacao': [
+            "(self::span or self::div) and @data-test='instrument-price-change-percent'"
+        ]
+    }
+))
+
+registrar_adaptador(AdaptadorLista(
+    'manchetes', [],
+    item="self::h1 or self::h2 or self::h3",
+    titulo="self::*"
+))
@@ -0,0 +1,191 @@
+"""
+Gravação e reprodução de respostas HTTP para execuções offline determinísticas.
+
+Modos (variável de ambiente AGENTE_HTTP_MODO ou configurar_gravacao):
+    desligado   comportamento normal, sem gravação
+    gravar      faz as requisições reais e grava cada resposta no arquivo
+    reproduzir  não acessa a rede; serve as respostas gravadas, reproduzindo
+                a latência original multiplicada por AGENTE_HTTP_ESCALA_LATENCIA
+
+O arquivo (AGENTE_HTTP_ARQUIVO, padrão estado/gravacao_http.jsonl.gz) é um
+JSON Lines comprimido com gzip. Cada gravação é anexada como um novo membro
+gzip, então várias execuções podem gravar no mesmo arquivo. Respostas
+repetidas para a mesma chave são servidas na ordem em que foram gravadas.
+"""
+
+import asyncio
+import base64
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from configuracao import caminho_estado
+
+MODOS = ('desligado', 'gravar', 'reproduzir')
+ARQUIVO_PADRAO = caminho_estado('gravacao_http.jsonl.gz')
+
+
+class RespostaNaoGravadaErro(ConnectionError):
+    """Requisição sem resposta correspondente no arquivo de gravação"""
+
+
+class GravadorHTTP:
+    """Grava e reproduz respostas HTTP (requests, aiohttp) e históricos do yfinance"""
+
+    def __init__(self, modo: str = 'desligado', arquivo: str = ARQUIVO_PADRAO,
+                 escala_latencia: float = 1.0):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de gravação inválido: {modo}")
+        self.modo = modo
+        self.arquivo = arquivo
+        self.escala_latencia = escala_latencia
+        self._trava = threading.Lock()
+        self._gravacoes: Dict[str, List[Dict]] = {}
+        self._posicoes: Dict[str, int] = {}
+
+        if modo == 'reproduzir':
+            self._carregar()
+
+    @property
+    def gravando(self) -> bool:
+        return self.modo == 'gravar'
+
+    @property
+    def reproduzindo(self) -> bool:
+        return self.modo == 'reproduzir'
+
+    @staticmethod
+    def chave(metodo: str, url: str) -> str:
+        return f"{metodo.upper()} {url}"
+
+    def _carregar(self):
+        if not os.path.exists(self.arquivo):
+            raise FileNotFoundError(f"Arquivo de gravação não encontrado: {self.arquivo}")
+        with gzip.open(self.arquivo, 'rt', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    entrada = json.loads(linha)
+                    self._gravacoes.setdefault(entrada['chave'], []).append(entrada)
+
+    def _anexar(self, entrada: Dict):
+        with self._trava:
+            pasta = os.path.dirname(self.arquivo)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            with gzip.open(self.arquivo, 'at', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+
+    def _proxima(self, chave: str) -> Dict:
+        """Próxima resposta gravada para a chave (repete a última quando esgotadas)"""
+        with self._trava:
+            entradas = self._gravacoes.get(chave)
+            if not entradas:
+                raise RespostaNaoGravadaErro(f"Sem resposta gravada para {chave}")
+            posicao = self._posicoes.get(chave, 0)
+            self._posicoes[chave] = posicao + 1
+            return entradas[min(posicao, len(entradas) - 1)]
+
+    def _espera(self, entrada: Dict) -> float:
+        return max(0.0, entrada.get('latencia', 0.0) * self.escala_latencia)
+
+    # ------------------------------------------------------------------
+    # Respostas HTTP
+    # ------------------------------------------------------------------
+
+    def gravar_resposta(self, metodo: str, url: str, status: int, headers: Dict,
+                        corpo: bytes, latencia: float):
+        """Grava uma resposta HTTP"""
+        self._anexar({
+            'chave': self.chave(metodo, url),
+            'tipo': 'http',
+            'url': url,
+            'status': status,
+            'headers': dict(headers),
+            'corpo': base64.b64encode(corpo).decode('ascii'),
+            'latencia': latencia
+        })
+
+    def _obter_gravacao_http(self, metodo: str, url: str) -> Dict:
+        entrada = self._proxima(self.chave(metodo, url))
+        espera = self._espera(entrada)
+        if espera > 0:
+            time.sleep(espera)
+        return entrada
+
+    def reproduzir_resposta(self, metodo: str, url: str) -> requests.Response:
+        """Monta um requests.Response a partir da gravação (síncrono)"""
+        entrada = self._obter_gravacao_http(metodo, url)
+        resposta = requests.Response()
+        resposta.status_code = entrada['status']
+        resposta.headers = CaseInsensitiveDict(entrada['headers'])
+        resposta._content = base64.b64decode(entrada['corpo'])
+        resposta._content_consumed = True
+        resposta.url = entrada['url']
+        resposta.encoding = requests.utils.get_encoding_from_headers(resposta.headers)
+        return resposta
+
+    async def reproduzir_texto_async(self, url: str):
+        """Versão assíncrona para aiohttp; retorna (status, texto)"""
+        entrada = self._proxima(self.chave('GET', url))
+        espera = self._espera(entrada)
+        if espera > 0:
+            await asyncio.sleep(espera)
+        corpo = base64.b64decode(entrada['corpo'])
+        return entrada['status'], corpo.decode('utf-8', errors='replace')
+
+    # ------------------------------------------------------------------
+    # Históricos do yfinance
+    # ------------------------------------------------------------------
+
+    def gravar_historico(self, simbolo: str, periodo: str, hist: pd.DataFrame, latencia: float):
+        """Grava o DataFrame retornado por yf.Ticker.history"""
+        self._anexar({
+            'chave': f"YFINANCE {simbolo} {periodo}",
+            'tipo': 'yfinance',
+            'csv': hist.to_csv(date_format='%Y-%m-%dT%H:%M:%S%z'),
+            'latencia': latencia
+        })
+
+    def reproduzir_historico(self, simbolo: str, periodo: str) -> pd.DataFrame:
+        """Reconstrói o DataFrame gravado"""
+        entrada = self._proxima(f"YFINANCE {simbolo} {periodo}")
+        espera = self._espera(entrada)
+        if espera > 0:
+            time.sleep(espera)
+        hist = pd.read_csv(io.StringIO(entrada['csv']), index_col=0)
+        hist.index = pd.to_datetime(hist.index, utc=True)
+        return hist
+
+
+_gravador_padrao: Optional[GravadorHTTP] = None
+_trava_gravador = threading.Lock()
+
+
+def configurar_gravacao(modo: str = 'desligado', arquivo: str = ARQUIVO_PADRAO,
+                        escala_latencia: float = 1.0) -> GravadorHTTP:
+    """Define o gravador global do processo"""
+    global _gravador_padrao
+    with _trava_gravador:
+        _gravador_padrao = GravadorHTTP(modo, arquivo, escala_latencia)
+        return _gravador_padrao
+
+
+def obter_gravador() -> GravadorHTTP:
+    """Gravador global; na primeira chamada lê a configuração das variáveis de ambiente"""
+    global _gravador_padrao
+    with _trava_gravador:
+        if _gravador_padrao is None:
+            _gravador_padrao = GravadorHTTP(
+                os.environ.get('AGENTE_HTTP_MODO', 'desligado'),
+                os.environ.get('AGENTE_HTTP_ARQUIVO', ARQUIVO_PADRAO),
+                float(os.environ.get('AGENTE_HTTP_ESCALA_LATENCIA', '1.0'))
+            )
+        return _gravador_padrao
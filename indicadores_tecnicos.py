@@ -0,0 +1,395 @@
+"""
+Indicadores técnicos sobre a matriz datas × símbolos do painel de preços.
+
+Cada indicador é calculado para todos os símbolos de uma vez:
+
+    médias móveis simples e Bollinger   somas acumuladas (x e x²) por coluna
+    EMA, MACD, RSI e ATR (Wilder)       filtro recursivo (scipy.signal.lfilter)
+    máximas/mínimas móveis              van Herk/Gil-Werman: máximos de prefixo
+                                        e sufixo por blocos (reshape), O(1)
+                                        por ponto independentemente da janela
+
+Suporte e resistência são a mínima e a máxima dos `janela_extremos` pregões
+anteriores (sem o pregão atual); rompimento é o fechamento além delas.
+
+Preços ausentes no meio da série repetem o último fechamento (como em
+covariancia.py); antes do primeiro preço de um símbolo tudo é NaN. As
+médias exponenciais começam no primeiro valor válido. Sem máximas e mínimas
+diárias (o painel guarda só o fechamento), o ATR usa a variação absoluta
+entre fechamentos como amplitude verdadeira.
+
+Modo incremental: MotorIndicadores.iniciar() calcula o histórico e devolve
+um EstadoIndicadores; atualizar(novos_fechamentos) processa só o pregão mais
+recente em O(N·janela), com o mesmo resultado do cálculo completo.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.signal import lfilter
+
+CHAVES_INDICADORES = (
+    'sma', 'sma_longa', 'ema', 'rsi', 'macd', 'macd_sinal', 'macd_histograma',
+    'bollinger_superior', 'bollinger_inferior', 'atr', 'suporte', 'resistencia'
+)
+
+
+def preencher_adiante(x: np.ndarray) -> np.ndarray:
+    """Repete o último valor válido de cada coluna (NaN antes do primeiro)"""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    validos = ~np.isnan(x)
+    ultimo = np.where(validos, np.arange(len(x))[:, None], 0)
+    np.maximum.accumulate(ultimo, axis=0, out=ultimo)
+    preenchido = np.ascontiguousarray(x[ultimo, np.arange(x.shape[1])])
+    # Colunas ainda sem valor apontam para a linha 0, que pode ser NaN ou não
+    preenchido[np.cumsum(validos, axis=0) == 0] = np.nan
+    return preenchido
+
+
+def _janela_completa(x: np.ndarray, janela: int) -> np.ndarray:
+    """True onde as últimas `janela` linhas não têm NaN"""
+    ausentes = np.zeros((len(x) + 1, x.shape[1]), dtype=np.int32)
+    np.cumsum(np.isnan(x), axis=0, out=ausentes[1:])
+    completa = np.zeros(x.shape, dtype=bool)
+    if len(x) >= janela:
+        completa[janela - 1:] = ausentes[janela:] == ausentes[:-janela]
+    return completa
+
+
+def _soma_movel(x: np.ndarray, janela: int) -> np.ndarray:
+    """Soma das últimas `janela` linhas por diferença de somas acumuladas (NaN conta zero)"""
+    acumulada = np.zeros((len(x) + 1, x.shape[1]))
+    np.cumsum(np.nan_to_num(x), axis=0, out=acumulada[1:])
+    soma = np.full(x.shape, np.nan)
+    if len(x) >= janela:
+        np.subtract(acumulada[janela:], acumulada[:-janela], out=soma[janela - 1:])
+    return soma
+
+
+def media_movel(x: np.ndarray, janela: int) -> np.ndarray:
+    """Média simples das últimas `janela` linhas (NaN até completar a janela)"""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    media = _soma_movel(x, janela)
+    media /= janela
+    media[~_janela_completa(x, janela)] = np.nan
+    return media
+
+
+def desvio_movel(x: np.ndarray, janela: int) -> np.ndarray:
+    """Desvio-padrão populacional móvel (o das bandas de Bollinger)"""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    # Centra cada coluna no primeiro valor válido para reduzir o cancelamento
+    referencia = np.nan_to_num(x[np.argmax(~np.isnan(x), axis=0), np.arange(x.shape[1])])
+    centrado = x - referencia
+    media = _soma_movel(centrado, janela) / janela
+    with np.errstate(invalid='ignore'):
+        variancia = _soma_movel(centrado * centrado, janela) / janela - media * media
+        desvio = np.sqrt(np.maximum(variancia, 0.0))
+    desvio[~_janela_completa(x, janela)] = np.nan
+    return desvio
+
+
+def media_exponencial(x: np.ndarray, alfa: float) -> np.ndarray:
+    """
+    EMA y_t = α·x_t + (1-α)·y_{t-1} por coluna, começando no primeiro valor
+    válido; NaN depois do início repete a média anterior
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    if len(x) == 0:
+        return np.empty(x.shape)
+    ausentes = np.isnan(x)
+    inicio = np.argmax(~ausentes, axis=0)
+    inicio[ausentes.all(axis=0)] = len(x)
+    iniciada = np.arange(len(x))[:, None] >= inicio
+    if (ausentes & iniciada).any():
+        return _ema_com_lacunas(x, alfa)
+    primeiro = np.nan_to_num(x[np.minimum(inicio, len(x) - 1), np.arange(x.shape[1])])
+    # Antes do início entra o próprio primeiro valor: a média fica parada nele
+    entrada = np.where(iniciada, x, primeiro)
+    estado_inicial = (1 - alfa) * primeiro
+    saida = lfilter([alfa], [1.0, alfa - 1.0], entrada, axis=0, zi=estado_inicial[None, :])[0]
+    saida[~iniciada] = np.nan
+    return saida
+
+
+def _ema_com_lacunas(x: np.ndarray, alfa: float) -> np.ndarray:
+    """EMA linha a linha (vetorizada nos símbolos) para séries com NaN no meio"""
+    saida = np.full(x.shape, np.nan)
+    estado = np.full(x.shape[1], np.nan)
+    for t in range(len(x)):
+        estado = _passo_ema(estado, x[t], alfa)
+        saida[t] = estado
+    return saida
+
+
+def _passo_ema(estado: np.ndarray, valor: np.ndarray, alfa: float) -> np.ndarray:
+    """Um passo da EMA: inicia no primeiro valor e ignora NaN"""
+    novo = np.where(np.isnan(estado), valor, estado + alfa * (valor - estado))
+    return np.where(np.isnan(valor), estado, novo)
+
+
+def _extremo_movel(x: np.ndarray, janela: int, operacao) -> np.ndarray:
+    """
+    Máximo (np.fmax) ou mínimo (np.fmin) das últimas `janela` linhas
+
+    van Herk/Gil-Werman: com a série dividida em blocos do tamanho da
+    janela, o extremo de qualquer janela é o extremo entre o sufixo do bloco
+    em que ela começa e o prefixo do bloco em que termina.
+    """
+    t, n = x.shape
+    resultado = np.full((t, n), np.nan)
+    if t < janela:
+        return resultado
+    blocos = -(-t // janela)
+    preenchido = np.full((blocos * janela, n), np.nan)
+    preenchido[:t] = x
+    por_bloco = preenchido.reshape(blocos, janela, n)
+    prefixos = operacao.accumulate(por_bloco, axis=1).reshape(-1, n)
+    sufixos = operacao.accumulate(por_bloco[:, ::-1], axis=1)[:, ::-1].reshape(-1, n)
+    resultado[janela - 1:] = operacao(sufixos[:t - janela + 1], prefixos[janela - 1:t])
+    resultado[~_janela_completa(x, janela)] = np.nan
+    return resultado
+
+
+def maxima_movel(x: np.ndarray, janela: int) -> np.ndarray:
+    return _extremo_movel(np.ascontiguousarray(x, dtype=np.float64), janela, np.fmax)
+
+
+def minima_movel(x: np.ndarray, janela: int) -> np.ndarray:
+    return _extremo_movel(np.ascontiguousarray(x, dtype=np.float64), janela, np.fmin)
+
+
+def _atrasar(x: np.ndarray) -> np.ndarray:
+    """Linha t recebe a linha t-1 (primeira linha NaN)"""
+    atrasado = np.full(x.shape, np.nan)
+    atrasado[1:] = x[:-1]
+    return atrasado
+
+
+def _amplitude_verdadeira(fechamento: np.ndarray, anterior: np.ndarray,
+                          maxima: Optional[np.ndarray], minima: Optional[np.ndarray]) -> np.ndarray:
+    """True range; sem máxima/mínima, |fechamento - fechamento anterior|"""
+    if maxima is None or minima is None:
+        return np.abs(fechamento - anterior)
+    with np.errstate(invalid='ignore'):
+        amplitude = np.fmax(maxima - minima, np.fmax(np.abs(maxima - anterior), np.abs(minima - anterior)))
+    return np.where(np.isnan(maxima) | np.isnan(minima), np.nan, amplitude)
+
+
+def _rsi(media_ganhos: np.ndarray, media_perdas: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + media_ganhos / media_perdas)
+    # Sem perdas na janela: RSI 100 (e 50 se o preço ficou parado)
+    rsi = np.where((media_perdas == 0) & (media_ganhos > 0), 100.0, rsi)
+    return np.where((media_perdas == 0) & (media_ganhos == 0), 50.0, rsi)
+
+
+class MotorIndicadores:
+    """Parâmetros dos indicadores e cálculo sobre a matriz inteira"""
+
+    def __init__(self, janela_media: int = 20, janela_longa: int = 50, janela_rsi: int = 14,
+                 macd: Sequence[int] = (12, 26, 9), janela_bollinger: int = 20, desvios_bollinger: float = 2.0,
+                 janela_atr: int = 14, janela_extremos: int = 20):
+        self.janela_media = janela_media
+        self.janela_longa = janela_longa
+        self.janela_rsi = janela_rsi
+        self.macd_rapida, self.macd_lenta, self.macd_sinal = macd
+        self.janela_bollinger = janela_bollinger
+        self.desvios_bollinger = desvios_bollinger
+        self.janela_atr = janela_atr
+        self.janela_extremos = janela_extremos
+
+    @property
+    def historico_necessario(self) -> int:
+        """Linhas mantidas pelo modo incremental para as janelas simples"""
+        return max(self.janela_media, self.janela_longa, self.janela_bollinger, self.janela_extremos + 1)
+
+    def calcular(self, fechamento: np.ndarray, maxima: np.ndarray = None, minima: np.ndarray = None,
+                 chaves: Sequence[str] = CHAVES_INDICADORES) -> Dict[str, np.ndarray]:
+        """
+        Indicadores pedidos em `chaves` (matrizes do mesmo formato de
+        `fechamento`); pedir só alguns evita calcular e guardar os demais
+        """
+        desconhecidas = set(chaves) - set(CHAVES_INDICADORES)
+        if desconhecidas:
+            raise ValueError(f"Indicadores desconhecidos: {sorted(desconhecidas)}")
+        precos = preencher_adiante(fechamento)
+        if len(precos) == 0:
+            return {chave: np.empty(precos.shape) for chave in chaves}
+        anterior = _atrasar(precos)
+        resultado: Dict[str, np.ndarray] = {}
+
+        if {'sma', 'sma_longa'} & set(chaves):
+            resultado['sma'] = media_movel(precos, self.janela_media)
+            resultado['sma_longa'] = media_movel(precos, self.janela_longa)
+        if 'ema' in chaves:
+            resultado['ema'] = media_exponencial(precos, 2.0 / (self.janela_media + 1))
+        if 'rsi' in chaves:
+            variacao = precos - anterior
+            with np.errstate(invalid='ignore'):
+                ganhos = np.where(np.isnan(variacao), np.nan, np.maximum(variacao, 0.0))
+                perdas = np.where(np.isnan(variacao), np.nan, np.maximum(-variacao, 0.0))
+            resultado['rsi'] = _rsi(media_exponencial(ganhos, 1.0 / self.janela_rsi),
+                                    media_exponencial(perdas, 1.0 / self.janela_rsi))
+        if {'macd', 'macd_sinal', 'macd_histograma'} & set(chaves):
+            macd = (media_exponencial(precos, 2.0 / (self.macd_rapida + 1))
+                    - media_exponencial(precos, 2.0 / (self.macd_lenta + 1)))
+            sinal = media_exponencial(macd, 2.0 / (self.macd_sinal + 1))
+            resultado.update(macd=macd, macd_sinal=sinal, macd_histograma=macd - sinal)
+        if {'bollinger_superior', 'bollinger_inferior'} & set(chaves):
+            if 'sma' in resultado and self.janela_bollinger == self.janela_media:
+                media_bollinger = resultado['sma']
+            else:
+                media_bollinger = media_movel(precos, self.janela_bollinger)
+            largura = self.desvios_bollinger * desvio_movel(precos, self.janela_bollinger)
+            resultado['bollinger_superior'] = media_bollinger + largura
+            resultado['bollinger_inferior'] = media_bollinger - largura
+        if 'atr' in chaves:
+            amplitude = _amplitude_verdadeira(precos, anterior, maxima, minima)
+            resultado['atr'] = media_exponencial(amplitude, 1.0 / self.janela_atr)
+        if {'suporte', 'resistencia'} & set(chaves):
+            resultado['suporte'] = _atrasar(minima_movel(precos, self.janela_extremos))
+            resultado['resistencia'] = _atrasar(maxima_movel(precos, self.janela_extremos))
+        return resultado
+
+    def iniciar(self, fechamento: np.ndarray, maxima: np.ndarray = None,
+                minima: np.ndarray = None) -> 'EstadoIndicadores':
+        """Calcula o histórico e guarda o estado para atualizações pregão a pregão"""
+        return EstadoIndicadores(self, fechamento, maxima, minima)
+
+
+class EstadoIndicadores:
+    """Estado do modo incremental: últimas médias e a janela de preços recentes"""
+
+    def __init__(self, motor: MotorIndicadores, fechamento: np.ndarray, maxima: np.ndarray = None,
+                 minima: np.ndarray = None):
+        self.motor = motor
+        self.indicadores = motor.calcular(fechamento, maxima, minima)
+
+        precos = preencher_adiante(fechamento)
+        n = precos.shape[1]
+
+        def ultimo(valores: np.ndarray) -> np.ndarray:
+            # Sem histórico o último valor é NaN (como um símbolo ainda sem pregões)
+            return valores[-1].copy() if len(valores) else np.full(n, np.nan)
+
+        self.ultimos: Dict[str, np.ndarray] = {chave: ultimo(valores) for chave, valores in self.indicadores.items()}
+        # Janela circular com os últimos preços (NaN enquanto não há histórico)
+        self._janela = np.full((motor.historico_necessario, n), np.nan)
+        recentes = precos[-motor.historico_necessario:]
+        if len(recentes):
+            self._janela[-len(recentes):] = recentes
+        self.ultimo_fechamento = ultimo(precos)
+
+        # Médias exponenciais internas (recalculadas na mesma ordem do cálculo completo)
+        anterior = _atrasar(precos)
+        variacao = precos - anterior
+        with np.errstate(invalid='ignore'):
+            ganhos = np.where(np.isnan(variacao), np.nan, np.maximum(variacao, 0.0))
+            perdas = np.where(np.isnan(variacao), np.nan, np.maximum(-variacao, 0.0))
+        self._ema_rapida = ultimo(media_exponencial(precos, 2.0 / (motor.macd_rapida + 1)))
+        self._ema_lenta = ultimo(media_exponencial(precos, 2.0 / (motor.macd_lenta + 1)))
+        self._media_ganhos = ultimo(media_exponencial(ganhos, 1.0 / motor.janela_rsi))
+        self._media_perdas = ultimo(media_exponencial(perdas, 1.0 / motor.janela_rsi))
+
+    def atualizar(self, fechamento: np.ndarray, maxima: np.ndarray = None,
+                  minima: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        Processa o pregão mais recente (um valor por símbolo; NaN repete o
+        último fechamento) e devolve os indicadores desse pregão
+        """
+        motor = self.motor
+        valor = np.asarray(fechamento, dtype=np.float64)
+        valor = np.where(np.isnan(valor), self.ultimo_fechamento, valor)
+        anterior = self.ultimo_fechamento
+        variacao = valor - anterior
+
+        # Suporte e resistência usam a janela antes de incluir o pregão atual
+        previos = self._janela[-motor.janela_extremos:]
+        completos = ~np.isnan(previos).any(axis=0)
+        with np.errstate(invalid='ignore'):
+            suporte = np.where(completos, np.nanmin(np.where(np.isnan(previos), np.inf, previos), axis=0), np.nan)
+            resistencia = np.where(completos, np.nanmax(np.where(np.isnan(previos), -np.inf, previos), axis=0), np.nan)
+
+        self._janela = np.roll(self._janela, -1, axis=0)
+        self._janela[-1] = valor
+        self.ultimo_fechamento = valor
+
+        def media_simples(janela: int) -> np.ndarray:
+            trecho = self._janela[-janela:]
+            return np.where(np.isnan(trecho).any(axis=0), np.nan, trecho.mean(axis=0))
+
+        with np.errstate(invalid='ignore'):
+            ganho = np.where(np.isnan(variacao), np.nan, np.maximum(variacao, 0.0))
+            perda = np.where(np.isnan(variacao), np.nan, np.maximum(-variacao, 0.0))
+        self._media_ganhos = _passo_ema(self._media_ganhos, ganho, 1.0 / motor.janela_rsi)
+        self._media_perdas = _passo_ema(self._media_perdas, perda, 1.0 / motor.janela_rsi)
+        self._ema_rapida = _passo_ema(self._ema_rapida, valor, 2.0 / (motor.macd_rapida + 1))
+        self._ema_lenta = _passo_ema(self._ema_lenta, valor, 2.0 / (motor.macd_lenta + 1))
+        macd = self._ema_rapida - self._ema_lenta
+        sinal = _passo_ema(self.ultimos['macd_sinal'], macd, 2.0 / (motor.macd_sinal + 1))
+
+        trecho = self._janela[-motor.janela_bollinger:]
+        media_bollinger = np.where(np.isnan(trecho).any(axis=0), np.nan, trecho.mean(axis=0))
+        largura = motor.desvios_bollinger * trecho.std(axis=0)
+        amplitude = _amplitude_verdadeira(valor, anterior, maxima, minima)
+
+        self.ultimos = {
+            'sma': media_simples(motor.janela_media),
+            'sma_longa': media_simples(motor.janela_longa),
+            'ema': _passo_ema(self.ultimos['ema'], valor, 2.0 / (motor.janela_media + 1)),
+            'rsi': _rsi(self._media_ganhos, self._media_perdas),
+            'macd': macd,
+            'macd_sinal': sinal,
+            'macd_histograma': macd - sinal,
+            'bollinger_superior': media_bollinger + largura,
+            'bollinger_inferior': media_bollinger - largura,
+            'atr': _passo_ema(self.ultimos['atr'], amplitude, 1.0 / motor.janela_atr),
+            'suporte': suporte,
+            'resistencia': resistencia,
+        }
+        return self.ultimos
+
+
+def classificar_tendencia(fechamento: np.ndarray, sma: np.ndarray, sma_longa: np.ndarray) -> np.ndarray:
+    """'alta' (preço > média curta > média longa), 'baixa' (o inverso) ou 'lateral'"""
+    with np.errstate(invalid='ignore'):
+        alta = (fechamento > sma) & (sma > sma_longa)
+        baixa = (fechamento < sma) & (sma < sma_longa)
+    return np.where(alta, 'alta', np.where(baixa, 'baixa', 'lateral')).astype(object)
+
+
+def resumo_tecnico(ultimos: Dict[str, np.ndarray], fechamento: np.ndarray,
+                   simbolos: List[str]) -> Dict[str, Dict]:
+    """
+    Leitura dos indicadores do último pregão por símbolo: valores
+    arredondados, tendência, zona do RSI, rompimento e posição nas bandas
+    """
+    fechamento = np.asarray(fechamento, dtype=np.float64)
+    tendencias = classificar_tendencia(fechamento, ultimos['sma'], ultimos['sma_longa'])
+    resumo = {}
+    for i, simbolo in enumerate(simbolos):
+        if np.isnan(fechamento[i]):
+            continue
+        valores = {chave: ultimos[chave][i] for chave in CHAVES_INDICADORES}
+        rsi = valores['rsi']
+        if fechamento[i] > valores['resistencia']:
+            rompimento = 'resistencia'
+        elif fechamento[i] < valores['suporte']:
+            rompimento = 'suporte'
+        else:
+            rompimento = None
+        if fechamento[i] > valores['bollinger_superior']:
+            bandas = 'acima'
+        elif fechamento[i] < valores['bollinger_inferior']:
+            bandas = 'abaixo'
+        else:
+            bandas = 'dentro'
+        resumo[simbolo] = {
+            **{chave: (None if np.isnan(v) else round(float(v), 4)) for chave, v in valores.items()},
+            'tendencia': tendencias[i],
+            'zona_rsi': 'sobrecomprado' if rsi > 70 else ('sobrevendido' if rsi < 30 else 'neutra'),
+            'rompimento': rompimento,
+            'bandas': bandas
+        }
+    return resumo
@@ -0,0 +1,313 @@
+"""
+Índice de busca textual das notícias coletadas (SQLite FTS5).
+
+Todo artigo coletado entra em estado/noticias.db: uma tabela comum com os
+campos do Artigo (chave única = link, ou fonte + título) e uma tabela FTS5
+de conteúdo externo sobre título e corpo, mantida por gatilhos. O
+tokenizador unicode61 com remove_diacritics ignora caixa e acentos, então
+"inflação", "Inflacao" e "INFLAÇÃO" são o mesmo termo. Os ativos citados
+(ticker ou nome da empresa, via entidades_b3) vão para a tabela
+mencoes_ativos, então a busca por PETR4 também encontra "Petrobras".
+
+Consultas combinam tickers, termos (palavras-chave de
+FontesDados.PALAVRAS_CHAVE_NOTICIAS ou sintaxe FTS5 livre), fonte e
+intervalo de datas. A busca textual percorre o índice invertido do mais
+recente indexado para o mais antigo e para no limite pedido; sem termos, a
+filtragem por fonte/data usa índices B-tree. Em ambos os casos o custo
+depende do número de resultados, não do tamanho da base (agregações como
+resumo_sentimento percorrem todos os artigos que casam).
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from configuracao import FontesDados, caminho_estado
+from entidades_b3 import ExtratorEntidades, obter_extrator
+from registros_noticias import Artigo, Fonte, RotuloSentimento, normalizar_fonte
+
+ARQUIVO_INDICE_PADRAO = caminho_estado('noticias.db')
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS artigos (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,
+    titulo TEXT NOT NULL,
+    fonte TEXT NOT NULL,
+    link TEXT,
+    data_hora TEXT NOT NULL,
+    rotulo TEXT,
+    pontuacao REAL,
+    confianca_sentimento REAL,
+    relevancia REAL,
+    tipo_recomendacao TEXT,
+    confianca REAL,
+    corpo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_artigos_data ON artigos (data_hora);
+CREATE INDEX IF NOT EXISTS idx_artigos_fonte_data ON artigos (fonte, data_hora);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS artigos_fts USING fts5(
+    titulo, corpo, content='artigos', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TABLE IF NOT EXISTS mencoes_ativos (
+    ticker TEXT NOT NULL,
+    artigo_id INTEGER NOT NULL,
+    PRIMARY KEY (ticker, artigo_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS artigos_ai AFTER INSERT ON artigos BEGIN
+    INSERT INTO artigos_fts (rowid, titulo, corpo) VALUES (new.id, new.titulo, new.corpo);
+END;
+CREATE TRIGGER IF NOT EXISTS artigos_ad AFTER DELETE ON artigos BEGIN
+    INSERT INTO artigos_fts (artigos_fts, rowid, titulo, corpo) VALUES ('delete', old.id, old.titulo, old.corpo);
+END;
+CREATE TRIGGER IF NOT EXISTS artigos_au AFTER UPDATE OF titulo, corpo ON artigos BEGIN
+    INSERT INTO artigos_fts (artigos_fts, rowid, titulo, corpo) VALUES ('delete', old.id, old.titulo, old.corpo);
+    INSERT INTO artigos_fts (rowid, titulo, corpo) VALUES (new.id, new.titulo, new.corpo);
+END;
+"""
+
+# Um artigo já indexado mantém o corpo anterior se a nova coleta não o trouxe
+_INSERIR = """
+INSERT INTO artigos (chave, titulo, fonte, link, data_hora, rotulo, pontuacao, confianca_sentimento,
+                     relevancia, tipo_recomendacao, confianca, corpo)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (chave) DO UPDATE SET
+    rotulo = COALESCE(excluded.rotulo, rotulo),
+    pontuacao = CASE WHEN excluded.rotulo IS NULL THEN pontuacao ELSE excluded.pontuacao END,
+    confianca_sentimento = CASE WHEN excluded.rotulo IS NULL THEN confianca_sentimento
+                                ELSE excluded.confianca_sentimento END,
+    relevancia = excluded.relevancia,
+    tipo_recomendacao = COALESCE(excluded.tipo_recomendacao, tipo_recomendacao),
+    confianca = COALESCE(excluded.confianca, confianca),
+    corpo = COALESCE(excluded.corpo, corpo)
+"""
+
+_INSERIR_MENCAO = """
+INSERT OR IGNORE INTO mencoes_ativos (ticker, artigo_id) SELECT ?, id FROM artigos WHERE chave = ?
+"""
+
+_COLUNAS = ('titulo', 'fonte', 'link', 'data_hora', 'rotulo', 'pontuacao', 'confianca_sentimento',
+            'relevancia', 'tipo_recomendacao', 'confianca')
+
+
+def termo_fts(termo: str) -> str:
+    """Termo ou expressão ('renda fixa') como frase FTS5, sem interpretar operadores"""
+    return '"' + termo.replace('"', '""') + '"'
+
+
+def _data_texto(data: Optional[datetime]) -> Optional[str]:
+    return data.isoformat(timespec='seconds') if data else None
+
+
+class IndiceNoticias:
+    """Índice persistente e incremental das notícias coletadas"""
+
+    def __init__(self, caminho: str = ARQUIVO_INDICE_PADRAO, extrator: ExtratorEntidades = None):
+        self.caminho = caminho
+        self.extrator = extrator or obter_extrator()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.executescript(_ESQUEMA)
+
+    @staticmethod
+    def _chave(artigo: Artigo) -> str:
+        return artigo.link or f"{artigo.fonte}|{artigo.titulo}"
+
+    def adicionar(self, artigos: Iterable[Artigo]) -> int:
+        """Insere (ou atualiza) os artigos; retorna quantos eram novos"""
+        artigos = [a for a in artigos if a.titulo]
+        if not artigos:
+            return 0
+        linhas = [
+            (self._chave(a), a.titulo, str(a.fonte), a.link, _data_texto(a.data_hora),
+             a.rotulo.value if a.rotulo else None, a.pontuacao, a.confianca_sentimento, a.relevancia,
+             a.tipo_recomendacao, a.confianca, a.corpo)
+            for a in artigos
+        ]
+        mencoes = [
+            (ticker, self._chave(a))
+            for a in artigos for ticker in self.extrator.tickers(f"{a.titulo}\n{a.corpo or ''}")
+        ]
+        # Novas linhas recebem ids acima do maior existente; atualizações mantêm o id
+        with self._trava, self._conexao:
+            antes = self._conexao.execute('SELECT COALESCE(MAX(id), 0) FROM artigos').fetchone()[0]
+            self._conexao.executemany(_INSERIR, linhas)
+            self._conexao.executemany(_INSERIR_MENCAO, mencoes)
+            depois = self._conexao.execute('SELECT COALESCE(MAX(id), 0) FROM artigos').fetchone()[0]
+        return depois - antes
+
+    def _filtros(self, consulta: Optional[str], tickers: Sequence[str], palavras_chave: Sequence[str],
+                 fonte: Optional[Fonte], inicio: Optional[datetime], fim: Optional[datetime]):
+        """Monta o MATCH do FTS5 e as condições sobre a tabela de artigos"""
+        expressoes = []
+        if consulta:
+            expressoes.append(f"({consulta})")
+        if palavras_chave:
+            expressoes.append('(' + ' OR '.join(termo_fts(p) for p in palavras_chave) + ')')
+
+        condicoes, parametros = [], []
+        if tickers:
+            resolvidos = sorted({t for termo in tickers for t in self.extrator.resolver(termo)})
+            marcadores = ', '.join('?' * len(resolvidos))
+            condicoes.append(f"a.id IN (SELECT artigo_id FROM mencoes_ativos WHERE ticker IN ({marcadores}))")
+            parametros.extend(resolvidos)
+        if fonte is not None:
+            condicoes.append('a.fonte = ?')
+            parametros.append(str(normalizar_fonte(fonte)))
+        if inicio is not None:
+            condicoes.append('a.data_hora >= ?')
+            parametros.append(_data_texto(inicio))
+        if fim is not None:
+            condicoes.append('a.data_hora <= ?')
+            parametros.append(_data_texto(fim))
+        return ' AND '.join(expressoes), condicoes, parametros
+
+    def _consultar(self, selecao: str, consulta, tickers, palavras_chave, fonte, inicio, fim,
+                   agrupamento: str = None, limite: int = None) -> List[tuple]:
+        correspondencia, condicoes, parametros = self._filtros(consulta, tickers, palavras_chave,
+                                                               fonte, inicio, fim)
+        if correspondencia:
+            sql = f"SELECT {selecao} FROM artigos_fts JOIN artigos a ON a.id = artigos_fts.rowid"
+            condicoes = ['artigos_fts MATCH ?'] + condicoes
+            parametros = [correspondencia] + parametros
+            # Percorrer o FTS por rowid permite parar no LIMIT sem ordenar todos os resultados
+            ordem = 'ORDER BY artigos_fts.rowid DESC LIMIT ?'
+        else:
+            sql = f"SELECT {selecao} FROM artigos a"
+            ordem = 'ORDER BY a.data_hora DESC LIMIT ?'
+        if condicoes:
+            sql += ' WHERE ' + ' AND '.join(condicoes)
+        if agrupamento:
+            sql += f" GROUP BY {agrupamento}"
+        if limite is not None:
+            sql += f" {ordem}"
+            parametros.append(limite)
+        with self._trava:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def buscar(self, consulta: str = None, tickers: Sequence[str] = (), palavras_chave: Sequence[str] = (),
+               fonte: Fonte = None, inicio: datetime = None, fim: datetime = None, limite: int = 100,
+               com_corpo: bool = False) -> List[Artigo]:
+        """
+        Artigos que atendem a todos os filtros, dos mais recentes aos mais antigos
+
+        Com termos de busca, "mais recente" é a ordem de indexação (que
+        acompanha a de publicação, já que a coleta é incremental); sem
+        termos, é a data/hora do artigo.
+
+        `tickers` aceita tickers ou nomes ('PETR4', 'Itaú') e
+        `palavras_chave` termos do texto; dentro de cada lista basta um
+        aparecer no título ou no corpo. `consulta` aceita a sintaxe do FTS5
+        (ex.: 'selic NEAR(copom)').
+        """
+        colunas = ', '.join(f"a.{c}" for c in _COLUNAS) + (', a.corpo' if com_corpo else ', NULL')
+        linhas = self._consultar(colunas, consulta, tickers, palavras_chave, fonte, inicio, fim,
+                                 limite=limite)
+        return [self._para_artigo(linha) for linha in linhas]
+
+    def contar(self, consulta: str = None, tickers: Sequence[str] = (), palavras_chave: Sequence[str] = (),
+               fonte: Fonte = None, inicio: datetime = None, fim: datetime = None) -> int:
+        return self._consultar('COUNT(*)', consulta, tickers, palavras_chave, fonte, inicio, fim)[0][0]
+
+    def mencoes(self, termos: Sequence[str] = None, fonte: Fonte = None, inicio: datetime = None,
+                fim: datetime = None) -> Dict[str, int]:
+        """
+        Quantidade de artigos que citam cada termo (padrão: palavras-chave de
+        FontesDados), em ordem decrescente e sem os termos não citados
+        """
+        termos = termos if termos is not None else FontesDados().PALAVRAS_CHAVE_NOTICIAS
+        contagem = {termo: self.contar(palavras_chave=[termo], fonte=fonte, inicio=inicio, fim=fim)
+                    for termo in termos}
+        return dict(sorted(((t, n) for t, n in contagem.items() if n), key=lambda item: item[1], reverse=True))
+
+    def tickers_citados(self, fonte: Fonte = None, inicio: datetime = None, fim: datetime = None) -> Dict[str, int]:
+        """Quantidade de artigos que citam cada ativo, em ordem decrescente"""
+        _, condicoes, parametros = self._filtros(None, (), (), fonte, inicio, fim)
+        sql = "SELECT m.ticker, COUNT(*) FROM mencoes_ativos m JOIN artigos a ON a.id = m.artigo_id"
+        if condicoes:
+            sql += ' WHERE ' + ' AND '.join(condicoes)
+        sql += ' GROUP BY m.ticker ORDER BY COUNT(*) DESC'
+        with self._trava:
+            return dict(self._conexao.execute(sql, parametros).fetchall())
+
+    def resumo_sentimento(self, consulta: str = None, tickers: Sequence[str] = (),
+                          palavras_chave: Sequence[str] = (), fonte: Fonte = None,
+                          inicio: datetime = None, fim: datetime = None) -> Dict:
+        """Contagem por rótulo e pontuação média ponderada pela relevância"""
+        linhas = self._consultar(
+            'a.rotulo, COUNT(*), SUM(a.pontuacao * a.relevancia), SUM(a.relevancia)',
+            consulta, tickers, palavras_chave, fonte, inicio, fim, agrupamento='a.rotulo'
+        )
+        resumo = {rotulo.value: 0 for rotulo in RotuloSentimento}
+        soma_ponderada = soma_pesos = 0.0
+        for rotulo, quantidade, ponderada, pesos in linhas:
+            if rotulo is None:
+                continue
+            resumo[rotulo] = quantidade
+            soma_ponderada += ponderada or 0.0
+            soma_pesos += pesos or 0.0
+        resumo['total'] = sum(resumo[r.value] for r in RotuloSentimento)
+        resumo['pontuacao_media'] = soma_ponderada / soma_pesos if soma_pesos else None
+        return resumo
+
+    @staticmethod
+    def _para_artigo(linha: tuple) -> Artigo:
+        (titulo, fonte, link, data_hora, rotulo, pontuacao, confianca_sentimento,
+         relevancia, tipo_recomendacao, confianca, corpo) = linha
+        return Artigo(titulo, fonte, link=link, data_hora=datetime.fromisoformat(data_hora),
+                      rotulo=rotulo, pontuacao=pontuacao or 0.0,
+                      confianca_sentimento=confianca_sentimento or 0.0,
+                      relevancia=relevancia if relevancia is not None else 0.5,
+                      tipo_recomendacao=tipo_recomendacao, confianca=confianca, corpo=corpo)
+
+    def corpos(self, links: Iterable[str]) -> Dict[str, str]:
+        """Corpo já indexado de cada link (só os que têm corpo)"""
+        links = list(dict.fromkeys(links))
+        corpos = {}
+        # Lotes abaixo do limite de parâmetros do SQLite
+        for inicio in range(0, len(links), 500):
+            lote = links[inicio:inicio + 500]
+            marcadores = ', '.join('?' * len(lote))
+            with self._trava:
+                linhas = self._conexao.execute(
+                    f"SELECT chave, corpo FROM artigos WHERE chave IN ({marcadores}) AND corpo IS NOT NULL",
+                    lote).fetchall()
+            corpos.update(linhas)
+        return corpos
+
+    def __len__(self) -> int:
+        with self._trava:
+            return self._conexao.execute('SELECT COUNT(*) FROM artigos').fetchone()[0]
+
+    def otimizar(self):
+        """Funde os segmentos do índice invertido (útil após cargas grandes)"""
+        with self._trava, self._conexao:
+            self._conexao.execute("INSERT INTO artigos_fts (artigos_fts) VALUES ('optimize')")
+
+    def fechar(self):
+        with self._trava:
+            self._conexao.close()
+
+
+_indice_padrao: Optional[IndiceNoticias] = None
+_trava_indice = threading.Lock()
+
+
+def obter_indice() -> IndiceNoticias:
+    """Índice global (um por processo), compartilhado por todos os coletores"""
+    global _indice_padrao
+    with _trava_indice:
+        if _indice_padrao is None:
+            _indice_padrao = IndiceNoticias()
+        return _indice_padrao
@@ -0,0 +1,307 @@
+"""
+Instrumentação leve do pipeline: spans cronometrados, contadores e exportação.
+
+Uso típico:
+
+    rastreador = obter_rastreador()
+
+    with rastreador.span('coleta.yahoo', simbolo='^BVSP'):
+        ...
+
+    @medir('analise.oportunidades')
+    def analisar_oportunidades(...): ...
+
+Cada execução de topo (rastreador.execucao) gera um trace JSON e um arquivo
+de métricas em formato texto do Prometheus. Só uma execução de topo roda por
+vez no processo: o rastreador padrão é compartilhado, e uma execucao aberta
+em outra thread enquanto a primeira está ativa vira span dela. Fora de uma execução só os
+últimos LIMITE_SPANS_AVULSOS spans são mantidos, para que um processo de
+longa duração que nunca abre execuções não acumule spans sem limite.
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+LIMITE_SPANS_AVULSOS = 1000  # Spans guardados fora de rastreador.execucao
+
+_span_atual: contextvars.ContextVar = contextvars.ContextVar('span_atual', default=None)
+
+
+class Span:
+    """Intervalo cronometrado de uma etapa do pipeline"""
+
+    __slots__ = ('id', 'pai_id', 'nome', 'inicio', 'fim', 'atributos', 'erro')
+
+    def __init__(self, id_span: int, nome: str, pai_id: Optional[int], atributos: Dict):
+        self.id = id_span
+        self.pai_id = pai_id
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.fim: Optional[float] = None
+        self.atributos = atributos
+        self.erro: Optional[str] = None
+
+    @property
+    def duracao(self) -> float:
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def definir(self, **atributos):
+        """Acrescenta atributos ao span (ex.: itens coletados)"""
+        self.atributos.update(atributos)
+
+    def como_dict(self, origem: float) -> Dict:
+        return {
+            'id': self.id,
+            'pai_id': self.pai_id,
+            'nome': self.nome,
+            'inicio_ms': round((self.inicio - origem) * 1000, 3),
+            'duracao_ms': round(self.duracao * 1000, 3),
+            'atributos': self.atributos,
+            'erro': self.erro
+        }
+
+
+class Rastreador:
+    """Coleta spans e contadores de uma execução (thread-safe e compatível com asyncio)"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._ids = itertools.count(1)
+        self._execucao_ativa = False
+        self.observadores: List = []  # Chamados com (evento, span), evento 'inicio' ou 'fim'
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta spans e contadores acumulados"""
+        with self._trava:
+            # Dentro de uma execução guarda todos os spans; fora dela, só os mais recentes
+            self.spans: Union[List[Span], Deque[Span]] = (
+                [] if self._execucao_ativa else deque(maxlen=LIMITE_SPANS_AVULSOS))
+            self.contadores: Dict[Tuple[str, Tuple], float] = {}
+            self.origem = time.perf_counter()
+            self.inicio_execucao = datetime.now()
+
+    @contextmanager
+    def span(self, nome: str, **atributos):
+        """Cronometra o bloco como um span filho do span corrente"""
+        pai = _span_atual.get()
+        span = Span(next(self._ids), nome, pai.id if pai else None, atributos)
+        token = _span_atual.set(span)
+        self._notificar('inicio', span)
+        try:
+            yield span
+        except BaseException as e:
+            span.erro = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.fim = time.perf_counter()
+            _span_atual.reset(token)
+            with self._trava:
+                self.spans.append(span)
+            self._notificar('fim', span)
+
+    def _notificar(self, evento: str, span: Span):
+        for observador in list(self.observadores):
+            observador(evento, span)
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        """Soma `valor` ao contador `nome` com os rótulos informados"""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def registrar_download(self, fonte: str, num_bytes: int):
+        """Contabiliza bytes baixados de uma fonte"""
+        self.incrementar('bytes_baixados', num_bytes, fonte=fonte)
+
+    def registrar_itens(self, fonte: str, quantidade: int):
+        """Contabiliza itens (notícias, ativos, indicadores) obtidos de uma fonte"""
+        self.incrementar('itens_coletados', quantidade, fonte=fonte)
+
+    @contextmanager
+    def execucao(self, nome: str, diretorio: str = 'logs'):
+        """
+        Span de topo de uma execução completa
+
+        Na execução mais externa reinicia o rastreador e, ao final, exporta
+        trace JSON e métricas Prometheus. Execuções aninhadas viram spans comuns.
+        A execução ativa vale para o processo todo (não por thread ou tarefa):
+        abra uma execução de topo por vez.
+        """
+        with self._trava:
+            externa = not self._execucao_ativa
+            self._execucao_ativa = True
+
+        if externa:
+            self.reiniciar()
+        try:
+            with self.span(nome) as span:
+                yield span
+        finally:
+            if externa:
+                with self._trava:
+                    self._execucao_ativa = False
+                try:
+                    self.exportar(diretorio, nome)
+                except OSError:
+                    pass
+                with self._trava:
+                    self.spans = deque(self.spans, maxlen=LIMITE_SPANS_AVULSOS)
+
+    def resumo_etapas(self) -> Dict[str, Dict[str, float]]:
+        """Agrega duração por nome de span (contagem, total, máximo)"""
+        resumo: Dict[str, Dict[str, float]] = {}
+        with self._trava:
+            spans = list(self.spans)
+        for span in spans:
+            item = resumo.setdefault(span.nome, {'contagem': 0, 'total_s': 0.0, 'max_s': 0.0, 'erros': 0})
+            item['contagem'] += 1
+            item['total_s'] += span.duracao
+            item['max_s'] = max(item['max_s'], span.duracao)
+            item['erros'] += 1 if span.erro else 0
+        return resumo
+
+    def gerar_trace(self) -> Dict:
+        """Trace da execução em estrutura serializável"""
+        with self._trava:
+            spans = sorted(self.spans, key=lambda s: s.inicio)
+            contadores = [
+                {'nome': nome, 'rotulos': dict(rotulos), 'valor': valor}
+                for (nome, rotulos), valor in sorted(self.contadores.items())
+            ]
+        return {
+            'inicio': self.inicio_execucao.isoformat(),
+            'spans': [s.como_dict(self.origem) for s in spans],
+            'contadores': contadores,
+            'resumo_etapas': self.resumo_etapas()
+        }
+
+    def gerar_texto_prometheus(self, prefixo: str = 'agente_ia') -> str:
+        """Métricas no formato de exposição texto do Prometheus"""
+        linhas = [
+            f'# HELP {prefixo}_etapa_duracao_segundos Duração das etapas do pipeline',
+            f'# TYPE {prefixo}_etapa_duracao_segundos summary'
+        ]
+        for nome, item in sorted(self.resumo_etapas().items()):
+            rotulo = f'etapa="{_escapar(nome)}"'
+            linhas.append(f'{prefixo}_etapa_duracao_segundos_sum{{{rotulo}}} {item["total_s"]:.6f}')
+            linhas.append(f'{prefixo}_etapa_duracao_segundos_count{{{rotulo}}} {item["contagem"]}')
+            linhas.append(f'{prefixo}_etapa_erros_total{{{rotulo}}} {item["erros"]}')
+
+        with self._trava:
+            contadores = sorted(self.contadores.items())
+        nomes_declarados = set()
+        for (nome, rotulos), valor in contadores:
+            metrica = f'{prefixo}_{nome}_total'
+            if metrica not in nomes_declarados:
+                linhas.append(f'# TYPE {metrica} counter')
+                nomes_declarados.add(metrica)
+            texto_rotulos = ','.join(f'{k}="{_escapar(str(v))}"' for k, v in rotulos)
+            linhas.append(f'{metrica}{{{texto_rotulos}}} {valor:g}')
+
+        linhas.extend(self._metricas_rede(prefixo))
+        return '\n'.join(linhas) + '\n'
+
+    @staticmethod
+    def _metricas_rede(prefixo: str) -> List[str]:
+        """Inclui métricas do limitador de taxa e estado dos disjuntores"""
+        from limitador_taxa import obter_limitador
+        from resiliencia import obter_registro_disjuntores
+
+        linhas = []
+        for host, m in sorted(obter_limitador().metricas().items()):
+            rotulo = f'host="{_escapar(host)}"'
+            linhas.append(f'{prefixo}_limitador_requisicoes_total{{{rotulo}}} {m["requisicoes"]}')
+            linhas.append(f'{prefixo}_limitador_espera_segundos_total{{{rotulo}}} {m["espera_total_s"]}')
+            linhas.append(f'{prefixo}_limitador_espera_maxima_segundos{{{rotulo}}} {m["espera_maxima_s"]}')
+        for host, estado in sorted(obter_registro_disjuntores().estados().items()):
+            linhas.append(f'{prefixo}_circuito_aberto{{host="{_escapar(host)}"}} {int(estado != "fechado")}')
+        return linhas
+
+    def exportar(self, diretorio: str = 'logs', nome: str = 'execucao') -> Tuple[str, str]:
+        """Grava trace JSON e métricas Prometheus; retorna os caminhos"""
+        os.makedirs(diretorio, exist_ok=True)
+        marca_tempo = self.inicio_execucao.strftime('%Y%m%d_%H%M%S')
+
+        caminho_trace = os.path.join(diretorio, f'trace_{nome}_{marca_tempo}.json')
+        with open(caminho_trace, 'w', encoding='utf-8') as f:
+            json.dump(self.gerar_trace(), f, ensure_ascii=False, indent=2, default=str)
+
+        caminho_metricas = os.path.join(diretorio, f'metricas_{nome}_{marca_tempo}.prom')
+        with open(caminho_metricas, 'w', encoding='utf-8') as f:
+            f.write(self.gerar_texto_prometheus())
+
+        return caminho_trace, caminho_metricas
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_rastreador_padrao = Rastreador()
+
+
+def obter_rastreador() -> Rastreador:
+    """Rastreador global do processo"""
+    return _rastreador_padrao
+
+
+def medir(nome: str = None, contar_itens: bool = False):
+    """
+    Decorador que cronometra a função como um span
+
+    Com contar_itens=True, registra len() do retorno como atributo 'itens'.
+    Funciona com funções síncronas e corrotinas.
+    """
+    def decorador(funcao):
+        nome_span = nome or funcao.__qualname__
+
+        if inspect.iscoroutinefunction(funcao):
+            @functools.wraps(funcao)
+            async def envoltorio_async(*args, **kwargs):
+                with _rastreador_padrao.span(nome_span) as span:
+                    resultado = await funcao(*args, **kwargs)
+                    if contar_itens:
+                        _anotar_itens(span, resultado)
+                    return resultado
+            return envoltorio_async
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with _rastreador_padrao.span(nome_span) as span:
+                resultado = funcao(*args, **kwargs)
+                if contar_itens:
+                    _anotar_itens(span, resultado)
+                return resultado
+        return envoltorio
+
+    return decorador
+
+
+def rastrear_execucao(nome: str, diretorio: str = 'logs'):
+    """Decorador equivalente a `with obter_rastreador().execucao(nome)`"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with _rastreador_padrao.execucao(nome, diretorio):
+                return funcao(*args, **kwargs)
+        return envoltorio
+
+    return decorador
+
+
+def _anotar_itens(span: Span, resultado):
+    try:
+        span.definir(itens=len(resultado))
+    except TypeError:
+        pass
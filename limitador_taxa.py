@@ -0,0 +1,159 @@
+"""
+Limitador de taxa por host (token bucket) compartilhado entre threads e tarefas asyncio.
+
+Cada host tem um balde com `capacidade` tokens reabastecido a `taxa` tokens por
+segundo. A aquisição reserva o token sob uma trava curta e devolve quanto tempo
+o chamador deve esperar; a espera em si acontece fora da trava, com
+time.sleep (threads) ou asyncio.sleep (corrotinas). Assim o mesmo balde serve
+aos dois modelos de concorrência sem bloquear o event loop.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+TAXA_PADRAO = 2.0        # requisições por segundo por host
+CAPACIDADE_PADRAO = 4    # rajada máxima
+
+
+class BaldeTokens:
+    """Balde de tokens de um host com reserva antecipada"""
+
+    def __init__(self, taxa: float = TAXA_PADRAO, capacidade: float = CAPACIDADE_PADRAO):
+        if taxa <= 0:
+            raise ValueError("A taxa deve ser positiva")
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.ultima_recarga = time.monotonic()
+        self._trava = threading.Lock()
+
+    def _recarregar(self, agora: float):
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.ultima_recarga) * self.taxa)
+        self.ultima_recarga = agora
+
+    def reservar(self) -> float:
+        """Consome um token e retorna a espera necessária em segundos"""
+        with self._trava:
+            self._recarregar(time.monotonic())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.taxa
+
+    def penalizar(self, espera: float):
+        """Esvazia o balde para que a próxima liberação ocorra só após `espera` segundos"""
+        with self._trava:
+            self._recarregar(time.monotonic())
+            self.tokens = min(self.tokens, -espera * self.taxa)
+
+
+class MetricasFila:
+    """Métricas de espera em fila de um host"""
+
+    __slots__ = ('requisicoes', 'esperas', 'espera_total', 'espera_maxima', 'limitacoes')
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.esperas = 0          # requisições que precisaram aguardar
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.limitacoes = 0       # respostas 429 / Retry-After recebidas
+
+    def registrar(self, espera: float):
+        self.requisicoes += 1
+        if espera > 0:
+            self.esperas += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def como_dict(self) -> Dict:
+        return {
+            'requisicoes': self.requisicoes,
+            'requisicoes_em_espera': self.esperas,
+            'espera_total_s': round(self.espera_total, 4),
+            'espera_media_s': round(self.espera_total / self.requisicoes, 4) if self.requisicoes else 0.0,
+            'espera_maxima_s': round(self.espera_maxima, 4),
+            'limitacoes_servidor': self.limitacoes
+        }
+
+
+class LimitadorTaxaPorHost:
+    """Registro de baldes de tokens por host, com limites configuráveis"""
+
+    def __init__(self, taxa_padrao: float = TAXA_PADRAO, capacidade_padrao: float = CAPACIDADE_PADRAO,
+                 limites_por_host: Optional[Dict[str, Dict[str, float]]] = None):
+        self.taxa_padrao = taxa_padrao
+        self.capacidade_padrao = capacidade_padrao
+        self.limites_por_host = dict(limites_por_host or {})
+        self._baldes: Dict[str, BaldeTokens] = {}
+        self._metricas: Dict[str, MetricasFila] = {}
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc or url
+
+    def configurar_host(self, host: str, taxa: float, capacidade: float = None):
+        """Define limite específico para um host (substitui o balde existente)"""
+        with self._trava:
+            self.limites_por_host[host] = {'taxa': taxa, 'capacidade': capacidade or max(1.0, taxa)}
+            self._baldes.pop(host, None)
+
+    def _obter_balde(self, host: str) -> BaldeTokens:
+        with self._trava:
+            if host not in self._baldes:
+                limite = self.limites_por_host.get(host, {})
+                self._baldes[host] = BaldeTokens(
+                    limite.get('taxa', self.taxa_padrao),
+                    limite.get('capacidade', self.capacidade_padrao)
+                )
+                self._metricas[host] = MetricasFila()
+            return self._baldes[host]
+
+    def _reservar(self, url: str) -> float:
+        host = self._host(url)
+        espera = self._obter_balde(host).reservar()
+        with self._trava:
+            self._metricas[host].registrar(espera)
+        return espera
+
+    def adquirir(self, url: str) -> float:
+        """Aguarda (bloqueando a thread) a liberação de uma requisição ao host"""
+        espera = self._reservar(url)
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+    async def adquirir_async(self, url: str) -> float:
+        """Aguarda (sem bloquear o event loop) a liberação de uma requisição ao host"""
+        espera = self._reservar(url)
+        if espera > 0:
+            await asyncio.sleep(espera)
+        return espera
+
+    def registrar_limitacao(self, url: str, retry_after: float = None):
+        """Recebeu 429: reduz a vazão do host pelo tempo indicado pelo servidor"""
+        host = self._host(url)
+        balde = self._obter_balde(host)
+        balde.penalizar(retry_after if retry_after is not None else 1.0 / balde.taxa)
+        with self._trava:
+            self._metricas[host].limitacoes += 1
+
+    def metricas(self) -> Dict[str, Dict]:
+        """Métricas de espera em fila por host"""
+        with self._trava:
+            return {host: m.como_dict() for host, m in self._metricas.items()}
+
+
+_limitador_padrao: Optional[LimitadorTaxaPorHost] = None
+_trava_limitador = threading.Lock()
+
+
+def obter_limitador() -> LimitadorTaxaPorHost:
+    """Limitador global (um por processo), compartilhado por todos os coletores"""
+    global _limitador_padrao
+    with _trava_limitador:
+        if _limitador_padrao is None:
+            _limitador_padrao = LimitadorTaxaPorHost()
+        return _limitador_padrao
@@ -22,13 +22,23 @@ def selecionar_perfil_risco():
     print("1. Conservador (Foco em segurança)")
     print("2. Moderado (Equilibrio risco/retorno)")
     print("3. Arrojado (Foco em rentabilidade)")
+    print("4. Pontuação de risco (0 a 100)")
     
     while True:
-        escolha = input("\nDigite sua escolha (1-3): ").strip().lower()
+        escolha = input("\nDigite sua escolha (1-4): ").strip().lower()
         perfis = {'1': 'conservador', '2': 'moderado', '3': 'arrojado'}
         
         if escolha in perfis:
             return perfis[escolha]
+        elif escolha == '4':
+            from perfis_risco import interpretar_pontuacao
+            try:
+                pontuacao = interpretar_pontuacao(input("Pontuação (0 = mais conservador, 100 = mais arrojado): "))
+            except ValueError:
+                pontuacao = None
+            if pontuacao is not None:
+                return pontuacao
+            print("❌ Pontuação inválida. Tente novamente.")
         elif escolha == '':
             return 'moderado'  # Padrão
         else:
@@ -121,4 +131,7 @@ def principal():
         print("Por favor, verifique os logs para mais detalhes.")
 
 if __name__ == "__main__":
-    principal()
\ No newline at end of file
+    from perfilamento import perfilamento_da_linha_de_comando
+    
+    with perfilamento_da_linha_de_comando('main'):
+        principal()
\ No newline at end of file
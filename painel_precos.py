@@ -0,0 +1,171 @@
+"""
+Painel compacto de preços: índice de datas compartilhado e matrizes de
+fechamento/volume com símbolos codificados em dicionário.
+
+Orçamento de memória por símbolo (sem contar o índice, que é compartilhado):
+
+    bytes = pregões × 2 colunas × tamanho do tipo
+
+    - 10 anos diários (~2520 pregões), float32: ~20 KiB
+    - 10 anos diários, float64:                 ~39 KiB
+    - 1 ano de barras de 5 min (~25 mil), float32: ~200 KiB
+
+Para comparação, o DataFrame completo do yfinance (OHLCV, dividendos e
+desdobramentos em float64, com índice próprio) ocupa ~8 × 8 = 64 bytes por
+pregão, ou ~160 KiB para os mesmos 10 anos. O índice de datas custa 8 bytes
+por data uma única vez para todo o painel.
+
+As matrizes usam ordem Fortran (coluna por símbolo contígua), então
+fechamentos(simbolo) e volumes(simbolo) devolvem views sem cópia.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_USADAS = ['Close', 'Volume']
+TIPOS_SUPORTADOS = ('float32', 'float64')
+
+
+def orcamento_memoria_por_simbolo(num_datas: int, tipo: str = 'float32') -> int:
+    """Bytes ocupados por um símbolo com `num_datas` pontos (fechamento + volume)"""
+    return num_datas * 2 * np.dtype(tipo).itemsize
+
+
+def normalizar_indice(indice: pd.DatetimeIndex, diario: bool = True) -> pd.DatetimeIndex:
+    """
+    Remove o fuso horário mantendo o horário local; no modo diário, descarta a hora
+
+    Assim barras diárias de bolsas em fusos diferentes caem na mesma data.
+    """
+    indice = pd.DatetimeIndex(indice)
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    return indice.normalize() if diario else indice
+
+
+class PainelPrecos:
+    """Fechamento e volume de vários símbolos sobre um índice de datas comum"""
+
+    def __init__(self, datas: np.ndarray, simbolos: List[str], fechamento: np.ndarray,
+                 volume: np.ndarray):
+        if fechamento.shape != (len(datas), len(simbolos)) or volume.shape != fechamento.shape:
+            raise ValueError("Dimensões do painel inconsistentes com datas e símbolos")
+        self.datas = datas
+        self.simbolos = list(simbolos)
+        self.codigos: Dict[str, int] = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+        self.fechamento = np.asfortranarray(fechamento)
+        self.volume = np.asfortranarray(volume)
+
+    @classmethod
+    def de_historicos(cls, historicos: Dict[str, pd.DataFrame], tipo: str = 'float32',
+                      diario: bool = True) -> 'PainelPrecos':
+        """
+        Monta o painel a partir de DataFrames no formato do yfinance
+
+        Datas ausentes em um símbolo (feriados locais, fins de semana do
+        bitcoin etc.) ficam como NaN.
+        """
+        if tipo not in TIPOS_SUPORTADOS:
+            raise ValueError(f"Tipo não suportado: {tipo}")
+
+        indices = {}
+        for simbolo, hist in historicos.items():
+            indice = normalizar_indice(hist.index, diario)
+            indices[simbolo] = (indice, ~indice.duplicated(keep='last'))
+
+        if indices:
+            datas = np.unique(np.concatenate([ind[mascara].values for ind, mascara in indices.values()]))
+        else:
+            datas = np.empty(0, dtype='datetime64[ns]')
+
+        simbolos = list(historicos)
+        fechamento = np.full((len(datas), len(simbolos)), np.nan, dtype=tipo, order='F')
+        volume = np.full((len(datas), len(simbolos)), np.nan, dtype=tipo, order='F')
+
+        for j, simbolo in enumerate(simbolos):
+            hist = historicos[simbolo]
+            indice, mascara = indices[simbolo]
+            posicoes = np.searchsorted(datas, indice[mascara].values)
+            fechamento[posicoes, j] = hist['Close'].to_numpy(dtype=np.float64)[mascara]
+            if 'Volume' in hist:
+                volume[posicoes, j] = hist['Volume'].to_numpy(dtype=np.float64)[mascara]
+
+        return cls(datas, simbolos, fechamento, volume)
+
+    def __contains__(self, simbolo: str) -> bool:
+        return simbolo in self.codigos
+
+    def __len__(self) -> int:
+        return len(self.simbolos)
+
+    def fechamentos(self, simbolo: str) -> np.ndarray:
+        """View (sem cópia) da coluna de fechamento do símbolo, alinhada a `datas`"""
+        return self.fechamento[:, self.codigos[simbolo]]
+
+    def volumes(self, simbolo: str) -> np.ndarray:
+        """View (sem cópia) da coluna de volume do símbolo"""
+        return self.volume[:, self.codigos[simbolo]]
+
+    def fechamentos_validos(self, simbolo: str) -> np.ndarray:
+        """Fechamentos do símbolo sem as datas em que ele não negociou"""
+        coluna = self.fechamentos(simbolo)
+        return coluna[~np.isnan(coluna)]
+
+    def serie(self, simbolo: str) -> pd.Series:
+        """Fechamentos como pd.Series sobre o índice compartilhado"""
+        return pd.Series(self.fechamentos(simbolo), index=pd.DatetimeIndex(self.datas),
+                         name=simbolo, copy=False)
+
+    def selecionar(self, simbolos: Iterable[str]) -> 'PainelPrecos':
+        """Subpainel com os símbolos informados (compartilha o índice de datas)"""
+        simbolos = [s for s in simbolos if s in self.codigos]
+        colunas = [self.codigos[s] for s in simbolos]
+        return PainelPrecos(self.datas, simbolos, self.fechamento[:, colunas], self.volume[:, colunas])
+
+    def juntar(self, outro: 'PainelPrecos') -> 'PainelPrecos':
+        """
+        Painel com os símbolos dos dois painéis sobre a união das datas
+
+        Símbolos repetidos ficam com os dados deste painel.
+        """
+        novos = [s for s in outro.simbolos if s not in self.codigos]
+        datas = np.union1d(self.datas, outro.datas)
+        simbolos = self.simbolos + novos
+        fechamento = np.full((len(datas), len(simbolos)), np.nan, dtype=self.fechamento.dtype, order='F')
+        volume = np.full_like(fechamento, np.nan)
+        linhas = np.searchsorted(datas, self.datas)
+        fechamento[linhas, :len(self.simbolos)] = self.fechamento
+        volume[linhas, :len(self.simbolos)] = self.volume
+        if novos:
+            linhas = np.searchsorted(datas, outro.datas)
+            colunas = [outro.codigos[s] for s in novos]
+            fechamento[linhas[:, None], np.arange(len(self.simbolos), len(simbolos))] = outro.fechamento[:, colunas]
+            volume[linhas[:, None], np.arange(len(self.simbolos), len(simbolos))] = outro.volume[:, colunas]
+        return PainelPrecos(datas, simbolos, fechamento, volume)
+
+    def memoria_bytes(self) -> int:
+        """Memória das matrizes e do índice"""
+        return self.fechamento.nbytes + self.volume.nbytes + self.datas.nbytes
+
+    def orcamento_por_simbolo(self) -> int:
+        return orcamento_memoria_por_simbolo(len(self.datas), self.fechamento.dtype.name)
+
+    def para_dataframe(self, coluna: str = 'Close') -> pd.DataFrame:
+        """DataFrame largo (datas × símbolos) da coluna pedida"""
+        matriz = self.fechamento if coluna == 'Close' else self.volume
+        return pd.DataFrame(matriz, index=pd.DatetimeIndex(self.datas), columns=self.simbolos)
+
+
+def resumir_fechamentos(fechamentos: np.ndarray) -> Optional[Dict[str, float]]:
+    """Preço atual, retorno do período e volatilidade diária (None se houver menos de 2 pontos)"""
+    if len(fechamentos) < 2:
+        return None
+    precos = fechamentos.astype(np.float64)
+    retornos = precos[1:] / precos[:-1] - 1
+    return {
+        'preco_atual': float(precos[-1]),
+        'retorno_periodo': (precos[-1] / precos[0] - 1) * 100,
+        'volatilidade_diaria': float(np.std(retornos, ddof=1)) if len(retornos) > 1 else 0.0
+    }
@@ -0,0 +1,200 @@
+"""
+Perfilamento opcional das execuções (CPU, pilhas amostradas e memória).
+
+Modos, combináveis:
+    amostragem  thread que amostra a pilha da thread principal em intervalo fixo
+                e grava pilhas colapsadas (entrada para flamegraph.pl/speedscope).
+                Custo baixo; adequado para ficar ligado em produção com taxa < 1.
+    cpu         cProfile determinístico; grava arquivo .pstats
+    memoria     tracemalloc; grava as N maiores alocações de cada etapa do
+                pipeline (spans 'coleta.*', 'analise.*', 'saida.*')
+
+Na linha de comando:
+    python agente_ia_investimentos.py --perfil=amostragem,memoria --perfil-taxa=0.1
+
+Ou pelas variáveis de ambiente AGENTE_PERFIL e AGENTE_PERFIL_TAXA.
+Os arquivos vão para logs/perfis.
+"""
+
+import cProfile
+import os
+import random
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from instrumentacao import obter_rastreador
+
+MODOS_PERFIL = ('amostragem', 'cpu', 'memoria')
+DIRETORIO_PERFIS = os.path.join('logs', 'perfis')
+PREFIXOS_ETAPAS = ('coleta.', 'analise.', 'saida.')
+
+
+class AmostradorPilhas:
+    """Amostra periodicamente a pilha de uma thread e acumula pilhas colapsadas"""
+
+    def __init__(self, intervalo: float = 0.005, id_thread: int = None):
+        self.intervalo = intervalo
+        self.id_thread = id_thread or threading.main_thread().ident
+        self.contagens: Counter = Counter()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.id_thread)
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                pilha.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                quadro = quadro.f_back
+            if pilha:
+                self.contagens[';'.join(reversed(pilha))] += 1
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._amostrar, name='amostrador-pilhas', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
+
+    def gravar(self, caminho: str):
+        """Formato colapsado: 'f1;f2;f3 contagem' por linha"""
+        with open(caminho, 'w', encoding='utf-8') as f:
+            for pilha, contagem in self.contagens.most_common():
+                f.write(f"{pilha} {contagem}\n")
+
+
+class MonitorMemoriaEtapas:
+    """Tira snapshots do tracemalloc no início e fim de cada etapa do pipeline"""
+
+    def __init__(self, top_n: int = 20, prefixos: Tuple[str, ...] = PREFIXOS_ETAPAS):
+        self.top_n = top_n
+        self.prefixos = prefixos
+        self._inicio: Dict[int, tracemalloc.Snapshot] = {}
+        self.resultados: List[Tuple[str, float, List[str]]] = []
+
+    def _eh_etapa(self, nome: str) -> bool:
+        return nome.startswith(self.prefixos) and nome.count('.') == 1
+
+    def __call__(self, evento: str, span):
+        if not tracemalloc.is_tracing() or not self._eh_etapa(span.nome):
+            return
+        if evento == 'inicio':
+            self._inicio[span.id] = tracemalloc.take_snapshot()
+        elif span.id in self._inicio:
+            antes = self._inicio.pop(span.id)
+            diferencas = tracemalloc.take_snapshot().compare_to(antes, 'lineno')
+            liquido = sum(d.size_diff for d in diferencas) / 1024
+            self.resultados.append((span.nome, liquido, [str(d) for d in diferencas[:self.top_n]]))
+
+    def gravar(self, caminho: str, pico: int):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(f"Pico de memória rastreada: {pico / 1024 / 1024:.2f} MiB\n")
+            for nome, liquido, linhas in self.resultados:
+                f.write(f"\n=== {nome} (líquido {liquido:+.1f} KiB) ===\n")
+                for linha in linhas:
+                    f.write(f"  {linha}\n")
+
+
+class SessaoPerfilamento:
+    """Contexto que liga os perfis escolhidos e grava os resultados ao sair"""
+
+    def __init__(self, modos: List[str], nome: str = 'execucao', diretorio: str = DIRETORIO_PERFIS,
+                 intervalo_amostragem: float = 0.005, top_n: int = 20):
+        invalidos = set(modos) - set(MODOS_PERFIL)
+        if invalidos:
+            raise ValueError(f"Modos de perfil inválidos: {', '.join(sorted(invalidos))}")
+        self.modos = list(modos)
+        self.nome = nome
+        self.diretorio = diretorio
+        self.intervalo_amostragem = intervalo_amostragem
+        self.top_n = top_n
+        self.arquivos: List[str] = []
+        self._perfil_cpu: Optional[cProfile.Profile] = None
+        self._amostrador: Optional[AmostradorPilhas] = None
+        self._monitor_memoria: Optional[MonitorMemoriaEtapas] = None
+
+    def __enter__(self):
+        if 'memoria' in self.modos:
+            tracemalloc.start(10)
+            self._monitor_memoria = MonitorMemoriaEtapas(self.top_n)
+            obter_rastreador().observadores.append(self._monitor_memoria)
+        if 'amostragem' in self.modos:
+            self._amostrador = AmostradorPilhas(self.intervalo_amostragem)
+            self._amostrador.iniciar()
+        if 'cpu' in self.modos:
+            self._perfil_cpu = cProfile.Profile()
+            self._perfil_cpu.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._perfil_cpu:
+            self._perfil_cpu.disable()
+        if self._amostrador:
+            self._amostrador.parar()
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        base = os.path.join(self.diretorio, f"{self.nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+        if self._perfil_cpu:
+            self._perfil_cpu.dump_stats(f"{base}.pstats")
+            self.arquivos.append(f"{base}.pstats")
+        if self._amostrador:
+            self._amostrador.gravar(f"{base}.folded")
+            self.arquivos.append(f"{base}.folded")
+        if self._monitor_memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            obter_rastreador().observadores.remove(self._monitor_memoria)
+            self._monitor_memoria.gravar(f"{base}_memoria.txt", pico)
+            self.arquivos.append(f"{base}_memoria.txt")
+
+        if self.arquivos:
+            print(f"🔬 Perfis gravados: {', '.join(self.arquivos)}")
+        return False
+
+
+def extrair_opcoes_perfil(argv: List[str]) -> Tuple[List[str], float, List[str]]:
+    """
+    Separa --perfil=... e --perfil-taxa=... dos demais argumentos
+
+    Retorna (modos, taxa, argumentos_restantes). Sem a opção, usa
+    AGENTE_PERFIL e AGENTE_PERFIL_TAXA.
+    """
+    modos = os.environ.get('AGENTE_PERFIL', '')
+    taxa = os.environ.get('AGENTE_PERFIL_TAXA', '1.0')
+    restantes = []
+
+    for argumento in argv:
+        if argumento.startswith('--perfil='):
+            modos = argumento.split('=', 1)[1]
+        elif argumento.startswith('--perfil-taxa='):
+            taxa = argumento.split('=', 1)[1]
+        else:
+            restantes.append(argumento)
+
+    lista_modos = [m.strip() for m in modos.split(',') if m.strip()]
+    return lista_modos, float(taxa), restantes
+
+
+def perfilamento_da_linha_de_comando(nome: str, argv: List[str] = None):
+    """
+    Lê as opções de perfil de sys.argv (removendo-as) e retorna o contexto adequado
+
+    Com taxa < 1, apenas essa fração das execuções é perfilada.
+    """
+    if argv is None:
+        argv = sys.argv
+    modos, taxa, restantes = extrair_opcoes_perfil(argv[1:])
+    argv[1:] = restantes
+
+    if not modos or random.random() >= taxa:
+        return nullcontext()
+    return SessaoPerfilamento(modos, nome)
@@ -0,0 +1,201 @@
+"""
+Perfis de risco contínuos (pontuação de 0 a 100) e perfis personalizados.
+
+Os perfis nomeados de PERFIS_CARTEIRA são âncoras igualmente espaçadas na
+escala de 0 a 100, do menos ao mais arriscado (parte fora da renda fixa):
+com os perfis padrão, conservador = 0, moderado = 50 e arrojado = 100. Uma
+pontuação intermediária recebe a interpolação linear das âncoras vizinhas
+(percentuais por classe e retorno esperado) e tem como perfil-base a
+âncora mais próxima, usado em regras como "conservador não recebe Bitcoin".
+
+Essas regras mudam em degrau no ponto médio entre duas âncoras, não são
+interpoladas: com os perfis padrão, pontuações até 25 (o empate fica com o
+perfil menos arriscado) têm base conservador e nunca recebem Bitcoin, e a
+partir de 26 o internacional pode ir inteiro para o Bitcoin se ele for o
+melhor ativo. Na GradeRecomendacoes o degrau ocupa um passo da grade (25,5
+fica com metade da recomendação de 25 e metade da de 26).
+
+GradePerfis calcula essas alocações uma vez numa grade de pontuações (passo
+de 1 ponto por padrão); resolver uma pontuação, ou um vetor com milhares
+delas, é aritmética de índice. GradeRecomendacoes faz o mesmo com a
+recomendação completa de um retrato do mercado (ativos escolhidos, alocação
+por risco, volatilidade): cada ponto da grade é recomendado uma vez e as
+pontuações entre dois pontos são interpoladas, sem refazer a otimização.
+
+Perfis personalizados são dicionários com os percentuais das classes
+(somando 100) e, opcionalmente, retorno_esperado e nome (validar_perfil).
+"""
+
+from numbers import Real
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from alocacao_hrp import arredondar_percentuais
+
+CLASSES_PERFIL = ('renda_fixa', 'renda_variavel', 'fiis', 'internacional')
+PASSO_GRADE_PADRAO = 1.0
+ATIVOS_CRIPTO = ('BITCOIN',)
+PERFIS_SEM_CRIPTO = ('conservador',)  # Perfis-base que não recebem ATIVOS_CRIPTO
+
+
+class ErroPerfil(ValueError):
+    """Pontuação ou perfil de risco inválido"""
+
+
+def parcela_risco(perfil: Dict) -> float:
+    """Percentual fora da renda fixa"""
+    return float(sum(perfil.get(classe, 0) for classe in CLASSES_PERFIL[1:]))
+
+
+def aceita_ativo(nome: str, perfil_base: str) -> bool:
+    """Regras do perfil-base sobre ativos (conservador não recebe cripto)"""
+    return not (perfil_base in PERFIS_SEM_CRIPTO and nome in ATIVOS_CRIPTO)
+
+
+def melhor_investimento(opcoes: Dict[str, Dict], perfil_base: str) -> Optional[Tuple[str, Dict]]:
+    """
+    (nome, dados) de maior 'retorno' entre as opções aceitas pelo perfil-base
+
+    Empates ficam com a primeira opção; a recomendação em lote
+    (recomendacao_lote) segue a mesma regra, de forma vetorizada.
+    """
+    aceitas = [(nome, dados) for nome, dados in opcoes.items() if aceita_ativo(nome, perfil_base)]
+    if not aceitas:
+        return None
+    return max(aceitas, key=lambda x: x[1].get('retorno', 0))
+
+
+def interpretar_pontuacao(valor) -> Optional[float]:
+    """Pontuação de risco (número ou texto numérico) ou None se for nome de perfil"""
+    if isinstance(valor, Real) and not isinstance(valor, bool):
+        pontuacao = float(valor)
+    elif isinstance(valor, str):
+        try:
+            pontuacao = float(valor.strip().replace(',', '.'))
+        except ValueError:
+            return None
+    else:
+        return None
+    if not 0 <= pontuacao <= 100:
+        raise ErroPerfil(f"Pontuação de risco deve estar entre 0 e 100: {valor}")
+    return pontuacao
+
+
+def validar_perfil(perfil: Dict) -> Dict:
+    """Perfil personalizado com percentuais inteiros por classe (somando 100) e retorno esperado opcional"""
+    desconhecidas = set(perfil) - set(CLASSES_PERFIL) - {'retorno_esperado', 'nome'}
+    if desconhecidas:
+        raise ErroPerfil(f"Classes desconhecidas no perfil: {', '.join(sorted(desconhecidas))}")
+    try:
+        valores = {classe: float(perfil.get(classe, 0) or 0) for classe in CLASSES_PERFIL}
+    except (TypeError, ValueError):
+        raise ErroPerfil("Percentuais do perfil devem ser numéricos")
+    if min(valores.values()) < 0 or abs(sum(valores.values()) - 100) > 0.5:
+        raise ErroPerfil(f"Percentuais do perfil devem ser positivos e somar 100 (somam {sum(valores.values()):g})")
+    percentuais = arredondar_percentuais(valores, 100)
+    validado = {classe: percentuais.get(classe, 0) for classe in CLASSES_PERFIL}
+    if perfil.get('retorno_esperado') is not None:
+        validado['retorno_esperado'] = float(perfil['retorno_esperado'])
+    return validado
+
+
+class GradePerfis:
+    """Percentuais por classe e retorno esperado numa grade de pontuações de 0 a 100"""
+
+    def __init__(self, perfis: Dict[str, Dict], passo: float = PASSO_GRADE_PADRAO):
+        self.nomes: List[str] = sorted(perfis, key=lambda nome: parcela_risco(perfis[nome]))
+        self.ancoras = np.linspace(0, 100, len(self.nomes))
+        self.riscos_ancoras = np.array([parcela_risco(perfis[nome]) for nome in self.nomes])
+        self.pontuacoes = np.linspace(0, 100, max(int(round(100 / passo)), 1) + 1)
+
+        # Colunas: classes e retorno esperado, interpoladas entre as âncoras
+        valores = np.array([[perfis[nome].get(classe, 0) for classe in CLASSES_PERFIL]
+                            + [perfis[nome].get('retorno_esperado', 0)] for nome in self.nomes], dtype=np.float64)
+        self.tabela = np.column_stack([np.interp(self.pontuacoes, self.ancoras, valores[:, j])
+                                       for j in range(valores.shape[1])])
+
+    def posicao(self, pontuacoes) -> Tuple[np.ndarray, np.ndarray]:
+        """Ponto da grade imediatamente abaixo e fração até o seguinte"""
+        relativas = np.clip(np.asarray(pontuacoes, dtype=np.float64), 0, 100) / 100 * (len(self.pontuacoes) - 1)
+        indices = np.minimum(relativas.astype(np.int64), len(self.pontuacoes) - 2)
+        return indices, relativas - indices
+
+    def consultar(self, pontuacoes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (percentuais por classe N × classes, retorno esperado N, índice do perfil-base N)
+
+        O perfil-base é a âncora mais próxima e muda em degrau no ponto médio
+        entre duas âncoras (empate fica com a de menor risco).
+        """
+        indices, fracoes = self.posicao(pontuacoes)
+        linhas = self.tabela[indices] * (1 - fracoes)[:, None] + self.tabela[indices + 1] * fracoes[:, None]
+        bases = np.abs(np.asarray(pontuacoes, dtype=np.float64)[:, None] - self.ancoras).argmin(axis=1)
+        return linhas[:, :-1], linhas[:, -1], bases
+
+    def perfil(self, pontuacao: float) -> Tuple[str, Dict]:
+        """Nome do perfil-base e perfil da pontuação (percentuais inteiros somando 100)"""
+        alocacao, retorno, base = self.consultar(np.array([pontuacao]))
+        percentuais = arredondar_percentuais(dict(zip(CLASSES_PERFIL, alocacao[0])), 100)
+        perfil = {classe: percentuais.get(classe, 0) for classe in CLASSES_PERFIL}
+        perfil['retorno_esperado'] = round(float(retorno[0]), 2)
+        return self.nomes[base[0]], perfil
+
+    def base_do_perfil(self, perfil: Dict) -> str:
+        """Perfil nomeado com a parcela de risco mais próxima (para perfis personalizados)"""
+        return self.nomes[int(np.abs(self.riscos_ancoras - parcela_risco(perfil)).argmin())]
+
+
+def interpolar_recomendacoes(a: Dict, b: Dict, fracao: float) -> Dict:
+    """Recomendação entre dois pontos da grade (percentuais inteiros, pelos maiores restos)"""
+    itens, brutos = {}, {}
+    for peso, recomendacao in ((1 - fracao, a), (fracao, b)):
+        for item in recomendacao['detalhes_carteira']:
+            chave = (item['categoria'], item['investimento'])
+            itens.setdefault(chave, item)
+            brutos[chave] = brutos.get(chave, 0.0) + peso * item['alocacao']
+    total = int(round(sum(brutos.values())))
+    percentuais = arredondar_percentuais(brutos, total)
+    detalhes = [dict(item, alocacao=percentuais[chave]) for chave, item in itens.items() if chave in percentuais]
+
+    classes = {classe: (1 - fracao) * a['alocacao'].get(classe, 0) + fracao * b['alocacao'].get(classe, 0)
+               for classe in CLASSES_PERFIL}
+    alocacao = {classe: 0 for classe in CLASSES_PERFIL}
+    alocacao.update(arredondar_percentuais(classes, int(round(sum(classes.values())))))
+
+    resultado = dict(a if fracao < 0.5 else b)
+    resultado['alocacao'] = {**resultado['alocacao'], **alocacao}
+    resultado['detalhes_carteira'] = detalhes
+    for campo in ('retorno_esperado', 'volatilidade_estimada'):
+        if campo in a and campo in b:
+            resultado[campo] = round((1 - fracao) * a[campo] + fracao * b[campo], 2)
+    if 'retorno_esperado' in resultado['alocacao']:
+        resultado['alocacao']['retorno_esperado'] = resultado['retorno_esperado']
+    return resultado
+
+
+class GradeRecomendacoes:
+    """Recomendações de um retrato do mercado pré-calculadas na grade de pontuações"""
+
+    def __init__(self, grade: GradePerfis, recomendar: Callable[[str, Dict], Dict]):
+        """recomendar(perfil_base, perfil) é chamado uma vez por perfil distinto da grade"""
+        self.grade = grade
+        calculadas = {}
+        self.recomendacoes: List[Dict] = []
+        for pontuacao in grade.pontuacoes:
+            base, perfil = grade.perfil(pontuacao)
+            # Pontos vizinhos costumam arredondar para o mesmo perfil
+            chave = (base,) + tuple(perfil.items())
+            if chave not in calculadas:
+                calculadas[chave] = recomendar(base, perfil)
+            self.recomendacoes.append(calculadas[chave])
+
+    def consultar(self, pontuacao: float) -> Dict:
+        indices, fracoes = self.grade.posicao([pontuacao])
+        i, fracao = int(indices[0]), float(fracoes[0])
+        a, b = self.recomendacoes[i], self.recomendacoes[i + 1]
+        if fracao < 1e-9 or a is b:
+            return dict(a, detalhes_carteira=[dict(item) for item in a['detalhes_carteira']])
+        if fracao > 1 - 1e-9:
+            return dict(b, detalhes_carteira=[dict(item) for item in b['detalhes_carteira']])
+        return interpolar_recomendacoes(a, b, fracao)
@@ -0,0 +1,458 @@
+"""
+Recomendações em lote para a carteira de clientes da mesa de assessoria.
+
+O arquivo de clientes é um CSV com ';' (linhas com # são comentários):
+
+    cliente;pontuacao_risco;horizonte_anos;restricoes;posicoes
+    C000123;45;3;sem_cripto|max_internacional=5;PETR4:12000|KNRI11:8000|CDB:30000
+
+Todos os clientes são avaliados contra um único retrato do mercado
+(RetratoMercado: perfis de carteira e ativos de cada classe ordenados pelo
+retorno), coletado uma vez ou lido de um JSON salvo. O arquivo é lido em
+blocos; cada bloco é calculado de forma vetorizada num processo do pool (o
+retrato vai uma única vez para cada processo, no inicializador) e gravado,
+na ordem de entrada, assim que fica pronto: Parquet com um row group por
+bloco (pyarrow) ou CSV, sem manter o resultado inteiro em memória.
+
+Para cada cliente:
+    perfil          percentuais por classe interpolados na grade de perfis
+                    contínuos (perfis_risco.GradePerfis) pela pontuação de
+                    risco de 0 a 100; a coluna perfil traz o perfil-base
+    horizonte       horizontes curtos limitam a parte em classes de risco
+                    (LIMITES_RISCO_HORIZONTE)
+    restricoes      sem_<classe>, max_<classe>=N, excluir=ATIVO e sem_cripto;
+                    o que sai das classes de risco vai para a renda fixa
+    investimentos   o melhor ativo de cada classe entre os não excluídos,
+                    pela mesma regra de perfis_risco.melhor_investimento
+                    (conservador não recebe Bitcoin); é o modo
+                    'melhor_retorno' de gerar_recomendacao_carteira, e os
+                    modos por risco ('hrp', 'volatilidade_inversa') não se
+                    aplicam ao lote
+    posicoes        ATIVO:valor em R$, agrupadas por classe; o resultado
+                    traz a distribuição atual e o ajuste em R$ de cada
+                    classe até a alocação recomendada
+
+Uso:
+    python recomendacao_lote.py clientes.csv --saida recomendacoes.parquet
+    python recomendacao_lote.py clientes.csv --retrato estado/retrato_mercado.json --processos 8
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from configuracao import caminho_estado
+from perfis_risco import ATIVOS_CRIPTO, CLASSES_PERFIL, PASSO_GRADE_PADRAO, PERFIS_SEM_CRIPTO, GradePerfis
+from triagem_ativos import ARQUIVO_UNIVERSO_PADRAO, carregar_universo
+
+ARQUIVO_RETRATO_PADRAO = caminho_estado('retrato_mercado.json')
+CLASSES_CARTEIRA = CLASSES_PERFIL
+CLASSE_POR_TIPO = {'acao': 'renda_variavel', 'etf': 'renda_variavel', 'fii': 'fiis', 'bdr': 'internacional'}
+# Posições fora do retrato e do universo reconhecidas como renda fixa pelo nome
+PREFIXOS_RENDA_FIXA = ('CDB', 'LCI', 'LCA', 'LC_', 'TESOURO', 'DEBENTURE', 'CRI', 'CRA', 'POUPANCA')
+# Horizonte abaixo de N anos -> no máximo X% nas classes de risco
+LIMITES_RISCO_HORIZONTE = ((1, 10.0), (3, 30.0), (5, 60.0))
+TAMANHO_BLOCO_PADRAO = 5000
+
+
+class RetratoMercado:
+    """Perfis de carteira e ativos candidatos de cada classe, compartilhados por todos os clientes"""
+
+    def __init__(self, perfis: Dict[str, Dict], candidatos: Dict[str, List[Tuple[str, float, str]]],
+                 classe_por_ativo: Dict[str, str] = None, data: str = '', passo_grade: float = PASSO_GRADE_PADRAO):
+        self.perfis = perfis
+        self.candidatos = {classe: sorted(candidatos.get(classe, []), key=lambda c: -c[1])
+                           for classe in CLASSES_CARTEIRA}
+        self.classe_por_ativo = {nome.upper(): classe for nome, classe in (classe_por_ativo or {}).items()}
+        self.data = data
+        self.passo_grade = passo_grade
+
+        # Alocações das pontuações de risco, calculadas uma vez para todos os clientes
+        self.grade = GradePerfis(perfis, passo_grade)
+
+        # Todos os candidatos numa lista só; por classe, as posições em ordem de retorno
+        self.ativos: List[str] = []
+        self.ordem: List[np.ndarray] = []
+        retornos = []
+        for classe in CLASSES_CARTEIRA:
+            inicio = len(self.ativos)
+            for nome, retorno, _ in self.candidatos[classe]:
+                self.ativos.append(nome)
+                retornos.append(retorno)
+                self.classe_por_ativo.setdefault(nome.upper(), classe)
+            self.ordem.append(np.arange(inicio, len(self.ativos)))
+        self.retornos_ativos = np.array(retornos + [0.0], dtype=np.float64)   # Último: classe sem ativo
+        self.indice_ativo = {nome.upper(): i for i, nome in enumerate(self.ativos)}
+
+    @classmethod
+    def de_analise(cls, analise: Dict, config, caminho_universo: str = None) -> 'RetratoMercado':
+        """Retrato a partir de analisar_oportunidades e da configuração do agente"""
+        modo = getattr(config, 'MODO_RECOMENDACAO', 'melhor_retorno')
+        if modo != 'melhor_retorno':
+            print(f"⚠️ MODO_RECOMENDACAO='{modo}' não se aplica ao lote; "
+                  f"cada classe recebe o ativo de melhor retorno")
+        candidatos = {
+            classe: [(nome, float(dados.get('retorno', 0) or 0), dados.get('risco', 'N/A'))
+                     for nome, dados in analise.get(classe, {}).items()]
+            for classe in CLASSES_CARTEIRA
+        }
+        classe_por_ativo = {}
+        try:
+            for ativo in carregar_universo(caminho_universo or getattr(config, 'ARQUIVO_UNIVERSO',
+                                                                       ARQUIVO_UNIVERSO_PADRAO)):
+                classe_por_ativo[ativo.ticker] = CLASSE_POR_TIPO[ativo.tipo]
+        except OSError:
+            pass
+        return cls(config.PERFIS_CARTEIRA, candidatos, classe_por_ativo, datetime.now().isoformat(timespec='seconds'),
+                   getattr(config, 'PASSO_GRADE_PERFIS', PASSO_GRADE_PADRAO))
+
+    @classmethod
+    def carregar(cls, caminho: str = ARQUIVO_RETRATO_PADRAO) -> 'RetratoMercado':
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        candidatos = {classe: [tuple(c) for c in lista] for classe, lista in dados['candidatos'].items()}
+        return cls(dados['perfis'], candidatos, dados.get('classe_por_ativo'), dados.get('data', ''),
+                   dados.get('passo_grade', PASSO_GRADE_PADRAO))
+
+    def salvar(self, caminho: str = ARQUIVO_RETRATO_PADRAO):
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({'data': self.data, 'perfis': self.perfis, 'candidatos': self.candidatos,
+                       'classe_por_ativo': self.classe_por_ativo, 'passo_grade': self.passo_grade},
+                      f, ensure_ascii=False, indent=1)
+
+    def classe_da_posicao(self, nome: str) -> Optional[str]:
+        nome = nome.upper()
+        if nome in self.classe_por_ativo:
+            return self.classe_por_ativo[nome]
+        if nome.startswith(PREFIXOS_RENDA_FIXA):
+            return 'renda_fixa'
+        return None
+
+
+def _separar_itens(serie: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """'a|b|c' -> (posição do cliente de cada item, itens)"""
+    linhas, itens = [], []
+    for linha, texto in enumerate(serie.fillna('').astype(str).tolist()):
+        for item in texto.split('|'):
+            item = item.strip()
+            if item:
+                linhas.append(linha)
+                itens.append(item)
+    return np.array(linhas, dtype=np.int64), itens
+
+
+def _interpretar_restricao(token: str, retrato: RetratoMercado) -> Optional[Tuple]:
+    if token == 'sem_cripto':
+        return ('excluir', [retrato.indice_ativo[a] for a in ATIVOS_CRIPTO if a in retrato.indice_ativo])
+    if token.startswith('excluir='):
+        indice = retrato.indice_ativo.get(token.split('=', 1)[1].strip().upper())
+        return ('excluir', [] if indice is None else [indice])
+    if token.startswith('sem_') and token[4:] in CLASSES_CARTEIRA[1:]:
+        return ('remover', CLASSES_CARTEIRA.index(token[4:]))
+    if token.startswith('max_') and '=' in token:
+        classe, limite = token[4:].split('=', 1)
+        try:
+            if classe in CLASSES_CARTEIRA[1:]:
+                return ('limite', CLASSES_CARTEIRA.index(classe), float(limite))
+        except ValueError:
+            return None
+    return None
+
+
+def _aplicar_restricoes(serie: pd.Series, retrato: RetratoMercado, limites: np.ndarray,
+                        excluidos: np.ndarray, avisos: List[Tuple[np.ndarray, str]]):
+    """Preenche limites (N × classes, %) e excluidos (N × ativos) a partir das restrições"""
+    linhas_itens, itens = _separar_itens(serie)
+    if not itens:
+        return
+    # Poucas restrições distintas: cada uma é interpretada uma vez e aplicada às suas linhas
+    itens = [item.strip().lower() for item in itens]
+    tokens, codigos = np.unique(np.array(itens, dtype=object), return_inverse=True)
+    ordem = np.argsort(codigos, kind='stable')
+    for token, linhas in zip(tokens, np.split(linhas_itens[ordem], np.cumsum(np.bincount(codigos))[:-1])):
+        acao = _interpretar_restricao(token, retrato)
+        if acao is None:
+            avisos.append((linhas, f"restrição desconhecida: {token}"))
+        elif acao[0] == 'excluir':
+            excluidos[np.ix_(linhas, acao[1])] = True
+        elif acao[0] == 'remover':
+            limites[linhas, acao[1]] = 0.0
+        else:
+            limites[linhas, acao[1]] = np.minimum(limites[linhas, acao[1]], acao[2])
+
+
+def _agrupar_posicoes(serie: pd.Series, retrato: RetratoMercado, avisos: List[Tuple[np.ndarray, str]]) -> np.ndarray:
+    """Valores em R$ por cliente e classe (última coluna: não classificados)"""
+    valores = np.zeros((len(serie), len(CLASSES_CARTEIRA) + 1))
+    linhas, itens = _separar_itens(serie)
+    if not itens:
+        return valores
+    nomes, quantias = [], []
+    for item in itens:
+        nome, _, quantia = item.rpartition(':')
+        nomes.append(nome.strip().upper())
+        quantias.append(quantia)
+    quantias = _numeros(pd.Series(quantias, dtype=object), monetario=True)
+    invalidas = np.isnan(quantias)
+    if invalidas.any():
+        avisos.append((linhas[invalidas], "posição sem valor numérico"))
+
+    colunas = {}
+    for nome in set(nomes):
+        classe = retrato.classe_da_posicao(nome)
+        colunas[nome] = CLASSES_CARTEIRA.index(classe) if classe else len(CLASSES_CARTEIRA)
+    classes = np.array([colunas[nome] for nome in nomes], dtype=np.int64)
+    np.add.at(valores, (linhas[~invalidas], classes[~invalidas]), quantias[~invalidas])
+    return valores
+
+
+def _numeros(textos: pd.Series, monetario: bool = False) -> np.ndarray:
+    """
+    Texto para float64 (NaN se não for número), aceitando vírgula decimal
+    (45,5 e 1.234,5). Em valores monetários, pontos em grupos de três
+    dígitos sem vírgula também separam milhar (1.000 é mil); em pontuações
+    e horizontes "45.5" continua 45,5
+    """
+    textos = textos.astype(str).str.strip()
+    if monetario:
+        milhares = textos.str.fullmatch(r'\d{1,3}(\.\d{3})+').fillna(False)
+        textos = textos.where(~milhares, textos.str.replace('.', '', regex=False))
+    # Ponto também é separador de milhar quando há vírgula depois dele
+    textos = textos.str.replace(r'\.(?=[^,]*,)', '', regex=True).str.replace(',', '.', regex=False)
+    return pd.to_numeric(textos, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+
+
+def _coluna_numerica(clientes: pd.DataFrame, nome: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Valores da coluna (NaN se vazio ou inválido) e máscara dos preenchidos que não são número"""
+    if nome not in clientes:
+        return np.full(len(clientes), np.nan), np.zeros(len(clientes), dtype=bool)
+    valores = _numeros(clientes[nome])
+    preenchidos = clientes[nome].fillna('').astype(str).str.strip().ne('').to_numpy()
+    return valores, np.isnan(valores) & preenchidos
+
+
+def recomendar_clientes(clientes: pd.DataFrame, retrato: RetratoMercado) -> pd.DataFrame:
+    """Recomendação de todos os clientes do bloco (uma linha por cliente, mesma ordem)"""
+    if 'cliente' not in clientes or 'pontuacao_risco' not in clientes:
+        raise ValueError("Arquivo de clientes precisa das colunas 'cliente' e 'pontuacao_risco'")
+    clientes = clientes.reset_index(drop=True)
+    n = len(clientes)
+    avisos: List[Tuple[np.ndarray, str]] = []
+
+    pontuacoes, _ = _coluna_numerica(clientes, 'pontuacao_risco')
+    sem_pontuacao = np.isnan(pontuacoes)
+    if sem_pontuacao.any():
+        avisos.append((np.flatnonzero(sem_pontuacao), "pontuação de risco inválida (usado 50)"))
+        pontuacoes[sem_pontuacao] = 50.0
+    fora_da_escala = (pontuacoes < 0) | (pontuacoes > 100)
+    if fora_da_escala.any():
+        avisos.append((np.flatnonzero(fora_da_escala), "pontuação de risco fora de 0-100 (limitada)"))
+        np.clip(pontuacoes, 0, 100, out=pontuacoes)
+    horizontes, horizonte_invalido = _coluna_numerica(clientes, 'horizonte_anos')
+    if horizonte_invalido.any():
+        avisos.append((np.flatnonzero(horizonte_invalido), "horizonte inválido (sem limite de risco)"))
+    horizontes[np.isnan(horizontes)] = np.inf
+    alocacao, retornos_perfil, indices_perfil = retrato.grade.consultar(pontuacoes)
+
+    # Horizonte curto reduz as classes de risco na mesma proporção
+    limite_risco = np.full(n, 100.0)
+    for anos, limite in reversed(LIMITES_RISCO_HORIZONTE):
+        limite_risco[horizontes < anos] = limite
+    risco = alocacao[:, 1:]
+    total_risco = risco.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        risco *= np.where(total_risco > limite_risco, limite_risco / total_risco, 1.0)[:, None]
+
+    # Restrições por classe e por ativo
+    limites = np.full((n, len(CLASSES_CARTEIRA)), np.inf)
+    excluidos = np.zeros((n, len(retrato.ativos) + 1), dtype=bool)
+    if 'restricoes' in clientes:
+        _aplicar_restricoes(clientes['restricoes'], retrato, limites, excluidos, avisos)
+    sem_cripto = [i for i, nome in enumerate(retrato.grade.nomes) if nome in PERFIS_SEM_CRIPTO]
+    if sem_cripto:
+        cripto = [retrato.indice_ativo[a] for a in ATIVOS_CRIPTO if a in retrato.indice_ativo]
+        excluidos[np.ix_(np.isin(indices_perfil, sem_cripto), cripto)] = True
+    np.minimum(risco, limites[:, 1:], out=risco)
+
+    # Melhor ativo disponível de cada classe (-1: nenhum; a classe vai para a renda fixa)
+    escolhidos = np.full((n, len(CLASSES_CARTEIRA)), -1, dtype=np.int64)
+    for c, ordem in enumerate(retrato.ordem):
+        if len(ordem):
+            disponiveis = ~excluidos[:, ordem]
+            escolhidos[:, c] = np.where(disponiveis.any(axis=1), ordem[disponiveis.argmax(axis=1)], -1)
+    risco[escolhidos[:, 1:] < 0] = 0.0
+    alocacao[:, 0] = 100.0 - risco.sum(axis=1)
+    escolhidos[alocacao <= 0] = -1
+    retorno_carteira = (alocacao * retrato.retornos_ativos[escolhidos]).sum(axis=1) / 100
+
+    # Posições atuais e ajuste até a alocação recomendada
+    if 'posicoes' in clientes:
+        valores = _agrupar_posicoes(clientes['posicoes'], retrato, avisos)
+    else:
+        valores = np.zeros((n, len(CLASSES_CARTEIRA) + 1))
+    classificado = valores[:, :-1].sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        atual = np.where(classificado[:, None] > 0, valores[:, :-1] / classificado[:, None] * 100, 0.0)
+    ajuste = alocacao / 100 * classificado[:, None] - valores[:, :-1]
+
+    nomes_ativos = np.array(retrato.ativos + [''], dtype=object)
+    resultado = {
+        'cliente': clientes['cliente'].astype(str).to_numpy(),
+        'perfil': np.array(retrato.grade.nomes, dtype=object)[indices_perfil],
+        'pontuacao_risco': pontuacoes,
+        'horizonte_anos': np.where(np.isinf(horizontes), np.nan, horizontes),
+    }
+    for c, classe in enumerate(CLASSES_CARTEIRA):
+        resultado[f'alocacao_{classe}'] = np.round(alocacao[:, c], 2)
+        resultado[f'investimento_{classe}'] = nomes_ativos[escolhidos[:, c]]
+    resultado['retorno_perfil'] = np.round(retornos_perfil, 2)
+    resultado['retorno_carteira'] = np.round(retorno_carteira, 2)
+    resultado['patrimonio'] = np.round(valores.sum(axis=1), 2)
+    resultado['valor_nao_classificado'] = np.round(valores[:, -1], 2)
+    for c, classe in enumerate(CLASSES_CARTEIRA):
+        resultado[f'atual_{classe}'] = np.round(atual[:, c], 2)
+        resultado[f'ajuste_{classe}'] = np.round(ajuste[:, c], 2)
+    texto_avisos = np.full(n, '', dtype=object)
+    for linhas, aviso in avisos:
+        for linha in np.unique(linhas):
+            texto_avisos[linha] = f"{texto_avisos[linha]}; {aviso}" if texto_avisos[linha] else aviso
+    resultado['avisos'] = texto_avisos
+    return pd.DataFrame(resultado)
+
+
+class EscritorColunar:
+    """Grava blocos de resultados à medida que ficam prontos (Parquet com pyarrow, senão CSV)"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._parquet = None
+        self.linhas = 0
+        if caminho.endswith('.parquet'):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                self.caminho = caminho[:-len('.parquet')] + '.csv'
+                print(f"⚠️ pyarrow não instalado; gravando em {self.caminho}")
+        os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+
+    def escrever(self, bloco: pd.DataFrame):
+        if self.caminho.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.caminho, tabela.schema)
+            self._parquet.write_table(tabela)   # Um row group por bloco
+        else:
+            bloco.to_csv(self.caminho, sep=';', index=False, mode='w' if self.linhas == 0 else 'a',
+                         header=self.linhas == 0)
+        self.linhas += len(bloco)
+
+    def fechar(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+def ler_clientes(caminho: str, tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Iterator[pd.DataFrame]:
+    """Blocos do arquivo de clientes, sem carregá-lo inteiro"""
+    yield from pd.read_csv(caminho, sep=';', comment='#', dtype=str, keep_default_na=False,
+                           chunksize=tamanho_bloco)
+
+
+# Retrato de cada processo do pool, recebido uma vez no inicializador
+_retrato_processo: Optional[RetratoMercado] = None
+
+
+def _iniciar_processo(retrato: RetratoMercado):
+    global _retrato_processo
+    _retrato_processo = retrato
+
+
+def _recomendar_bloco(clientes: pd.DataFrame) -> pd.DataFrame:
+    return recomendar_clientes(clientes, _retrato_processo)
+
+
+def recomendar_arquivo(caminho_clientes: str, caminho_saida: str, retrato: RetratoMercado,
+                       processos: int = None, tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Dict:
+    """
+    Recomendações para todos os clientes do arquivo, gravadas em blocos
+
+    processos=1 calcula no próprio processo; o padrão usa um por CPU. No
+    máximo dois blocos por processo ficam em andamento, então a memória não
+    cresce com o tamanho do arquivo.
+    """
+    processos = processos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    blocos = ler_clientes(caminho_clientes, tamanho_bloco)
+    with EscritorColunar(caminho_saida) as escritor:
+        if processos == 1:
+            for bloco in blocos:
+                escritor.escrever(recomendar_clientes(bloco, retrato))
+        else:
+            with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(retrato,)) as pool:
+                pendentes = deque()
+                for bloco in blocos:
+                    pendentes.append(pool.submit(_recomendar_bloco, bloco))
+                    if len(pendentes) >= 2 * processos:
+                        escritor.escrever(pendentes.popleft().result())
+                while pendentes:
+                    escritor.escrever(pendentes.popleft().result())
+    return {'clientes': escritor.linhas, 'arquivo': escritor.caminho, 'processos': processos,
+            'segundos': round(time.perf_counter() - inicio, 2)}
+
+
+def coletar_retrato(config=None) -> RetratoMercado:
+    """Coleta o mercado uma vez (preços, triagem e análise) e monta o retrato"""
+    from agente_ia_investimentos import AnalisadorInvestimentos
+
+    analisador = AnalisadorInvestimentos(config)
+    dados_mercado = analisador.coletor.obter_dados_yahoo_finance()
+    if analisador.config.FILTRO_TRIAGEM:
+        try:
+            analisador.triar_universo(dados_mercado=dados_mercado)
+        except Exception as e:
+            analisador.logger.warning(f"Erro na triagem do universo: {str(e)}")
+    analise = analisador.analisar_oportunidades(dados_mercado)
+    return RetratoMercado.de_analise(analise, analisador.config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recomendações em lote para um arquivo de clientes')
+    parser.add_argument('clientes', help='CSV cliente;pontuacao_risco;horizonte_anos;restricoes;posicoes')
+    parser.add_argument('--saida', default='recomendacoes_lote.parquet', help='Arquivo .parquet ou .csv')
+    parser.add_argument('--retrato', help='Retrato do mercado salvo (JSON); sem ele, coleta agora e salva em '
+                                          f'{ARQUIVO_RETRATO_PADRAO}')
+    parser.add_argument('--processos', type=int, default=None, help='Processos do pool (padrão: um por CPU)')
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO_PADRAO, help='Clientes por bloco')
+    argumentos = parser.parse_args()
+
+    if argumentos.retrato:
+        retrato = RetratoMercado.carregar(argumentos.retrato)
+    else:
+        print("📊 Coletando o retrato do mercado...")
+        retrato = coletar_retrato()
+        retrato.salvar()
+    resultado = recomendar_arquivo(argumentos.clientes, argumentos.saida, retrato,
+                                   argumentos.processos, argumentos.bloco)
+    print(f"✅ {resultado['clientes']} recomendações em {resultado['arquivo']} "
+          f"({resultado['segundos']:.1f}s, {resultado['processos']} processos)")
+
+
+if __name__ == "__main__":
+    main()
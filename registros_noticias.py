@@ -0,0 +1,270 @@
+"""
+Registros compactos de notícias e lote colunar para processamento em massa.
+
+Artigo usa __slots__ e campos planos (sem o dicionário 'sentimento' aninhado);
+fonte e rótulo de sentimento são enums, portanto cada valor existe uma única
+vez em memória. LoteArtigos guarda as mesmas informações em colunas NumPy
+para pontuação, agregação e serialização em massa.
+"""
+
+import sys
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class FonteNoticia(str, Enum):
+    """Fontes de notícias conhecidas"""
+    INFOMONEY = 'InfoMoney'
+    VALOR = 'Valor'
+    INVESTING = 'Investing'
+    SUNO = 'Suno Research'
+    BTG = 'BTG Research'
+    XP = 'XP Research'
+    RICO = 'Rico'
+    EASYNVEST = 'Easynvest'
+    TORO = 'Toro Investimentos'
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class RotuloSentimento(str, Enum):
+    """Rótulos de sentimento"""
+    POSITIVO = 'positivo'
+    NEGATIVO = 'negativo'
+    NEUTRO = 'neutro'
+
+    def __str__(self) -> str:
+        return self.value
+
+
+# Nomes usados pelos coletores (chaves de configuração) -> fonte canônica
+_ALIASES_FONTE = {
+    'infomoney': FonteNoticia.INFOMONEY,
+    'valor': FonteNoticia.VALOR,
+    'valor_economico': FonteNoticia.VALOR,
+    'investing': FonteNoticia.INVESTING,
+    'investing_brasil': FonteNoticia.INVESTING,
+    'suno': FonteNoticia.SUNO,
+    'suno_research': FonteNoticia.SUNO,
+    'btg_research': FonteNoticia.BTG,
+    'xp_research': FonteNoticia.XP,
+    'rico_research': FonteNoticia.RICO,
+    'easynvest': FonteNoticia.EASYNVEST,
+    'toro_investimentos': FonteNoticia.TORO,
+}
+_ALIASES_FONTE.update({f.value.lower(): f for f in FonteNoticia})
+
+Fonte = Union[FonteNoticia, str]
+
+
+def normalizar_fonte(nome: Fonte) -> Fonte:
+    """Converte o nome da fonte para o enum (ou string internada, se desconhecida)"""
+    if isinstance(nome, FonteNoticia):
+        return nome
+    return _ALIASES_FONTE.get(str(nome).lower(), sys.intern(str(nome)))
+
+
+class Artigo:
+    """Notícia ou recomendação coletada"""
+
+    __slots__ = ('titulo', 'fonte', 'link', 'data_hora', 'rotulo', 'pontuacao', 'confianca_sentimento',
+                 'relevancia', 'tipo_recomendacao', 'confianca', 'corpo')
+
+    def __init__(self, titulo: str, fonte: Fonte, link: Optional[str] = None,
+                 data_hora: Optional[datetime] = None, rotulo: Optional[RotuloSentimento] = None,
+                 pontuacao: float = 0.0, confianca_sentimento: float = 0.0, relevancia: float = 0.5,
+                 tipo_recomendacao: Optional[str] = None, confianca: Optional[float] = None,
+                 corpo: Optional[str] = None):
+        self.titulo = titulo
+        self.fonte = normalizar_fonte(fonte)
+        self.link = link
+        self.data_hora = data_hora or datetime.now()
+        self.rotulo = RotuloSentimento(rotulo) if rotulo is not None else None
+        self.pontuacao = float(pontuacao)
+        self.confianca_sentimento = float(confianca_sentimento)
+        self.relevancia = float(relevancia)
+        self.tipo_recomendacao = sys.intern(tipo_recomendacao) if tipo_recomendacao else None
+        self.confianca = confianca
+        self.corpo = corpo  # Texto completo, quando o link foi seguido
+
+    @property
+    def tem_sentimento(self) -> bool:
+        return self.rotulo is not None
+
+    def definir_sentimento(self, sentimento: Dict):
+        """Preenche os campos de sentimento a partir do dict de analisar_sentimento"""
+        self.rotulo = RotuloSentimento(sentimento.get('sentimento', 'neutro'))
+        self.pontuacao = float(sentimento.get('pontuacao', 0.0))
+        self.confianca_sentimento = float(sentimento.get('confianca', 0.0))
+
+    def para_dict(self) -> Dict:
+        """Formato de dicionário (serialização JSON/CSV)"""
+        dados = {
+            'titulo': self.titulo,
+            'fonte': str(self.fonte),
+            'link': self.link,
+            'data_hora': self.data_hora.isoformat() if self.data_hora else None,
+            'relevancia': self.relevancia
+        }
+        if self.tem_sentimento:
+            dados['sentimento'] = {
+                'sentimento': self.rotulo.value,
+                'pontuacao': self.pontuacao,
+                'confianca': self.confianca_sentimento
+            }
+        if self.tipo_recomendacao is not None:
+            dados['tipo'] = self.tipo_recomendacao
+            dados['confianca'] = self.confianca
+        if self.corpo:
+            dados['corpo'] = self.corpo
+        return dados
+
+    def __repr__(self) -> str:
+        return f"Artigo({self.titulo[:40]!r}, fonte={self.fonte!s}, rotulo={self.rotulo!s})"
+
+
+def serializar_registro(obj):
+    """Função `default` para json.dump: Artigo, LoteArtigos, datas e enums"""
+    if isinstance(obj, Artigo):
+        return obj.para_dict()
+    if isinstance(obj, LoteArtigos):
+        return obj.para_registros()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+# Códigos inteiros dos rótulos no lote colunar (-1 = sem sentimento)
+_CODIGOS_ROTULO = {RotuloSentimento.NEGATIVO: 0, RotuloSentimento.NEUTRO: 1, RotuloSentimento.POSITIVO: 2}
+_ROTULOS_POR_CODIGO = {codigo: rotulo for rotulo, codigo in _CODIGOS_ROTULO.items()}
+SEM_ROTULO = -1
+
+
+class LoteArtigos:
+    """
+    Lote colunar de artigos
+
+    Textos e links ficam em listas; fontes são codificadas em um dicionário
+    (int16); data/hora, rótulo, pontuações e relevância em arrays NumPy.
+    """
+
+    def __init__(self):
+        self.titulos: List[str] = []
+        self.links: List[Optional[str]] = []
+        self.tipos_recomendacao: List[Optional[str]] = []
+        self.corpos: List[Optional[str]] = []
+        self.fontes: List[Fonte] = []                 # dicionário de fontes
+        self._indice_fontes: Dict[Fonte, int] = {}
+        self.codigos_fonte = np.empty(0, dtype=np.int16)
+        self.data_hora = np.empty(0, dtype='datetime64[s]')
+        self.rotulos = np.empty(0, dtype=np.int8)
+        self.pontuacoes = np.empty(0, dtype=np.float32)
+        self.confiancas_sentimento = np.empty(0, dtype=np.float32)
+        self.relevancias = np.empty(0, dtype=np.float32)
+        self.confiancas = np.empty(0, dtype=np.float32)  # NaN quando não é recomendação
+
+    @classmethod
+    def de_artigos(cls, artigos: Iterable[Artigo]) -> 'LoteArtigos':
+        """Constrói o lote a partir de registros Artigo"""
+        lote = cls()
+        artigos = list(artigos)
+        lote.titulos = [a.titulo for a in artigos]
+        lote.links = [a.link for a in artigos]
+        lote.tipos_recomendacao = [a.tipo_recomendacao for a in artigos]
+        lote.corpos = [a.corpo for a in artigos]
+        lote.codigos_fonte = np.fromiter((lote._codificar_fonte(a.fonte) for a in artigos),
+                                         dtype=np.int16, count=len(artigos))
+        lote.data_hora = np.array([a.data_hora for a in artigos], dtype='datetime64[s]')
+        lote.rotulos = np.fromiter((_CODIGOS_ROTULO.get(a.rotulo, SEM_ROTULO) for a in artigos),
+                                   dtype=np.int8, count=len(artigos))
+        lote.pontuacoes = np.fromiter((a.pontuacao for a in artigos), dtype=np.float32, count=len(artigos))
+        lote.confiancas_sentimento = np.fromiter((a.confianca_sentimento for a in artigos),
+                                                 dtype=np.float32, count=len(artigos))
+        lote.relevancias = np.fromiter((a.relevancia for a in artigos), dtype=np.float32, count=len(artigos))
+        lote.confiancas = np.fromiter((np.nan if a.confianca is None else a.confianca for a in artigos),
+                                      dtype=np.float32, count=len(artigos))
+        return lote
+
+    def _codificar_fonte(self, fonte: Fonte) -> int:
+        if fonte not in self._indice_fontes:
+            self._indice_fontes[fonte] = len(self.fontes)
+            self.fontes.append(fonte)
+        return self._indice_fontes[fonte]
+
+    def __len__(self) -> int:
+        return len(self.titulos)
+
+    def __getitem__(self, i: int) -> Artigo:
+        codigo_rotulo = int(self.rotulos[i])
+        confianca = float(self.confiancas[i])
+        return Artigo(
+            titulo=self.titulos[i],
+            fonte=self.fontes[self.codigos_fonte[i]],
+            link=self.links[i],
+            data_hora=self.data_hora[i].astype(datetime),
+            rotulo=_ROTULOS_POR_CODIGO.get(codigo_rotulo),
+            pontuacao=float(self.pontuacoes[i]),
+            confianca_sentimento=float(self.confiancas_sentimento[i]),
+            relevancia=float(self.relevancias[i]),
+            tipo_recomendacao=self.tipos_recomendacao[i],
+            confianca=None if np.isnan(confianca) else confianca,
+            corpo=self.corpos[i]
+        )
+
+    def __iter__(self) -> Iterator[Artigo]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def pontuar(self, funcao_lote: Callable[[List[str]], Dict[str, np.ndarray]],
+                apenas_sem_rotulo: bool = True):
+        """
+        Aplica um pontuador em lote sobre os títulos
+
+        `funcao_lote` recebe a lista de textos e retorna arrays 'rotulo'
+        (RotuloSentimento ou str), 'pontuacao' e 'confianca' do mesmo tamanho.
+        """
+        indices = np.flatnonzero(self.rotulos == SEM_ROTULO) if apenas_sem_rotulo else np.arange(len(self))
+        if len(indices) == 0:
+            return
+        resultado = funcao_lote([self.titulos[i] for i in indices])
+        self.rotulos[indices] = [_CODIGOS_ROTULO[RotuloSentimento(r)] for r in resultado['rotulo']]
+        self.pontuacoes[indices] = resultado['pontuacao']
+        self.confiancas_sentimento[indices] = resultado['confianca']
+
+    def mascara_rotulo(self, rotulo: RotuloSentimento) -> np.ndarray:
+        return self.rotulos == _CODIGOS_ROTULO[rotulo]
+
+    def sentimento_ponderado(self) -> Optional[float]:
+        """Média das pontuações ponderada pela relevância (apenas artigos com sentimento)"""
+        mascara = self.rotulos != SEM_ROTULO
+        pesos = self.relevancias[mascara].astype(np.float64)
+        if not mascara.any() or pesos.sum() == 0:
+            return None
+        return float(np.dot(self.pontuacoes[mascara], pesos) / pesos.sum())
+
+    def para_registros(self) -> List[Dict]:
+        """Lista de dicionários (para JSON)"""
+        return [artigo.para_dict() for artigo in self]
+
+    def para_dataframe(self) -> pd.DataFrame:
+        """DataFrame plano, uma coluna por campo (para CSV)"""
+        rotulos = np.array([r.value for r in (_ROTULOS_POR_CODIGO[c] for c in range(3))] + [''], dtype=object)
+        return pd.DataFrame({
+            'titulo': self.titulos,
+            'fonte': [str(self.fontes[c]) for c in self.codigos_fonte],
+            'link': self.links,
+            'data_hora': self.data_hora,
+            'sentimento': rotulos[self.rotulos],
+            'pontuacao_sentimento': self.pontuacoes,
+            'confianca_sentimento': self.confiancas_sentimento,
+            'relevancia': self.relevancias,
+            'tipo_recomendacao': self.tipos_recomendacao,
+            'confianca': self.confiancas
+        })
@@ -0,0 +1,323 @@
+"""
+Camada de resiliência compartilhada pelos coletores HTTP.
+
+Combina limitação de taxa por host (ver limitador_taxa), retentativas com
+backoff exponencial (jitter completo) e um disjuntor (circuit breaker) por
+host. Um 429 reduz a vazão do host pelo Retry-After do servidor, nas versões
+síncrona e assíncrona, sem contar como falha no disjuntor. Depois de falhas consecutivas, o host fica
+"aberto" por um período e as chamadas seguintes falham imediatamente, em vez
+de esperar o timeout inteiro de cada requisição. Um timeout que não será
+repetido abre o disjuntor na hora: um host fora do ar custa um único
+timeout até o fim do tempo de recuperação.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from gravacao_http import obter_gravador
+from instrumentacao import obter_rastreador
+from limitador_taxa import LimitadorTaxaPorHost, obter_limitador
+
+# Status HTTP que indicam falha transitória do servidor
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class CircuitoAbertoErro(ConnectionError):
+    """Erro lançado quando o disjuntor do host está aberto"""
+
+    def __init__(self, host: str, espera_restante: float):
+        super().__init__(f"Circuito aberto para {host} (nova tentativa em {espera_restante:.1f}s)")
+        self.host = host
+        self.espera_restante = espera_restante
+
+
+@dataclass
+class PoliticaRetentativa:
+    """Parâmetros de retentativa com backoff exponencial"""
+
+    tentativas: int = 3
+    espera_base: float = 0.25
+    espera_maxima: float = 4.0
+    repetir_timeout: bool = False  # Timeout já consumiu o tempo; por padrão não repete
+
+    def calcular_espera(self, tentativa: int) -> float:
+        """Espera antes da próxima tentativa (jitter completo)"""
+        teto = min(self.espera_maxima, self.espera_base * (2 ** tentativa))
+        return random.uniform(0, teto)
+
+
+class DisjuntorCircuito:
+    """
+    Disjuntor de um host: fechado -> aberto -> semiaberto -> fechado
+
+    No estado semiaberto apenas uma requisição de teste é liberada; quem a
+    recebeu (verificar() retorna True) registra o resultado ou, se for
+    interrompido antes disso, chama liberar_teste().
+    """
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    SEMIABERTO = 'semiaberto'
+
+    def __init__(self, host: str, limite_falhas: int = 3, tempo_recuperacao: float = 60.0):
+        self.host = host
+        self.limite_falhas = limite_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+        self.estado = self.FECHADO
+        self.falhas_consecutivas = 0
+        self.aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._trava = threading.Lock()
+
+    def verificar(self) -> bool:
+        """Libera a requisição (True se for o teste do estado semiaberto) ou lança CircuitoAbertoErro"""
+        with self._trava:
+            if self.estado == self.FECHADO:
+                return False
+
+            decorrido = time.monotonic() - self.aberto_em
+            if self.estado == self.ABERTO and decorrido >= self.tempo_recuperacao:
+                self.estado = self.SEMIABERTO
+                self._teste_em_andamento = False
+
+            if self.estado == self.SEMIABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+
+            raise CircuitoAbertoErro(self.host, max(0.0, self.tempo_recuperacao - decorrido))
+
+    def registrar_sucesso(self):
+        """Fecha o circuito após resposta bem-sucedida"""
+        with self._trava:
+            self.estado = self.FECHADO
+            self.falhas_consecutivas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self, abrir: bool = False):
+        """Contabiliza falha e abre o circuito ao atingir o limite (ou já, com `abrir`)"""
+        with self._trava:
+            self.falhas_consecutivas += 1
+            if abrir or self.estado == self.SEMIABERTO or self.falhas_consecutivas >= self.limite_falhas:
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic()
+            self._teste_em_andamento = False
+
+    def liberar_teste(self):
+        """Libera um novo teste quando o atual foi interrompido sem resultado"""
+        with self._trava:
+            self._teste_em_andamento = False
+
+
+class RegistroDisjuntores:
+    """Registro de disjuntores por host, compartilhado entre sessões e threads"""
+
+    def __init__(self, limite_falhas: int = 3, tempo_recuperacao: float = 60.0):
+        self.limite_falhas = limite_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+        self._disjuntores: Dict[str, DisjuntorCircuito] = {}
+        self._trava = threading.Lock()
+
+    def obter(self, url: str) -> DisjuntorCircuito:
+        """Retorna o disjuntor do host da URL"""
+        host = urlparse(url).netloc or url
+        with self._trava:
+            if host not in self._disjuntores:
+                self._disjuntores[host] = DisjuntorCircuito(
+                    host, self.limite_falhas, self.tempo_recuperacao
+                )
+            return self._disjuntores[host]
+
+    def estados(self) -> Dict[str, str]:
+        """Estado atual de cada host conhecido"""
+        with self._trava:
+            return {host: d.estado for host, d in self._disjuntores.items()}
+
+
+_registro_padrao: Optional[RegistroDisjuntores] = None
+_trava_registro = threading.Lock()
+
+
+def obter_registro_disjuntores() -> RegistroDisjuntores:
+    """Registro global de disjuntores (um por processo)"""
+    global _registro_padrao
+    with _trava_registro:
+        if _registro_padrao is None:
+            _registro_padrao = RegistroDisjuntores()
+        return _registro_padrao
+
+
+def _eh_timeout(erro: Exception) -> bool:
+    return isinstance(erro, (requests.exceptions.Timeout, asyncio.TimeoutError, TimeoutError))
+
+
+def _ler_retry_after(cabecalhos) -> Optional[float]:
+    """Retry-After em segundos (requests e aiohttp; datas HTTP são ignoradas)"""
+    try:
+        return float(cabecalhos.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class GerenciadorResiliencia:
+    """Executa chamadas HTTP com limite de taxa, retentativa e disjuntor por host"""
+
+    def __init__(self, politica: PoliticaRetentativa = None,
+                 registro: RegistroDisjuntores = None,
+                 limitador: LimitadorTaxaPorHost = None):
+        self.politica = politica or PoliticaRetentativa()
+        self.registro = registro or obter_registro_disjuntores()
+        self.limitador = limitador or obter_limitador()
+
+    def _deve_repetir(self, erro: Exception, tentativa: int) -> bool:
+        if tentativa + 1 >= self.politica.tentativas:
+            return False
+        if isinstance(erro, CircuitoAbertoErro):
+            return False
+        return self.politica.repetir_timeout or not _eh_timeout(erro)
+
+    def _abre_disjuntor(self, erro: Exception) -> bool:
+        """Timeout não repetido abre o disjuntor sem esperar o limite de falhas"""
+        return _eh_timeout(erro) and not self.politica.repetir_timeout
+
+    @staticmethod
+    def _liberar_sem_falha(disjuntor: DisjuntorCircuito, teste: bool):
+        """429 é limitação, não falha: só o limitador desacelera e o disjuntor fica como está"""
+        if teste:
+            disjuntor.liberar_teste()
+
+    def executar(self, url: str, funcao: Callable[[], requests.Response]) -> requests.Response:
+        """Executa `funcao` (síncrona) aplicando retentativas e disjuntor"""
+        disjuntor = self.registro.obter(url)
+
+        for tentativa in range(self.politica.tentativas):
+            teste = disjuntor.verificar()
+            try:
+                self.limitador.adquirir(url)
+                resposta = funcao()
+            except Exception as e:
+                disjuntor.registrar_falha(self._abre_disjuntor(e))
+                if not self._deve_repetir(e, tentativa):
+                    raise
+                time.sleep(self.politica.calcular_espera(tentativa))
+                continue
+            except BaseException:
+                # Interrompido no teste (ex.: KeyboardInterrupt) sem registrar resultado
+                if teste:
+                    disjuntor.liberar_teste()
+                raise
+
+            if resposta.status_code in STATUS_REPETIVEIS:
+                if resposta.status_code == 429:
+                    self.limitador.registrar_limitacao(url, _ler_retry_after(resposta.headers))
+                    self._liberar_sem_falha(disjuntor, teste)
+                else:
+                    disjuntor.registrar_falha()
+                if tentativa + 1 < self.politica.tentativas:
+                    resposta.close()
+                    time.sleep(self.politica.calcular_espera(tentativa))
+                    continue
+            else:
+                disjuntor.registrar_sucesso()
+            return resposta
+
+    async def executar_async(self, url: str, funcao):
+        """
+        Versão assíncrona: `funcao` é uma corrotina sem argumentos que
+        retorna (status, conteudo, cabecalhos); o resultado é (status, conteudo)
+        """
+        disjuntor = self.registro.obter(url)
+
+        for tentativa in range(self.politica.tentativas):
+            teste = disjuntor.verificar()
+            try:
+                await self.limitador.adquirir_async(url)
+                status, conteudo, cabecalhos = await funcao()
+            except Exception as e:
+                disjuntor.registrar_falha(self._abre_disjuntor(e))
+                if not self._deve_repetir(e, tentativa):
+                    raise
+                await asyncio.sleep(self.politica.calcular_espera(tentativa))
+                continue
+            except BaseException:
+                # CancelledError no teste semiaberto não pode deixar o disjuntor preso
+                if teste:
+                    disjuntor.liberar_teste()
+                raise
+
+            if status in STATUS_REPETIVEIS:
+                if status == 429:
+                    self.limitador.registrar_limitacao(url, _ler_retry_after(cabecalhos))
+                    self._liberar_sem_falha(disjuntor, teste)
+                else:
+                    disjuntor.registrar_falha()
+                if tentativa + 1 < self.politica.tentativas:
+                    await asyncio.sleep(self.politica.calcular_espera(tentativa))
+                    continue
+            else:
+                disjuntor.registrar_sucesso()
+            return status, conteudo
+
+    async def buscar_texto_async(self, sessao, url: str, **kwargs):
+        """GET via aiohttp com resiliência; retorna (status, texto)"""
+        async def _buscar():
+            async with sessao.get(url, **kwargs) as resposta:
+                return resposta.status, await resposta.text(), resposta.headers
+
+        rastreador = obter_rastreador()
+        gravador = obter_gravador()
+        host = urlparse(url).netloc
+        with rastreador.span('http.requisicao', host=host, url=url) as span:
+            if gravador.reproduzindo:
+                status, texto = await gravador.reproduzir_texto_async(url)
+            else:
+                inicio = time.perf_counter()
+                status, texto = await self.executar_async(url, _buscar)
+                if gravador.gravando:
+                    gravador.gravar_resposta('GET', url, status, {}, texto.encode('utf-8'),
+                                             time.perf_counter() - inicio)
+            num_bytes = len(texto.encode('utf-8'))
+            span.definir(status=status, bytes=num_bytes)
+        rastreador.registrar_download(host, num_bytes)
+        return status, texto
+
+
+class SessaoResiliente(requests.Session):
+    """
+    requests.Session com retentativa e disjuntor por host em toda requisição
+    """
+
+    def __init__(self, tentativas: int = 3, gerenciador: GerenciadorResiliencia = None):
+        super().__init__()
+        self.gerenciador = gerenciador or GerenciadorResiliencia(
+            PoliticaRetentativa(tentativas=tentativas)
+        )
+
+    def request(self, method, url, *args, **kwargs):
+        rastreador = obter_rastreador()
+        gravador = obter_gravador()
+        host = urlparse(url).netloc
+        with rastreador.span('http.requisicao', host=host, url=url) as span:
+            if gravador.reproduzindo:
+                resposta = gravador.reproduzir_resposta(method, url)
+            else:
+                inicio = time.perf_counter()
+                resposta = self.gerenciador.executar(
+                    url, lambda: super(SessaoResiliente, self).request(method, url, *args, **kwargs)
+                )
+                if gravador.gravando:
+                    gravador.gravar_resposta(method, url, resposta.status_code, resposta.headers,
+                                             resposta.content, time.perf_counter() - inicio)
+            span.definir(status=resposta.status_code)
+            # Em modo stream o corpo ainda não foi lido; quem consome contabiliza os bytes
+            if not kwargs.get('stream'):
+                num_bytes = len(resposta.content)
+                span.definir(bytes=num_bytes)
+                rastreador.registrar_download(host, num_bytes)
+        return resposta
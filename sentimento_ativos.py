@@ -0,0 +1,252 @@
+"""
+Sentimento por ativo e por setor com médias de decaimento exponencial.
+
+Cada chave (ticker ou "setor:<nome>") guarda, para cada meia-vida
+configurada (padrão: 1, 7 e 30 dias), a soma ponderada das pontuações e a
+soma dos pesos, ambas com decaimento exponencial, e o instante da última
+atualização. Um artigo novo custa O(1) por chave: o estado é decaído até o
+instante do artigo e a contribuição é somada; artigos fora de ordem entram
+com o peso já decaído. A consulta decai todas as chaves até agora de uma vez
+(vetorizado), sem reler artigos:
+
+    agregador.sentimento_indice('IBOV', meia_vida=7)
+
+Também é mantida a série diária (soma, peso, quantidade) de cada chave. O
+estado fica em estado/sentimento_ativos.json e os artigos já contabilizados
+em um filtro de Bloom (estado/sentimento_vistos.npz), para que coletas
+repetidas não contem o mesmo artigo duas vezes.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from coletor_artigos import FiltroBloom
+from configuracao import caminho_estado
+from entidades_b3 import ExtratorEntidades, obter_extrator
+from registros_noticias import Artigo
+
+ARQUIVO_ESTADO_PADRAO = caminho_estado('sentimento_ativos.json')
+ARQUIVO_VISTOS_PADRAO = caminho_estado('sentimento_vistos.npz')
+MEIAS_VIDAS_PADRAO = (1.0, 7.0, 30.0)  # Dias
+PREFIXO_SETOR = 'setor:'
+_SEGUNDOS_DIA = 86400.0
+
+
+def _em_dias(instante: datetime) -> float:
+    return instante.timestamp() / _SEGUNDOS_DIA
+
+
+class AgregadorSentimento:
+    """Estado incremental de sentimento por ticker e por setor"""
+
+    def __init__(self, meias_vidas: Sequence[float] = MEIAS_VIDAS_PADRAO,
+                 caminho: str = ARQUIVO_ESTADO_PADRAO, caminho_vistos: str = ARQUIVO_VISTOS_PADRAO,
+                 extrator: ExtratorEntidades = None):
+        self.meias_vidas = tuple(float(m) for m in meias_vidas)
+        self._taxas = np.log(2) / np.array(self.meias_vidas)
+        self.caminho = caminho
+        self.caminho_vistos = caminho_vistos
+        self.extrator = extrator or obter_extrator()
+        self._trava = threading.Lock()
+
+        self.chaves: List[str] = []
+        self._codigos: Dict[str, int] = {}
+        self._somas = np.zeros((16, len(self.meias_vidas)))
+        self._pesos = np.zeros((16, len(self.meias_vidas)))
+        self._contagens = np.zeros(16, dtype=np.int64)
+        self._instantes = np.zeros(16)               # Dias desde a época
+        self._diario: Dict[str, Dict[str, List[float]]] = {}
+        self.vistos = FiltroBloom.carregar(caminho_vistos)
+        self._carregar()
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+
+    def _codigo(self, chave: str) -> int:
+        codigo = self._codigos.get(chave)
+        if codigo is None:
+            codigo = len(self.chaves)
+            if codigo == len(self._contagens):
+                # Capacidade dobra quando enche: custo amortizado O(1)
+                self._somas = np.vstack([self._somas, np.zeros_like(self._somas)])
+                self._pesos = np.vstack([self._pesos, np.zeros_like(self._pesos)])
+                self._contagens = np.concatenate([self._contagens, np.zeros_like(self._contagens)])
+                self._instantes = np.concatenate([self._instantes, np.zeros_like(self._instantes)])
+            self._codigos[chave] = codigo
+            self.chaves.append(chave)
+        return codigo
+
+    def registrar(self, chave: str, pontuacao: float, peso: float, instante: datetime):
+        """Soma uma observação à chave (O(1))"""
+        if peso <= 0:
+            return
+        t = _em_dias(instante)
+        with self._trava:
+            i = self._codigo(chave)
+            delta = t - self._instantes[i]
+            pesos = np.full(len(self.meias_vidas), float(peso))
+            if self._contagens[i] == 0:
+                self._instantes[i] = t
+            elif delta >= 0:
+                fator = np.exp(-self._taxas * delta)
+                self._somas[i] *= fator
+                self._pesos[i] *= fator
+                self._instantes[i] = t
+            else:
+                # Observação mais antiga que o estado: entra já decaída
+                pesos *= np.exp(self._taxas * delta)
+            self._somas[i] += pesos * pontuacao
+            self._pesos[i] += pesos
+            self._contagens[i] += 1
+
+            dia = self._diario.setdefault(chave, {}).setdefault(instante.date().isoformat(), [0.0, 0.0, 0])
+            dia[0] += peso * pontuacao
+            dia[1] += peso
+            dia[2] += 1
+
+    def registrar_artigos(self, artigos: Iterable[Artigo]) -> int:
+        """
+        Contabiliza os artigos com sentimento nos ativos citados e nos seus
+        setores; retorna quantos artigos inéditos foram usados
+        """
+        usados = 0
+        for artigo in artigos:
+            if not artigo.tem_sentimento:
+                continue
+            chave = artigo.link or f"{artigo.fonte}|{artigo.titulo}"
+            if chave in self.vistos:
+                continue
+            self.vistos.adicionar(chave)
+            tickers = self.extrator.tickers(f"{artigo.titulo}\n{artigo.corpo or ''}")
+            if not tickers:
+                continue
+            setores = {self.extrator.setor(t) for t in tickers} - {None, ''}
+            for ticker in tickers:
+                self.registrar(ticker, artigo.pontuacao, artigo.relevancia, artigo.data_hora)
+            for setor in setores:
+                self.registrar(PREFIXO_SETOR + setor, artigo.pontuacao, artigo.relevancia, artigo.data_hora)
+            usados += 1
+        return usados
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _coluna(self, meia_vida: float) -> int:
+        try:
+            return self.meias_vidas.index(float(meia_vida))
+        except ValueError:
+            raise ValueError(f"Meia-vida {meia_vida} não configurada; disponíveis: {self.meias_vidas}")
+
+    def sentimento(self, chaves: Iterable[str] = None, meia_vida: float = 7.0,
+                   agora: datetime = None) -> Dict[str, Dict[str, float]]:
+        """
+        Sentimento decaído das chaves (padrão: todas) no instante `agora`
+
+        Para cada chave: 'sentimento' (média ponderada, -1 a 1), 'peso'
+        (massa de evidência restante após o decaimento) e 'artigos'
+        (total já contabilizado). Chaves sem dados ficam de fora.
+        """
+        coluna = self._coluna(meia_vida)
+        t = _em_dias(agora or datetime.now())
+        with self._trava:
+            if chaves is None:
+                chaves = list(self.chaves)
+            chaves = [c for c in chaves if c in self._codigos]
+            indices = np.array([self._codigos[c] for c in chaves], dtype=np.int64)
+            somas = self._somas[indices, coluna]
+            pesos = self._pesos[indices, coluna]
+            contagens = self._contagens[indices]
+            idades = np.maximum(t - self._instantes[indices], 0.0)
+
+        pesos_atuais = pesos * np.exp(-self._taxas[coluna] * idades)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = np.where(pesos > 0, somas / pesos, np.nan)
+        return {
+            chave: {'sentimento': float(media), 'peso': float(peso), 'artigos': int(n)}
+            for chave, media, peso, n in zip(chaves, medias, pesos_atuais, contagens)
+            if not np.isnan(media)
+        }
+
+    def sentimento_indice(self, indice: str = 'IBOV', meia_vida: float = 7.0,
+                          agora: datetime = None) -> Dict[str, Dict[str, float]]:
+        """Sentimento decaído dos componentes de um índice ('IBOV', 'IFIX')"""
+        return self.sentimento(self.extrator.tickers_do_indice(indice), meia_vida, agora)
+
+    def sentimento_setores(self, meia_vida: float = 7.0, agora: datetime = None) -> Dict[str, Dict[str, float]]:
+        """Sentimento decaído por setor (chaves sem o prefixo)"""
+        setores = [c for c in self.chaves if c.startswith(PREFIXO_SETOR)]
+        return {chave[len(PREFIXO_SETOR):]: valor
+                for chave, valor in self.sentimento(setores, meia_vida, agora).items()}
+
+    def serie(self, chave: str) -> pd.DataFrame:
+        """Série diária da chave: sentimento médio, peso e quantidade de artigos"""
+        dias = self._diario.get(chave, {})
+        datas = sorted(dias)
+        valores = np.array([dias[d] for d in datas], dtype=float).reshape(-1, 3)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = valores[:, 0] / valores[:, 1]
+        return pd.DataFrame({'sentimento': medias, 'peso': valores[:, 1], 'artigos': valores[:, 2].astype(int)},
+                            index=pd.DatetimeIndex(datas, name='data'))
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return
+        if tuple(estado.get('meias_vidas', ())) != self.meias_vidas:
+            return  # Outras meias-vidas: o estado antigo não é reaproveitável
+        for chave, soma, peso, contagem, instante in zip(estado['chaves'], estado['somas'], estado['pesos'],
+                                                        estado['contagens'], estado['instantes']):
+            i = self._codigo(chave)
+            self._somas[i] = soma
+            self._pesos[i] = peso
+            self._contagens[i] = contagem
+            self._instantes[i] = instante
+        self._diario = estado.get('diario', {})
+
+    def salvar(self):
+        n = len(self.chaves)
+        with self._trava:
+            estado = {
+                'meias_vidas': list(self.meias_vidas),
+                'chaves': self.chaves,
+                'somas': self._somas[:n].tolist(),
+                'pesos': self._pesos[:n].tolist(),
+                'contagens': self._contagens[:n].tolist(),
+                'instantes': self._instantes[:n].tolist(),
+                'diario': self._diario
+            }
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+        self.vistos.salvar(self.caminho_vistos)
+
+
+_agregador_padrao: Optional[AgregadorSentimento] = None
+_trava_agregador = threading.Lock()
+
+
+def obter_agregador() -> AgregadorSentimento:
+    """Agregador global (um por processo), carregado do disco na primeira chamada"""
+    global _agregador_padrao
+    with _trava_agregador:
+        if _agregador_padrao is None:
+            _agregador_padrao = AgregadorSentimento()
+        return _agregador_padrao
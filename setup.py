@@ -19,6 +19,7 @@ setup(
         "aiohttp>=3.8.0",
         "lxml>=4.9.0",
         "scikit-learn>=1.1.0",
+        "scipy>=1.7.0",
         "openpyxl>=3.0.0"
     ],
     python_requires=">=3.8",
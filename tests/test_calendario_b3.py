@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from calendario_b3 import obter_calendario
+
+
+@pytest.fixture(scope='module')
+def calendario():
+    return obter_calendario('anbima')
+
+
+def test_ajustar_anterior_antes_do_primeiro_dia_util(calendario):
+    with pytest.raises(ValueError):
+        calendario.ajustar_dia_util('1990-01-01', 'anterior')
+    assert calendario.ajustar_dia_util('1990-01-06', 'anterior') == np.datetime64('1990-01-05')
+
+
+@pytest.mark.parametrize('periodo', ['M', 'T', 'A'])
+def test_fim_de_periodo_no_ultimo_periodo(calendario, periodo):
+    assert calendario.fim_de_periodo('2099-12-15', periodo) == np.datetime64('2099-12-31')
+
+
+def test_contagens_ate_o_fim_do_calendario(calendario):
+    assert calendario.du('2099-12-01', '2100-01-01') == len(calendario.dias_uteis('2099-12-01', '2100-01-01'))
+    with pytest.raises(ValueError):
+        calendario.eh_dia_util('2100-01-01')
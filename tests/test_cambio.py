@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from cambio import CamadaCambio
+from painel_precos import PainelPrecos
+
+
+def _painel_com_dolar():
+    gerador = np.random.default_rng(3)
+    precos = 100 * np.cumprod(1 + gerador.normal(0, 0.01, (60, 3)), axis=0)
+    precos[10, 1:] = np.nan
+    return PainelPrecos(pd.bdate_range(end='2025-08-01', periods=60).values,
+                        ['USDBRL=X', '^GSPC', 'PETR4.SA'], precos, np.ones_like(precos))
+
+
+def test_painel_em_reais_preserva_formato_e_lacunas():
+    painel = _painel_com_dolar()
+    camada = CamadaCambio(painel, juros_brl=13.75, juros_moedas={'USD': 5.0})
+    for visao in ('sem_hedge', 'com_hedge'):
+        convertido = camada.painel_em_reais(visao)
+        assert convertido.fechamento.shape == painel.fechamento.shape
+        assert np.isnan(convertido.fechamento[10, 1:]).all()
+        # Ativo em reais fica como está; o estrangeiro muda com o câmbio
+        np.testing.assert_array_equal(convertido.fechamento[:, 2], painel.fechamento[:, 2])
+        assert not np.allclose(np.nan_to_num(convertido.fechamento[:, 1]), np.nan_to_num(painel.fechamento[:, 1]))
@@ -0,0 +1,27 @@
+import requests
+
+from coletor_feeds import ColetorFeeds
+
+FEED = b"""<?xml version="1.0"?><rss><channel>
+<item><title>Petrobras sobe</title><link>https://exemplo.com/a</link><pubDate>Mon, 06 Oct 2025 10:00:00 -0300</pubDate></item>
+</channel></rss>"""
+
+
+class SessaoFalsa:
+    """Primeiro feed responde 500, o segundo responde o FEED"""
+
+    def get(self, url, **kwargs):
+        resposta = requests.Response()
+        resposta.url = url
+        resposta.status_code = 500 if 'falha' in url else 200
+        resposta._content = b'' if 'falha' in url else FEED
+        resposta._content_consumed = True
+        return resposta
+
+
+def test_corte_nao_avanca_com_feed_falho(tmp_path):
+    coletor = ColetorFeeds(SessaoFalsa(), feeds={'InfoMoney': ['https://falha/rss', 'https://ok/rss']},
+                           arquivo_estado=str(tmp_path / 'estado.json'))
+    artigos = coletor.coletar('InfoMoney', max_itens=10)
+    assert len(artigos) == 1
+    assert coletor.ultima_data('InfoMoney') is None
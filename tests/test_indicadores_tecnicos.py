@@ -0,0 +1,15 @@
+import numpy as np
+
+from indicadores_tecnicos import MotorIndicadores
+
+
+def test_estado_sem_historico_acompanha_calculo_completo():
+    fechamento = 100 * np.cumprod(1 + np.random.default_rng(1).normal(0, 0.01, (120, 3)), axis=0)
+    motor = MotorIndicadores()
+    estado = motor.iniciar(fechamento[:0])
+    assert all(np.isnan(valores).all() for valores in estado.ultimos.values())
+    for pregao in fechamento:
+        atual = estado.atualizar(pregao)
+    completo = motor.calcular(fechamento)
+    for chave, valores in atual.items():
+        np.testing.assert_allclose(valores, completo[chave][-1], err_msg=chave)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from configuracao import ConfiguracaoAgente
+from recomendacao_lote import RetratoMercado, _numeros, recomendar_clientes
+
+
+@pytest.mark.parametrize('texto, valor', [
+    ('45', 45.0), ('45.5', 45.5), ('45,5', 45.5), ('1.000', 1.0), ('1.234,5', 1234.5), ('abc', np.nan),
+])
+def test_numeros_pontuacao(texto, valor):
+    np.testing.assert_equal(_numeros(pd.Series([texto]))[0], valor)
+
+
+@pytest.mark.parametrize('texto, valor', [
+    ('1.000', 1000.0), ('10.000', 10000.0), ('1.234.567', 1234567.0), ('1.234,5', 1234.5),
+    ('45,5', 45.5), ('45.5', 45.5), ('1000.50', 1000.5), ('1,234.5', np.nan),
+])
+def test_numeros_monetario(texto, valor):
+    np.testing.assert_equal(_numeros(pd.Series([texto]), monetario=True)[0], valor)
+
+
+def test_recomendar_clientes_formato_brasileiro():
+    retrato = RetratoMercado(ConfiguracaoAgente().PERFIS_CARTEIRA, {'renda_fixa': [('CDB_BANCO', 10.0, 'Baixo')]})
+    clientes = pd.DataFrame({'cliente': ['C1', 'C2'], 'pontuacao_risco': ['45.5', '45,5'],
+                             'posicoes': ['CDB_BANCO:1.000|TESOURO_IPCA:10.000|CDB:1.234,5', '']})
+    resultado = recomendar_clientes(clientes, retrato)
+    assert resultado['pontuacao_risco'].tolist() == [45.5, 45.5]
+    assert resultado['patrimonio'].tolist() == [12234.5, 0.0]
+    assert resultado['avisos'].tolist() == ['', '']
@@ -0,0 +1,393 @@
+"""
+Triagem de um universo grande de ativos (ações, FIIs, BDRs e ETFs).
+
+O universo junta as ações e FIIs do dicionário de entidades
+(dados/ativos_b3.csv; FII quando o setor começa com "FII") à listagem
+local dos demais tipos (dados/universo_ativos.csv: ticker;tipo;setor;nome),
+que também corrige, pelo ticker, o que vier do dicionário. As métricas de todos os ativos ficam em uma tabela
+colunar (um array NumPy por métrica), calculada de uma vez sobre o painel de
+preços, e os filtros são expressões em Python restrito:
+
+    volatilidade < 30 and retorno_ano > 10 and volume_medio > 1e6
+    tipo == 'fii' and not setor in ('FII Papel',) and drawdown_maximo > -25
+    tipo == 'acao' and tendencia == 'alta' and rsi < 70
+
+A expressão é validada e compilada uma única vez com o módulo ast: nomes
+viram colunas, and/or/not viram &, |, ~ e "in" vira np.isin. A avaliação é
+um punhado de operações vetorizadas sobre a tabela, então filtrar 10 mil
+ativos leva frações de milissegundo. Métricas ausentes (NaN) reprovam a
+comparação, inclusive em !=, "not in" e "not": o ativo sem a métrica não
+passa em nenhum filtro que a use. O filtro e os operandos de and/or/not
+precisam ser comparações (ou True/False); expressões numéricas ou de texto
+são recusadas com ErroFiltro.
+
+Métricas calculadas pelo painel (de_painel):
+    preco, retorno_ano (%, período do painel), retorno_mes (%, 21 pregões),
+    volatilidade (% a.a.), volume_medio (R$ negociados por pregão, média dos
+    últimos 21), drawdown_maximo (%), pregoes, rsi (14) e tendencia
+    ('alta', 'baixa' ou 'lateral', médias de 20 e 50; indicadores_tecnicos.py)
+"""
+
+import ast
+import csv
+import os
+import warnings
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from calendario_b3 import DIAS_UTEIS_ANO
+from entidades_b3 import ARQUIVO_ATIVOS_PADRAO, carregar_ativos, simbolo_yahoo
+from indicadores_tecnicos import MotorIndicadores, classificar_tendencia, preencher_adiante
+from painel_precos import PainelPrecos
+
+# Listagem versionada junto com o código (não depende do diretório de trabalho)
+ARQUIVO_UNIVERSO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'universo_ativos.csv')
+TIPOS_ATIVO = ('acao', 'fii', 'bdr', 'etf')
+# Grupo de dados_mercado (formato de obter_dados_yahoo_finance) de cada tipo
+GRUPOS_POR_TIPO = {'acao': 'Acoes', 'etf': 'Acoes', 'fii': 'FIIs', 'bdr': 'BDRs'}
+PREGOES_MES = 21
+
+
+class ErroFiltro(ValueError):
+    """Expressão de triagem inválida"""
+
+
+class AtivoUniverso(NamedTuple):
+    ticker: str
+    tipo: str
+    setor: str
+    nome: str
+
+
+def carregar_universo(caminho: str = ARQUIVO_UNIVERSO_PADRAO,
+                      caminho_ativos: Optional[str] = ARQUIVO_ATIVOS_PADRAO) -> List[AtivoUniverso]:
+    """
+    Ações e FIIs do dicionário de entidades mais a listagem ticker;tipo;setor;nome
+
+    Linhas da listagem com ticker já presente no dicionário substituem o item
+    dele; com caminho_ativos=None, só a listagem é usada.
+    """
+    ativos: Dict[str, AtivoUniverso] = {}
+    if caminho_ativos:
+        for ativo in carregar_ativos(caminho_ativos)[0]:
+            tipo = 'fii' if ativo.setor.upper().startswith('FII') else 'acao'
+            ativos[ativo.ticker] = AtivoUniverso(ativo.ticker, tipo, ativo.setor, ativo.nome)
+    with open(caminho, 'r', encoding='utf-8') as f:
+        linhas = (linha for linha in f if linha.strip() and not linha.lstrip().startswith('#'))
+        for registro in csv.DictReader(linhas, delimiter=';'):
+            ticker = (registro.get('ticker') or '').strip().upper()
+            tipo = (registro.get('tipo') or '').strip().lower()
+            if not ticker or tipo not in TIPOS_ATIVO:
+                continue
+            ativos[ticker] = AtivoUniverso(ticker, tipo, (registro.get('setor') or '').strip(),
+                                           (registro.get('nome') or ticker).strip())
+    return list(ativos.values())
+
+
+# ---------------------------------------------------------------------------
+# Compilação dos filtros
+# ---------------------------------------------------------------------------
+
+FUNCOES_FILTRO = {'abs': np.abs, 'log': np.log, 'sqrt': np.sqrt}
+_OPERADORES_ARITMETICOS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow)
+_COMPARACOES = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+
+
+class _TradutorFiltro(ast.NodeTransformer):
+    """Reescreve a expressão em operações NumPy, recusando o que não for permitido"""
+
+    def __init__(self):
+        self.colunas = set()
+
+    def generic_visit(self, no):
+        raise ErroFiltro(f"Construção não permitida no filtro: {type(no).__name__}")
+
+    def visit_Expression(self, no):
+        no.body = self.visit(no.body)
+        return no
+
+    def visit_BoolOp(self, no):
+        operador = ast.BitAnd() if isinstance(no.op, ast.And) else ast.BitOr()
+        valores = [self._logico(self.visit(valor)) for valor in no.values]
+        resultado = valores[0]
+        for valor in valores[1:]:
+            resultado = ast.BinOp(left=resultado, op=operador, right=valor)
+        return resultado
+
+    def visit_UnaryOp(self, no):
+        if isinstance(no.op, ast.Not):
+            # NaN em qualquer coluna da expressão negada reprova o ativo
+            colunas = sorted({n.id for n in ast.walk(no.operand) if isinstance(n, ast.Name)}
+                             - set(FUNCOES_FILTRO) - {'True', 'False'})
+            negacao = ast.UnaryOp(op=ast.Invert(), operand=self._logico(self.visit(no.operand)))
+            return self._exigir_validos(negacao, [ast.Name(id=c, ctx=ast.Load()) for c in colunas])
+        operando = self.visit(no.operand)
+        if isinstance(no.op, (ast.USub, ast.UAdd)):
+            return ast.UnaryOp(op=no.op, operand=operando)
+        raise ErroFiltro(f"Operador não permitido no filtro: {type(no.op).__name__}")
+
+    def visit_BinOp(self, no):
+        if not isinstance(no.op, _OPERADORES_ARITMETICOS):
+            raise ErroFiltro(f"Operador não permitido no filtro: {type(no.op).__name__}")
+        return ast.BinOp(left=self.visit(no.left), op=no.op, right=self.visit(no.right))
+
+    def visit_Compare(self, no):
+        # a < b < c vira (a < b) & (b < c)
+        partes = []
+        esquerda = self.visit(no.left)
+        for operador, direita in zip(no.ops, no.comparators):
+            direita = self.visit(direita)
+            if isinstance(operador, (ast.In, ast.NotIn)):
+                if not isinstance(direita, (ast.Tuple, ast.List)):
+                    raise ErroFiltro("'in' exige uma lista ou tupla de valores")
+                parte = ast.Call(func=ast.Name(id='_isin', ctx=ast.Load()), args=[esquerda, direita], keywords=[])
+                if isinstance(operador, ast.NotIn):
+                    parte = self._exigir_validos(ast.UnaryOp(op=ast.Invert(), operand=parte), [esquerda])
+            elif isinstance(operador, _COMPARACOES):
+                parte = ast.Compare(left=esquerda, ops=[operador], comparators=[direita])
+                # NaN != x é verdadeiro; as demais comparações com NaN já são falsas
+                if isinstance(operador, ast.NotEq):
+                    parte = self._exigir_validos(parte, [esquerda, direita])
+            else:
+                raise ErroFiltro(f"Comparação não permitida no filtro: {type(operador).__name__}")
+            partes.append(parte)
+            esquerda = direita
+        resultado = partes[0]
+        for parte in partes[1:]:
+            resultado = ast.BinOp(left=resultado, op=ast.BitAnd(), right=parte)
+        return resultado
+
+    def visit_Call(self, no):
+        if not isinstance(no.func, ast.Name) or no.func.id not in FUNCOES_FILTRO or no.keywords:
+            raise ErroFiltro(f"Funções permitidas no filtro: {', '.join(FUNCOES_FILTRO)}")
+        return ast.Call(func=ast.Name(id=no.func.id, ctx=ast.Load()),
+                        args=[self.visit(arg) for arg in no.args], keywords=[])
+
+    def visit_Name(self, no):
+        if no.id in ('True', 'False'):
+            return ast.Constant(value=no.id == 'True')
+        self.colunas.add(no.id)
+        return ast.Name(id=no.id, ctx=ast.Load())
+
+    def visit_Constant(self, no):
+        if not isinstance(no.value, (int, float, str, bool)):
+            raise ErroFiltro(f"Constante não permitida no filtro: {no.value!r}")
+        return no
+
+    def visit_Tuple(self, no):
+        # Só constantes (inclusive negativas): a lista vai inteira para np.isin
+        for elemento in no.elts:
+            if isinstance(elemento, ast.UnaryOp) and isinstance(elemento.op, ast.USub):
+                elemento = elemento.operand
+            if not isinstance(elemento, ast.Constant):
+                raise ErroFiltro("Listas do filtro só podem conter constantes")
+            self.visit_Constant(elemento)
+        return ast.Tuple(elts=no.elts, ctx=ast.Load())
+
+    visit_List = visit_Tuple
+
+    @staticmethod
+    def _logico(no):
+        return ast.Call(func=ast.Name(id='_logico', ctx=ast.Load()), args=[no], keywords=[])
+
+    @staticmethod
+    def _exigir_validos(no, operandos):
+        """no & _valido(operando) para cada operando que não é constante"""
+        for operando in operandos:
+            if not isinstance(operando, ast.Constant):
+                validos = ast.Call(func=ast.Name(id='_valido', ctx=ast.Load()), args=[operando], keywords=[])
+                no = ast.BinOp(left=no, op=ast.BitAnd(), right=validos)
+        return no
+
+
+def _logico(valores) -> np.ndarray:
+    """Filtro ou operando de and/or/not: precisa ser booleano (comparação, 'in' ou True/False)"""
+    valores = np.asarray(valores)
+    if valores.dtype != np.bool_:
+        raise ErroFiltro("Filtros e operandos de and/or/not precisam ser comparações (ex.: rsi < 70), "
+                         "não valores numéricos ou texto")
+    return valores
+
+
+class FiltroCompilado:
+    """Expressão de triagem validada e compilada para operações sobre colunas"""
+
+    def __init__(self, expressao: str):
+        self.expressao = expressao
+        try:
+            arvore = ast.parse(expressao.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ErroFiltro(f"Filtro inválido: {e.msg}") from None
+        tradutor = _TradutorFiltro()
+        arvore = ast.fix_missing_locations(tradutor.visit(arvore))
+        self.colunas = frozenset(tradutor.colunas - set(FUNCOES_FILTRO))
+        self._codigo = compile(arvore, '<filtro>', 'eval')
+
+    def avaliar(self, tabela: 'TabelaMetricas') -> np.ndarray:
+        """Máscara booleana com um item por ativo da tabela"""
+        faltando = self.colunas - set(tabela.colunas)
+        if faltando:
+            raise ErroFiltro(f"Colunas inexistentes no filtro: {', '.join(sorted(faltando))}")
+        ambiente = {nome: tabela.colunas[nome] for nome in self.colunas}
+        ambiente.update(FUNCOES_FILTRO, _isin=np.isin, _logico=_logico, _valido=pd.notna)
+        try:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                resultado = eval(self._codigo, {'__builtins__': {}}, ambiente)
+        except TypeError as e:
+            # Ex.: texto comparado com número (tipo > 3)
+            raise ErroFiltro(f"Tipos incompatíveis no filtro: {e}") from None
+        # O resultado também precisa ser booleano: "volume_medio" sozinho aprovaria todo
+        # ativo com volume diferente de zero (e com NaN)
+        return np.broadcast_to(_logico(resultado), (len(tabela),))
+
+    def __repr__(self) -> str:
+        return f"FiltroCompilado({self.expressao!r})"
+
+
+@lru_cache(maxsize=256)
+def compilar_filtro(expressao: str) -> FiltroCompilado:
+    """Compila (uma vez por expressão) um filtro de triagem"""
+    return FiltroCompilado(expressao)
+
+
+# ---------------------------------------------------------------------------
+# Tabela de métricas
+# ---------------------------------------------------------------------------
+
+class TabelaMetricas:
+    """Métricas do universo em colunas (arrays NumPy de mesmo tamanho)"""
+
+    def __init__(self, colunas: Dict[str, np.ndarray]):
+        if 'ticker' not in colunas:
+            raise ValueError("A tabela de métricas precisa da coluna 'ticker'")
+        tamanhos = {len(valores) for valores in colunas.values()}
+        if len(tamanhos) > 1:
+            raise ValueError("Colunas da tabela de métricas com tamanhos diferentes")
+        self.colunas = {nome: np.asarray(valores) for nome, valores in colunas.items()}
+
+    def __len__(self) -> int:
+        return len(self.colunas['ticker'])
+
+    def __getitem__(self, coluna: str) -> np.ndarray:
+        return self.colunas[coluna]
+
+    @property
+    def tickers(self) -> List[str]:
+        return self.colunas['ticker'].tolist()
+
+    def selecionar(self, indices: np.ndarray) -> 'TabelaMetricas':
+        """Subtabela pelas posições ou máscara booleana"""
+        return TabelaMetricas({nome: valores[indices] for nome, valores in self.colunas.items()})
+
+    def filtrar(self, filtro: Union[str, FiltroCompilado] = None, ordenar_por: str = None,
+                decrescente: bool = True, limite: int = None) -> 'TabelaMetricas':
+        """
+        Ativos que passam no filtro, opcionalmente ordenados por uma coluna
+        (NaN por último) e limitados aos `limite` primeiros
+        """
+        if isinstance(filtro, str):
+            filtro = compilar_filtro(filtro) if filtro.strip() else None
+        indices = np.flatnonzero(filtro.avaliar(self)) if filtro is not None else np.arange(len(self))
+        if ordenar_por:
+            chave = self.colunas[ordenar_por][indices].astype(np.float64)
+            chave = np.where(np.isnan(chave), np.inf, -chave if decrescente else chave)
+            if limite is not None and limite < len(indices):
+                parcial = np.argpartition(chave, limite)[:limite]
+                indices = indices[parcial[np.argsort(chave[parcial], kind='stable')]]
+            else:
+                indices = indices[np.argsort(chave, kind='stable')]
+        if limite is not None:
+            indices = indices[:limite]
+        return self.selecionar(indices)
+
+    def para_dataframe(self) -> pd.DataFrame:
+        colunas = dict(self.colunas)
+        return pd.DataFrame(colunas).set_index('ticker')
+
+    def para_dados_mercado(self) -> Dict[str, Dict]:
+        """
+        Ativos agrupados no formato de obter_dados_yahoo_finance: 'Acoes'
+        (ações e ETFs), 'FIIs' e 'BDRs'
+        """
+        grupos: Dict[str, Dict] = {}
+        numericas = [nome for nome, valores in self.colunas.items() if valores.dtype.kind in 'fiu']
+        for i, ticker in enumerate(self.tickers):
+            tipo = str(self.colunas['tipo'][i]) if 'tipo' in self.colunas else 'acao'
+            dados = {nome: int(self.colunas[nome][i]) if self.colunas[nome].dtype.kind in 'iu'
+                     else round(float(self.colunas[nome][i]), 2) for nome in numericas}
+            for nome in ('tipo', 'setor', 'nome', 'simbolo', 'tendencia'):
+                if nome in self.colunas:
+                    dados[nome] = str(self.colunas[nome][i])
+            # Mesma chave de retorno dos FIIs coletados pelo agente
+            if GRUPOS_POR_TIPO.get(tipo) == 'FIIs':
+                dados['retorno_periodo'] = dados.get('retorno_ano', 0.0)
+            grupos.setdefault(GRUPOS_POR_TIPO.get(tipo, 'Acoes'), {})[ticker] = dados
+        return grupos
+
+    @classmethod
+    def de_painel(cls, painel: PainelPrecos, universo: Sequence[AtivoUniverso]) -> 'TabelaMetricas':
+        """
+        Calcula as métricas de todos os ativos do universo de uma vez
+
+        O painel é indexado pelo símbolo do Yahoo (simbolo_yahoo); ativos sem
+        preços ficam com métricas NaN.
+        """
+        n = len(universo)
+        simbolos = [simbolo_yahoo(ativo.ticker) for ativo in universo]
+        colunas = [painel.codigos.get(simbolo, -1) for simbolo in simbolos]
+        presentes = np.array([c >= 0 for c in colunas], dtype=bool)
+        metricas = {nome: np.full(n, np.nan) for nome in
+                    ('preco', 'retorno_ano', 'retorno_mes', 'volatilidade', 'volume_medio', 'drawdown_maximo',
+                     'rsi')}
+        metricas['pregoes'] = np.zeros(n, dtype=np.int64)
+        metricas['tendencia'] = np.full(n, '', dtype=object)
+
+        if presentes.any() and len(painel.datas):
+            indices = [c for c in colunas if c >= 0]
+            precos = painel.fechamento[:, indices].astype(np.float64)
+            volumes = painel.volume[:, indices].astype(np.float64)
+            validos = ~np.isnan(precos)
+            pregoes = validos.sum(axis=0)
+
+            # Repete o último fechamento nas datas sem negociação
+            precos = preencher_adiante(precos)
+            primeiro = validos.argmax(axis=0)
+            inicial = precos[primeiro, np.arange(precos.shape[1])]
+
+            with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+                # Ativos sem nenhum preço geram fatias vazias (resultado NaN)
+                warnings.simplefilter('ignore', RuntimeWarning)
+                atual = precos[-1]
+                retornos = precos[1:] / precos[:-1] - 1
+                retornos[~validos[1:]] = np.nan
+                volatilidade = np.nanstd(retornos, axis=0, ddof=1) * np.sqrt(DIAS_UTEIS_ANO) * 100
+                mes = precos[max(len(precos) - 1 - PREGOES_MES, 0)]
+                financeiro = (precos * volumes)[-PREGOES_MES:]
+                financeiro[~validos[-PREGOES_MES:]] = np.nan
+                picos = np.fmax.accumulate(precos, axis=0)
+                drawdown = np.nanmin(precos / picos - 1, axis=0) * 100
+
+                metricas['preco'][presentes] = atual
+                metricas['retorno_ano'][presentes] = (atual / inicial - 1) * 100
+                metricas['retorno_mes'][presentes] = np.where(np.isnan(mes), np.nan, (atual / mes - 1) * 100)
+                metricas['volatilidade'][presentes] = np.where(pregoes > 2, volatilidade, np.nan)
+                metricas['volume_medio'][presentes] = np.nanmean(financeiro, axis=0)
+                metricas['drawdown_maximo'][presentes] = drawdown
+            metricas['pregoes'][presentes] = pregoes
+
+            indicadores = MotorIndicadores().calcular(precos, chaves=('rsi', 'sma', 'sma_longa'))
+            metricas['rsi'][presentes] = indicadores['rsi'][-1]
+            metricas['tendencia'][presentes] = classificar_tendencia(
+                precos[-1], indicadores['sma'][-1], indicadores['sma_longa'][-1])
+
+        return cls({
+            'ticker': np.array([ativo.ticker for ativo in universo], dtype=object),
+            'simbolo': np.array(simbolos, dtype=object),
+            'tipo': np.array([ativo.tipo for ativo in universo], dtype=object),
+            'setor': np.array([ativo.setor for ativo in universo], dtype=object),
+            'nome': np.array([ativo.nome for ativo in universo], dtype=object),
+            **metricas
+        })
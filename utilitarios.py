@@ -5,6 +5,8 @@ import logging
 import os
 import json
 
+from registros_noticias import serializar_registro
+
 # --- NOVO: Gerenciador de Caminhos ---
 def obter_caminho(subpasta: str, nome_arquivo: str) -> str:
     """
@@ -188,6 +190,6 @@ def salvar_backup_dados(dados, nome_arquivo=None):
     
     # Salva os dados em formato JSON
     with open(caminho_completo, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2, default=str)
+        json.dump(dados, f, ensure_ascii=False, indent=2, default=serializar_registro)
     
     return caminho_completo
\ No newline at end of file